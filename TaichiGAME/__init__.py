@@ -1,11 +1,50 @@
-import colorama as cra
+import importlib
+from typing import Any, Dict, List
+
 from .common import *
 from .math import *
 from .geometry import *
-from .scene import *
+from .simulation import *
+from .rollout import *
+from .snapshot import *
+from .replay import *
+from .sensor import *
+from .planning import *
 from .frame import *
 from .collision import *
 from .dynamics import *
-from .render import *
 
-cra.init()
+# NOTE: the gui and the taichi world import taichi, which dominates the
+# startup time, so they are loaded on the first access
+_LazyTable: Dict[str, str] = {
+    'Scene': '.scene',
+    'Camera': '.common.camera',
+    'ExportManager': '.common.export_manager',
+    'Render': '.render.render',
+    'RenderBatch': '.render.render',
+    'Tessellation': '.render.render',
+    'TiPhysicsWorld': '.dynamics.ti_phy_world',
+}
+_LazyModule: List[str] = ['scene', 'render', 'ti_scene']
+
+
+def __getattr__(name: str) -> Any:
+    val: Any
+    if name in _LazyModule:
+        val = importlib.import_module(f'.{name}', __name__)
+    elif name == 'TiPhysicsWorld':
+        # NOTE: the taichi world has the same name as the python one
+        val = importlib.import_module(_LazyTable[name],
+                                      __name__).PhysicsWorld
+    elif name in _LazyTable:
+        val = getattr(importlib.import_module(_LazyTable[name], __name__),
+                      name)
+    else:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    globals()[name] = val
+    return val
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + list(_LazyTable) + _LazyModule)
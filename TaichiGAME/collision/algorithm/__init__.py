@@ -2,3 +2,4 @@ from .clip import *
 from .gjk import *
 from .mpr import *
 from .sat import *
+from .raycast import *
@@ -107,6 +107,9 @@ class PointPair():
 
 
 class GJK():
+    # the total epa iterations, read by the profiler
+    epa_iter_cnt: int = 0
+
     @staticmethod
     def gjk(prima: ShapePrimitive,
             primb: ShapePrimitive,
@@ -210,6 +213,7 @@ class GJK():
         p: Minkowski = Minkowski()
 
         for i in range(iter_val):
+            GJK.epa_iter_cnt += 1
             (idx1, idx2) = GJK.find_edge_closest_to_origin(simplex)
             normal = GJK.calc_direction_by_edge(simplex._vertices[idx1]._res,
                                                 simplex._vertices[idx2]._res,
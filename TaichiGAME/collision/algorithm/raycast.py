@@ -0,0 +1,350 @@
+from typing import List, Optional, Tuple, cast
+
+import numpy as np
+
+from ...common.config import Config
+from ...math.matrix import Matrix
+from ...dynamics.body import Body
+from ...geometry.shape import Capsule, Circle, Edge, Ellipse
+from ...geometry.shape import Polygon, Sector, Shape, ShapePrimitive
+
+
+class RaycastResult():
+    '''the hit of a ray, the point is 'start + fraction * dirn' of the ray
+    and the normal is the unit normal of the shape surface at the point.
+    A ray starting inside the shape hits it at the start with the zero
+    normal.
+    '''
+    def __init__(self):
+        self._body: Optional[Body] = None
+        self._point: Matrix = Matrix([0.0, 0.0], 'vec')
+        self._normal: Matrix = Matrix([0.0, 0.0], 'vec')
+        self._fraction: float = 0.0
+        self._dist: float = 0.0
+
+    @property
+    def body(self) -> Optional[Body]:
+        return self._body
+
+    @property
+    def point(self) -> Matrix:
+        return self._point
+
+    @property
+    def normal(self) -> Matrix:
+        return self._normal
+
+    @property
+    def fraction(self) -> float:
+        return self._fraction
+
+    @property
+    def dist(self) -> float:
+        return self._dist
+
+
+# the ray interval inside a convex part: enter, exit and enter normal
+Interval = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class Raycast():
+    '''the exact ray and shape intersection, every test runs many rays
+    against one shape at once. The rays are (N, 2) start points and unit
+    directions, the results are (N, ) distances(inf if missed) and (N, 2)
+    normals.
+    '''
+    @staticmethod
+    def body(body: Body,
+             start: Matrix,
+             dirn: Matrix,
+             max_dist: float = Config.Max) -> Optional[RaycastResult]:
+        '''cast one ray on the body
+
+        Parameters
+        ----------
+        body : Body
+            the target body
+        start : Matrix
+            the ray start point
+        dirn : Matrix
+            the ray direction, the fraction is in its length
+        max_dist : float
+            the max distance along the ray
+
+        Returns
+        -------
+        Optional[RaycastResult]
+            the nearest hit, None if missed
+        '''
+        length: float = dirn.len()
+        if length < Config.GeometryEpsilon:
+            return None
+
+        org: np.ndarray = start._val.reshape(1, 2)
+        unit: np.ndarray = dirn._val.reshape(1, 2) / length
+        dist, normal = Raycast.prim(Raycast.body_prim(body), org, unit)
+        if dist[0] > max_dist:
+            return None
+
+        return Raycast.result(body, start, dirn, float(dist[0]), normal[0])
+
+    @staticmethod
+    def result(body: Body, start: Matrix, dirn: Matrix, dist: float,
+               normal: np.ndarray) -> RaycastResult:
+        res: RaycastResult = RaycastResult()
+        res._body = body
+        res._dist = dist
+        res._fraction = dist / dirn.len()
+        res._point = start + dirn * res._fraction
+        res._normal = Matrix([normal[0], normal[1]], 'vec')
+        return res
+
+    @staticmethod
+    def body_prim(body: Body) -> ShapePrimitive:
+        prim: ShapePrimitive = ShapePrimitive()
+        prim._shape = body.shape
+        prim._rot = body.rot
+        prim._xform = body.pos
+        return prim
+
+    @staticmethod
+    def prim(prim: ShapePrimitive, org: np.ndarray,
+             unit: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        '''cast the rays on the shape primitive in the world space'''
+        assert prim._shape is not None
+        cos: float = np.cos(prim._rot)
+        sin: float = np.sin(prim._rot)
+        # NOTE: test in the shape space, then rotate the normals back
+        rel: np.ndarray = org - prim._xform._val.reshape(1, 2)
+        loc_org: np.ndarray = np.stack(
+            [cos * rel[:, 0] + sin * rel[:, 1],
+             -sin * rel[:, 0] + cos * rel[:, 1]], axis=1)
+        loc_unit: np.ndarray = np.stack(
+            [cos * unit[:, 0] + sin * unit[:, 1],
+             -sin * unit[:, 0] + cos * unit[:, 1]], axis=1)
+
+        dist, normal = Raycast.shape(prim._shape, loc_org, loc_unit)
+        return dist, np.stack([
+            cos * normal[:, 0] - sin * normal[:, 1],
+            sin * normal[:, 0] + cos * normal[:, 1]
+        ], axis=1)
+
+    @staticmethod
+    def shape(shape: Shape, org: np.ndarray,
+              unit: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        '''cast the rays on the shape in its own space'''
+        part_list: List[Interval] = []
+        if shape.type == Shape.Type.Polygon:
+            part_list.append(
+                Raycast.polygon(cast(Polygon, shape).vertices, org, unit))
+
+        elif shape.type == Shape.Type.Circle:
+            part_list.append(
+                Raycast.circle(np.zeros(2),
+                               cast(Circle, shape).radius, org, unit))
+
+        elif shape.type == Shape.Type.Ellipse:
+            elli: Ellipse = cast(Ellipse, shape)
+            part_list.append(Raycast.ellipse(elli.A(), elli.B(), org, unit))
+
+        elif shape.type == Shape.Type.Edge:
+            edg: Edge = cast(Edge, shape)
+            return Raycast.edge(edg.start._val.ravel(), edg.end._val.ravel(),
+                                org, unit)
+
+        elif shape.type == Shape.Type.Capsule:
+            part_list += Raycast.capsule(cast(Capsule, shape), org, unit)
+
+        elif shape.type == Shape.Type.Sector:
+            part_list += Raycast.sector(cast(Sector, shape), org, unit)
+
+        # NOTE: the point and the curve have no area to hit
+        return Raycast.union(part_list, len(org))
+
+    @staticmethod
+    def union(part_list: List[Interval],
+              size: int) -> Tuple[np.ndarray, np.ndarray]:
+        '''the nearest hit of the convex parts'''
+        dist: np.ndarray = np.full(size, np.inf)
+        normal: np.ndarray = np.zeros((size, 2))
+        for t_enter, t_exit, n_enter in part_list:
+            hit: np.ndarray = (t_enter <= t_exit) & (t_exit >= 0.0)
+            # the ray starting inside hits at once
+            part_dist: np.ndarray = np.where(hit, np.fmax(t_enter, 0.0),
+                                             np.inf)
+            near: np.ndarray = part_dist < dist
+            dist[near] = part_dist[near]
+            normal[near] = n_enter[near] * (t_enter[near, None] > 0.0)
+
+        return dist, normal
+
+    @staticmethod
+    def clip(t_enter: np.ndarray, t_exit: np.ndarray, n_enter: np.ndarray,
+             point: np.ndarray, normal: np.ndarray, org: np.ndarray,
+             unit: np.ndarray) -> Interval:
+        '''clip the ray intervals by the half planes
+
+        Parameters
+        ----------
+        point : np.ndarray
+            (E, 2) a point on every plane
+        normal : np.ndarray
+            (E, 2) the outward normal of every plane
+        '''
+        # inside the plane k: t * den[k] <= num[k]
+        num: np.ndarray = np.sum(normal * point, axis=1) - org @ normal.T
+        den: np.ndarray = unit @ normal.T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t: np.ndarray = num / den
+
+        t_in: np.ndarray = np.where(den < 0.0, t, -np.inf)
+        t_out: np.ndarray = np.where(den > 0.0, t, np.inf)
+        # NOTE: a ray parallel to and outside a plane misses
+        t_out[(den == 0.0) & (num < 0.0)] = -np.inf
+
+        idx: np.ndarray = np.argmax(t_in, axis=1)
+        plane_enter: np.ndarray = t_in[np.arange(len(org)), idx]
+        later: np.ndarray = plane_enter > t_enter
+        return (np.where(later, plane_enter, t_enter),
+                np.fmin(t_exit, np.min(t_out, axis=1)),
+                np.where(later[:, None], normal[idx], n_enter))
+
+    @staticmethod
+    def polygon_plane(
+            vertices: List[Matrix]) -> Tuple[np.ndarray, np.ndarray]:
+        '''get the (E, 2) vertices and the outward unit normals of the
+        edges starting at them, of the convex polygon
+        '''
+        vert: np.ndarray = np.array([v._val.ravel() for v in vertices])
+        # the vertex list is closed by the first vertex
+        if len(vert) > 1 and np.allclose(vert[0], vert[-1]):
+            vert = vert[:-1]
+
+        edge: np.ndarray = np.roll(vert, -1, axis=0) - vert
+        normal: np.ndarray = np.stack([edge[:, 1], -edge[:, 0]], axis=1)
+        # NOTE: the outward normal of the clockwise vertices is flipped
+        area: float = np.sum(vert[:, 0] * np.roll(vert[:, 1], -1) -
+                             np.roll(vert[:, 0], -1) * vert[:, 1])
+        if area < 0.0:
+            normal = -normal
+        normal /= np.linalg.norm(normal, axis=1, keepdims=True)
+        return vert, normal
+
+    @staticmethod
+    def polygon(vertices: List[Matrix], org: np.ndarray,
+                unit: np.ndarray) -> Interval:
+        vert, normal = Raycast.polygon_plane(vertices)
+        return Raycast.clip(np.full(len(org), -np.inf),
+                            np.full(len(org), np.inf), np.zeros((len(org), 2)),
+                            vert, normal, org, unit)
+
+    @staticmethod
+    def circle(center: np.ndarray, radius: float, org: np.ndarray,
+               unit: np.ndarray) -> Interval:
+        rel: np.ndarray = org - center
+        b: np.ndarray = np.sum(rel * unit, axis=1)
+        c: np.ndarray = np.sum(rel * rel, axis=1) - radius * radius
+        disc: np.ndarray = b * b - c
+        root: np.ndarray = np.sqrt(np.fmax(disc, 0.0))
+        miss: np.ndarray = disc < 0.0
+
+        t_enter: np.ndarray = np.where(miss, np.inf, -b - root)
+        t_exit: np.ndarray = np.where(miss, -np.inf, -b + root)
+        n_enter: np.ndarray = rel + unit * np.where(miss, 0.0, t_enter)[:,
+                                                                         None]
+        return t_enter, t_exit, n_enter / max(radius, Config.PositiveMin)
+
+    @staticmethod
+    def ellipse(a: float, b: float, org: np.ndarray,
+                unit: np.ndarray) -> Interval:
+        # NOTE: scale the ellipse to the unit circle
+        axis: np.ndarray = np.array([a, b])
+        so: np.ndarray = org / axis
+        sd: np.ndarray = unit / axis
+        qa: np.ndarray = np.sum(sd * sd, axis=1)
+        qb: np.ndarray = np.sum(so * sd, axis=1)
+        qc: np.ndarray = np.sum(so * so, axis=1) - 1.0
+        disc: np.ndarray = qb * qb - qa * qc
+        root: np.ndarray = np.sqrt(np.fmax(disc, 0.0))
+        miss: np.ndarray = disc < 0.0
+
+        t_enter: np.ndarray = np.where(miss, np.inf, (-qb - root) / qa)
+        t_exit: np.ndarray = np.where(miss, -np.inf, (-qb + root) / qa)
+        point: np.ndarray = org + unit * np.where(miss, 0.0, t_enter)[:, None]
+        n_enter: np.ndarray = point / (axis * axis)
+        length: np.ndarray = np.linalg.norm(n_enter, axis=1, keepdims=True)
+        return t_enter, t_exit, n_enter / np.fmax(length, Config.PositiveMin)
+
+    @staticmethod
+    def edge(start: np.ndarray, end: np.ndarray, org: np.ndarray,
+             unit: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        seg: np.ndarray = end - start
+        rel: np.ndarray = start - org
+        den: np.ndarray = unit[:, 0] * seg[1] - unit[:, 1] * seg[0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t: np.ndarray = (rel[:, 0] * seg[1] - rel[:, 1] * seg[0]) / den
+            s: np.ndarray = (rel[:, 0] * unit[:, 1] -
+                             rel[:, 1] * unit[:, 0]) / den
+
+        # NOTE: the parallel ray misses the edge
+        hit: np.ndarray = (np.fabs(den) > Config.GeometryEpsilon) & (
+            t >= 0.0) & (s >= 0.0) & (s <= 1.0)
+        normal: np.ndarray = np.array([seg[1], -seg[0]]) / max(
+            np.linalg.norm(seg), Config.PositiveMin)
+        # the normal faces the ray
+        side: np.ndarray = np.where(unit @ normal > 0.0, -1.0, 1.0)
+        return np.where(hit, t, np.inf), np.where(hit[:, None],
+                                                  side[:, None] * normal, 0.0)
+
+    @staticmethod
+    def capsule(cap: Capsule, org: np.ndarray,
+                unit: np.ndarray) -> List[Interval]:
+        '''the capsule is the union of two circles and the box between'''
+        radius: float = min(cap.width, cap.height) / 2.0
+        half: np.ndarray = np.array([cap.width / 2.0 - radius, 0.0])
+        if cap.width < cap.height:
+            half = np.array([0.0, cap.height / 2.0 - radius])
+
+        side: np.ndarray = np.array([half[1], half[0]]) / max(
+            np.linalg.norm(half), Config.PositiveMin) * radius
+        if np.allclose(half, 0.0):
+            return [Raycast.circle(np.zeros(2), radius, org, unit)]
+
+        box: List[Matrix] = [
+            Matrix(list(v), 'vec')
+            for v in (half + side, -half + side, -half - side, half - side)
+        ]
+        return [
+            Raycast.circle(half, radius, org, unit),
+            Raycast.circle(-half, radius, org, unit),
+            Raycast.polygon(box, org, unit)
+        ]
+
+    @staticmethod
+    def sector(sec: Sector, org: np.ndarray,
+               unit: np.ndarray) -> List[Interval]:
+        '''the sector is the circle clipped by the two radius planes, the
+        sector wider than the half circle is split into two convex parts
+        '''
+        if sec.span >= 2.0 * np.pi:
+            return [Raycast.circle(np.zeros(2), sec.radius, org, unit)]
+
+        if sec.span > np.pi:
+            half: float = sec.span / 2.0
+            return [
+                Raycast.wedge(sec.start, half, sec.radius, org, unit),
+                Raycast.wedge(sec.start + half, half, sec.radius, org, unit)
+            ]
+
+        return [Raycast.wedge(sec.start, sec.span, sec.radius, org, unit)]
+
+    @staticmethod
+    def wedge(start: float, span: float, radius: float, org: np.ndarray,
+              unit: np.ndarray) -> Interval:
+        end: float = start + span
+        normal: np.ndarray = np.array([[np.sin(start), -np.cos(start)],
+                                       [-np.sin(end), np.cos(end)]])
+        t_enter, t_exit, n_enter = Raycast.circle(np.zeros(2), radius, org,
+                                                  unit)
+        return Raycast.clip(t_enter, t_exit, n_enter, np.zeros((2, 2)),
+                            normal, org, unit)
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Optional, Tuple, cast
+from typing import List, Optional, Tuple, cast
 
 import numpy as np
 
@@ -7,7 +7,7 @@ from ...common.config import Config
 from ...math.matrix import Matrix
 from ...geometry.geom_algo import GeomAlgo2D
 from ...geometry.shape import Circle, Edge, Ellipse
-from ...geometry.shape import Polygon, Shape, ShapePrimitive
+from ...geometry.shape import Polygon, Sector, Shape, ShapePrimitive
 from ...dynamics.body import Body
 from ..algorithm.gjk import GJK
 
@@ -214,7 +214,21 @@ class AABB():
             res._width = p1.x * 2.0
             res._height = p2.y * 2.0
         elif prim._shape.type == Shape.Type.Sector:
-            pass
+            sec: Sector = cast(Sector, prim._shape)
+            # the apex, the arc ends and the arc points on the axes
+            theta_list: List[float] = [sec.start, sec.start + sec.span]
+            for i in range(4):
+                theta: float = i * np.pi / 2.0 - prim._rot
+                if (theta - sec.start) % (2.0 * np.pi) <= sec.span:
+                    theta_list.append(theta)
+
+            theta_arr: np.ndarray = np.array(theta_list) + prim._rot
+            x_arr: np.ndarray = np.append(sec.radius * np.cos(theta_arr), 0.0)
+            y_arr: np.ndarray = np.append(sec.radius * np.sin(theta_arr), 0.0)
+            res._width = np.max(x_arr) - np.min(x_arr)
+            res._height = np.max(y_arr) - np.min(y_arr)
+            res._pos.set_value([(np.max(x_arr) + np.min(x_arr)) / 2.0,
+                                (np.max(y_arr) + np.min(y_arr)) / 2.0])
 
         res._pos += prim._xform
         res.expand(factor)
@@ -1,4 +1,5 @@
 from __future__ import annotations
+import heapq
 from typing import List, Dict, Optional, Union, Tuple
 
 import numpy as np
@@ -6,6 +7,7 @@ import numpy as np
 from ...math.matrix import Matrix
 from ...common.config import Config
 from ...dynamics.body import Body
+from ..algorithm.raycast import Raycast, RaycastResult
 from .aabb import AABB
 
 
@@ -48,6 +50,14 @@ class DBVT():
         self._tree: List[DBVT.Node] = []
         self._empty_list: List[int] = []
         self._body_table: Dict[Body, int] = {}
+        # the reinserts of the moved bodies, read by the profiler
+        self._reinsert_cnt: int = 0
+        # the packed (box, child) arrays of the batched queries
+        self._flat: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @property
+    def reinsert_cnt(self) -> int:
+        return self._reinsert_cnt
 
     def query(self, val: Union[Body, AABB]) -> List[Body]:
         res: List[Body] = []
@@ -72,7 +82,262 @@ class DBVT():
         self._generate(self._root_idx, pairs)
         return pairs
 
+    def query_many(self, aabbs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        '''query many regions in one call
+
+        all the queries walk the tree together level by level, every
+        level tests the (query, node) pairs by one vectorized overlap test
+
+        Parameters
+        ----------
+        aabbs : np.ndarray
+            (N, 4) the regions, every row is [x_min, y_min, x_max, y_max]
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            the CSR (offset, node_idx), the hit leaves of the query i are
+            node_idx[offset[i]:offset[i + 1]], map them by the 'bodies'
+        '''
+        qry: np.ndarray = np.asarray(aabbs, dtype=np.float64).reshape(-1, 4)
+        box, child = self.flatten()
+        qry_idx: np.ndarray = np.arange(len(qry))
+        node_idx: np.ndarray = np.full(len(qry), self._root_idx)
+        if self._root_idx == -1:
+            qry_idx = qry_idx[:0]
+
+        hit_qry: List[np.ndarray] = []
+        hit_node: List[np.ndarray] = []
+        while len(qry_idx) > 0:
+            nbox: np.ndarray = box[node_idx]
+            qbox: np.ndarray = qry[qry_idx]
+            mask: np.ndarray = np.all(nbox[:, :2] <= qbox[:, 2:], axis=1)
+            mask &= np.all(qbox[:, :2] <= nbox[:, 2:], axis=1)
+            qry_idx, node_idx = qry_idx[mask], node_idx[mask]
+
+            leaf: np.ndarray = child[node_idx, 0] == -1
+            hit_qry.append(qry_idx[leaf])
+            hit_node.append(node_idx[leaf])
+            qry_idx = np.repeat(qry_idx[~leaf], 2)
+            node_idx = child[node_idx[~leaf]].ravel()
+
+        return DBVT._pack(len(qry), hit_qry, hit_node)
+
+    def raycast_many(
+        self,
+        origins: np.ndarray,
+        dirs: np.ndarray,
+        max_dist: float = Config.Max,
+        closest: bool = False
+    ) -> Tuple[np.ndarray, ...]:
+        '''cast many rays in one call
+
+        the rays walk the tree together like the 'query_many', every
+        level runs one vectorized slab test. A ray starting inside a box
+        hits it at the distance 0.
+
+        Parameters
+        ----------
+        origins : np.ndarray
+            (N, 2) the ray start points
+        dirs : np.ndarray
+            (N, 2) the ray directions, a zero direction hits nothing
+        max_dist : float
+            the max distance along the ray
+        closest : bool
+            only find the nearest body of every ray
+
+        Returns
+        -------
+        Tuple[np.ndarray, ...]
+            the CSR (offset, node_idx) of the leaves whose fat box is hit,
+            every ray is sorted front to back. For the closest mode,
+            (node_idx, dist, normal) of the nearest body AABB(not the fat
+            one), the node_idx is -1 and the dist is max_dist if missed
+        '''
+        org: np.ndarray = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+        dirn: np.ndarray = np.asarray(dirs, dtype=np.float64).reshape(-1, 2)
+        length: np.ndarray = np.linalg.norm(dirn, axis=1)
+        valid: np.ndarray = length > Config.GeometryEpsilon
+        unit: np.ndarray = np.zeros_like(dirn)
+        unit[valid] = dirn[valid] / length[valid, None]
+
+        box, child = self.flatten()
+        ray_idx: np.ndarray = np.nonzero(valid)[0]
+        node_idx: np.ndarray = np.full(len(ray_idx), self._root_idx)
+        if self._root_idx == -1:
+            ray_idx = ray_idx[:0]
+
+        best: np.ndarray = np.full(len(org), max_dist)
+        best_node: np.ndarray = np.full(len(org), -1)
+        best_normal: np.ndarray = np.zeros((len(org), 2))
+        hit_ray: List[np.ndarray] = []
+        hit_node: List[np.ndarray] = []
+        hit_dist: List[np.ndarray] = []
+        while len(ray_idx) > 0:
+            t_enter, t_exit, axis = DBVT._slab(box[node_idx], org[ray_idx],
+                                               unit[ray_idx])
+            # NOTE: the closest mode drops the boxes behind the best hit
+            limit: np.ndarray = best[ray_idx] if closest else np.full(
+                len(ray_idx), max_dist)
+            mask: np.ndarray = (t_enter <= t_exit) & (t_exit >= 0.0) & (
+                t_enter <= limit)
+            ray_idx, node_idx = ray_idx[mask], node_idx[mask]
+
+            leaf: np.ndarray = child[node_idx, 0] == -1
+            if closest:
+                self._closest_leaf(ray_idx[leaf], node_idx[leaf], org, unit,
+                                   best, best_node, best_normal)
+            else:
+                hit_ray.append(ray_idx[leaf])
+                hit_node.append(node_idx[leaf])
+                hit_dist.append(np.fmax(t_enter[mask][leaf], 0.0))
+
+            ray_idx = np.repeat(ray_idx[~leaf], 2)
+            node_idx = child[node_idx[~leaf]].ravel()
+
+        if closest:
+            return best_node, best, best_normal
+
+        return DBVT._pack(len(org), hit_ray, hit_node, hit_dist)
+
+    def raycast_closest(
+            self,
+            start: Matrix,
+            dirn: Matrix,
+            max_dist: float = Config.Max) -> Optional[RaycastResult]:
+        '''cast the ray on the body shapes, get the nearest hit
+
+        the nodes are visited front to back by their enter distance, the
+        ray is clipped to the nearest hit found so far and the walk stops
+        when the next node is farther than it
+
+        Parameters
+        ----------
+        start : Matrix
+            the ray start point
+        dirn : Matrix
+            the ray direction, the fraction of the hit is in its length
+        max_dist : float
+            the max distance along the ray
+
+        Returns
+        -------
+        Optional[RaycastResult]
+            the nearest hit, None if missed
+        '''
+        res_list: List[RaycastResult] = self._raycast_shape(
+            start, dirn, max_dist, True)
+        return res_list[0] if res_list else None
+
+    def raycast_all(self,
+                    start: Matrix,
+                    dirn: Matrix,
+                    max_dist: float = Config.Max) -> List[RaycastResult]:
+        '''cast the ray on the body shapes, get the enter hit of every
+        body sorted by the distance
+        '''
+        return self._raycast_shape(start, dirn, max_dist, False)
+
+    def raycast_closest_many(
+        self,
+        origins: np.ndarray,
+        dirs: np.ndarray,
+        max_dist: float = Config.Max,
+        ignore: Optional[Body] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''cast many rays on the body shapes, get the nearest hit of
+        every ray
+
+        the candidates come from one 'raycast_many', then every candidate
+        body tests all its rays by one exact shape test
+
+        Parameters
+        ----------
+        origins : np.ndarray
+            (N, 2) the ray start points
+        dirs : np.ndarray
+            (N, 2) the ray directions
+        max_dist : float
+            the max distance along the ray
+        ignore : Optional[Body]
+            the body skipped, such as the one holding the sensor
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, np.ndarray]
+            (node_idx, dist, normal) like the closest mode of the
+            'raycast_many', but the hits are on the shapes
+        '''
+        org: np.ndarray = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+        dirn: np.ndarray = np.asarray(dirs, dtype=np.float64).reshape(-1, 2)
+        length: np.ndarray = np.linalg.norm(dirn, axis=1, keepdims=True)
+        unit: np.ndarray = dirn / np.fmax(length, Config.PositiveMin)
+
+        best: np.ndarray = np.full(len(org), max_dist)
+        best_node: np.ndarray = np.full(len(org), -1)
+        best_normal: np.ndarray = np.zeros((len(org), 2))
+        offset, node_idx = self.raycast_many(org, dirn, max_dist)
+        ray_idx: np.ndarray = np.repeat(np.arange(len(org)), np.diff(offset))
+        # group the rays by the candidate leaves
+        order: np.ndarray = np.argsort(node_idx, kind='stable')
+        node_idx, ray_idx = node_idx[order], ray_idx[order]
+        uniq, start = np.unique(node_idx, return_index=True)
+
+        for i, v in enumerate(uniq):
+            body: Optional[Body] = self._tree[v]._body
+            assert body is not None
+            if body is ignore:
+                continue
+
+            rays: np.ndarray = ray_idx[start[i]:start[i + 1] if i +
+                                       1 < len(uniq) else len(ray_idx)]
+            dist, normal = Raycast.prim(Raycast.body_prim(body), org[rays],
+                                        unit[rays])
+            near: np.ndarray = dist < best[rays]
+            best[rays[near]] = dist[near]
+            best_node[rays[near]] = v
+            best_normal[rays[near]] = normal[near]
+
+        return best_node, best, best_normal
+
+    def bodies(self, node_idx: np.ndarray) -> List[Body]:
+        '''map the leaf indexes of the batched queries to the bodies'''
+        res: List[Body] = []
+        for i in node_idx:
+            tmp: Optional[Body] = self._tree[i]._body
+            assert tmp is not None
+            res.append(tmp)
+
+        return res
+
+    def flatten(self) -> Tuple[np.ndarray, np.ndarray]:
+        '''pack the tree into the arrays of the batched queries, they are
+        cached until the tree is changed
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            (M, 4) node box [x_min, y_min, x_max, y_max] and (M, 2) node
+            [left_idx, right_idx]
+        '''
+        if self._flat is not None:
+            return self._flat
+
+        box: np.ndarray = np.zeros((len(self._tree), 4))
+        child: np.ndarray = np.full((len(self._tree), 2), -1, dtype=np.int64)
+        for i, v in enumerate(self._tree):
+            half_w: float = v._aabb._width / 2.0
+            half_h: float = v._aabb._height / 2.0
+            box[i] = (v._aabb._pos.x - half_w, v._aabb._pos.y - half_h,
+                      v._aabb._pos.x + half_w, v._aabb._pos.y + half_h)
+            child[i] = (v._left_idx, v._right_idx)
+
+        self._flat = (box, child)
+        return self._flat
+
     def insert(self, body: Body) -> None:
+        self._flat = None
         new_node_idx: int = self._allocate_node()
         self._tree[new_node_idx]._body = body
         self._tree[new_node_idx]._aabb = AABB.from_body(body)
@@ -112,6 +377,7 @@ class DBVT():
         if not is_find:
             return
 
+        self._flat = None
         parent_idx: int = self._tree[self._body_table[body]]._parent_idx
         if parent_idx == -1 and self._tree[self._body_table[body]].is_leaf():
             self._root_idx = -1
@@ -132,6 +398,7 @@ class DBVT():
         self._empty_list = []
         self._body_table = {}
         self._root_idx = -1
+        self._flat = None
 
     def update(self, body: Body) -> None:
         is_find: bool = False
@@ -148,6 +415,7 @@ class DBVT():
         if not thin.is_subset(self._tree[self._body_table[body]]._aabb):
             self._extract(self._body_table[body])
             self.insert(body)
+            self._reinsert_cnt += 1
 
     def tree(self) -> List[Node]:
         return self._tree
@@ -221,6 +489,142 @@ class DBVT():
         self._traverse_lowest_cost(node_idx, lowest_const_idx, [lowest_cost],
                                    final_idx)
 
+    def _raycast_shape(self, start: Matrix, dirn: Matrix, max_dist: float,
+                       closest: bool) -> List[RaycastResult]:
+        length: float = dirn.len()
+        if self._root_idx == -1 or length < Config.GeometryEpsilon:
+            return []
+
+        box, child = self.flatten()
+        org: np.ndarray = start._val.reshape(1, 2)
+        unit: np.ndarray = dirn._val.reshape(1, 2) / length
+        res: List[RaycastResult] = []
+        limit: float = max_dist
+        # (enter distance, node index)
+        heap: List[Tuple[float, int]] = []
+        self._push_hit(heap, box, np.array([self._root_idx]), org, unit,
+                       limit)
+        while heap:
+            t_node, node_idx = heapq.heappop(heap)
+            if t_node > limit:
+                break
+
+            if child[node_idx, 0] != -1:
+                self._push_hit(heap, box, child[node_idx], org, unit, limit)
+                continue
+
+            body: Optional[Body] = self._tree[node_idx]._body
+            assert body is not None
+            dist, normal = Raycast.prim(Raycast.body_prim(body), org, unit)
+            if dist[0] <= limit:
+                res.append(
+                    Raycast.result(body, start, dirn, float(dist[0]),
+                                   normal[0]))
+                if closest:
+                    limit = float(dist[0])
+
+        res.sort(key=lambda v: v._dist)
+        return res[:1] if closest else res
+
+    @staticmethod
+    def _push_hit(heap: List[Tuple[float, int]], box: np.ndarray,
+                  node_idx: np.ndarray, org: np.ndarray, unit: np.ndarray,
+                  limit: float) -> None:
+        '''push the nodes hit by the ray with their enter distance'''
+        t_enter, t_exit, axis = DBVT._slab(box[node_idx],
+                                           np.repeat(org, len(node_idx), 0),
+                                           np.repeat(unit, len(node_idx), 0))
+        for i, v in enumerate(node_idx):
+            if t_enter[i] <= min(t_exit[i], limit) and t_exit[i] >= 0.0:
+                heapq.heappush(heap, (max(float(t_enter[i]), 0.0), int(v)))
+
+    def _closest_leaf(self, ray_idx: np.ndarray, node_idx: np.ndarray,
+                      org: np.ndarray, unit: np.ndarray, best: np.ndarray,
+                      best_node: np.ndarray, best_normal: np.ndarray) -> None:
+        '''test the hit leaves by the current body AABBs, keep the
+        nearest hit of every ray
+        '''
+        if len(ray_idx) == 0:
+            return
+
+        # NOTE: the fat box is old, the body can move inside it
+        uniq, inv = np.unique(node_idx, return_inverse=True)
+        tight: np.ndarray = np.zeros((len(uniq), 4))
+        for i, v in enumerate(uniq):
+            aabb: AABB = AABB.from_body(self.bodies([v])[0])
+            tight[i] = (aabb.bot_left.x, aabb.bot_left.y, aabb.top_right.x,
+                        aabb.top_right.y)
+
+        t_enter, t_exit, axis = DBVT._slab(tight[inv], org[ray_idx],
+                                           unit[ray_idx])
+        dist: np.ndarray = np.fmax(t_enter, 0.0)
+        mask: np.ndarray = (t_enter <= t_exit) & (t_exit >= 0.0) & (
+            dist < best[ray_idx])
+        if not np.any(mask):
+            return
+
+        ray_idx, node_idx, dist = ray_idx[mask], node_idx[mask], dist[mask]
+        t_enter, axis = t_enter[mask], axis[mask]
+        # the nearest one of every ray in this level
+        order: np.ndarray = np.lexsort((dist, ray_idx))
+        first: np.ndarray = order[np.unique(ray_idx[order],
+                                            return_index=True)[1]]
+
+        ray_idx, axis = ray_idx[first], axis[first]
+        best[ray_idx] = dist[first]
+        best_node[ray_idx] = node_idx[first]
+        normal: np.ndarray = np.zeros((len(first), 2))
+        # the normal faces the ray, zero if the ray starts inside
+        normal[np.arange(len(first)),
+               axis] = -np.sign(unit[ray_idx, axis]) * (t_enter[first] > 0.0)
+        best_normal[ray_idx] = normal
+
+    @staticmethod
+    def _slab(box: np.ndarray, org: np.ndarray,
+              unit: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''the slab test of the rays against the boxes row by row
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, np.ndarray]
+            the enter and exit distance, the axis of the enter face
+        '''
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inv: np.ndarray = 1.0 / unit
+            t1: np.ndarray = (box[:, :2] - org) * inv
+            t2: np.ndarray = (box[:, 2:] - org) * inv
+
+        # NOTE: a ray parallel to the slab is inside it or misses it
+        par: np.ndarray = unit == 0.0
+        inside: np.ndarray = (box[:, :2] <= org) & (org <= box[:, 2:])
+        t_min: np.ndarray = np.where(par, np.where(inside, -np.inf, np.inf),
+                                     np.fmin(t1, t2))
+        t_max: np.ndarray = np.where(par, np.where(inside, np.inf, -np.inf),
+                                     np.fmax(t1, t2))
+        axis: np.ndarray = np.argmax(t_min, axis=1)
+        return np.max(t_min, axis=1), np.min(t_max, axis=1), axis
+
+    @staticmethod
+    def _pack(size: int,
+              hit_row: List[np.ndarray],
+              hit_node: List[np.ndarray],
+              hit_key: Optional[List[np.ndarray]] = None
+              ) -> Tuple[np.ndarray, np.ndarray]:
+        '''pack the (row, node) hits into the CSR arrays, sorted by the
+        row then by the key(the node index if not given)
+        '''
+        row: np.ndarray = np.concatenate(hit_row) if hit_row else np.zeros(
+            0, dtype=np.int64)
+        node: np.ndarray = np.concatenate(hit_node) if hit_node else np.zeros(
+            0, dtype=np.int64)
+        key: np.ndarray = node if hit_key is None or not hit_key \
+            else np.concatenate(hit_key)
+
+        order: np.ndarray = np.lexsort((key, row))
+        offset: np.ndarray = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(row, minlength=size), out=offset[1:])
+        return offset, node[order].astype(np.int64)
+
     def _raycast(self, res: List[Body], node_idx: int, p: Matrix,
                  d: Matrix) -> None:
         if node_idx < 0:
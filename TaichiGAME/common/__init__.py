@@ -1,3 +1,24 @@
-from .camera import *
+import importlib
+from typing import Any, Dict, List
+
 from .config import *
+from .profiler import *
 from .random import *
+from .trajectory import *
+
+# NOTE: the camera imports taichi, so load it on the first access
+_LazyTable: Dict[str, str] = {'Camera': '.camera'}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LazyTable:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    val: Any = getattr(importlib.import_module(_LazyTable[name], __name__),
+                       name)
+    globals()[name] = val
+    return val
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + list(_LazyTable))
@@ -1,14 +1,16 @@
 from __future__ import annotations
-from typing import List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 
 import numpy as np
 import taichi as ti
 
 from ..common.config import Config
-from ..render.render import Render
+from ..common.profiler import Profiler
+from ..render.render import Render, RenderBatch
 from ..math.matrix import Matrix
 from ..dynamics.phy_world import PhysicsWorld
 from ..dynamics.body import Body
+from ..dynamics.joint.joint import Joint
 from ..dynamics.constraint.contact import ContactMaintainer
 from ..collision.broad_phase.dbvh import DBVH
 from ..collision.broad_phase.dbvt import DBVT
@@ -63,6 +65,9 @@ class Camera():
         self._rotation_line_visible: bool = False
         self._center_visible: bool = False
         self._contact_visible: bool = False
+        self._profile_visible: bool = False
+        # only render the bodies in the view by the dbvt query
+        self._cull_ena: bool = True
 
         self._meter_to_pixel: float = 33.0
         self._pixel_to_meter: float = 1 / self._meter_to_pixel
@@ -80,11 +85,25 @@ class Camera():
         self._dbvh: Optional[DBVH] = None
         self._dbvt: Optional[DBVT] = None
         self._maintainer: Optional[ContactMaintainer] = None
+        self._profiler: Optional[Profiler] = None
 
         self._zoom_factor: float = 1.0
         self._restit: float = 2.0
         self._delta_time: float = 15.0
         self._axis_point_count: int = 20
+        # the world points of the axis, (2 * count + 1, 2) for each axis
+        self._axis_point: np.ndarray = np.zeros((0, 2))
+
+        # screen = world * scale + offset, the cache key is the
+        # (meter_to_pixel, transform, origin, viewport size)
+        self._xform_key: Tuple[float, ...] = ()
+        self._xform_scale: np.ndarray = np.ones(2)
+        self._xform_offset: np.ndarray = np.zeros(2)
+
+        # render pose interpolation between two fixed sim steps
+        # body -> (x, y, rot) of the previous step
+        self._interp_table: Dict[Body, Tuple[float, float, float]] = {}
+        self._interp_alpha: float = 1.0
 
     # render factory method
     def render(self, gui: ti.GUI) -> None:
@@ -94,12 +113,16 @@ class Camera():
         if self.visible:
             # assert self.world is not None
             self.smooth_scale()
+            # NOTE: query the view once and share it in the frame
+            body_list: List[Body] = []
+            if self.body_visible or self.joint_visible or self.aabb_visible:
+                body_list = self.visible_bodies()
 
             if self.body_visible:
-                self.render_body(gui)
+                self.render_body(gui, body_list)
 
             if self.joint_visible:
-                self.render_joint(gui)
+                self.render_joint(gui, body_list)
 
             if self.axis_visible:
                 self.render_axis(gui)
@@ -107,16 +130,21 @@ class Camera():
             if self.aabb_visible:
                 assert self._dbvt is not None
 
-                for elem in self._dbvt.tree():
-                    if elem._body is not None:
-                        self.render_aabb(gui, elem._aabb)
+                tree: List[DBVT.Node] = self._dbvt.tree()
+                leaf_list: List[int] = [
+                    self._dbvt._body_table[bd] for bd in body_list
+                ] if self.cull_valid() else [
+                    i for i, elem in enumerate(tree) if elem._body is not None
+                ]
+                self.render_aabbs(gui, [tree[idx]._aabb for idx in leaf_list])
 
             if self.dbvh_visible:
                 pass
 
             if self.dbvt_visible:
                 assert self._dbvt is not None
-                self.render_dbvt(gui, self._dbvt.root_index())
+                self.render_dbvt(gui, self._dbvt.root_index(),
+                                 self.view_aabb())
 
             if self.grid_visible:
                 self.render_grid_scale_line(gui)
@@ -124,6 +152,9 @@ class Camera():
             if self.contact_visible:
                 self.render_contact(gui)
 
+            if self.profile_visible:
+                self.render_profile(gui)
+
     @property
     def visible(self) -> bool:
         return self._visible
@@ -212,6 +243,31 @@ class Camera():
     def contact_visible(self, visible: bool) -> None:
         self._contact_visible = visible
 
+    @property
+    def profile_visible(self) -> bool:
+        return self._profile_visible
+
+    @profile_visible.setter
+    def profile_visible(self, visible: bool) -> None:
+        self._profile_visible = visible
+
+    @property
+    def profiler(self) -> Profiler:
+        assert self._profiler is not None
+        return self._profiler
+
+    @profiler.setter
+    def profiler(self, profiler: Profiler) -> None:
+        self._profiler = profiler
+
+    @property
+    def cull_ena(self) -> bool:
+        return self._cull_ena
+
+    @cull_ena.setter
+    def cull_ena(self, ena: bool) -> None:
+        self._cull_ena = ena
+
     @property
     def meter_to_pixel(self) -> float:
         return self._meter_to_pixel
@@ -292,39 +348,49 @@ class Camera():
 
         self._pixel_to_meter = 1.0 / self._meter_to_pixel
 
-    def world_to_screen(self, pos: Matrix) -> Matrix:
-        orign: Matrix = Matrix([
-            self._origin.x + self._transform.x,
-            self._origin.y + self._transform.y
-        ], 'vec')
+    def screen_xform(self) -> Tuple[np.ndarray, np.ndarray]:
+        '''get the world to screen transform, which is only recomputed
+        when the 'meter_to_pixel', transform or viewport is changed
 
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            the (2, ) scale and offset, screen = world * scale + offset
+        '''
         # taichi axis system is radio-based
-        view_width: float = self.viewport.width
-        view_height: float = self.viewport.height
-
-        tmpx: float = (orign.x + pos.x * self._meter_to_pixel) / view_width
-        tmpy: float = (orign.y + pos.y * self._meter_to_pixel) / view_height
-        # print(f'({tmpx}, {tmpy})')
-        # tmpx = Config.clamp(tmpx, 0.0, 1.0)
-        # tmpy = Config.clamp(tmpy, 0.0, 1.0)
-        return Matrix([tmpx, tmpy], 'vec')
+        key: Tuple[float, ...] = (self._meter_to_pixel, self._transform.x,
+                                  self._transform.y, self._origin.x,
+                                  self._origin.y, self.viewport.width,
+                                  self.viewport.height)
+        if key != self._xform_key:
+            self._xform_key = key
+            view: np.ndarray = np.array([key[5], key[6]])
+            self._xform_scale = self._meter_to_pixel / view
+            self._xform_offset = np.array([key[1] + key[3], key[2] + key[4]
+                                           ]) / view
+
+        return self._xform_scale, self._xform_offset
 
-    def screen_to_world(self, pos: Matrix) -> Matrix:
-        orign: Matrix = Matrix([
-            self._origin.x + self._transform.x,
-            self._origin.y + self._transform.y
-        ], 'vec')
+    def world_to_screen(self, pos: Matrix) -> Matrix:
+        scale, offset = self.screen_xform()
+        return Matrix(
+            [pos.x * scale[0] + offset[0], pos.y * scale[1] + offset[1]],
+            'vec')
 
-        view_width: float = self.viewport.width
-        view_height: float = self.viewport.height
+    def world_to_screen_arr(self, pos: np.ndarray) -> np.ndarray:
+        '''map the (N, 2) world points to the screen in one operation'''
+        scale, offset = self.screen_xform()
+        return pos * scale + offset
 
-        res: Matrix = Matrix([0.0, 0.0], 'vec')
-        res.x = pos.x * view_width
-        res.y = pos.y * view_height
-        res -= orign
-        res *= self._pixel_to_meter
+    def screen_to_world(self, pos: Matrix) -> Matrix:
+        scale, offset = self.screen_xform()
+        return Matrix([(pos.x - offset[0]) / scale[0],
+                       (pos.y - offset[1]) / scale[1]], 'vec')
 
-        return res
+    def screen_to_world_arr(self, pos: np.ndarray) -> np.ndarray:
+        '''map the (N, 2) screen points to the world in one operation'''
+        scale, offset = self.screen_xform()
+        return (pos - offset) / scale
 
     @property
     def dbvh(self) -> DBVH:
@@ -361,70 +427,237 @@ class Camera():
     def maintainer(self, maintainer: ContactMaintainer) -> None:
         self._maintainer = maintainer
 
-    def render_body(self, gui: ti.GUI) -> None:
+    def body_pose(self, body: Body) -> Tuple[Matrix, float]:
+        '''get the render pose of the body, which is blended
+        between the previous and current sim step
+
+        Parameters
+        ----------
+        body : Body
+            the rendered body
+
+        Returns
+        -------
+        Tuple[Matrix, float]
+            the position and rotation to render
+        '''
+        prev: Optional[Tuple[float, float,
+                             float]] = self._interp_table.get(body)
+        if prev is None or self._interp_alpha >= 1.0:
+            return body.pos, body.rot
+
+        alpha: float = self._interp_alpha
+        pos: Matrix = Matrix([
+            prev[0] + (body.pos.x - prev[0]) * alpha,
+            prev[1] + (body.pos.y - prev[1]) * alpha
+        ], 'vec')
+        rot: float = prev[2] + (body.rot - prev[2]) * alpha
+        return pos, rot
+
+    def view_aabb(self) -> AABB:
+        '''get the world space AABB of the viewport'''
+        bot_left: Matrix = self.screen_to_world(Matrix([0.0, 0.0], 'vec'))
+        top_right: Matrix = self.screen_to_world(Matrix([1.0, 1.0], 'vec'))
+        return AABB.from_box(Matrix([bot_left.x, top_right.y], 'vec'),
+                             Matrix([top_right.x, bot_left.y], 'vec'))
+
+    def cull_valid(self) -> bool:
+        # NOTE: the bodies not inserted to the dbvt can not be
+        # found by the query, so render all of them in that case
         assert self._world is not None
+        return self._cull_ena and self._dbvt is not None and len(
+            self._dbvt._body_table) >= len(self._world._body_list)
 
-        for bd in self._world._body_list:
-            prim: ShapePrimitive = ShapePrimitive()
-            prim._shape = bd.shape
-            prim._rot = bd.rot
-            prim._xform = bd.pos
+    def visible_bodies(self) -> List[Body]:
+        '''get the bodies overlapped with the viewport
 
-            Render.rd_shape(gui, prim, self.world_to_screen,
-                            self.meter_to_pixel, Config.FillColor)
+        Returns
+        -------
+        List[Body]
+            the dbvt query result if the culling is valid,
+            otherwise all bodies of the world
+        '''
+        assert self._world is not None
+        if not self.cull_valid():
+            return self._world._body_list
 
-            if self.center_visible:
-                Render.rd_point(gui, self.world_to_screen(prim._xform),
-                                Config.BodyCenterColor, 4)
+        assert self._dbvt is not None
+        return self._dbvt.query(self.view_aabb())
 
-            if self._rotation_line_visible:
-                Render.rd_angle_line(gui, prim, self.world_to_screen)
+    def joint_in_view(self, joint: Joint, view: AABB,
+                      body_set: Set[Body]) -> bool:
+        '''check if the joint is overlapped with the viewport, the joint
+        is visible if one of its bodies is visible or the box of its
+        bodies and fixed points overlaps the view
+        '''
+        point_list: List[Matrix] = []
+        for name in ('_bodya', '_bodyb'):
+            bd: Optional[Body] = getattr(joint._prim, name, None)
+            if bd is None:
+                continue
+            if bd in body_set:
+                return True
+            point_list.append(bd.pos)
+
+        for name in ('_target_point', '_ground_pointa', '_ground_pointb'):
+            point: Optional[Matrix] = getattr(joint._prim, name, None)
+            if point is not None:
+                point_list.append(point)
+
+        if len(point_list) == 0:
+            return True
+
+        xpos: List[float] = [v.x for v in point_list]
+        ypos: List[float] = [v.y for v in point_list]
+        box: AABB = AABB.from_box(Matrix([min(xpos), max(ypos)], 'vec'),
+                                  Matrix([max(xpos), min(ypos)], 'vec'))
+        return box.collide(view)
+
+    def render_body(self,
+                    gui: ti.GUI,
+                    body_list: Optional[List[Body]] = None) -> None:
+        '''render the bodies, the visible bodies are queried if the
+        body_list is None
+        '''
+        assert self._world is not None
 
-    def render_joint(self, gui: ti.GUI) -> None:
+        if body_list is None:
+            body_list = self.visible_bodies()
+        body_len: int = len(body_list)
+        pos: np.ndarray = np.zeros((body_len, 2))
+        rot: np.ndarray = np.zeros(body_len)
+        batch: RenderBatch = RenderBatch()
+
+        for i, bd in enumerate(body_list):
+            xform, rot[i] = self.body_pose(bd)
+            pos[i, 0] = xform.x
+            pos[i, 1] = xform.y
+
+            if not Render.batch_shape(batch, bd.shape, i, self.meter_to_pixel,
+                                      Config.FillColor):
+                prim: ShapePrimitive = ShapePrimitive()
+                prim._shape = bd.shape
+                prim._xform = xform
+                prim._rot = rot[i]
+                Render.rd_shape(gui, prim, self.world_to_screen,
+                                self.meter_to_pixel, Config.FillColor,
+                                Config.OuterLineColor,
+                                self.world_to_screen_arr)
+
+            if self.center_visible or self._rotation_line_visible:
+                Render.batch_body_axis(batch, bd.shape, i,
+                                       self.center_visible,
+                                       self._rotation_line_visible)
+
+        batch.flush(gui, pos, rot, self.world_to_screen_arr)
+
+    def render_joint(self,
+                     gui: ti.GUI,
+                     body_list: Optional[List[Body]] = None) -> None:
+        '''render the joints in the view, the visible bodies are queried
+        if the body_list is None
+        '''
         assert self._world is not None
+        cull: bool = self.cull_valid()
+        view: AABB = self.view_aabb()
+        body_set: Set[Body] = set()
+        if cull:
+            body_set = set(
+                self.visible_bodies() if body_list is None else body_list)
+
         for jt in self._world._joint_list:
-            if jt.active:
-                Render.rd_joint(gui, jt, self.world_to_screen)
+            if not jt.active:
+                continue
+            if cull and not self.joint_in_view(jt, view, body_set):
+                continue
+            Render.rd_joint(gui, jt, self.world_to_screen)
 
     def render_axis(self, gui: ti.GUI) -> None:
-        axis_points: List[Matrix] = []
-
-        for i in range(-self._axis_point_count, self._axis_point_count + 1):
-            tmp: Matrix = self.world_to_screen(Matrix([0.0, i * 1.0], 'vec'))
-            axis_points.append(tmp)
-            tmp = self.world_to_screen(Matrix([i * 1.0, 0.0], 'vec'))
-            axis_points.append(tmp)
-
-        Render.rd_points(gui, axis_points, Config.AxisPointColor)
-        Render.rd_line(gui,
-                       axis_points[0],
-                       axis_points[-2],
-                       color=Config.AxisLineColor)
-        Render.rd_line(gui,
-                       axis_points[1],
-                       axis_points[-1],
-                       color=Config.AxisLineColor)
+        cnt: int = self._axis_point_count
+        if len(self._axis_point) != 2 * (2 * cnt + 1):
+            seq: np.ndarray = np.arange(-cnt, cnt + 1, dtype=np.float64)
+            zero: np.ndarray = np.zeros_like(seq)
+            self._axis_point = np.concatenate(
+                (np.stack((zero, seq), axis=1), np.stack((seq, zero),
+                                                         axis=1)))
+
+        axis_point: np.ndarray = self.world_to_screen_arr(self._axis_point)
+        half: int = 2 * cnt + 1
+        Render.rd_points(gui, axis_point, Config.AxisPointColor)
+        Render.rd_lines(gui,
+                        np.stack((axis_point[[0, half]],
+                                  axis_point[[half - 1, -1]]),
+                                 axis=1),
+                        color=Config.AxisLineColor)
 
     def render_aabb(self, gui: ti.GUI, aabb: AABB) -> None:
         tmp1: Matrix = self.world_to_screen(aabb.top_left)
         tmp2: Matrix = self.world_to_screen(aabb.bot_right)
         Render.rd_rect(gui, tmp1, tmp2, Config.AABBLineColor)
 
-    def render_dbvt(self, gui: ti.GUI, node_idx: int) -> None:
+    def render_aabbs(self, gui: ti.GUI, aabb_list: List[AABB]) -> None:
+        if len(aabb_list) == 0:
+            return
+
+        box: np.ndarray = np.array([[
+            v._pos.x - v._width / 2.0, v._pos.y + v._height / 2.0,
+            v._pos.x + v._width / 2.0, v._pos.y - v._height / 2.0
+        ] for v in aabb_list])
+        Render.rd_rects(gui, self.world_to_screen_arr(box[:, 0:2]),
+                        self.world_to_screen_arr(box[:, 2:4]),
+                        Config.AABBLineColor)
+
+    def render_dbvt(self,
+                    gui: ti.GUI,
+                    node_idx: int,
+                    view: Optional[AABB] = None) -> None:
+        aabb_list: List[AABB] = []
+        self.collect_dbvt(node_idx, view, aabb_list)
+        self.render_aabbs(gui, aabb_list)
+
+    def collect_dbvt(self, node_idx: int, view: Optional[AABB],
+                     res: List[AABB]) -> None:
         if node_idx == -1:
             return
 
         assert self._dbvt is not None
-        self.render_dbvt(gui, self._dbvt.tree()[node_idx]._left_idx)
-        self.render_dbvt(gui, self._dbvt.tree()[node_idx]._right_idx)
-
         aabb: AABB = self._dbvt.tree()[node_idx]._aabb
+        # the children are inside the parent box
+        if view is not None and self._cull_ena and not aabb.collide(view):
+            return
+
+        self.collect_dbvt(self._dbvt.tree()[node_idx]._left_idx, view, res)
+        self.collect_dbvt(self._dbvt.tree()[node_idx]._right_idx, view, res)
+
         if not self._dbvt.tree()[node_idx].is_leaf():
-            self.render_aabb(gui, aabb)
+            res.append(aabb)
 
     def render_contact(self, gui: ti.GUI) -> None:
         pass
 
+    def render_profile(self, gui: ti.GUI) -> None:
+        '''render the mean/max phase time(ms) and the last counters
+        of the profiler at the top left
+        '''
+        if self._profiler is None:
+            return
+
+        line_list: List[str] = []
+        for name, val in self._profiler.stats().items():
+            if name in Profiler.CounterName:
+                line_list.append(f'{name:<14}{int(val["last"]):>8d}')
+            else:
+                line_list.append(
+                    f'{name:<14}{val["mean"]:>8.3f}{val["max"]:>8.3f}')
+
+        if len(line_list) == 0:
+            line_list.append('profiler: no frame')
+
+        for i, line in enumerate(line_list):
+            gui.text(line, [0.01, 0.99 - i * 0.025],
+                     font_size=14,
+                     color=Config.ProfileTextColor)
+
     def render_grid_scale_line(self, gui: ti.GUI) -> None:
         pass
 
@@ -29,6 +29,7 @@ class Config():
     QueryRaycasOutLineColor: int = 0x33FFFF
     JointPointColor: int = 0xFF0000
     JointLineColor: int = 0x0000FF
+    ProfileTextColor: int = 0xFFFFFF
 
     T = TypeVar('T', float, int)
 
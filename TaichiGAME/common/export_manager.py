@@ -1,33 +1,247 @@
+import json
 import os
-import glob
+import queue
+import shutil
+import subprocess
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+import taichi as ti
 
 
 class ExportManager():
-    def __init__(self, root_dir: str = './export-res'):
-        try:
-            os.makedirs(root_dir + '/frames')
-        except FileExistsError:
-            for infile in glob.glob(os.path.join(root_dir + '/frames',
-                                                 '*.png')):
-                os.remove(infile)
-
-        self._frame_cnt: int = -1
+    '''export the rendered frames to a video or gif
+
+    the frames are grabbed from the gui frame buffer and encoded on a
+    background thread, which streams the raw rgb frames into an ffmpeg
+    compatible encoder pipe. If no encoder is found, the frames are
+    written to a memory-mapped raw frame file(frames.raw + frames.json)
+    which can be encoded later
+
+    Parameters
+    ----------
+    root_dir : str
+        the output dir
+    fps : int
+        the frame rate of the output
+    queue_size : int
+        the max frames waiting for the encoder
+    encoder : Optional[str]
+        the ffmpeg compatible encoder, None to find the ffmpeg in
+        the PATH, '' to always write the raw frame file
+    '''
+    # the frames of one growth of the raw frame file
+    RawChunk: int = 64
+
+    def __init__(self,
+                 root_dir: str = './export-res',
+                 fps: int = 24,
+                 queue_size: int = 8,
+                 encoder: Optional[str] = None):
         self._root_dir: str = root_dir
+        self._fps: int = fps
+        # NOTE: the put blocks when the queue is full, so the render
+        # loop waits for the encoder instead of piling up the frames
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._encoder: Optional[str] = shutil.which(
+            'ffmpeg') if encoder is None else (encoder or None)
+        self._fmt: str = 'mp4'
+
+        self._thread: Optional[threading.Thread] = None
+        self._proc: Optional[subprocess.Popen] = None
+        self._raw_file = None
+        self._raw: Optional[np.memmap] = None
+        self._size: Tuple[int, int] = (0, 0)
+        self._frame_cnt: int = 0
+        self._error: Optional[BaseException] = None
+
+    @property
+    def frame_cnt(self) -> int:
+        return self._frame_cnt
+
+    @property
+    def fmt(self) -> str:
+        return self._fmt
+
+    @fmt.setter
+    def fmt(self, fmt: str) -> None:
+        assert fmt in ('mp4', 'gif')
+        assert not self.running
+        self._fmt = fmt
 
     @property
-    def frame_name(self) -> str:
+    def running(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def output_path(self) -> str:
+        if self._proc is not None or (self._raw is None
+                                      and self._encoder is not None):
+            return os.path.join(self._root_dir, f'video.{self._fmt}')
+
+        return os.path.join(self._root_dir, 'frames.raw')
+
+    def start(self, width: int, height: int) -> None:
+        '''open the encoder pipe or the raw frame file and start the
+        encode thread
+
+        Parameters
+        ----------
+        width : int
+            the frame width(pixel)
+        height : int
+            the frame height(pixel)
+        '''
+        assert not self.running
+        os.makedirs(self._root_dir, exist_ok=True)
+        self._size = (width, height)
+        self._frame_cnt = 0
+        self._error = None
+
+        if self._encoder is not None:
+            self._proc = subprocess.Popen(self.encoder_cmd(width, height),
+                                          stdin=subprocess.PIPE,
+                                          stdout=subprocess.DEVNULL,
+                                          stderr=subprocess.DEVNULL)
+        else:
+            self._raw_file = open(
+                os.path.join(self._root_dir, 'frames.raw'), 'w+b')
+            self.grow_raw(ExportManager.RawChunk)
+
+        self._thread = threading.Thread(target=self.encode_loop,
+                                        name='frame-export',
+                                        daemon=True)
+        self._thread.start()
+
+    def encoder_cmd(self, width: int, height: int) -> List[str]:
+        assert self._encoder is not None
+        cmd: List[str] = [
+            self._encoder, '-y', '-loglevel', 'error', '-f', 'rawvideo',
+            '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-r',
+            str(self._fps), '-i', '-'
+        ]
+        if self._fmt == 'mp4':
+            # yuv420p needs the even size
+            cmd += [
+                '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p'
+            ]
+
+        return cmd + [os.path.join(self._root_dir, f'video.{self._fmt}')]
+
+    def grow_raw(self, frame_cap: int) -> None:
+        assert self._raw_file is not None
+        width, height = self._size
+        if self._raw is not None:
+            self._raw.flush()
+
+        self._raw_file.truncate(frame_cap * height * width * 3)
+        self._raw = np.memmap(self._raw_file,
+                              dtype=np.uint8,
+                              mode='r+',
+                              shape=(frame_cap, height, width, 3))
+
+    def push(self, frame: np.ndarray) -> None:
+        '''queue a frame to encode, blocks when the queue is full
+
+        Parameters
+        ----------
+        frame : np.ndarray
+            the (width, height, C) taichi image, the C is 3 or 4 and
+            the value is in [0, 1] for the float image
+        '''
+        if self._error is not None:
+            raise RuntimeError('frame export failed') from self._error
+
+        if not self.running:
+            self.start(frame.shape[0], frame.shape[1])
+
+        self._queue.put(frame)
+
+    def grab(self, gui: ti.GUI) -> None:
+        '''grab the gui frame buffer, call it before the gui.show'''
+        # NOTE: the gui reuses the image buffer for every frame
+        self.push(np.copy(gui.get_image()))
+
+    @staticmethod
+    def to_rgb(frame: np.ndarray) -> np.ndarray:
+        # taichi image is (x, y) with the origin at the bottom left
+        rgb: np.ndarray = frame[:, ::-1, :3].transpose(1, 0, 2)
+        if rgb.dtype != np.uint8:
+            rgb = (np.clip(rgb, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+
+        return np.ascontiguousarray(rgb)
+
+    def encode_loop(self) -> None:
+        while True:
+            frame: Optional[np.ndarray] = self._queue.get()
+            if frame is None:
+                break
+            if self._error is not None:
+                continue
+
+            try:
+                self.write(ExportManager.to_rgb(frame))
+            except BaseException as e:
+                self._error = e
+
+    def write(self, rgb: np.ndarray) -> None:
+        if self._proc is not None:
+            assert self._proc.stdin is not None
+            self._proc.stdin.write(rgb.tobytes())
+        else:
+            assert self._raw is not None
+            if self._frame_cnt == len(self._raw):
+                self.grow_raw(len(self._raw) * 2)
+            self._raw[self._frame_cnt] = rgb
+
         self._frame_cnt += 1
-        return self._root_dir + f'/frames/{self._frame_cnt:05d}.png'
 
-    def gen_video(self) -> None:
+    def finish(self) -> str:
+        '''drain the queue, close the encoder and return the output path'''
+        if not self.running:
+            return self.output_path
+
+        assert self._thread is not None
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        res: str = self.output_path
+
+        if self._proc is not None:
+            assert self._proc.stdin is not None
+            try:
+                self._proc.stdin.close()
+            except BrokenPipeError:
+                pass
+            self._proc.wait()
+            self._proc = None
+        else:
+            assert self._raw_file is not None
+            width, height = self._size
+            self._raw = None
+            self._raw_file.truncate(self._frame_cnt * height * width * 3)
+            self._raw_file.close()
+            self._raw_file = None
+            with open(os.path.join(self._root_dir, 'frames.json'), 'w') as fp:
+                json.dump(
+                    {
+                        'width': width,
+                        'height': height,
+                        'frame_cnt': self._frame_cnt,
+                        'fps': self._fps,
+                        'pix_fmt': 'rgb24'
+                    }, fp)
+
+        if self._error is not None:
+            raise RuntimeError('frame export failed') from self._error
+
+        return res
+
+    def gen_video(self) -> str:
         print('export .mp4 video...')
-        os.chdir(self._root_dir + '/frames')
-        os.system('ti video -f24')
-        os.system('mv video.mp4 ../')
+        return self.finish()
 
-    def gen_gif(self) -> None:
+    def gen_gif(self) -> str:
         print('export .gif ...')
-        os.chdir(self._root_dir + '/frames')
-        os.system('ti video -f24')
-        os.system('ti gif -i video.mp4 -f24')
-        os.system('mv video.gif ../')
+        return self.finish()
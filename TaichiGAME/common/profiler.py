@@ -0,0 +1,142 @@
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class Profiler():
+    '''per-phase wall time and counters of the recent sim frames
+
+    the phases are marked by 'tick', which charges the time since the
+    last mark to the phase. The finished frames are kept in a ring
+    buffer. When disabled, every call is just one flag check.
+    '''
+    # phase index
+    Tree: int = 0
+    IntegrateVel: int = 1
+    Generate: int = 2
+    Detect: int = 3
+    Contact: int = 4
+    Prepare: int = 5
+    SolveVel: int = 6
+    IntegratePos: int = 7
+    SolvePos: int = 8
+    PhaseName: Tuple[str, ...] = ('tree', 'integrate_vel', 'generate',
+                                  'detect', 'contact', 'prepare', 'solve_vel',
+                                  'integrate_pos', 'solve_pos')
+
+    # counter index
+    Pair: int = 0
+    Colliding: int = 1
+    ContactPoint: int = 2
+    EpaIter: int = 3
+    Reinsert: int = 4
+    CounterName: Tuple[str, ...] = ('pair', 'colliding', 'contact_point',
+                                    'epa_iter', 'reinsert')
+
+    def __init__(self, frame_len: int = 120):
+        assert frame_len >= 1
+        self._ena: bool = False
+        self._frame_len: int = frame_len
+        self._time: np.ndarray = np.zeros(
+            (frame_len, len(Profiler.PhaseName)))
+        self._cnt: np.ndarray = np.zeros(
+            (frame_len, len(Profiler.CounterName)), dtype=np.int64)
+        # the next slot of the ring buffer and the valid frames
+        self._head: int = 0
+        self._size: int = 0
+
+        # NOTE: the list is faster than the array for scalar adds
+        self._cur_time: List[float] = [0.0] * len(Profiler.PhaseName)
+        self._cur_cnt: List[int] = [0] * len(Profiler.CounterName)
+        self._last: float = 0.0
+
+    @property
+    def ena(self) -> bool:
+        return self._ena
+
+    @ena.setter
+    def ena(self, ena: bool) -> None:
+        self._ena = ena
+        self._last = time.perf_counter()
+
+    @property
+    def frame_len(self) -> int:
+        return self._frame_len
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def begin(self) -> None:
+        '''start the timing of the next phase'''
+        if self._ena:
+            self._last = time.perf_counter()
+
+    def tick(self, phase: int) -> None:
+        '''charge the time since the last mark to the phase'''
+        if self._ena:
+            now: float = time.perf_counter()
+            self._cur_time[phase] += now - self._last
+            self._last = now
+
+    def count(self, counter: int, val: int = 1) -> None:
+        if self._ena:
+            self._cur_cnt[counter] += val
+
+    def end_frame(self) -> None:
+        '''move the current frame into the ring buffer'''
+        if not self._ena:
+            return
+
+        self._time[self._head] = self._cur_time
+        self._cnt[self._head] = self._cur_cnt
+        self._head = (self._head + 1) % self._frame_len
+        self._size = min(self._size + 1, self._frame_len)
+        self._cur_time = [0.0] * len(Profiler.PhaseName)
+        self._cur_cnt = [0] * len(Profiler.CounterName)
+
+    def reset(self) -> None:
+        self._head = 0
+        self._size = 0
+        self._cur_time = [0.0] * len(Profiler.PhaseName)
+        self._cur_cnt = [0] * len(Profiler.CounterName)
+
+    def frames(self) -> Tuple[np.ndarray, np.ndarray]:
+        '''get the recorded frames from the oldest to the newest
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            (N, phase) wall time in seconds and (N, counter) counts
+        '''
+        idx: np.ndarray = (np.arange(self._size) + self._head -
+                           self._size) % self._frame_len
+        return self._time[idx], self._cnt[idx]
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        '''get the mean, max and last value of every phase(ms) and
+        counter over the recorded frames, the 'frame' is the sum of
+        all phases
+        '''
+        res: Dict[str, Dict[str, float]] = {}
+        if self._size == 0:
+            return res
+
+        tm, cnt = self.frames()
+        tm = tm * 1000.0
+        val_list: List[Tuple[str, np.ndarray]] = [
+            (name, tm[:, i]) for i, name in enumerate(Profiler.PhaseName)
+        ]
+        val_list.append(('frame', tm.sum(axis=1)))
+        val_list += [(name, cnt[:, i])
+                     for i, name in enumerate(Profiler.CounterName)]
+
+        for name, val in val_list:
+            res[name] = {
+                'mean': float(val.mean()),
+                'max': float(val.max()),
+                'last': float(val[-1])
+            }
+
+        return res
@@ -19,3 +19,72 @@ class RandomGenerator():
     @staticmethod
     def pop(val: int):
         RandomGenerator.empty_list.append(val)
+
+
+class IdAllocator():
+    '''Generational id allocator, each world owns its instance.
+
+    The id packs an index(low bits) and a generation(high bits).
+    The index is reused after free and can be used to index the
+    array-backed storage, the generation is bumped on every free
+    so the stale id of a removed object never matches again.
+    All ids fit in 32 bits, 0 is never allocated and kept as the
+    invalid id(the default id of the body).
+    '''
+    def __init__(self, index_bits: int = 20):
+        assert 0 < index_bits < 32
+        self._index_bits: int = index_bits
+        self._index_mask: int = (1 << index_bits) - 1
+        self._generation_mask: int = (1 << (32 - index_bits)) - 1
+        self._generation: List[int] = []
+        self._alive: List[bool] = []
+        self._free_list: List[int] = []
+
+    @property
+    def capacity(self) -> int:
+        # the array size to hold all indices allocated so far
+        return len(self._generation)
+
+    def __len__(self) -> int:
+        return len(self._generation) - len(self._free_list)
+
+    def index(self, val: int) -> int:
+        return val & self._index_mask
+
+    def generation(self, val: int) -> int:
+        return val >> self._index_bits
+
+    def alloc(self) -> int:
+        idx: int = 0
+        if len(self._free_list) > 0:
+            idx = self._free_list.pop()
+        else:
+            idx = len(self._generation)
+            assert idx <= self._index_mask
+            self._generation.append(1)
+            self._alive.append(False)
+
+        self._alive[idx] = True
+        return (self._generation[idx] << self._index_bits) | idx
+
+    def free(self, val: int) -> None:
+        assert self.is_valid(val)
+        idx: int = self.index(val)
+        # NOTE: skip generation 0 to keep the id non-zero
+        gen: int = (self._generation[idx] + 1) & self._generation_mask
+        self._generation[idx] = 1 if gen == 0 else gen
+        self._alive[idx] = False
+        self._free_list.append(idx)
+
+    def is_valid(self, val: int) -> bool:
+        idx: int = self.index(val)
+        if idx >= len(self._generation):
+            return False
+
+        return self._alive[idx] and self._generation[idx] == self.generation(
+            val)
+
+    def clear(self) -> None:
+        self._generation.clear()
+        self._alive.clear()
+        self._free_list.clear()
@@ -0,0 +1,359 @@
+from __future__ import annotations
+import json
+import os
+import queue
+import threading
+from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from ..math.matrix import Matrix
+    from ..simulation import Simulation
+
+# the state of one body in one recorded frame
+BodyDtype: np.dtype = np.dtype([('id', '<u4'), ('x', '<f8'), ('y', '<f8'),
+                                ('rot', '<f8'), ('vel_x', '<f8'),
+                                ('vel_y', '<f8'), ('ang_vel', '<f8')])
+# one contact point, the point is on the body a in world space
+ContactDtype: np.dtype = np.dtype([('ida', '<u4'), ('idb', '<u4'),
+                                   ('x', '<f8'), ('y', '<f8'),
+                                   ('normal_x', '<f8'), ('normal_y', '<f8'),
+                                   ('normal_impulse', '<f8'),
+                                   ('tangent_impulse', '<f8')])
+# the step and the [offset, offset + len) rows of the bodies and contacts
+FrameDtype: np.dtype = np.dtype([('step', '<i8'), ('body_offset', '<i8'),
+                                 ('body_len', '<i8'),
+                                 ('contact_offset', '<i8'),
+                                 ('contact_len', '<i8')])
+
+
+class RawArray():
+    '''a record file mapped by the numpy memmap, the capacity is doubled
+    when it is full and cut to the used rows when closed
+    '''
+    def __init__(self, path: str, dtype: np.dtype, cap: int):
+        self._dtype: np.dtype = dtype
+        self._file = open(path, 'w+b')
+        self._arr: Optional[np.memmap] = None
+        self._len: int = 0
+        self.grow(max(1, cap))
+
+    def __len__(self) -> int:
+        return self._len
+
+    def grow(self, cap: int) -> None:
+        if self._arr is not None:
+            self._arr.flush()
+
+        self._file.truncate(cap * self._dtype.itemsize)
+        self._arr = np.memmap(self._file,
+                              dtype=self._dtype,
+                              mode='r+',
+                              shape=(cap, ))
+
+    def append(self, rows: np.ndarray) -> int:
+        '''write the rows at the end and return their offset'''
+        assert self._arr is not None
+        res: int = self._len
+        if res + len(rows) > len(self._arr):
+            self.grow(max(2 * len(self._arr), res + len(rows)))
+
+        self._arr[res:res + len(rows)] = rows
+        self._len += len(rows)
+        return res
+
+    def flush(self) -> None:
+        assert self._arr is not None
+        self._arr.flush()
+
+    def close(self) -> None:
+        self._arr = None
+        self._file.truncate(self._len * self._dtype.itemsize)
+        self._file.close()
+
+
+class TrajectoryRecorder():
+    '''record the body states of every n-th sim step into the memory-
+    mapped record files, for the long offline runs
+
+    it is attached to the sim as an observer. The sim loop only copies
+    the states into an array and queues it, a background thread writes
+    the records and flushes them every 'flush_interval' frames, so the
+    memory is bounded by the queue size. The output dir holds:
+    body.raw(BodyDtype), frame.raw(FrameDtype), contact.raw(ContactDtype)
+    and meta.json, read them by the TrajectoryReader.
+
+    Parameters
+    ----------
+    root_dir : str
+        the output dir
+    contact : bool
+        also record the contact points with the accumulated impulses
+    chunk : int
+        the initial capacity(frames) of the record files
+    queue_size : int
+        the max frames waiting for the writer, the sim blocks when full
+    flush_interval : int
+        the frames between two flushes to the disk
+    '''
+    Version: int = 1
+
+    def __init__(self,
+                 root_dir: str = './trajectory',
+                 contact: bool = False,
+                 chunk: int = 1024,
+                 queue_size: int = 64,
+                 flush_interval: int = 256):
+        assert chunk >= 1 and flush_interval >= 1
+        self._root_dir: str = root_dir
+        self._contact: bool = contact
+        self._chunk: int = chunk
+        self._flush_interval: int = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+
+        self._sim: Optional[Simulation] = None
+        self._interval: int = 1
+        self._thread: Optional[threading.Thread] = None
+        self._body: Optional[RawArray] = None
+        self._frame: Optional[RawArray] = None
+        self._contact_arr: Optional[RawArray] = None
+        self._error: Optional[BaseException] = None
+
+    @property
+    def root_dir(self) -> str:
+        return self._root_dir
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    @property
+    def frame_cnt(self) -> int:
+        '''the frames written by the writer thread'''
+        return 0 if self._frame is None else len(self._frame)
+
+    def attach(self, sim: Simulation, interval: int = 1) -> None:
+        '''start the writer and record the sim every 'interval' steps'''
+        assert not self.running
+        self.start(interval)
+        self._sim = sim
+        sim.attach(self.record, interval)
+
+    def start(self, interval: int = 1) -> None:
+        assert not self.running
+        os.makedirs(self._root_dir, exist_ok=True)
+        self._interval = interval
+        self._error = None
+        self._body = RawArray(os.path.join(self._root_dir, 'body.raw'),
+                              BodyDtype, self._chunk * 16)
+        self._frame = RawArray(os.path.join(self._root_dir, 'frame.raw'),
+                               FrameDtype, self._chunk)
+        self._contact_arr = RawArray(
+            os.path.join(self._root_dir, 'contact.raw'), ContactDtype,
+            self._chunk if self._contact else 1)
+        self.write_meta()
+
+        self._thread = threading.Thread(target=self.write_loop,
+                                        name='trajectory-record',
+                                        daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def gather(sim: Simulation,
+               contact: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        '''copy the body states(and the contact points) of the sim'''
+        body: np.ndarray = np.array([(bd.id, bd.pos.x, bd.pos.y, bd.rot,
+                                      bd.vel.x, bd.vel.y, bd.ang_vel)
+                                     for bd in sim.world._body_list],
+                                    dtype=BodyDtype)
+        if not contact:
+            return body, np.zeros(0, dtype=ContactDtype)
+
+        row_list: List[Tuple[int, int, float, float, float, float, float,
+                             float]] = []
+        for val in sim.maintainer._contact_table.values():
+            for ccp in val:
+                vcp = ccp._vcp
+                # NOTE: the body may be moved since the contact is
+                # prepared, so use its local point on the current pose
+                point: Matrix = ccp._bodya.to_world_point(ccp._locala)
+                row_list.append(
+                    (ccp._bodya.id, ccp._bodyb.id, point.x, point.y,
+                     vcp._normal.x, vcp._normal.y,
+                     vcp._accum_normal_impulse, vcp._accum_tangent_impulse))
+
+        return body, np.array(row_list, dtype=ContactDtype)
+
+    def record(self, sim: Simulation) -> None:
+        '''the sim observer, queue the current states'''
+        if self._error is not None:
+            raise RuntimeError('trajectory record failed') from self._error
+
+        body, contact = TrajectoryRecorder.gather(sim, self._contact)
+        self._queue.put((sim.step_cnt, body, contact))
+
+    def write_loop(self) -> None:
+        while True:
+            item: Optional[Tuple[int, np.ndarray, np.ndarray]] = \
+                self._queue.get()
+            try:
+                if item is None:
+                    break
+                if self._error is None:
+                    self.write(*item)
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def write(self, step: int, body: np.ndarray, contact: np.ndarray) -> None:
+        assert self._body is not None and self._frame is not None
+        assert self._contact_arr is not None
+        frame: np.ndarray = np.zeros(1, dtype=FrameDtype)
+        frame['step'] = step
+        frame['body_offset'] = self._body.append(body)
+        frame['body_len'] = len(body)
+        frame['contact_offset'] = self._contact_arr.append(contact)
+        frame['contact_len'] = len(contact)
+        self._frame.append(frame)
+
+        if len(self._frame) % self._flush_interval == 0:
+            self.flush_file()
+
+    def flush_file(self) -> None:
+        assert self._body is not None and self._frame is not None
+        assert self._contact_arr is not None
+        self._body.flush()
+        self._contact_arr.flush()
+        # NOTE: the frame is flushed last, the reader trusts the meta
+        self._frame.flush()
+        self.write_meta()
+
+    def write_meta(self) -> None:
+        meta: Dict = {
+            'version': TrajectoryRecorder.Version,
+            'interval': self._interval,
+            'contact': self._contact,
+            'frame_cnt': 0 if self._frame is None else len(self._frame),
+            'body_cnt': 0 if self._body is None else len(self._body),
+            'contact_cnt':
+            0 if self._contact_arr is None else len(self._contact_arr)
+        }
+        tmp: str = os.path.join(self._root_dir, 'meta.json.tmp')
+        with open(tmp, 'w') as fp:
+            json.dump(meta, fp)
+        os.replace(tmp, os.path.join(self._root_dir, 'meta.json'))
+
+    def flush(self) -> None:
+        '''wait for the queued frames and flush them to the disk'''
+        if not self.running:
+            return
+
+        self._queue.join()
+        if self._error is not None:
+            raise RuntimeError('trajectory record failed') from self._error
+        self.flush_file()
+
+    def close(self) -> str:
+        '''detach from the sim, write the rest and close the files'''
+        if not self.running:
+            return self._root_dir
+
+        if self._sim is not None:
+            self._sim.detach(self.record)
+            self._sim = None
+
+        assert self._thread is not None
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+        if self._error is None:
+            self.flush_file()
+        for arr in (self._body, self._frame, self._contact_arr):
+            assert arr is not None
+            arr.close()
+
+        if self._error is not None:
+            raise RuntimeError('trajectory record failed') from self._error
+
+        return self._root_dir
+
+
+class TrajectoryReader():
+    '''random access to the frames written by the TrajectoryRecorder,
+    the record files are memory-mapped and only the read frames are
+    loaded. It can read the dir while the recorder is running, the
+    frames flushed so far are visible.
+    '''
+    def __init__(self, root_dir: str):
+        self._root_dir: str = root_dir
+        with open(os.path.join(root_dir, 'meta.json')) as fp:
+            self._meta: Dict = json.load(fp)
+
+        if self._meta['version'] != TrajectoryRecorder.Version:
+            raise ValueError('not a compatible trajectory')
+
+        self._frame: np.ndarray = self.open('frame.raw', FrameDtype,
+                                            self._meta['frame_cnt'])
+        self._body: np.ndarray = self.open('body.raw', BodyDtype,
+                                           self._meta['body_cnt'])
+        self._contact: np.ndarray = self.open('contact.raw', ContactDtype,
+                                              self._meta['contact_cnt'])
+
+    def open(self, name: str, dtype: np.dtype, size: int) -> np.ndarray:
+        if size == 0:
+            return np.zeros(0, dtype=dtype)
+
+        return np.memmap(os.path.join(self._root_dir, name),
+                         dtype=dtype,
+                         mode='r',
+                         shape=(size, ))
+
+    def __len__(self) -> int:
+        return len(self._frame)
+
+    @property
+    def interval(self) -> int:
+        return self._meta['interval']
+
+    @property
+    def steps(self) -> np.ndarray:
+        return np.asarray(self._frame['step'])
+
+    def step(self, idx: int) -> int:
+        return int(self._frame[idx]['step'])
+
+    def frame(self, idx: int) -> np.ndarray:
+        '''get the BodyDtype rows of the frame'''
+        frm: np.ndarray = self._frame[idx]
+        offset: int = int(frm['body_offset'])
+        return self._body[offset:offset + int(frm['body_len'])]
+
+    def contacts(self, idx: int) -> np.ndarray:
+        '''get the ContactDtype rows of the frame'''
+        frm: np.ndarray = self._frame[idx]
+        offset: int = int(frm['contact_offset'])
+        return self._contact[offset:offset + int(frm['contact_len'])]
+
+    def find(self, step: int) -> int:
+        '''get the frame index of the step, -1 if not recorded'''
+        idx: int = int(np.searchsorted(self._frame['step'], step))
+        if idx < len(self._frame) and self._frame[idx]['step'] == step:
+            return idx
+
+        return -1
+
+    def track(self, body_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        '''get the steps and the BodyDtype rows of one body over the
+        frames it exists in
+        '''
+        mask: np.ndarray = self._body['id'] == body_id
+        row_idx: np.ndarray = np.nonzero(mask)[0]
+        # the frame of a row is the last frame starting before it
+        frame_idx: np.ndarray = np.searchsorted(
+            self._frame['body_offset'], row_idx, side='right') - 1
+        return np.asarray(self._frame['step'][frame_idx]), np.asarray(
+            self._body[row_idx])
@@ -2,3 +2,4 @@ from .body import *
 from .constraint import *
 from .joint import *
 from .phy_world import *
+from .batch_world import *
@@ -0,0 +1,891 @@
+from typing import Dict, List, Optional, Tuple, cast
+
+import numpy as np
+
+from ..math.matrix import Matrix
+from ..geometry.shape import Capsule, Circle, Edge, Ellipse
+from ..geometry.shape import Polygon, Sector, Shape
+from ..collision.detector import Collsion, Detector
+from .body import Body
+from .phy_world import PhysicsWorld
+from .joint.joint import Joint, JointType
+from .joint.joint_solver import inv2x2
+from .joint.distance import DistanceJoint
+from .joint.point import PointJoint
+from .joint.revolute import RevoluteJoint
+from .joint.rotation import RotationJoint
+
+
+def _cross(veca: np.ndarray, vecb: np.ndarray) -> np.ndarray:
+    return veca[..., 0] * vecb[..., 1] - veca[..., 1] * vecb[..., 0]
+
+
+def _perp(vec: np.ndarray) -> np.ndarray:
+    # same as Matrix.cross_product2(1.0, vec)
+    return np.stack((-vec[..., 1], vec[..., 0]), axis=-1)
+
+
+def _rotate(rot: np.ndarray, vec: np.ndarray) -> np.ndarray:
+    cos_val: np.ndarray = np.cos(rot)
+    sin_val: np.ndarray = np.sin(rot)
+    return np.stack((cos_val * vec[..., 0] - sin_val * vec[..., 1],
+                     sin_val * vec[..., 0] + cos_val * vec[..., 1]),
+                    axis=-1)
+
+
+def _inv_or_zero(val: np.ndarray) -> np.ndarray:
+    res: np.ndarray = np.zeros_like(val)
+    np.divide(1.0, val, out=res, where=~np.isclose(val, 0.0))
+    return res
+
+
+def _bound_radius(shape: Shape) -> float:
+    if shape.type == Shape.Type.Circle:
+        return cast(Circle, shape).radius
+    elif shape.type == Shape.Type.Polygon:
+        return max([v.len() for v in cast(Polygon, shape).vertices])
+    elif shape.type == Shape.Type.Edge:
+        edg: Edge = cast(Edge, shape)
+        return max(edg.start.len(), edg.end.len())
+    elif shape.type == Shape.Type.Capsule:
+        cap: Capsule = cast(Capsule, shape)
+        return max(cap.width, cap.height) / 2.0
+    elif shape.type == Shape.Type.Ellipse:
+        ell: Ellipse = cast(Ellipse, shape)
+        return max(ell.A(), ell.B())
+    elif shape.type == Shape.Type.Sector:
+        return cast(Sector, shape).radius
+
+    return 0.0
+
+
+class BatchWorld():
+    '''K copies of one small physics world stepped together.
+
+    All body states are stored in arrays with a leading batch
+    dimension, so integration, contact solve and joint solve are
+    vectorized over the K worlds instead of stepping K PhysicsWorld
+    instances in python. The topology(bodies, shapes, joints) is
+    copied from the template world and shared by all copies, the
+    states and the world parameters can differ per copy.
+
+    NOTE: circle-circle and circle-edge contacts are generated in
+    vectorized form, other shape pairs fall back to the Detector
+    per copy. The contact impulses are not warm started.
+    '''
+    def __init__(self, world: PhysicsWorld, batch: int):
+        assert batch >= 1
+
+        self._batch: int = batch
+        self._body_list: List[Body] = list(world._body_list)
+        self._body_cnt: int = len(self._body_list)
+        body_idx: Dict[Body, int] = {
+            bd: i
+            for i, bd in enumerate(self._body_list)
+        }
+
+        k: int = batch
+        n: int = self._body_cnt
+
+        # world params, one per copy
+        self._grav: np.ndarray = np.tile(
+            [world.grav.x, world.grav.y], (k, 1)).astype(np.float64)
+        self._lin_vel_damping: np.ndarray = np.full(k,
+                                                    world.lin_vel_damping)
+        self._ang_vel_damping: np.ndarray = np.full(k,
+                                                    world.ang_vel_damping)
+        self._grav_ena: bool = world.grav_ena
+        self._damping_ena: bool = world.damping_ena
+        self._vel_iter: int = world.vel_iter
+        self._pos_iter: int = world.pos_iter
+
+        # contact params, same as the ContactMaintainer
+        self._penetration_max: float = 0.01
+        self._bias_factor: float = 0.03
+
+        # body states
+        self._type: np.ndarray = np.array(
+            [int(bd.type) for bd in self._body_list], dtype=np.int64)
+        self._pos: np.ndarray = np.zeros((k, n, 2))
+        self._vel: np.ndarray = np.zeros((k, n, 2))
+        self._rot: np.ndarray = np.zeros((k, n))
+        self._ang_vel: np.ndarray = np.zeros((k, n))
+        self._forces: np.ndarray = np.zeros((k, n, 2))
+        self._torques: np.ndarray = np.zeros((k, n))
+
+        self._mass: np.ndarray = np.zeros((k, n))
+        self._inv_mass: np.ndarray = np.zeros((k, n))
+        self._inv_inertia: np.ndarray = np.zeros((k, n))
+        self._fric: np.ndarray = np.zeros((k, n))
+        self._restit: np.ndarray = np.zeros((k, n))
+
+        for i, bd in enumerate(self._body_list):
+            self._pos[:, i] = [bd.pos.x, bd.pos.y]
+            self._vel[:, i] = [bd.vel.x, bd.vel.y]
+            self._rot[:, i] = bd.rot
+            self._ang_vel[:, i] = bd.ang_vel
+            self._forces[:, i] = [bd.forces.x, bd.forces.y]
+            self._torques[:, i] = bd.torques
+            self._mass[:, i] = bd.mass
+            self._inv_mass[:, i] = bd.inv_mass
+            self._inv_inertia[:, i] = bd.inv_inertia
+            self._fric[:, i] = bd.fric
+            self._restit[:, i] = bd.restit
+
+        # the state 'reset' goes back to
+        self._init_state: Tuple[np.ndarray, ...] = (self._pos.copy(),
+                                                    self._vel.copy(),
+                                                    self._rot.copy(),
+                                                    self._ang_vel.copy())
+
+        self.init_contact(body_idx)
+        self.init_joint(world._joint_list, body_idx)
+
+    def init_contact(self, body_idx: Dict[Body, int]) -> None:
+        # one pair for every two bodies can collide, the pair keeps
+        # the detector's order(smaller id is bodya)
+        ordered: List[Body] = sorted(self._body_list, key=lambda v: v.id)
+        pair_list: List[Tuple[int, int]] = []
+        for i, bda in enumerate(ordered):
+            for bdb in ordered[i + 1:]:
+                if not bda.bitmask & bdb.bitmask:
+                    continue
+
+                is_static: bool = bda.type == Body.Type.Static
+                if is_static and bdb.type == Body.Type.Static:
+                    continue
+
+                pair_list.append((body_idx[bda], body_idx[bdb]))
+
+        self._pair: np.ndarray = np.array(pair_list, dtype=np.int64).reshape(
+            -1, 2)
+        self._bound_radius: np.ndarray = np.array(
+            [_bound_radius(bd.shape) for bd in self._body_list])
+
+        shape_type: List[int] = [
+            int(bd.shape.type) for bd in self._body_list
+        ]
+        circle: int = int(Shape.Type.Circle)
+        edge: int = int(Shape.Type.Edge)
+        self._pair_circle: List[int] = []
+        self._pair_edge: List[int] = []
+        self._pair_other: List[int] = []
+        for i, (ia, ib) in enumerate(pair_list):
+            types: Tuple[int, int] = (shape_type[ia], shape_type[ib])
+            if types == (circle, circle):
+                self._pair_circle.append(i)
+            elif types in ((circle, edge), (edge, circle)):
+                self._pair_edge.append(i)
+            else:
+                self._pair_other.append(i)
+
+        # NOTE: the detector need a body to read the shape from,
+        # the proxy is moved to the state of each copy in turn
+        self._proxy_list: List[Body] = []
+        for bd in self._body_list:
+            proxy: Body = Body()
+            proxy.id = bd.id
+            proxy.shape = bd.shape
+            self._proxy_list.append(proxy)
+
+        # two contact slots for every pair
+        slot_len: int = len(pair_list) * 2
+        k: int = self._batch
+        self._slot_a: np.ndarray = np.repeat(self._pair[:, 0], 2)
+        self._slot_b: np.ndarray = np.repeat(self._pair[:, 1], 2)
+        self._ct_active: np.ndarray = np.zeros((k, slot_len), dtype=bool)
+        self._ct_normal: np.ndarray = np.zeros((k, slot_len, 2))
+        self._ct_ra: np.ndarray = np.zeros((k, slot_len, 2))
+        self._ct_rb: np.ndarray = np.zeros((k, slot_len, 2))
+        self._ct_vel_bias: np.ndarray = np.zeros((k, slot_len, 2))
+        self._ct_eff_mass_normal: np.ndarray = np.zeros((k, slot_len))
+        self._ct_eff_mass_tangent: np.ndarray = np.zeros((k, slot_len))
+        self._ct_fric: np.ndarray = np.zeros((k, slot_len))
+        self._ct_accum_normal: np.ndarray = np.zeros((k, slot_len))
+        self._ct_accum_tangent: np.ndarray = np.zeros((k, slot_len))
+        self._ct_slot_list: np.ndarray = np.zeros(0, dtype=np.int64)
+
+    def init_joint(self, joint_list: List[Joint],
+                   body_idx: Dict[Body, int]) -> None:
+        k: int = self._batch
+        self._joint_list: List[Tuple[JointType, Joint, int, int]] = []
+        # per joint per copy solver states
+        self._jt_impulse: List[np.ndarray] = []
+        self._jt_bias: List[np.ndarray] = []
+        self._jt_gamma: List[np.ndarray] = []
+        self._jt_eff_mass: List[np.ndarray] = []
+        self._jt_normal: List[np.ndarray] = []
+        self._jt_ra: List[np.ndarray] = []
+        self._jt_rb: List[np.ndarray] = []
+
+        for jt in joint_list:
+            if not jt.active:
+                continue
+
+            jt_type: JointType = jt.type()
+            ia: int = -1
+            ib: int = -1
+            if jt_type == JointType.Revolute:
+                rev: RevoluteJoint = cast(RevoluteJoint, jt)
+                ia = body_idx[rev.prim()._bodya]
+                ib = body_idx[rev.prim()._bodyb]
+                self._jt_impulse.append(
+                    np.tile([rev.prim()._impulse.x,
+                             rev.prim()._impulse.y], (k, 1)))
+
+            elif jt_type == JointType.Point:
+                pnt: PointJoint = cast(PointJoint, jt)
+                ia = body_idx[pnt.prim()._bodya]
+                self._jt_impulse.append(
+                    np.tile([pnt.prim()._impulse.x,
+                             pnt.prim()._impulse.y], (k, 1)))
+
+            elif jt_type == JointType.Distance:
+                dis: DistanceJoint = cast(DistanceJoint, jt)
+                ia = body_idx[dis.prim._bodya]
+                self._jt_impulse.append(np.zeros(k))
+
+            elif jt_type == JointType.Rotation:
+                rot: RotationJoint = cast(RotationJoint, jt)
+                ia = body_idx[rot.prim()._bodya]
+                ib = body_idx[rot.prim()._bodyb]
+                self._jt_impulse.append(np.zeros(k))
+
+            else:
+                raise ValueError(
+                    f'{jt_type.name} joint is not supported in batch, the '
+                    'supported joints are Point, Revolute, Distance and '
+                    'Rotation')
+
+            self._joint_list.append((jt_type, jt, ia, ib))
+            self._jt_bias.append(np.zeros((k, 2)))
+            self._jt_gamma.append(np.zeros(k))
+            self._jt_eff_mass.append(np.zeros((k, 2, 2)))
+            self._jt_normal.append(np.zeros((k, 2)))
+            self._jt_ra.append(np.zeros((k, 2)))
+            self._jt_rb.append(np.zeros((k, 2)))
+
+        self._jt_init_impulse: List[np.ndarray] = [
+            v.copy() for v in self._jt_impulse
+        ]
+
+    @property
+    def batch(self) -> int:
+        return self._batch
+
+    @property
+    def body_cnt(self) -> int:
+        return self._body_cnt
+
+    @property
+    def grav(self) -> np.ndarray:
+        return self._grav
+
+    @grav.setter
+    def grav(self, grav: np.ndarray) -> None:
+        self._grav[:] = grav
+
+    @property
+    def lin_vel_damping(self) -> np.ndarray:
+        return self._lin_vel_damping
+
+    @lin_vel_damping.setter
+    def lin_vel_damping(self, lin_vel_damping: np.ndarray) -> None:
+        self._lin_vel_damping[:] = lin_vel_damping
+
+    @property
+    def ang_vel_damping(self) -> np.ndarray:
+        return self._ang_vel_damping
+
+    @ang_vel_damping.setter
+    def ang_vel_damping(self, ang_vel_damping: np.ndarray) -> None:
+        self._ang_vel_damping[:] = ang_vel_damping
+
+    @property
+    def vel_iter(self) -> int:
+        return self._vel_iter
+
+    @vel_iter.setter
+    def vel_iter(self, vel_iter: int) -> None:
+        self._vel_iter = vel_iter
+
+    @property
+    def pos_iter(self) -> int:
+        return self._pos_iter
+
+    @pos_iter.setter
+    def pos_iter(self, pos_iter: int) -> None:
+        self._pos_iter = pos_iter
+
+    @property
+    def fric(self) -> np.ndarray:
+        return self._fric
+
+    @property
+    def restit(self) -> np.ndarray:
+        return self._restit
+
+    def reset(self, mask: Optional[np.ndarray] = None) -> None:
+        '''reset the selected copies to the state of the template
+
+        Parameters
+        ----------
+        mask : Optional[np.ndarray]
+            bool array of shape (K,), None means all copies
+        '''
+        sel: np.ndarray = np.ones(self._batch, dtype=bool)
+        if mask is not None:
+            sel = np.asarray(mask, dtype=bool)
+        pos, vel, rot, ang_vel = self._init_state
+        self._pos[sel] = pos[sel]
+        self._vel[sel] = vel[sel]
+        self._rot[sel] = rot[sel]
+        self._ang_vel[sel] = ang_vel[sel]
+        self._forces[sel] = 0.0
+        self._torques[sel] = 0.0
+        self._ct_accum_normal[sel] = 0.0
+        self._ct_accum_tangent[sel] = 0.0
+
+        for impulse, init_impulse in zip(self._jt_impulse,
+                                         self._jt_init_impulse):
+            impulse[sel] = init_impulse[sel]
+
+    def set_state(self,
+                  pos: Optional[np.ndarray] = None,
+                  rot: Optional[np.ndarray] = None,
+                  vel: Optional[np.ndarray] = None,
+                  ang_vel: Optional[np.ndarray] = None,
+                  mask: Optional[np.ndarray] = None) -> None:
+        '''overwrite the body states of the selected copies
+
+        Parameters
+        ----------
+        pos : Optional[np.ndarray]
+            (K, N, 2) or (M, N, 2) with M the selected copy count
+        rot : Optional[np.ndarray]
+            (K, N) or (M, N)
+        vel : Optional[np.ndarray]
+            (K, N, 2) or (M, N, 2)
+        ang_vel : Optional[np.ndarray]
+            (K, N) or (M, N)
+        mask : Optional[np.ndarray]
+            bool array of shape (K,), None means all copies
+        '''
+        sel: np.ndarray = np.ones(self._batch, dtype=bool)
+        if mask is not None:
+            sel = np.asarray(mask, dtype=bool)
+        if pos is not None:
+            self._pos[sel] = pos
+        if rot is not None:
+            self._rot[sel] = rot
+        if vel is not None:
+            self._vel[sel] = vel
+        if ang_vel is not None:
+            self._ang_vel[sel] = ang_vel
+
+    def get_observations(self) -> np.ndarray:
+        '''get the body states of all copies
+
+        Returns
+        -------
+        np.ndarray
+            (K, N, 6) array, the last dim is
+            [x, y, rot, vel_x, vel_y, ang_vel]
+        '''
+        return np.concatenate(
+            (self._pos, self._rot[..., None], self._vel,
+             self._ang_vel[..., None]),
+            axis=-1)
+
+    def apply_force(self,
+                    forces: Optional[np.ndarray] = None,
+                    torques: Optional[np.ndarray] = None) -> None:
+        '''accumulate the external forces of the next step, such as
+        the control input
+
+        Parameters
+        ----------
+        forces : Optional[np.ndarray]
+            (K, N, 2)
+        torques : Optional[np.ndarray]
+            (K, N)
+        '''
+        if forces is not None:
+            self._forces += forces
+        if torques is not None:
+            self._torques += torques
+
+    def step(self, dt: float) -> None:
+        self.step_velocity(dt)
+        self.detect()
+        self.prepare_contact()
+        self.prepare_velocity_constraint(dt)
+
+        for i in range(self._vel_iter):
+            self.solve_velocity_constraint(dt)
+            self.solve_contact_velocity()
+
+        self.step_position(dt)
+
+        for i in range(self._pos_iter):
+            self.solve_contact_position()
+
+    def step_velocity(self, dt: float) -> None:
+        static: np.ndarray = self._type == Body.Type.Static
+        dynamic: np.ndarray = self._type == Body.Type.Dynamic
+        kinematic: np.ndarray = self._type == Body.Type.Kinematic
+        moved: np.ndarray = dynamic | kinematic
+
+        lvd: np.ndarray = np.ones(self._batch)
+        avd: np.ndarray = np.ones(self._batch)
+        if self._damping_ena:
+            lvd = 1.0 / (1.0 + dt * self._lin_vel_damping)
+            avd = 1.0 / (1.0 + dt * self._ang_vel_damping)
+
+        self._vel[:, static] = 0.0
+        self._ang_vel[:, static] = 0.0
+
+        if self._grav_ena:
+            mass: np.ndarray = self._mass[:, dynamic, None]
+            self._forces[:, dynamic] += self._grav[:, None, :] * mass
+
+        inv_mass: np.ndarray = self._inv_mass[:, moved, None]
+        inv_inertia: np.ndarray = self._inv_inertia[:, moved]
+        self._vel[:, moved] += self._forces[:, moved] * dt * inv_mass
+        self._ang_vel[:, moved] += inv_inertia * self._torques[:, moved] * dt
+        self._vel[:, moved] *= lvd[:, None, None]
+        self._ang_vel[:, moved] *= avd[:, None]
+
+    def step_position(self, dt: float) -> None:
+        moved: np.ndarray = (self._type == Body.Type.Dynamic) | (
+            self._type == Body.Type.Kinematic)
+
+        self._pos[:, moved] += self._vel[:, moved] * dt
+        self._rot[:, moved] += self._ang_vel[:, moved] * dt
+        self._forces[:, moved] = 0.0
+        self._torques[:, moved] = 0.0
+
+    def detect(self) -> None:
+        self._ct_active[:] = False
+        self._ct_accum_normal[:] = 0.0
+        self._ct_accum_tangent[:] = 0.0
+
+        if len(self._pair_circle) > 0:
+            self.detect_circle(np.array(self._pair_circle))
+
+        if len(self._pair_edge) > 0:
+            self.detect_edge(np.array(self._pair_edge))
+
+        if len(self._pair_other) > 0:
+            self.detect_other(np.array(self._pair_other))
+
+    def detect_circle(self, pair_idx: np.ndarray) -> None:
+        ia: np.ndarray = self._pair[pair_idx, 0]
+        ib: np.ndarray = self._pair[pair_idx, 1]
+        rad_a: np.ndarray = self._bound_radius[ia]
+        rad_b: np.ndarray = self._bound_radius[ib]
+
+        # normal points from bodyb to bodya
+        delta: np.ndarray = self._pos[:, ia] - self._pos[:, ib]
+        dist: np.ndarray = np.linalg.norm(delta, axis=-1)
+        colliding: np.ndarray = (dist < rad_a + rad_b) & (dist > 0.0)
+        normal: np.ndarray = delta / np.where(dist > 0.0, dist, 1.0)[..., None]
+
+        pa: np.ndarray = self._pos[:, ia] - normal * rad_a[:, None]
+        pb: np.ndarray = self._pos[:, ib] + normal * rad_b[:, None]
+        self.store_contact(pair_idx * 2, colliding, normal, pa, pb, ia, ib)
+
+    def detect_edge(self, pair_idx: np.ndarray) -> None:
+        ia: np.ndarray = self._pair[pair_idx, 0]
+        ib: np.ndarray = self._pair[pair_idx, 1]
+
+        # one circle and one edge in every pair
+        is_cir_a: np.ndarray = np.array([
+            self._body_list[i].shape.type == Shape.Type.Circle for i in ia
+        ])
+        ic: np.ndarray = np.where(is_cir_a, ia, ib)
+        ie: np.ndarray = np.where(is_cir_a, ib, ia)
+        edg_st: np.ndarray = np.array([[
+            cast(Edge, self._body_list[i].shape).start.x,
+            cast(Edge, self._body_list[i].shape).start.y
+        ] for i in ie])
+        edg_ed: np.ndarray = np.array([[
+            cast(Edge, self._body_list[i].shape).end.x,
+            cast(Edge, self._body_list[i].shape).end.y
+        ] for i in ie])
+
+        st: np.ndarray = _rotate(self._rot[:, ie],
+                                 edg_st) + self._pos[:, ie]
+        ed: np.ndarray = _rotate(self._rot[:, ie],
+                                 edg_ed) + self._pos[:, ie]
+        center: np.ndarray = self._pos[:, ic]
+        seg: np.ndarray = ed - st
+        seg_len2: np.ndarray = np.maximum(np.sum(seg * seg, axis=-1),
+                                          1e-12)
+        t: np.ndarray = np.clip(
+            np.sum((center - st) * seg, axis=-1) / seg_len2, 0.0, 1.0)
+        closest: np.ndarray = st + seg * t[..., None]
+
+        # from the edge to the circle
+        delta: np.ndarray = center - closest
+        dist: np.ndarray = np.linalg.norm(delta, axis=-1)
+        rad: np.ndarray = self._bound_radius[ic]
+        colliding: np.ndarray = (dist < rad) & (dist > 0.0)
+        dirn: np.ndarray = delta / np.where(dist > 0.0, dist, 1.0)[..., None]
+        deepest: np.ndarray = center - dirn * rad[:, None]
+
+        sign: np.ndarray = np.where(is_cir_a, 1.0, -1.0)[:, None]
+        normal: np.ndarray = dirn * sign
+        pa: np.ndarray = np.where(is_cir_a[:, None], deepest, closest)
+        pb: np.ndarray = np.where(is_cir_a[:, None], closest, deepest)
+        self.store_contact(pair_idx * 2, colliding, normal, pa, pb, ia, ib)
+
+    def detect_other(self, pair_idx: np.ndarray) -> None:
+        ia: np.ndarray = self._pair[pair_idx, 0]
+        ib: np.ndarray = self._pair[pair_idx, 1]
+
+        # bounding circle test first, only the copies may collide
+        # go to the detector
+        dist: np.ndarray = np.linalg.norm(self._pos[:, ia] - self._pos[:, ib],
+                                          axis=-1)
+        maybe: np.ndarray = dist <= (self._bound_radius[ia] +
+                                     self._bound_radius[ib])
+
+        for wi, pi in zip(*np.nonzero(maybe)):
+            a: int = int(ia[pi])
+            b: int = int(ib[pi])
+            proxya: Body = self._proxy_list[a]
+            proxyb: Body = self._proxy_list[b]
+            proxya.pos = Matrix(self._pos[wi, a].copy(), 'vec')
+            proxya.rot = self._rot[wi, a]
+            proxyb.pos = Matrix(self._pos[wi, b].copy(), 'vec')
+            proxyb.rot = self._rot[wi, b]
+
+            res: Collsion = Detector.detect(proxya, proxyb)
+            if not res._is_colliding:
+                continue
+
+            slot: int = int(pair_idx[pi]) * 2
+            normal: List[float] = [res._normal.x, res._normal.y]
+            for ci, elem in enumerate(res._contact_list[:2]):
+                self._ct_active[wi, slot + ci] = True
+                self._ct_normal[wi, slot + ci] = normal
+                self._ct_ra[wi, slot + ci] = [
+                    elem._pa.x - self._pos[wi, a, 0],
+                    elem._pa.y - self._pos[wi, a, 1]
+                ]
+                self._ct_rb[wi, slot + ci] = [
+                    elem._pb.x - self._pos[wi, b, 0],
+                    elem._pb.y - self._pos[wi, b, 1]
+                ]
+
+    def store_contact(self, slot: np.ndarray, colliding: np.ndarray,
+                      normal: np.ndarray, pa: np.ndarray, pb: np.ndarray,
+                      ia: np.ndarray, ib: np.ndarray) -> None:
+        self._ct_active[:, slot] = colliding
+        self._ct_normal[:, slot] = normal
+        self._ct_ra[:, slot] = pa - self._pos[:, ia]
+        self._ct_rb[:, slot] = pb - self._pos[:, ib]
+
+    def prepare_contact(self) -> None:
+        active: np.ndarray = self._ct_active
+        ia: np.ndarray = self._slot_a
+        ib: np.ndarray = self._slot_b
+        normal: np.ndarray = self._ct_normal
+        tangent: np.ndarray = _perp(normal)
+        ra: np.ndarray = self._ct_ra
+        rb: np.ndarray = self._ct_rb
+
+        im_a: np.ndarray = self._inv_mass[:, ia]
+        im_b: np.ndarray = self._inv_mass[:, ib]
+        ii_a: np.ndarray = self._inv_inertia[:, ia]
+        ii_b: np.ndarray = self._inv_inertia[:, ib]
+
+        rn_a: np.ndarray = _cross(ra, normal)
+        rn_b: np.ndarray = _cross(rb, normal)
+        rt_a: np.ndarray = _cross(ra, tangent)
+        rt_b: np.ndarray = _cross(rb, tangent)
+
+        im_ab: np.ndarray = im_a + im_b
+        k_normal: np.ndarray = im_ab + ii_a * rn_a * rn_a + ii_b * rn_b * rn_b
+        k_tangent: np.ndarray = im_ab + ii_a * rt_a * rt_a + ii_b * rt_b * rt_b
+
+        # NOTE: zero eff mass makes the inactive slots apply no impulse
+        self._ct_eff_mass_normal = _inv_or_zero(k_normal) * active
+        self._ct_eff_mass_tangent = _inv_or_zero(k_tangent) * active
+        self._ct_fric = np.sqrt(self._fric[:, ia] * self._fric[:, ib])
+
+        restit: np.ndarray = np.fmin(self._restit[:, ia], self._restit[:, ib])
+        wa: np.ndarray = self._ang_vel[:, ia, None]
+        wb: np.ndarray = self._ang_vel[:, ib, None]
+        va: np.ndarray = self._vel[:, ia] + _perp(ra) * wa
+        vb: np.ndarray = self._vel[:, ib] + _perp(rb) * wb
+        self._ct_vel_bias = (va - vb) * -restit[..., None]
+
+        # only iterate the slots active in any copy
+        self._ct_slot_list = np.nonzero(active.any(axis=0))[0]
+
+    def solve_contact_velocity(self) -> None:
+        for s in self._ct_slot_list:
+            ia: int = self._slot_a[s]
+            ib: int = self._slot_b[s]
+            normal: np.ndarray = self._ct_normal[:, s]
+            tangent: np.ndarray = _perp(normal)
+            ra: np.ndarray = self._ct_ra[:, s]
+            rb: np.ndarray = self._ct_rb[:, s]
+
+            va: np.ndarray = self._vel[:, ia] + _perp(
+                ra) * self._ang_vel[:, ia, None]
+            vb: np.ndarray = self._vel[:, ib] + _perp(
+                rb) * self._ang_vel[:, ib, None]
+            dv: np.ndarray = va - vb
+            jv: np.ndarray = -np.sum(normal * (dv - self._ct_vel_bias[:, s]),
+                                     axis=-1)
+            lambda_n: np.ndarray = self._ct_eff_mass_normal[:, s] * jv
+            old_impulse: np.ndarray = self._ct_accum_normal[:, s].copy()
+            self._ct_accum_normal[:, s] = np.fmax(old_impulse + lambda_n, 0.0)
+            lambda_n = self._ct_accum_normal[:, s] - old_impulse
+            self.apply_impulse(ia, ib, normal * lambda_n[:, None], ra, rb)
+
+            va = self._vel[:, ia] + _perp(ra) * self._ang_vel[:, ia, None]
+            vb = self._vel[:, ib] + _perp(rb) * self._ang_vel[:, ib, None]
+            jvt: np.ndarray = np.sum(tangent * (va - vb), axis=-1)
+            lambda_t: np.ndarray = self._ct_eff_mass_tangent[:, s] * -jvt
+
+            max_t: np.ndarray = self._ct_fric[:, s] * self._ct_accum_normal[:,
+                                                                            s]
+            old_impulse = self._ct_accum_tangent[:, s].copy()
+            self._ct_accum_tangent[:, s] = np.clip(old_impulse + lambda_t,
+                                                   -max_t, max_t)
+            lambda_t = self._ct_accum_tangent[:, s] - old_impulse
+            self.apply_impulse(ia, ib, tangent * lambda_t[:, None], ra, rb)
+
+    def solve_contact_position(self) -> None:
+        moved: np.ndarray = self._type != Body.Type.Static
+
+        for s in self._ct_slot_list:
+            ia: int = self._slot_a[s]
+            ib: int = self._slot_b[s]
+            normal: np.ndarray = self._ct_normal[:, s]
+            ra: np.ndarray = self._ct_ra[:, s]
+            rb: np.ndarray = self._ct_rb[:, s]
+
+            c: np.ndarray = (ra + self._pos[:, ia]) - (rb + self._pos[:, ib])
+            # already solved by vel
+            solved: np.ndarray = np.sum(c * normal, axis=-1) < 0.0
+            bias: np.ndarray = self._bias_factor * np.fmax(
+                np.linalg.norm(c, axis=-1) - self._penetration_max, 0.0)
+            val_lambda: np.ndarray = self._ct_eff_mass_normal[:, s] * bias
+            val_lambda[solved] = 0.0
+            impulse: np.ndarray = normal * val_lambda[:, None]
+
+            if moved[ia]:
+                self._pos[:, ia] += impulse * self._inv_mass[:, ia, None]
+                self._rot[:, ia] += self._inv_inertia[:, ia] * _cross(
+                    ra, impulse)
+
+            if moved[ib]:
+                self._pos[:, ib] -= impulse * self._inv_mass[:, ib, None]
+                self._rot[:, ib] -= self._inv_inertia[:, ib] * _cross(
+                    rb, impulse)
+
+    def apply_impulse(self, ia: int, ib: int, impulse: np.ndarray,
+                      ra: np.ndarray, rb: np.ndarray) -> None:
+        self._vel[:, ia] += impulse * self._inv_mass[:, ia, None]
+        self._ang_vel[:, ia] += self._inv_inertia[:, ia] * _cross(ra, impulse)
+
+        if ib >= 0:
+            self._vel[:, ib] -= impulse * self._inv_mass[:, ib, None]
+            self._ang_vel[:, ib] -= self._inv_inertia[:, ib] * _cross(
+                rb, impulse)
+
+    def prepare_velocity_constraint(self, dt: float) -> None:
+        for i, (jt_type, jt, ia, ib) in enumerate(self._joint_list):
+            if jt_type == JointType.Revolute:
+                self.prepare_revolute(i, cast(RevoluteJoint, jt), dt)
+            elif jt_type == JointType.Point:
+                self.prepare_point(i, cast(PointJoint, jt), dt)
+            elif jt_type == JointType.Distance:
+                self.prepare_distance(i, cast(DistanceJoint, jt), dt)
+            elif jt_type == JointType.Rotation:
+                self.prepare_rotation(i, cast(RotationJoint, jt), dt)
+
+    def solve_velocity_constraint(self, dt: float) -> None:
+        for i, (jt_type, jt, ia, ib) in enumerate(self._joint_list):
+            if jt_type == JointType.Revolute:
+                self.solve_point_velocity(
+                    i, ia, ib, dt,
+                    cast(RevoluteJoint, jt).prim()._force_max)
+            elif jt_type == JointType.Point:
+                self.solve_point_velocity(i, ia, -1, dt,
+                                          cast(PointJoint,
+                                               jt).prim()._force_max)
+            elif jt_type == JointType.Distance:
+                self.solve_distance_velocity(i, ia)
+            elif jt_type == JointType.Rotation:
+                self.solve_rotation_velocity(i, ia, ib)
+
+    def soft_param(self, mass: np.ndarray, freq: float, damping_radio: float,
+                   dt: float) -> Tuple[np.ndarray, np.ndarray]:
+        # same as the Joint static helpers, return (gamma, erp)
+        if freq <= 0.0:
+            return np.zeros_like(mass), np.zeros_like(mass)
+
+        nf: float = Joint.natural_frequency(freq)
+        stiff: np.ndarray = mass * nf * nf
+        damping: np.ndarray = damping_radio * 2.0 * mass * nf
+        cim: np.ndarray = dt * (dt * stiff + damping)
+        erp: np.ndarray = dt * stiff + damping
+        return _inv_or_zero(cim), stiff * _inv_or_zero(erp)
+
+    def prepare_revolute(self, idx: int, joint: RevoluteJoint,
+                         dt: float) -> None:
+        _, _, ia, ib = self._joint_list[idx]
+        prim = joint.prim()
+        gamma, erp = self.soft_param(self._mass[:, ia] + self._mass[:, ib],
+                                     prim._freq, prim._damping_radio, dt)
+
+        ra: np.ndarray = _rotate(
+            self._rot[:, ia],
+            np.array([prim._local_pointa.x, prim._local_pointa.y]))
+        rb: np.ndarray = _rotate(
+            self._rot[:, ib],
+            np.array([prim._local_pointb.x, prim._local_pointb.y]))
+        pa: np.ndarray = ra + self._pos[:, ia]
+        pb: np.ndarray = rb + self._pos[:, ib]
+
+        self._jt_ra[idx] = ra
+        self._jt_rb[idx] = rb
+        self._jt_gamma[idx] = gamma
+        self._jt_bias[idx] = (pa - pb) * erp[:, None]
+        self._jt_eff_mass[idx] = self.point_eff_mass(ia, ib, ra, rb, gamma)
+        self.apply_impulse(ia, ib, self._jt_impulse[idx], ra, rb)
+
+    def prepare_point(self, idx: int, joint: PointJoint, dt: float) -> None:
+        _, _, ia, _ = self._joint_list[idx]
+        prim = joint.prim()
+        gamma, erp = self.soft_param(self._mass[:, ia], prim._freq,
+                                     prim._damping_radio, dt)
+
+        ra: np.ndarray = _rotate(
+            self._rot[:, ia],
+            np.array([prim._local_pointa.x, prim._local_pointa.y]))
+        pa: np.ndarray = ra + self._pos[:, ia]
+        pb: np.ndarray = np.array(
+            [prim._target_point.x, prim._target_point.y])
+
+        self._jt_ra[idx] = ra
+        self._jt_gamma[idx] = gamma
+        self._jt_bias[idx] = (pa - pb) * erp[:, None]
+        self._jt_eff_mass[idx] = self.point_eff_mass(ia, -1, ra, ra, gamma)
+        self.apply_impulse(ia, -1, self._jt_impulse[idx], ra, ra)
+
+    def point_eff_mass(self, ia: int, ib: int, ra: np.ndarray, rb: np.ndarray,
+                       gamma: np.ndarray) -> np.ndarray:
+        im_a: np.ndarray = self._inv_mass[:, ia]
+        ii_a: np.ndarray = self._inv_inertia[:, ia]
+        k11: np.ndarray = im_a + ra[:, 1] * ra[:, 1] * ii_a + gamma
+        k12: np.ndarray = -ra[:, 0] * ra[:, 1] * ii_a
+        k22: np.ndarray = im_a + ra[:, 0] * ra[:, 0] * ii_a + gamma
+
+        if ib >= 0:
+            im_b: np.ndarray = self._inv_mass[:, ib]
+            ii_b: np.ndarray = self._inv_inertia[:, ib]
+            k11 = k11 + im_b + rb[:, 1] * rb[:, 1] * ii_b
+            k12 = k12 - rb[:, 0] * rb[:, 1] * ii_b
+            k22 = k22 + im_b + rb[:, 0] * rb[:, 0] * ii_b
+
+        return inv2x2(k11, k12, k22)
+
+    def solve_point_velocity(self, idx: int, ia: int, ib: int, dt: float,
+                             force_max: float) -> None:
+        ra: np.ndarray = self._jt_ra[idx]
+        rb: np.ndarray = self._jt_rb[idx]
+        jvb: np.ndarray = self._vel[:, ia] + _perp(ra) * self._ang_vel[:, ia,
+                                                                       None]
+        if ib >= 0:
+            jvb = jvb - (self._vel[:, ib] +
+                         _perp(rb) * self._ang_vel[:, ib, None])
+
+        impulse: np.ndarray = self._jt_impulse[idx]
+        jvb = -(jvb + self._jt_bias[idx] +
+                impulse * self._jt_gamma[idx][:, None])
+        J: np.ndarray = np.einsum('kij,kj->ki', self._jt_eff_mass[idx], jvb)
+        old_impulse: np.ndarray = impulse.copy()
+        impulse += J
+
+        max_impulse: float = dt * force_max
+        impulse_len: np.ndarray = np.linalg.norm(impulse, axis=-1)
+        over: np.ndarray = impulse_len > max_impulse
+        impulse[over] *= (max_impulse / impulse_len[over])[:, None]
+
+        self.apply_impulse(ia, ib, impulse - old_impulse, ra, rb)
+
+    def prepare_distance(self, idx: int, joint: DistanceJoint,
+                         dt: float) -> None:
+        _, _, ia, _ = self._joint_list[idx]
+        prim = joint.prim
+        assert prim._dist_min <= prim._dist_max
+
+        ra: np.ndarray = _rotate(
+            self._rot[:, ia],
+            np.array([prim._local_pointa.x, prim._local_pointa.y]))
+        pa: np.ndarray = ra + self._pos[:, ia]
+        pb: np.ndarray = np.array(
+            [prim._target_point.x, prim._target_point.y])
+        error: np.ndarray = pb - pa
+        val_len: np.ndarray = np.linalg.norm(error, axis=-1)
+        normal: np.ndarray = error / np.where(val_len > 0.0, val_len,
+                                              1.0)[:, None]
+
+        short: np.ndarray = val_len < prim._dist_min
+        long: np.ndarray = val_len > prim._dist_max
+        c: np.ndarray = np.where(short, prim._dist_min - val_len,
+                                 val_len - prim._dist_max)
+        normal[short] *= -1.0
+
+        # inside the range or moving to the right direction
+        moving: np.ndarray = np.sum(self._vel[:, ia] * normal, axis=-1) > 0.0
+        active: np.ndarray = (short | long) & ~moving
+
+        rn_a: np.ndarray = np.sum(normal * ra, axis=-1)
+        eff_mass: np.ndarray = _inv_or_zero(
+            self._inv_mass[:, ia] + self._inv_inertia[:, ia] * rn_a * rn_a)
+
+        self._jt_ra[idx] = ra
+        self._jt_normal[idx] = normal * active[:, None]
+        self._jt_eff_mass[idx][:, 0, 0] = eff_mass * active
+        self._jt_bias[idx][:, 0] = prim._bias_factor * c / dt * active
+        self._jt_impulse[idx][~active] = 0.0
+
+    def solve_distance_velocity(self, idx: int, ia: int) -> None:
+        ra: np.ndarray = self._jt_ra[idx]
+        normal: np.ndarray = self._jt_normal[idx]
+        va: np.ndarray = self._vel[:, ia] + _perp(ra) * self._ang_vel[:, ia,
+                                                                      None]
+        jvb: np.ndarray = -np.sum(normal * va,
+                                  axis=-1) + self._jt_bias[idx][:, 0]
+        lambda_n: np.ndarray = self._jt_eff_mass[idx][:, 0, 0] * jvb
+
+        impulse: np.ndarray = self._jt_impulse[idx]
+        old_impulse: np.ndarray = impulse.copy()
+        impulse[:] = np.fmax(old_impulse + lambda_n, 0.0)
+        lambda_n = impulse - old_impulse
+        self.apply_impulse(ia, -1, normal * lambda_n[:, None], ra, ra)
+
+    def prepare_rotation(self, idx: int, joint: RotationJoint,
+                         dt: float) -> None:
+        _, _, ia, ib = self._joint_list[idx]
+        prim = joint.prim()
+        ii_sum: np.ndarray = self._inv_inertia[:, ia] + self._inv_inertia[:,
+                                                                          ib]
+        c: np.ndarray = self._rot[:, ia] - self._rot[:, ib] - prim._ref_rot
+        self._jt_eff_mass[idx][:, 0, 0] = _inv_or_zero(ii_sum)
+        self._jt_bias[idx][:, 0] = -joint._factor / dt * c
+
+    def solve_rotation_velocity(self, idx: int, ia: int, ib: int) -> None:
+        dw: np.ndarray = self._ang_vel[:, ia] - self._ang_vel[:, ib]
+        impulse: np.ndarray = self._jt_eff_mass[idx][:, 0, 0] * (
+            -dw + self._jt_bias[idx][:, 0])
+        self._ang_vel[:, ia] += self._inv_inertia[:, ia] * impulse
+        self._ang_vel[:, ib] -= self._inv_inertia[:, ib] * impulse
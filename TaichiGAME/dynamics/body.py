@@ -188,6 +188,14 @@ class Body():
         self._phy_attr._vel += impulse * self._inv_mass
         self._phy_attr._ang_vel += self._inv_inertia * r.cross(impulse)
 
+    def apply_pos_impulse(self, impulse: Matrix, r: Matrix) -> None:
+        # the position pass(NGS) moves the body directly
+        if self._type == Body.Type.Static:
+            return
+
+        self._phy_attr._pos += impulse * self._inv_mass
+        self._phy_attr._rot += self._inv_inertia * r.cross(impulse)
+
     def to_local_point(self, point: Matrix) -> Matrix:
         return Matrix.rotate_mat(-self._phy_attr._rot) * (point -
                                                           self._phy_attr._pos)
@@ -9,13 +9,14 @@ from ...collision.detector import Collsion
 from ..body import Body
 
 
-# FIXME:
 def generate_relation(bodya: Body, bodyb: Body) -> int:
     # Combine two 32-bit id into one 64-bit id in unique form
     ida: int = bodya.id
     idb: int = bodyb.id
+    if ida > idb:
+        ida, idb = idb, ida
 
-    return ida + idb
+    return (ida << 32) | idb
 
 
 class VelocityConstraintPoint():
@@ -270,6 +271,18 @@ class ContactMaintainer():
                     del self._contact_table[item[0]]
                     break
 
+    def body_list(self) -> List[Body]:
+        '''the bodies of the active contacts'''
+        res: Dict[Body, bool] = {}
+        for val in self._contact_table.values():
+            if len(val) == 0 or not val[0]._active:
+                continue
+
+            res[val[0]._bodya] = True
+            res[val[0]._bodyb] = True
+
+        return list(res)
+
     def deactivate_all_points(self) -> None:
         for val in self._contact_table.values():
             if len(val) == 0 or not val[0]._active:
@@ -4,3 +4,4 @@ from .point import *
 from .pulley import *
 from .revolute import *
 from .rotation import *
+from .joint_solver import *
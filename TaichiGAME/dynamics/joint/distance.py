@@ -27,6 +27,8 @@ class DistanceConstraintPrimitive():
         self._bodyb: Optional[Body] = None
         self._nearest_pa: Matrix = Matrix([0.0, 0.0], 'vec')
         self._nearest_pb: Matrix = Matrix([0.0, 0.0], 'vec')
+        self._local_pa: Matrix = Matrix([0.0, 0.0], 'vec')
+        self._local_pb: Matrix = Matrix([0.0, 0.0], 'vec')
         self._ra: Matrix = Matrix([0.0, 0.0], 'vec')
         self._rb: Matrix = Matrix([0.0, 0.0], 'vec')
         self._bias: Matrix = Matrix([0.0, 0.0], 'vec')
@@ -107,7 +109,34 @@ class DistanceJoint(Joint):
         self._prim._bodya.apply_impulse(impulse, ra)
 
     def solve_position(self, dt: float) -> None:
-        pass
+        assert self._prim._bodya is not None
+
+        bodya: Body = self._prim._bodya
+        pa: Matrix = bodya.to_world_point(self._prim._local_pointa)
+        ra: Matrix = pa - bodya.pos
+        error: Matrix = self._prim._target_point - pa
+        val_len: float = error.len()
+        if np.isclose(val_len, 0.0):
+            return
+
+        c: float = 0.0
+        normal: Matrix = error.normal()
+        if val_len < self._prim._dist_min:
+            c = self._prim._dist_min - val_len
+            normal.negate()
+
+        elif val_len > self._prim._dist_max:
+            c = val_len - self._prim._dist_max
+
+        if c < Joint.PosSlop:
+            return
+
+        rn_a: float = normal.dot(ra)
+        k: float = bodya.inv_mass + bodya.inv_inertia * rn_a * rn_a
+        if np.isclose(k, 0.0):
+            return
+
+        bodya.apply_pos_impulse(normal * (Joint.PosFactor * c / k), ra)
 
     @property
     def prim(self) -> DistanceJointPrimitive:
@@ -150,6 +179,9 @@ class DistanceConstraint(Joint):
 
         self._prim._bias = error * self._factor
         self._prim._eff_mass = k.invert()
+        # keep the anchors on the bodies for the position pass
+        self._prim._local_pa = bodya.to_local_point(self._prim._nearest_pa)
+        self._prim._local_pb = bodyb.to_local_point(self._prim._nearest_pb)
 
     def solve_velocity(self, dt: float) -> None:
         if self._prim._bodya is None or self._prim._bodyb is None:
@@ -165,7 +197,8 @@ class DistanceConstraint(Joint):
         jvb.negate()
 
         J: Matrix = self._prim._eff_mass * jvb
-        old_impulse: Matrix = self._prim._impulse
+        # NOTE: copy it, the impulse is updated in place
+        old_impulse: Matrix = +self._prim._impulse
         self._prim._impulse += J
 
         max_impulse: float = dt * self._prim._force_max
@@ -183,7 +216,11 @@ class DistanceConstraint(Joint):
         self._prim._nearest_pb = pb
 
     def solve_position(self, dt: float) -> None:
-        pass
+        if self._prim._bodya is None or self._prim._bodyb is None:
+            return
+
+        Joint.solve_point_position(self._prim._bodya, self._prim._local_pa,
+                                   self._prim._bodyb, self._prim._local_pb)
 
     def prim(self) -> DistanceConstraintPrimitive:
         return self._prim
@@ -1,8 +1,12 @@
 from abc import ABC, abstractmethod
 from enum import IntEnum, unique
+from typing import List, Optional
 
 import numpy as np
 
+from ...math.matrix import Matrix
+from ..body import Body
+
 
 @unique
 class JointType(IntEnum):
@@ -18,6 +22,11 @@ class JointType(IntEnum):
 
 
 class Joint(ABC):
+    # the position pass(NGS) only fixes this ratio of the error
+    # each iteration and leaves the error under the slop
+    PosFactor: float = 0.2
+    PosSlop: float = 0.005
+
     def __init__(self):
         self._active: bool = True
         self._type: JointType = JointType.BASE
@@ -78,3 +87,48 @@ class Joint(ABC):
                                   damping: float) -> float:
         erp: float = dt * stiff + damping
         return 0.0 if np.isclose(erp, 0.0) else stiff / erp
+
+    @staticmethod
+    def solve_point_position(bodya: Body,
+                             local_pointa: Matrix,
+                             bodyb: Optional[Body] = None,
+                             local_pointb: Optional[Matrix] = None,
+                             target_point: Optional[Matrix] = None) -> None:
+        '''move the bodies to make the two anchors coincide, the
+        anchor of bodyb is replaced by the target point if bodyb is None
+        '''
+        pa: Matrix = bodya.to_world_point(local_pointa)
+        ra: Matrix = pa - bodya.pos
+        rb: Matrix = Matrix([0.0, 0.0], 'vec')
+        im_b: float = 0.0
+        ii_b: float = 0.0
+        if bodyb is None:
+            assert target_point is not None
+            pb: Matrix = target_point
+        else:
+            assert local_pointb is not None
+            pb = bodyb.to_world_point(local_pointb)
+            rb = pb - bodyb.pos
+            im_b = bodyb.inv_mass
+            ii_b = bodyb.inv_inertia
+
+        c: Matrix = pa - pb
+        if c.len() < Joint.PosSlop:
+            return
+
+        im_a: float = bodya.inv_mass
+        ii_a: float = bodya.inv_inertia
+        data_arr: List[float] = []
+        data_arr.append(im_a + ra.y * ra.y * ii_a + im_b + rb.y * rb.y * ii_b)
+        data_arr.append(-ra.x * ra.y * ii_a - rb.x * rb.y * ii_b)
+        data_arr.append(data_arr[1])
+        data_arr.append(im_a + ra.x * ra.x * ii_a + im_b + rb.x * rb.x * ii_b)
+
+        k: Matrix = Matrix(data_arr)
+        if np.isclose(k.determinant(), 0.0):
+            return
+
+        impulse: Matrix = k.invert() * c * -Joint.PosFactor
+        bodya.apply_pos_impulse(impulse, ra)
+        if bodyb is not None:
+            bodyb.apply_pos_impulse(-impulse, rb)
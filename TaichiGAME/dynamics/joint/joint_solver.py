@@ -0,0 +1,564 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union, cast
+
+import numpy as np
+
+from ...math.matrix import Matrix
+from ..body import Body
+from .joint import Joint, JointType
+from .distance import DistanceJoint
+from .point import PointJoint, PointJointPrimitive
+from .revolute import RevoluteJoint, RevoluteJointPrimitive
+from .rotation import RotationJoint
+
+
+def inv2x2(k11: np.ndarray, k12: np.ndarray, k22: np.ndarray) -> np.ndarray:
+    '''closed form inverse of the symmetric 2x2 matrices
+
+    Returns
+    -------
+    np.ndarray
+        (N, 2, 2), zero for the singular matrix
+    '''
+    det: np.ndarray = k11 * k22 - k12 * k12
+    inv_det: np.ndarray = np.zeros_like(det)
+    np.divide(1.0, det, out=inv_det, where=~np.isclose(det, 0.0))
+
+    res: np.ndarray = np.empty((len(det), 2, 2))
+    res[:, 0, 0] = k22 * inv_det
+    res[:, 0, 1] = -k12 * inv_det
+    res[:, 1, 0] = -k12 * inv_det
+    res[:, 1, 1] = k11 * inv_det
+    return res
+
+
+def rotate(rot: np.ndarray, vec: np.ndarray) -> np.ndarray:
+    cos_val: np.ndarray = np.cos(rot)
+    sin_val: np.ndarray = np.sin(rot)
+    return np.stack((cos_val * vec[:, 0] - sin_val * vec[:, 1],
+                     sin_val * vec[:, 0] + cos_val * vec[:, 1]),
+                    axis=-1)
+
+
+def cross(veca: np.ndarray, vecb: np.ndarray) -> np.ndarray:
+    return veca[:, 0] * vecb[:, 1] - veca[:, 1] * vecb[:, 0]
+
+
+def perp(vec: np.ndarray) -> np.ndarray:
+    # same as Matrix.cross_product2(1.0, vec)
+    return np.stack((-vec[:, 1], vec[:, 0]), axis=-1)
+
+
+class JointGroup():
+    '''packed constraint arrays of the joints with the same type'''
+    def __init__(self, jt_type: JointType, joint_list: List[Joint],
+                 ia: List[int], ib: List[int]):
+        size: int = len(joint_list)
+        self._type: JointType = jt_type
+        self._joint_list: List[Joint] = joint_list
+        self._ia: np.ndarray = np.array(ia, dtype=np.int64)
+        self._ib: np.ndarray = np.array(ib, dtype=np.int64)
+        self._color_list: List[np.ndarray] = []
+
+        self._ra: np.ndarray = np.zeros((size, 2))
+        self._rb: np.ndarray = np.zeros((size, 2))
+        self._normal: np.ndarray = np.zeros((size, 2))
+        self._gamma: np.ndarray = np.zeros(size)
+        self._max_impulse: np.ndarray = np.zeros(size)
+        # the point constraints use both columns, the others only the
+        # first one
+        self._bias: np.ndarray = np.zeros((size, 2))
+        self._eff_mass: np.ndarray = np.zeros((size, 2, 2))
+        self._impulse: np.ndarray = np.zeros((size, 2))
+
+
+class JointSolver():
+    '''Solve the joints grouped by type with packed arrays.
+
+    The point, revolute, distance and rotation joints are packed
+    into one group per type, each group is colored so the joints
+    with the same color share no movable body and are solved in
+    one vectorized pass. Other joint types fall back to their own
+    prepare and solve methods.
+
+    The groups and colors are kept until the joints or their bodies
+    change. The body velocities stay in the arrays for the whole
+    solve, only the bodies also moved by the other solvers(the
+    fallback joints and the contacts) are synced every iteration,
+    the others are written back once by 'finish'.
+    '''
+    BatchType: Tuple[JointType, ...] = (JointType.Point, JointType.Revolute,
+                                        JointType.Distance,
+                                        JointType.Rotation)
+
+    def __init__(self):
+        self._body_list: List[Body] = []
+        self._group_list: List[JointGroup] = []
+        self._fallback_list: List[Joint] = []
+        # the joint bindings the groups are built for
+        self._key: List[Tuple] = []
+        # the bodies moved by the fallback joints
+        self._fallback_body: Set[Body] = set()
+        # the body slots synced with the bodies every iteration
+        self._shared: np.ndarray = np.zeros(0, dtype=np.int64)
+
+        # body states, the last slot is a static dummy body used by
+        # the joints with only one body
+        self._vel: np.ndarray = np.zeros((1, 2))
+        self._ang_vel: np.ndarray = np.zeros(1)
+        self._inv_mass: np.ndarray = np.zeros(1)
+        self._inv_inertia: np.ndarray = np.zeros(1)
+
+    @property
+    def group_list(self) -> List[JointGroup]:
+        return self._group_list
+
+    @property
+    def fallback_list(self) -> List[Joint]:
+        return self._fallback_list
+
+    @staticmethod
+    def point_prim(
+            joint: Joint) -> Union[PointJointPrimitive, RevoluteJointPrimitive]:
+        if joint.type() == JointType.Point:
+            return cast(PointJoint, joint).prim()
+
+        return cast(RevoluteJoint, joint).prim()
+
+    @staticmethod
+    def bind(joint: Joint) -> Tuple[Optional[Body], Optional[Body]]:
+        '''the bodies of the joint, bodyb is None for the one body joints'''
+        prim = getattr(joint, '_prim', None)
+        return getattr(prim, '_bodya', None), getattr(prim, '_bodyb', None)
+
+    @staticmethod
+    def movable(body: Optional[Body]) -> bool:
+        return body is not None and (body.inv_mass != 0.0
+                                     or body.inv_inertia != 0.0)
+
+    @staticmethod
+    def signature(joint_list: List[Joint]) -> List[Tuple]:
+        '''the bindings the groups and colors depend on'''
+        res: List[Tuple] = []
+        for jt in joint_list:
+            bodya, bodyb = JointSolver.bind(jt)
+            res.append((jt, jt.active, bodya, bodyb,
+                        JointSolver.movable(bodya),
+                        JointSolver.movable(bodyb)))
+
+        return res
+
+    def prepare(self,
+                joint_list: List[Joint],
+                dt: float,
+                shared: Optional[Iterable[Body]] = None) -> None:
+        '''prepare the joints of one step
+
+        Parameters
+        ----------
+        joint_list : List[Joint]
+            the joints of the world
+        dt : float
+            the step time
+        shared : Optional[Iterable[Body]]
+            the bodies whose velocities are also changed by the other
+            solvers between the iterations, None for all the bodies
+        '''
+        key: List[Tuple] = JointSolver.signature(joint_list)
+        if key != self._key:
+            self.build(joint_list)
+            self._key = key
+
+        for jt in self._fallback_list:
+            jt.prepare(dt)
+
+        if len(self._group_list) == 0:
+            return
+
+        body_len: int = len(self._body_list)
+        pos: np.ndarray = np.zeros((body_len + 1, 2))
+        rot: np.ndarray = np.zeros(body_len + 1)
+        mass: np.ndarray = np.zeros(body_len + 1)
+        self._inv_mass = np.zeros(body_len + 1)
+        self._inv_inertia = np.zeros(body_len + 1)
+        for i, bd in enumerate(self._body_list):
+            pos[i] = [bd.pos.x, bd.pos.y]
+            rot[i] = bd.rot
+            mass[i] = bd.mass
+            self._inv_mass[i] = bd.inv_mass
+            self._inv_inertia[i] = bd.inv_inertia
+
+        self.share(shared)
+        self.gather()
+        for grp in self._group_list:
+            if grp._type in (JointType.Point, JointType.Revolute):
+                self.prepare_point(grp, pos, rot, mass, dt)
+            elif grp._type == JointType.Distance:
+                self.prepare_distance(grp, pos, rot, dt)
+            elif grp._type == JointType.Rotation:
+                self.prepare_rotation(grp, rot, dt)
+
+        self.scatter(self._shared)
+
+    def share(self, shared: Optional[Iterable[Body]]) -> None:
+        if shared is None:
+            self._shared = np.arange(len(self._body_list), dtype=np.int64)
+            return
+
+        body_set: Set[Body] = self._fallback_body.union(shared)
+        self._shared = np.array([
+            i for i, bd in enumerate(self._body_list) if bd in body_set
+        ],
+                                dtype=np.int64)
+
+    def build(self, joint_list: List[Joint]) -> None:
+        self._body_list = []
+        self._group_list = []
+        self._fallback_list = []
+        self._fallback_body = set()
+        body_idx: Dict[Body, int] = {}
+
+        def index(body: Optional[Body]) -> int:
+            assert body is not None
+            if body not in body_idx:
+                body_idx[body] = len(self._body_list)
+                self._body_list.append(body)
+
+            return body_idx[body]
+
+        pack: Dict[JointType, Tuple[List[Joint], List[Body],
+                                    List[Optional[Body]]]] = {
+                                        v: ([], [], [])
+                                        for v in JointSolver.BatchType
+                                    }
+        for jt in joint_list:
+            if not jt.active:
+                continue
+
+            jt_type: JointType = jt.type()
+            bodya, bodyb = JointSolver.bind(jt)
+            if jt_type not in JointSolver.BatchType:
+                self._fallback_list.append(jt)
+                self._fallback_body.update(
+                    v for v in (bodya, bodyb) if v is not None)
+                continue
+
+            # NOTE: same as the revolute joint, skip the unbound one
+            if jt_type == JointType.Revolute and bodyb is None:
+                continue
+            # the point and distance joint only move the bodya
+            if jt_type in (JointType.Point, JointType.Distance):
+                bodyb = None
+
+            if bodya is None:
+                continue
+
+            pack[jt_type][0].append(jt)
+            pack[jt_type][1].append(bodya)
+            pack[jt_type][2].append(bodyb)
+
+        for jt_type in JointSolver.BatchType:
+            jt_list, bda_list, bdb_list = pack[jt_type]
+            if len(jt_list) == 0:
+                continue
+
+            ia: List[int] = [index(v) for v in bda_list]
+            ib: List[int] = [-1 if v is None else index(v) for v in bdb_list]
+            self._group_list.append(JointGroup(jt_type, jt_list, ia, ib))
+
+        # the dummy body is the last slot
+        dummy: int = len(self._body_list)
+        for grp in self._group_list:
+            grp._ib[grp._ib < 0] = dummy
+            grp._color_list = self.color(grp)
+
+    def color(self, grp: JointGroup) -> List[np.ndarray]:
+        # greedy coloring, the static bodies never change their vel,
+        # so they do not make conflict
+        color_set: List[Set[Body]] = []
+        color_idx: List[List[int]] = []
+        dummy: int = len(self._body_list)
+
+        for i, (ia, ib) in enumerate(zip(grp._ia, grp._ib)):
+            used: List[Body] = []
+            for idx in (ia, ib):
+                if idx == dummy:
+                    continue
+                bd: Body = self._body_list[idx]
+                if JointSolver.movable(bd):
+                    used.append(bd)
+
+            for c, bd_set in enumerate(color_set):
+                if not any([bd in bd_set for bd in used]):
+                    bd_set.update(used)
+                    color_idx[c].append(i)
+                    break
+            else:
+                color_set.append(set(used))
+                color_idx.append([i])
+
+        return [np.array(v, dtype=np.int64) for v in color_idx]
+
+    def gather(self, idx: Optional[np.ndarray] = None) -> None:
+        '''read the velocities of the body slots, all if idx is None'''
+        if idx is None:
+            body_len: int = len(self._body_list)
+            self._vel = np.zeros((body_len + 1, 2))
+            self._ang_vel = np.zeros(body_len + 1)
+            idx = np.arange(body_len)
+
+        for i in idx:
+            bd: Body = self._body_list[i]
+            self._vel[i] = [bd.vel.x, bd.vel.y]
+            self._ang_vel[i] = bd.ang_vel
+
+    def scatter(self, idx: Optional[np.ndarray] = None) -> None:
+        '''write the velocities of the body slots, all if idx is None'''
+        if idx is None:
+            idx = np.arange(len(self._body_list))
+
+        for i in idx:
+            bd: Body = self._body_list[i]
+            bd.vel.set_value([self._vel[i, 0], self._vel[i, 1]])
+            bd.ang_vel = self._ang_vel[i]
+
+    def apply_impulse(self, ia: np.ndarray, ib: np.ndarray,
+                      impulse: np.ndarray, ra: np.ndarray,
+                      rb: np.ndarray) -> None:
+        np.add.at(self._vel, ia, impulse * self._inv_mass[ia, None])
+        np.add.at(self._ang_vel, ia, self._inv_inertia[ia] * cross(ra, impulse))
+        np.add.at(self._vel, ib, -impulse * self._inv_mass[ib, None])
+        np.add.at(self._ang_vel, ib,
+                  -self._inv_inertia[ib] * cross(rb, impulse))
+
+    def prepare_point(self, grp: JointGroup, pos: np.ndarray, rot: np.ndarray,
+                      mass: np.ndarray, dt: float) -> None:
+        # point and revolute joint share the same constraint, the
+        # point joint is bound to the static dummy body at the target
+        la: List[List[float]] = []
+        lb: List[List[float]] = []
+        target: List[List[float]] = []
+        freq: List[float] = []
+        damping_radio: List[float] = []
+        force_max: List[float] = []
+        impulse: List[List[float]] = []
+        for jt in grp._joint_list:
+            prim: Union[PointJointPrimitive,
+                        RevoluteJointPrimitive] = JointSolver.point_prim(jt)
+            la.append([prim._local_pointa.x, prim._local_pointa.y])
+            if grp._type == JointType.Point:
+                pnt: PointJoint = cast(PointJoint, jt)
+                lb.append([0.0, 0.0])
+                target.append([
+                    pnt.prim()._target_point.x,
+                    pnt.prim()._target_point.y
+                ])
+            else:
+                rev: RevoluteJoint = cast(RevoluteJoint, jt)
+                lb.append(
+                    [rev.prim()._local_pointb.x,
+                     rev.prim()._local_pointb.y])
+                target.append([0.0, 0.0])
+
+            freq.append(prim._freq)
+            damping_radio.append(prim._damping_radio)
+            force_max.append(prim._force_max)
+            impulse.append([prim._impulse.x, prim._impulse.y])
+
+        ia: np.ndarray = grp._ia
+        ib: np.ndarray = grp._ib
+        is_point: bool = grp._type == JointType.Point
+        m: np.ndarray = mass[ia] if is_point else mass[ia] + mass[ib]
+        freq_arr: np.ndarray = np.array(freq)
+        nf: np.ndarray = np.where(freq_arr > 0.0,
+                                  Joint.natural_frequency(freq_arr), 0.0)
+        stiff: np.ndarray = m * nf * nf
+        damping: np.ndarray = np.array(damping_radio) * 2.0 * m * nf
+
+        cim: np.ndarray = dt * (dt * stiff + damping)
+        erp: np.ndarray = dt * stiff + damping
+        gamma: np.ndarray = np.zeros_like(cim)
+        np.divide(1.0, cim, out=gamma, where=~np.isclose(cim, 0.0))
+        erp = np.divide(stiff,
+                        erp,
+                        out=np.zeros_like(erp),
+                        where=~np.isclose(erp, 0.0))
+
+        ra: np.ndarray = rotate(rot[ia], np.array(la))
+        rb: np.ndarray = rotate(rot[ib], np.array(lb))
+        pa: np.ndarray = ra + pos[ia]
+        pb: np.ndarray = np.array(target) if is_point else rb + pos[ib]
+
+        im_a: np.ndarray = self._inv_mass[ia]
+        ii_a: np.ndarray = self._inv_inertia[ia]
+        im_b: np.ndarray = self._inv_mass[ib]
+        ii_b: np.ndarray = self._inv_inertia[ib]
+        k11: np.ndarray = im_a + ra[:, 1] * ra[:, 1] * ii_a + gamma
+        k11 += im_b + rb[:, 1] * rb[:, 1] * ii_b
+        k12: np.ndarray = -ra[:, 0] * ra[:, 1] * ii_a
+        k12 -= rb[:, 0] * rb[:, 1] * ii_b
+        k22: np.ndarray = im_a + ra[:, 0] * ra[:, 0] * ii_a + gamma
+        k22 += im_b + rb[:, 0] * rb[:, 0] * ii_b
+
+        grp._ra = ra
+        grp._rb = rb
+        grp._gamma = gamma
+        grp._bias = (pa - pb) * erp[:, None]
+        grp._eff_mass = inv2x2(k11, k12, k22)
+        grp._max_impulse = dt * np.array(force_max)
+        grp._impulse = np.array(impulse).reshape(-1, 2)
+        self.apply_impulse(ia, ib, grp._impulse, ra, rb)
+
+    def prepare_distance(self, grp: JointGroup, pos: np.ndarray,
+                         rot: np.ndarray, dt: float) -> None:
+        la: List[List[float]] = []
+        target: List[List[float]] = []
+        dist_min: List[float] = []
+        dist_max: List[float] = []
+        bias_factor: List[float] = []
+        impulse: List[float] = []
+        for jt in grp._joint_list:
+            prim = cast(DistanceJoint, jt).prim
+            assert prim._dist_min <= prim._dist_max
+            la.append([prim._local_pointa.x, prim._local_pointa.y])
+            target.append([prim._target_point.x, prim._target_point.y])
+            dist_min.append(prim._dist_min)
+            dist_max.append(prim._dist_max)
+            bias_factor.append(prim._bias_factor)
+            impulse.append(prim._accum_impulse)
+
+        ia: np.ndarray = grp._ia
+        ra: np.ndarray = rotate(rot[ia], np.array(la))
+        error: np.ndarray = np.array(target) - (ra + pos[ia])
+        val_len: np.ndarray = np.linalg.norm(error, axis=-1)
+        normal: np.ndarray = error / np.where(val_len > 0.0, val_len,
+                                              1.0)[:, None]
+
+        dmin: np.ndarray = np.array(dist_min)
+        dmax: np.ndarray = np.array(dist_max)
+        short: np.ndarray = val_len < dmin
+        long: np.ndarray = val_len > dmax
+        c: np.ndarray = np.where(short, dmin - val_len, val_len - dmax)
+        normal[short] *= -1.0
+
+        # inside the range or already moving to the right direction
+        moving: np.ndarray = np.sum(self._vel[ia] * normal, axis=-1) > 0.0
+        active: np.ndarray = (short | long) & ~moving
+
+        rn_a: np.ndarray = np.sum(normal * ra, axis=-1)
+        k: np.ndarray = self._inv_mass[ia] + self._inv_inertia[ia] * rn_a * rn_a
+        eff_mass: np.ndarray = np.zeros_like(k)
+        np.divide(1.0, k, out=eff_mass, where=active & ~np.isclose(k, 0.0))
+
+        grp._ra = ra
+        grp._normal = normal * active[:, None]
+        grp._eff_mass[:, 0, 0] = eff_mass
+        grp._bias[:, 0] = np.array(bias_factor) * c / dt * active
+        grp._impulse[:, 0] = np.where(active, np.array(impulse), 0.0)
+
+    def prepare_rotation(self, grp: JointGroup, rot: np.ndarray,
+                         dt: float) -> None:
+        ref_rot: np.ndarray = np.array(
+            [cast(RotationJoint, jt).prim()._ref_rot for jt in grp._joint_list])
+        factor: np.ndarray = np.array(
+            [cast(RotationJoint, jt)._factor for jt in grp._joint_list])
+
+        ia: np.ndarray = grp._ia
+        ib: np.ndarray = grp._ib
+        ii_sum: np.ndarray = self._inv_inertia[ia] + self._inv_inertia[ib]
+        eff_mass: np.ndarray = np.zeros_like(ii_sum)
+        np.divide(1.0, ii_sum, out=eff_mass, where=~np.isclose(ii_sum, 0.0))
+
+        grp._eff_mass[:, 0, 0] = eff_mass
+        grp._bias[:, 0] = -factor / dt * (rot[ia] - rot[ib] - ref_rot)
+
+    def solve_velocity(self, dt: float) -> None:
+        for jt in self._fallback_list:
+            jt.solve_velocity(dt)
+
+        if len(self._group_list) == 0:
+            return
+
+        self.gather(self._shared)
+        for grp in self._group_list:
+            for sel in grp._color_list:
+                if grp._type in (JointType.Point, JointType.Revolute):
+                    self.solve_point(grp, sel)
+                elif grp._type == JointType.Distance:
+                    self.solve_distance(grp, sel)
+                elif grp._type == JointType.Rotation:
+                    self.solve_rotation(grp, sel)
+
+        self.scatter(self._shared)
+
+    def solve_point(self, grp: JointGroup, sel: np.ndarray) -> None:
+        ia: np.ndarray = grp._ia[sel]
+        ib: np.ndarray = grp._ib[sel]
+        ra: np.ndarray = grp._ra[sel]
+        rb: np.ndarray = grp._rb[sel]
+
+        va: np.ndarray = self._vel[ia] + perp(ra) * self._ang_vel[ia, None]
+        vb: np.ndarray = self._vel[ib] + perp(rb) * self._ang_vel[ib, None]
+        old_impulse: np.ndarray = grp._impulse[sel]
+        jvb: np.ndarray = -(va - vb + grp._bias[sel] +
+                            old_impulse * grp._gamma[sel, None])
+
+        impulse: np.ndarray = old_impulse + np.einsum(
+            'nij,nj->ni', grp._eff_mass[sel], jvb)
+        max_impulse: np.ndarray = grp._max_impulse[sel]
+        impulse_len: np.ndarray = np.linalg.norm(impulse, axis=-1)
+        over: np.ndarray = impulse_len > max_impulse
+        impulse[over] *= (max_impulse[over] / impulse_len[over])[:, None]
+
+        grp._impulse[sel] = impulse
+        self.apply_impulse(ia, ib, impulse - old_impulse, ra, rb)
+
+    def solve_distance(self, grp: JointGroup, sel: np.ndarray) -> None:
+        ia: np.ndarray = grp._ia[sel]
+        ra: np.ndarray = grp._ra[sel]
+        normal: np.ndarray = grp._normal[sel]
+
+        va: np.ndarray = self._vel[ia] + perp(ra) * self._ang_vel[ia, None]
+        jvb: np.ndarray = -np.sum(normal * va, axis=-1) + grp._bias[sel, 0]
+        lambda_n: np.ndarray = grp._eff_mass[sel, 0, 0] * jvb
+
+        old_impulse: np.ndarray = grp._impulse[sel, 0]
+        impulse: np.ndarray = np.fmax(old_impulse + lambda_n, 0.0)
+        grp._impulse[sel, 0] = impulse
+        lambda_n = impulse - old_impulse
+
+        dummy: np.ndarray = grp._ib[sel]
+        self.apply_impulse(ia, dummy, normal * lambda_n[:, None], ra, ra)
+
+    def solve_rotation(self, grp: JointGroup, sel: np.ndarray) -> None:
+        ia: np.ndarray = grp._ia[sel]
+        ib: np.ndarray = grp._ib[sel]
+        dw: np.ndarray = self._ang_vel[ia] - self._ang_vel[ib]
+        impulse: np.ndarray = grp._eff_mass[sel, 0, 0] * (-dw +
+                                                         grp._bias[sel, 0])
+        np.add.at(self._ang_vel, ia, self._inv_inertia[ia] * impulse)
+        np.add.at(self._ang_vel, ib, -self._inv_inertia[ib] * impulse)
+
+    def finish(self) -> None:
+        '''write back the velocities and the impulses after the last
+        velocity iteration of the step
+        '''
+        if len(self._group_list) == 0:
+            return
+
+        self.scatter()
+        self.store_impulse()
+
+    def store_impulse(self) -> None:
+        '''write the accumulated impulses back to the joint prims,
+        the next prepare warm starts from them
+        '''
+        for grp in self._group_list:
+            if grp._type in (JointType.Point, JointType.Revolute):
+                for jt, val in zip(grp._joint_list, grp._impulse):
+                    prim: Union[PointJointPrimitive, RevoluteJointPrimitive]
+                    prim = JointSolver.point_prim(jt)
+                    prim._impulse = Matrix([val[0], val[1]], 'vec')
+
+            elif grp._type == JointType.Distance:
+                for jt, val in zip(grp._joint_list, grp._impulse):
+                    cast(DistanceJoint, jt).prim._accum_impulse = float(val[0])
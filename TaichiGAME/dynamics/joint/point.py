@@ -90,7 +90,8 @@ class PointJoint(Joint):
         jvb.negate()
 
         J: Matrix = self._prim._eff_mass * jvb
-        old_impulse: Matrix = self._prim._impulse
+        # NOTE: copy it, the impulse is updated in place
+        old_impulse: Matrix = +self._prim._impulse
         self._prim._impulse += J
 
         max_impulse: float = dt * self._prim._force_max
@@ -102,7 +103,14 @@ class PointJoint(Joint):
         self._prim._bodya.apply_impulse(J, ra)
 
     def solve_position(self, dt: float) -> None:
-        pass
+        # NOTE: the soft point joint(such as the mouse joint) is a
+        # spring, only the rigid one is fixed in the position pass
+        if self._prim._bodya is None or self._prim._freq > 0.0:
+            return
+
+        Joint.solve_point_position(self._prim._bodya,
+                                   self._prim._local_pointa,
+                                   target_point=self._prim._target_point)
 
     def prim(self) -> PointJointPrimitive:
         return self._prim
@@ -1,9 +1,30 @@
+from typing import Optional
+
+from ...math.matrix import Matrix
+from ..body import Body
 from .joint import Joint, JointType
 
 
 class PulleyJointPrimitive():
     def __init__(self):
-        pass
+        self._bodya: Optional[Body] = None
+        self._bodyb: Optional[Body] = None
+        self._local_pointa: Matrix = Matrix([0.0, 0.0], 'vec')
+        self._local_pointb: Matrix = Matrix([0.0, 0.0], 'vec')
+        # the fixed points the rope goes around
+        self._ground_pointa: Matrix = Matrix([0.0, 0.0], 'vec')
+        self._ground_pointb: Matrix = Matrix([0.0, 0.0], 'vec')
+        # len_a + ratio * len_b == length, the length is set by the
+        # body poses when the joint is created if it is not positive
+        self._ratio: float = 1.0
+        self._length: float = 0.0
+
+        self._ra: Matrix = Matrix([0.0, 0.0], 'vec')
+        self._rb: Matrix = Matrix([0.0, 0.0], 'vec')
+        self._ua: Matrix = Matrix([0.0, 0.0], 'vec')
+        self._ub: Matrix = Matrix([0.0, 0.0], 'vec')
+        self._eff_mass: float = 0.0
+        self._impulse: float = 0.0
 
 
 class PulleyJoint(Joint):
@@ -11,15 +32,111 @@ class PulleyJoint(Joint):
         super().__init__()
         self._type: JointType = JointType.Pulley
         self._prim: PulleyJointPrimitive = prim
+        self.init_length()
 
     def set_value(self, prim: PulleyJointPrimitive):
         self._prim = prim
+        self.init_length()
+
+    def init_length(self) -> None:
+        '''keep the current rope length as the rest length if unset'''
+        if self._prim._length > 0.0:
+            return
+
+        if self._prim._bodya is not None and self._prim._bodyb is not None:
+            self.calc_length()
+
+    def calc_length(self) -> float:
+        '''set the rope length by the current body poses'''
+        assert self._prim._bodya is not None
+        assert self._prim._bodyb is not None
+
+        pa: Matrix = self._prim._bodya.to_world_point(self._prim._local_pointa)
+        pb: Matrix = self._prim._bodyb.to_world_point(self._prim._local_pointb)
+        self._prim._length = (pa - self._prim._ground_pointa).len(
+        ) + self._prim._ratio * (pb - self._prim._ground_pointb).len()
+        return self._prim._length
+
+    def calc_axis(self) -> float:
+        # update the anchors and the rope dirs, return the eff mass
+        assert self._prim._bodya is not None
+        assert self._prim._bodyb is not None
+
+        bodya: Body = self._prim._bodya
+        bodyb: Body = self._prim._bodyb
+        pa: Matrix = bodya.to_world_point(self._prim._local_pointa)
+        pb: Matrix = bodyb.to_world_point(self._prim._local_pointb)
+        self._prim._ra = pa - bodya.pos
+        self._prim._rb = pb - bodyb.pos
+
+        self._prim._ua = pa - self._prim._ground_pointa
+        self._prim._ub = pb - self._prim._ground_pointb
+        for u in (self._prim._ua, self._prim._ub):
+            if u.len() > Joint.PosSlop:
+                u.normalize()
+            else:
+                u.clear()
+
+        ru_a: float = self._prim._ra.cross(self._prim._ua)
+        ru_b: float = self._prim._rb.cross(self._prim._ub)
+        m_a: float = bodya.inv_mass + bodya.inv_inertia * ru_a * ru_a
+        m_b: float = bodyb.inv_mass + bodyb.inv_inertia * ru_b * ru_b
+        k: float = m_a + self._prim._ratio * self._prim._ratio * m_b
+
+        return 0.0 if k <= 0.0 else 1.0 / k
+
+    def apply_impulse(self, impulse: float) -> None:
+        assert self._prim._bodya is not None
+        assert self._prim._bodyb is not None
+
+        self._prim._bodya.apply_impulse(self._prim._ua * -impulse,
+                                        self._prim._ra)
+        self._prim._bodyb.apply_impulse(
+            self._prim._ub * (-self._prim._ratio * impulse), self._prim._rb)
 
     def prepare(self, dt: float) -> None:
-        raise NotImplementedError
+        if self._prim._bodya is None or self._prim._bodyb is None:
+            return
+
+        self._prim._eff_mass = self.calc_axis()
+        self.apply_impulse(self._prim._impulse)
 
     def solve_velocity(self, dt: float) -> None:
-        raise NotImplementedError
+        if self._prim._bodya is None or self._prim._bodyb is None:
+            return
+
+        va: Matrix = self._prim._bodya.vel + Matrix.cross_product2(
+            self._prim._bodya.ang_vel, self._prim._ra)
+        vb: Matrix = self._prim._bodyb.vel + Matrix.cross_product2(
+            self._prim._bodyb.ang_vel, self._prim._rb)
+
+        jv: float = -self._prim._ua.dot(va) - self._prim._ratio * (
+            self._prim._ub.dot(vb))
+        impulse: float = -self._prim._eff_mass * jv
+        self._prim._impulse += impulse
+        self.apply_impulse(impulse)
 
     def solve_position(self, dt: float) -> None:
-        raise NotImplementedError
+        if self._prim._bodya is None or self._prim._bodyb is None:
+            return
+
+        bodya: Body = self._prim._bodya
+        bodyb: Body = self._prim._bodyb
+        eff_mass: float = self.calc_axis()
+
+        pa: Matrix = bodya.to_world_point(self._prim._local_pointa)
+        pb: Matrix = bodyb.to_world_point(self._prim._local_pointb)
+        c: float = self._prim._length - (
+            pa - self._prim._ground_pointa).len() - self._prim._ratio * (
+                pb - self._prim._ground_pointb).len()
+        if abs(c) < Joint.PosSlop:
+            return
+
+        impulse: float = -eff_mass * c * Joint.PosFactor
+        pos_a: Matrix = self._prim._ua * -impulse
+        pos_b: Matrix = self._prim._ub * (-self._prim._ratio * impulse)
+        bodya.apply_pos_impulse(pos_a, self._prim._ra)
+        bodyb.apply_pos_impulse(pos_b, self._prim._rb)
+
+    def prim(self) -> PulleyJointPrimitive:
+        return self._prim
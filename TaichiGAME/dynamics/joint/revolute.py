@@ -104,7 +104,8 @@ class RevoluteJoint(Joint):
         jvb.negate()
 
         J: Matrix = self._prim._eff_mass * jvb
-        old_impulse: Matrix = self._prim._impulse
+        # NOTE: copy it, the impulse is updated in place
+        old_impulse: Matrix = +self._prim._impulse
         self._prim._impulse += J
 
         max_impulse: float = dt * self._prim._force_max
@@ -120,5 +121,8 @@ class RevoluteJoint(Joint):
         if self._prim._bodya is None or self._prim._bodyb is None:
             return
 
+        Joint.solve_point_position(self._prim._bodya, self._prim._local_pointa,
+                                   self._prim._bodyb, self._prim._local_pointb)
+
     def prim(self) -> RevoluteJointPrimitive:
         return self._prim
@@ -55,7 +55,18 @@ class RotationJoint(Joint):
         self._prim._bodyb.ang_vel -= self._prim._bodyb.inv_inertia * impulse
 
     def solve_position(self, dt: float) -> None:
-        pass
+        bodya: Body = self._prim._bodya
+        bodyb: Body = self._prim._bodyb
+        ii_sum: float = bodya.inv_inertia + bodyb.inv_inertia
+        c: float = bodya.rot - bodyb.rot - self._prim._ref_rot
+        if np.isclose(ii_sum, 0.0) or abs(c) < Joint.PosSlop:
+            return
+
+        impulse: float = -Joint.PosFactor * c / ii_sum
+        if bodya.type != Body.Type.Static:
+            bodya.rot += bodya.inv_inertia * impulse
+        if bodyb.type != Body.Type.Static:
+            bodyb.rot -= bodyb.inv_inertia * impulse
 
     def prim(self) -> RotationJointPrimitive:
         return self._prim
@@ -99,7 +110,20 @@ class OrientationJoint(Joint):
         self._prim._bodya.ang_vel += self._prim._bodya.inv_inertia * impulse
 
     def solve_position(self, dt: float) -> None:
-        pass
+        bodya: Body = self._prim._bodya
+        if bodya is None or np.isclose(bodya.inv_inertia, 0.0):
+            return
+
+        point: Matrix = self._prim._target_point - bodya.pos
+        c: float = point.theta() - bodya.rot - self._prim._ref_rot
+        # NOTE: turn the short way to the target angle
+        c = (c + np.pi) % (2.0 * np.pi) - np.pi
+        if abs(c) < Joint.PosSlop:
+            return
+
+        impulse: float = Joint.PosFactor * c / bodya.inv_inertia
+        if bodya.type != Body.Type.Static:
+            bodya.rot += bodya.inv_inertia * impulse
 
     def prim(self) -> OrientationJointPrimitive:
         return self._prim
@@ -1,9 +1,10 @@
-from typing import Optional, Union, List
+from typing import Iterable, Optional, Union, List
 
 from ..math.matrix import Matrix
 from ..dynamics.body import Body
-from ..common.random import RandomGenerator
+from ..common.random import IdAllocator
 from .joint.joint import Joint
+from .joint.joint_solver import JointSolver
 from .joint.distance import DistanceJoint, DistanceJointPrimitive
 from .joint.point import PointJoint, PointJointPrimitive
 from .joint.pulley import PulleyJoint, PulleyJointPrimitive
@@ -29,11 +30,21 @@ class PhysicsWorld():
         self._damping_ena: bool = True
         self._body_list: List[Body] = []
         self._joint_list: List[Joint] = []
-
-    def prepare_velocity_constraint(self, dt: float) -> None:
-        for joint in self._joint_list:
-            if joint.active:
-                joint.prepare(dt)
+        # NOTE: the ids are owned by the world, so many worlds can
+        # run in one process without sharing the id space
+        self._body_id_alloc: IdAllocator = IdAllocator()
+        self._joint_id_alloc: IdAllocator = IdAllocator()
+        # the joints are solved in packed groups by type
+        self._joint_solver: JointSolver = JointSolver()
+
+    def prepare_velocity_constraint(
+            self,
+            dt: float,
+            shared: Optional[Iterable[Body]] = None) -> None:
+        '''the shared bodies are also moved by the contacts between the
+        joint iterations, None for all the bodies
+        '''
+        self._joint_solver.prepare(self._joint_list, dt, shared)
 
     def step_velocity(self, dt: float) -> None:
         g: Matrix = self._gravity if self._grav_ena else Matrix([0.0, 0.0],
@@ -71,9 +82,14 @@ class PhysicsWorld():
                 pass
 
     def solve_velocity_constraint(self, dt: float) -> None:
-        for joint in self._joint_list:
-            if joint.active:
-                joint.solve_velocity(dt)
+        self._joint_solver.solve_velocity(dt)
+
+    def finish_velocity_constraint(self) -> None:
+        '''write back the joint solver velocities to the bodies and keep
+        the impulses in the joints for the warm start of the next step,
+        call it after the last velocity iteration
+        '''
+        self._joint_solver.finish()
 
     def step_position(self, dt: float) -> None:
         for body in self._body_list:
@@ -189,7 +205,7 @@ class PhysicsWorld():
 
     def create_body(self) -> Body:
         body: Body = Body()
-        body.id = RandomGenerator.unique()
+        body.id = self._body_id_alloc.alloc()
         self._body_list.append(body)
         return body
 
@@ -217,25 +233,27 @@ class PhysicsWorld():
         elif isinstance(prim, OrientationJointPrimitive):
             joint = OrientationJoint(prim)
 
-        joint.id = RandomGenerator.unique()
+        joint.id = self._joint_id_alloc.alloc()
         self._joint_list.append(joint)
         return joint
 
     def remove_body(self, body: Body) -> None:
         for b in self._body_list:
             if body == b:
-                RandomGenerator.pop(body.id)
+                self._body_id_alloc.free(body.id)
                 self._body_list.remove(body)
                 break
 
     def remove_joint(self, joint: Joint) -> None:
         for j in self._joint_list:
             if joint == j:
-                RandomGenerator.pop(joint.id)
+                self._joint_id_alloc.free(joint.id)
                 self._joint_list.remove(joint)
 
     def clear_all_bodies(self) -> None:
         self._body_list.clear()
+        self._body_id_alloc.clear()
 
     def clear_all_joints(self) -> None:
         self._joint_list.clear()
+        self._joint_id_alloc.clear()
@@ -1,16 +1,202 @@
-from typing import Optional, Union, List, cast
+from typing import Dict, List, Tuple, cast
 
+import numpy as np
 import taichi as ti
 
 from ..dynamics.body import Body
 from .joint.joint import Joint
-from ..common.random import RandomGenerator
-from ..geometry.shape import Capsule, Circle, Edge, Polygon, Shape
+from ..common.random import IdAllocator
+from ..geometry.shape import Capsule, Circle, Edge, Ellipse, Polygon, Sector
+from ..geometry.shape import Shape
+
+
+class BodyStore():
+    '''The host arrays of the bodies in the taichi world.
+
+    The rows are in the order of the world fields. A row changed by
+    the host is marked dirty and only the dirty rows are uploaded,
+    the moving state is read back by one download. The rows are
+    looked up by the IdAllocator index of the body id, which is a
+    direct index into the row map.
+    '''
+    def __init__(self):
+        self._pos: np.ndarray = np.zeros((0, 2))
+        self._vel: np.ndarray = np.zeros((0, 2))
+        self._force: np.ndarray = np.zeros((0, 2))
+        # rot, ang_vel, torque, mass, inv_mass, inertia, inv_inertia,
+        # fric, restit
+        self._scalar: np.ndarray = np.zeros((0, 9))
+        # bitmask, phy_type
+        self._int: np.ndarray = np.zeros((0, 2), dtype=np.int32)
+        self._dirty: np.ndarray = np.zeros(0, dtype=bool)
+        # the id index of every row and the row of every id index, -1
+        # if the index has no row
+        self._slot: np.ndarray = np.zeros(0, dtype=np.int64)
+        self._row: np.ndarray = np.zeros(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self._dirty)
+
+    @staticmethod
+    def body_row(body: Body) -> Tuple[List[float], List[float], List[int]]:
+        return ([
+            body.pos.x, body.pos.y, body.vel.x, body.vel.y, body.forces.x,
+            body.forces.y
+        ], [
+            body.rot, body.ang_vel, body.torques, body.mass, body.inv_mass,
+            body.inertia, body.inv_inertia, body.fric, body.restit
+        ], [body.bitmask, int(body.type)])
+
+    def load(self, body_list: List[Body], slot: List[int]) -> None:
+        '''rebuild all rows from the body objects and their id indexes,
+        all are dirty'''
+        row_list = [BodyStore.body_row(body) for body in body_list]
+        vec: np.ndarray = np.array([v[0] for v in row_list],
+                                   dtype=np.float64).reshape(-1, 3, 2)
+        self._pos = vec[:, 0].copy()
+        self._vel = vec[:, 1].copy()
+        self._force = vec[:, 2].copy()
+        self._scalar = np.array([v[1] for v in row_list],
+                                dtype=np.float64).reshape(-1, 9)
+        self._int = np.array([v[2] for v in row_list],
+                             dtype=np.int32).reshape(-1, 2)
+        self._dirty = np.ones(len(body_list), dtype=bool)
+        self.index_row(np.array(slot, dtype=np.int64))
+
+    def index_row(self, slot: np.ndarray) -> None:
+        self._slot = slot
+        self._row = np.full(int(slot.max()) + 1 if len(slot) > 0 else 0,
+                            -1,
+                            dtype=np.int64)
+        self._row[slot] = np.arange(len(slot))
+
+    def row(self, slot: int) -> int:
+        '''get the row of the id index, -1 if it has no row'''
+        if slot >= len(self._row):
+            return -1
+
+        return int(self._row[slot])
+
+    def unlink(self, slot: int) -> None:
+        '''detach the id index from its row, the row is dropped by the
+        next keep'''
+        if slot < len(self._row):
+            self._row[slot] = -1
+
+    def load_body(self, idx: int, body: Body) -> None:
+        vec, scalar, int_data = BodyStore.body_row(body)
+        self._pos[idx] = vec[0:2]
+        self._vel[idx] = vec[2:4]
+        self._force[idx] = vec[4:6]
+        self._scalar[idx] = scalar
+        self._int[idx] = int_data
+        self._dirty[idx] = True
+
+    def mark(self, idx) -> None:
+        '''mark the rows changed by writing the arrays directly'''
+        self._dirty[idx] = True
+
+    def dirty_idx(self) -> np.ndarray:
+        return np.flatnonzero(self._dirty).astype(np.int32)
+
+    def clear_dirty(self) -> None:
+        self._dirty[:] = False
+
+    def keep(self, mask: np.ndarray) -> None:
+        self._pos = self._pos[mask]
+        self._vel = self._vel[mask]
+        self._force = self._force[mask]
+        self._scalar = self._scalar[mask]
+        self._int = self._int[mask]
+        self._dirty = self._dirty[mask]
+        self.index_row(self._slot[mask])
+
+    def vec_data(self, idx: np.ndarray) -> np.ndarray:
+        return np.stack([self._pos[idx], self._vel[idx], self._force[idx]],
+                        axis=1)
+
+    def scalar_data(self, idx: np.ndarray) -> np.ndarray:
+        return np.ascontiguousarray(self._scalar[idx])
+
+    def int_data(self, idx: np.ndarray) -> np.ndarray:
+        return np.ascontiguousarray(self._int[idx])
+
+    def set_state(self, vec: np.ndarray, scalar: np.ndarray) -> None:
+        # the moving state read from the fields
+        self._pos = vec[:, 0].copy()
+        self._vel = vec[:, 1].copy()
+        self._force = vec[:, 2].copy()
+        self._scalar[:, 0:3] = scalar
+
+    @property
+    def pos(self) -> np.ndarray:
+        return self._pos
+
+    @property
+    def vel(self) -> np.ndarray:
+        return self._vel
+
+    @property
+    def force(self) -> np.ndarray:
+        return self._force
+
+    @property
+    def rot(self) -> np.ndarray:
+        return self._scalar[:, 0]
+
+    @property
+    def ang_vel(self) -> np.ndarray:
+        return self._scalar[:, 1]
+
+    @property
+    def torque(self) -> np.ndarray:
+        return self._scalar[:, 2]
+
+    @property
+    def inv_mass(self) -> np.ndarray:
+        return self._scalar[:, 4]
+
+    @property
+    def dirty(self) -> np.ndarray:
+        return self._dirty
 
 
 @ti.data_oriented
 class PhysicsWorld():
-    def __init__(self, body_len: int = 60):
+    '''The physics world whose whole step runs in taichi kernels.
+
+    Every step integrates the forces, finds the pairs by a uniform
+    hash grid, generates the contacts of the circles and the convex
+    polygons and solves them with a jacobi solver, all in parallel
+    loops, so it runs on the multi-threaded ti.cpu as well as the gpu.
+    The body objects are only read in 'init_data' and 'mark_dirty',
+    and updated in 'write_back'. Both go through the BodyStore arrays,
+    so the transfer is a few kernel calls with the whole arrays.
+
+    The fields are sparse: a pointer SNode over dense blocks, sized
+    by 'max_body'. Only the touched blocks are allocated, so the
+    world grows with the scene and the kernels are compiled once. The
+    pointer SNodes are only supported by the cuda and the cpu backends,
+    so init taichi with ti.cuda or ti.cpu, not with ti.gpu, which may
+    pick metal or vulkan.
+    The polygon vertices of all bodies are packed in one buffer and
+    every body keeps its offset and count.
+    '''
+    # same code as Body.Type
+    Kinematic: int = int(Body.Type.Kinematic)
+    Static: int = int(Body.Type.Static)
+    Dynamic: int = int(Body.Type.Dynamic)
+    Bullet: int = int(Body.Type.Bullet)
+
+    # collision geometry used by the kernels
+    CollNone: int = 0
+    CollCircle: int = 1
+    CollPolygon: int = 2
+
+    # the element number of one allocated block
+    BlockLen: int = 1024
+
+    def __init__(self, max_body: int = 1 << 20, curve_vert: int = 8):
         # env var
         self._grav_ena: bool = True
         self._grav: ti.Vector = ti.Vector([0.0, -1.0])
@@ -19,222 +205,969 @@ class PhysicsWorld():
         self._linear_vel_damping: float = 0.9
         self._ang_vel_damping: float = 0.9
 
+        # contact solver
+        self._vel_iter: int = 8
+        self._bias_factor: float = 0.2
+        self._penetration_max: float = 0.01
+        self._restit_thresh: float = 1.0
+
         self._body_list: List[Body] = []
         self._joint_list: List[Joint] = []
+        self._body_id_alloc: IdAllocator = IdAllocator()
+        self._store: BodyStore = BodyStore()
+        # the field indices removed since the last compaction
+        self._removed_list: List[int] = []
+
+        # the virtual sizes, round up to the block
+        blk: int = PhysicsWorld.BlockLen
+        self._max_body: int = -(-max_body // blk) * blk
+        self._max_vert: int = self._max_body * 8
+        self._max_pair: int = self._max_body * 8
+        self._max_hash: int = self._max_body * 2
+        # the vertex number of the curved shape approximation
+        self._curve_vert: int = curve_vert
+
+        self._body_cnt = ti.field(int, shape=())
+        self._vert_total = ti.field(int, shape=())
+        self._pair_cnt = ti.field(int, shape=())
+        # power of two minus one, less than the max hash
+        self._hash_mask = ti.field(int, shape=())
+        self._cell_size = ti.field(float, shape=())
+
+        self._pos = ti.Vector.field(2, float)
+        self._vel = ti.Vector.field(2, float)
+        self._force = ti.Vector.field(2, float)
+        self._rot = ti.field(float)
+        self._ang_vel = ti.field(float)
+        self._torque = ti.field(float)
+        self._mass = ti.field(float)
+        self._inv_mass = ti.field(float)
+        self._inertia = ti.field(float)
+        self._inv_inertia = ti.field(float)
+        self._fric = ti.field(float)
+        self._restit = ti.field(float)
+        self._bitmask = ti.field(int)
+        # same code as Body.Type
+        self._phy_type = ti.field(int)
+        self._coll_type = ti.field(int)
+        self._coll_rad = ti.field(float)
+        self._bound_rad = ti.field(float)
+        self._vert_offset = ti.field(int)
+        self._vert_cnt = ti.field(int)
+        self._removed = ti.field(int)
+
+        # broad phase, the large bodies are not put into the grid
+        # and are tested with all the other bodies
+        self._large = ti.field(int)
+        self._cell = ti.Vector.field(2, int)
+        self._cell_body = ti.field(int)
+
+        # contact solver
+        self._body_ct_cnt = ti.field(int)
+        self._dvel = ti.Vector.field(2, float)
+        self._dang_vel = ti.field(float)
+
+        # moved together in the compaction
+        self._body_field_list = [
+            self._pos, self._vel, self._force, self._rot, self._ang_vel,
+            self._torque, self._mass, self._inv_mass, self._inertia,
+            self._inv_inertia, self._fric, self._restit, self._bitmask,
+            self._phy_type, self._coll_type, self._coll_rad, self._bound_rad,
+            self._vert_cnt, self._large
+        ]
 
-        # body physics params
-        self._body_len: int = body_len
-
-        # rot line
-        self._rot_line_hst = ti.Vector.field(2, float, shape=self._body_len)
-        self._rot_line_hed = ti.Vector.field(2, float, shape=self._body_len)
-        self._rot_line_vst = ti.Vector.field(2, float, shape=self._body_len)
-        self._rot_line_ved = ti.Vector.field(2, float, shape=self._body_len)
-
-        self._mass = ti.field(float, shape=self._body_len)
-        self._inertia = ti.field(float, shape=self._body_len)
-        # 1: kinematic 2: static 3: dynamic
-        self._phy_type = ti.field(int, shape=self._body_len)
-        # 1: circle 2: Edge 3: triangle 4: rect 5: pentagon
-        # 6: hexagon 7: capsule
-        self._shape_type = ti.field(int, shape=self._body_len)
-        # circle
-        self._cirpos = ti.Vector.field(2, float, shape=self._body_len)
-        self._cirspos = ti.Vector.field(2, float, shape=self._body_len)
-        self._cir_rad = ti.field(float, shape=self._body_len)
-        self._scir_rad = ti.field(float, shape=self._body_len)
-        # edge
-        self._edgpos = ti.Vector.field(2, float, shape=self._body_len)
-        self._edg_st = ti.Vector.field(2, float, shape=self._body_len)
-        self._edg_sst = ti.Vector.field(2, float, shape=self._body_len)
-        self._edg_ed = ti.Vector.field(2, float, shape=self._body_len)
-        self._edg_sed = ti.Vector.field(2, float, shape=self._body_len)
-
-        # polygon triangle
-        self._poly_tripos = ti.Vector.field(2, float, shape=self._body_len)
-        self._poly_trispos = ti.Vector.field(2, float, shape=self._body_len)
-        self._poly_trist = ti.Vector.field(2, float, shape=(self._body_len, 3))
-        self._poly_tried = ti.Vector.field(2, float, shape=(self._body_len, 3))
-        self._poly_trisst = ti.Vector.field(2,
-                                            float,
-                                            shape=(self._body_len, 3))
-        self._poly_trised = ti.Vector.field(2,
-                                            float,
-                                            shape=(self._body_len, 3))
-        self._poly_tri_a = ti.Vector.field(2, float, shape=(self._body_len, 1))
-        self._poly_tri_b = ti.Vector.field(2, float, shape=(self._body_len, 1))
-        self._poly_tri_c = ti.Vector.field(2, float, shape=(self._body_len, 1))
-
-        # polygon rect
-        self._poly_recpos = ti.Vector.field(2, float, shape=self._body_len)
-        self._poly_recspos = ti.Vector.field(2, float, shape=self._body_len)
-        self._poly_recst = ti.Vector.field(2, float, shape=(self._body_len, 4))
-        self._poly_reced = ti.Vector.field(2, float, shape=(self._body_len, 4))
-        self._poly_recsst = ti.Vector.field(2,
-                                            float,
-                                            shape=(self._body_len, 4))
-        self._poly_recsed = ti.Vector.field(2,
-                                            float,
-                                            shape=(self._body_len, 4))
-
-        self._poly_rec_a = ti.Vector.field(2, float, shape=(self._body_len, 2))
-        self._poly_rec_b = ti.Vector.field(2, float, shape=(self._body_len, 2))
-        self._poly_rec_c = ti.Vector.field(2, float, shape=(self._body_len, 2))
-
-        # polygon pen
-        self._poly_penpos = ti.Vector.field(2, float, shape=self._body_len)
-        self._poly_penspos = ti.Vector.field(2, float, shape=self._body_len)
-        self._poly_penst = ti.Vector.field(2, float, shape=(self._body_len, 5))
-        self._poly_pened = ti.Vector.field(2, float, shape=(self._body_len, 5))
-        self._poly_pensst = ti.Vector.field(2,
-                                            float,
-                                            shape=(self._body_len, 5))
-        self._poly_pensed = ti.Vector.field(2,
-                                            float,
-                                            shape=(self._body_len, 5))
-
-        self._poly_pen_a = ti.Vector.field(2, float, shape=(self._body_len, 3))
-        self._poly_pen_b = ti.Vector.field(2, float, shape=(self._body_len, 3))
-        self._poly_pen_c = ti.Vector.field(2, float, shape=(self._body_len, 3))
-
-        # capsule
-        self._cap_pos = ti.Vector.field(2, float, shape=self._body_len)
-        self._cap_spos = ti.Vector.field(2, float, shape=self._body_len)
-        self._cap_width = ti.field(float, shape=self._body_len)
-        self._cap_height = ti.field(float, shape=self._body_len)
-        self._cap_c1 = ti.Vector.field(2, float, shape=self._body_len)
-        self._cap_c2 = ti.Vector.field(2, float, shape=self._body_len)
-        self._cap_p = ti.Vector.field(2, float, shape=(self._body_len, 4))
-        self._cap_rec_a = ti.Vector.field(2, float, shape=(self._body_len, 2))
-        self._cap_rec_b = ti.Vector.field(2, float, shape=(self._body_len, 2))
-        self._cap_rec_c = ti.Vector.field(2, float, shape=(self._body_len, 2))
-
-        self._vel = ti.Vector.field(2, float, shape=self._body_len)
-        self._rot = ti.field(float, shape=self._body_len)
-        self._ang_vel = ti.field(float, shape=self._body_len)
-        self._force = ti.Vector.field(2, float, shape=self._body_len)
-        self._torque = ti.field(float, shape=self._body_len)
+        # collision geometry in the local frame, polygons are CCW
+        # and not closed, the edge i is from vert i to vert i + 1
+        self._vert = ti.Vector.field(2, float)
+        self._norm = ti.Vector.field(2, float)
+
+        self._cell_cnt = ti.field(int)
+        self._cell_start = ti.field(int)
+        self._cell_fill = ti.field(int)
+
+        # narrow phase, at most two points per pair, the point k of
+        # the pair p is at p * 2 + k
+        # the normal is from the body a to the body b
+        self._pair = ti.Vector.field(2, int)
+        self._ct_cnt = ti.field(int)
+        self._ct_normal = ti.Vector.field(2, float)
+        self._ct_fric = ti.field(float)
+
+        self._ct_point = ti.Vector.field(2, float)
+        self._ct_pen = ti.field(float)
+        self._ct_mass_n = ti.field(float)
+        self._ct_mass_t = ti.field(float)
+        self._ct_bias = ti.field(float)
+        self._ct_jn = ti.field(float)
+        self._ct_jt = ti.field(float)
+
+        fb: ti.FieldsBuilder = ti.FieldsBuilder()
+        self.place_sparse(fb, self._max_body, self._body_field_list + [
+            self._vert_offset, self._removed, self._cell, self._cell_body,
+            self._body_ct_cnt, self._dvel, self._dang_vel
+        ])
+        self.place_sparse(fb, self._max_vert, [self._vert, self._norm])
+        self.place_sparse(fb, self._max_hash,
+                          [self._cell_cnt, self._cell_start, self._cell_fill])
+        self.place_sparse(
+            fb, self._max_pair,
+            [self._pair, self._ct_cnt, self._ct_normal, self._ct_fric])
+        self.place_sparse(fb, self._max_pair * 2, [
+            self._ct_point, self._ct_pen, self._ct_mass_n, self._ct_mass_t,
+            self._ct_bias, self._ct_jn, self._ct_jt
+        ])
+        self._snode_tree: ti.SNodeTree = fb.finalize()
+
+        # host side render data, rebuilt with the geometry
+        self._host_coll_type: np.ndarray = np.zeros(0, dtype=np.int32)
+        self._host_coll_rad: np.ndarray = np.zeros(0)
+        self._host_vert_cnt: np.ndarray = np.zeros(0, dtype=np.int32)
+        self._cir_idx: np.ndarray = np.zeros(0, dtype=np.int32)
+        self._tri_idx: np.ndarray = np.zeros((0, 3), dtype=np.int32)
+        self._line_idx: np.ndarray = np.zeros((0, 2), dtype=np.int32)
+
+    @staticmethod
+    def place_sparse(fb: ti.FieldsBuilder, size: int, field_list) -> None:
+        fb.pointer(ti.i, size // PhysicsWorld.BlockLen).dense(
+            ti.i, PhysicsWorld.BlockLen).place(*field_list)
 
     def create_body(self):
         body: Body = Body()
-        body.id = RandomGenerator.unique()
+        body.id = self._body_id_alloc.alloc()
         self._body_list.append(body)
         return body
 
+    def remove_body(self, body: Body) -> None:
+        '''remove the body, the fields and the body list are compacted
+        once before the next step or write back'''
+        # NOTE: the store rows are the field rows, which still keep the
+        # bodies removed before
+        slot: int = self._body_id_alloc.index(body.id)
+        field_idx: int = self._store.row(slot)
+        assert field_idx >= 0
+        self._removed[field_idx] = 1
+        self._removed_list.append(field_idx)
+        self._store.unlink(slot)
+        self._body_id_alloc.free(body.id)
+
+    @staticmethod
+    def coll_geom(shape: Shape,
+                  curve_vert: int) -> Tuple[int, float, List[List[float]]]:
+        '''convert the shape to the kernel collision geometry
+
+        the circle is kept, the edge is a two-vertex polygon and the
+        curved shapes are approximated by the convex polygons
+
+        Returns
+        -------
+        Tuple[int, float, List[List[float]]]
+            collision type, circle radius, CCW polygon vertices
+        '''
+        vert: List[List[float]] = []
+        if shape.type == Shape.Type.Circle:
+            return PhysicsWorld.CollCircle, cast(Circle, shape).radius, vert
+
+        elif shape.type == Shape.Type.Polygon:
+            # NOTE: the vertices is closed, the last is the first one
+            poly: Polygon = cast(Polygon, shape)
+            vert = [[v.x, v.y] for v in poly.vertices[:-1]]
+
+        elif shape.type == Shape.Type.Edge:
+            edg: Edge = cast(Edge, shape)
+            vert = [[edg.start.x, edg.start.y], [edg.end.x, edg.end.y]]
+
+        elif shape.type == Shape.Type.Capsule:
+            cap: Capsule = cast(Capsule, shape)
+            rad: float = min(cap.width, cap.height) / 2.0
+            half: float = (max(cap.width, cap.height) - 2.0 * rad) / 2.0
+            base: float = 0.0 if cap.width >= cap.height else np.pi / 2.0
+            side: int = curve_vert // 2
+            for sign in (1.0, -1.0):
+                for i in range(side):
+                    theta: float = base + (i / (side - 1) - 0.5) * np.pi + (
+                        0.0 if sign > 0.0 else np.pi)
+                    vert.append([
+                        sign * half * np.cos(base) + rad * np.cos(theta),
+                        sign * half * np.sin(base) + rad * np.sin(theta)
+                    ])
+
+        elif shape.type == Shape.Type.Ellipse:
+            elp: Ellipse = cast(Ellipse, shape)
+            for i in range(curve_vert):
+                theta = 2.0 * np.pi * i / curve_vert
+                vert.append([elp.A() * np.cos(theta), elp.B() * np.sin(theta)])
+
+        elif shape.type == Shape.Type.Sector:
+            sec: Sector = cast(Sector, shape)
+            vert.append([0.0, 0.0])
+            for i in range(curve_vert - 1):
+                theta = sec.start + sec.span * i / (curve_vert - 2)
+                vert.append(
+                    [sec.radius * np.cos(theta), sec.radius * np.sin(theta)])
+
+        else:
+            return PhysicsWorld.CollNone, 0.0, vert
+
+        # make the order CCW
+        area: float = 0.0
+        for i in range(len(vert)):
+            p1: List[float] = vert[i]
+            p2: List[float] = vert[(i + 1) % len(vert)]
+            area += p1[0] * p2[1] - p2[0] * p1[1]
+
+        if area < 0.0:
+            vert.reverse()
+
+        return PhysicsWorld.CollPolygon, 0.0, vert
+
+    def init_coll(self) -> None:
+        bd_len: int = len(self._body_list)
+        self._host_coll_type = np.zeros(bd_len, dtype=np.int32)
+        self._host_coll_rad = np.zeros(bd_len)
+        self._host_vert_cnt = np.zeros(bd_len, dtype=np.int32)
+
+        # NOTE: the bodies often share one shape object
+        geom_dict: Dict[int, Tuple[int, float, List[List[float]]]] = {}
+        vert_list: List[List[float]] = []
+        for i, body in enumerate(self._body_list):
+            key: int = id(body.shape)
+            if key not in geom_dict:
+                geom_dict[key] = PhysicsWorld.coll_geom(
+                    body.shape, self._curve_vert)
+
+            coll_type, rad, vert = geom_dict[key]
+            self._host_coll_type[i] = coll_type
+            self._host_coll_rad[i] = rad
+            self._host_vert_cnt[i] = len(vert)
+            vert_list.extend(vert)
+
+        cnt: np.ndarray = self._host_vert_cnt
+        vert_total: int = int(cnt.sum())
+        if vert_total > self._max_vert:
+            raise ValueError(f'more than {self._max_vert} vertices')
+
+        offset: np.ndarray = (np.cumsum(cnt) - cnt).astype(np.int32)
+        vert_arr: np.ndarray = np.array(vert_list,
+                                        dtype=np.float64).reshape(-1, 2)
+        owner: np.ndarray = np.repeat(np.arange(bd_len), cnt)
+        nxt: np.ndarray = offset[owner] + (np.arange(vert_total) -
+                                           offset[owner] + 1) % cnt[owner]
+        edge: np.ndarray = vert_arr[nxt] - vert_arr
+        norm_arr: np.ndarray = np.stack([edge[:, 1], -edge[:, 0]], axis=1)
+        norm_arr /= np.linalg.norm(edge, axis=1)[:, None]
+
+        bound_rad: np.ndarray = self._host_coll_rad.copy()
+        np.maximum.at(bound_rad, owner, np.linalg.norm(vert_arr, axis=1))
+
+        # the grid cell fits the ordinary bodies, the bodies much larger
+        # than them (grounds, walls) are handled out of the grid
+        large: np.ndarray = np.zeros(bd_len, dtype=bool)
+        cell_size: float = 1.0
+        if bd_len > 0:
+            # NOTE: the large bodies are mostly static, so measure the
+            # ordinary size by the movable bodies
+            movable: np.ndarray = self._store.inv_mass > 0.0
+            ref_rad: np.ndarray = bound_rad[
+                movable] if movable.any() else bound_rad
+            large = bound_rad > 4.0 * max(np.median(ref_rad), 1e-3)
+            if not large.all():
+                cell_size = max(2.0 * bound_rad[~large].max(), 1e-3)
+
+        self._cell_size[None] = cell_size
+        self.upload_geom(
+            bd_len,
+            np.stack([self._host_coll_type, offset, cnt, large],
+                     axis=1).astype(np.int32),
+            np.stack([self._host_coll_rad, bound_rad], axis=1), vert_total,
+            np.stack([vert_arr, norm_arr], axis=1).reshape(-1, 2, 2))
+
+        self.calc_hash_mask()
+        self.build_render_index()
+
+    @ti.kernel
+    def upload_geom(self, n: int, body_int: ti.types.ndarray(),
+                    body_float: ti.types.ndarray(), vert_total: int,
+                    vert: ti.types.ndarray()):
+        for i in range(n):
+            self._coll_type[i] = body_int[i, 0]
+            self._vert_offset[i] = body_int[i, 1]
+            self._vert_cnt[i] = body_int[i, 2]
+            self._large[i] = body_int[i, 3]
+            self._coll_rad[i] = body_float[i, 0]
+            self._bound_rad[i] = body_float[i, 1]
+            self._removed[i] = 0
+
+        for i in range(vert_total):
+            self._vert[i] = ti.Vector([vert[i, 0, 0], vert[i, 0, 1]])
+            self._norm[i] = ti.Vector([vert[i, 1, 0], vert[i, 1, 1]])
+
+        self._vert_total[None] = vert_total
+
+    def calc_hash_mask(self) -> None:
+        hash_len: int = 1 << int(
+            np.ceil(np.log2(max(len(self._body_list), 1) * 2)))
+        self._hash_mask[None] = min(hash_len, self._max_hash) - 1
+
+    def build_render_index(self) -> None:
+        '''build the circle, triangle fan and outline indices of the
+        packed vertices for the batched drawing'''
+        cnt: np.ndarray = self._host_vert_cnt
+        offset: np.ndarray = np.cumsum(cnt) - cnt
+        self._cir_idx = np.flatnonzero(
+            self._host_coll_type == PhysicsWorld.CollCircle).astype(np.int32)
+
+        # every vertex starts one outline segment
+        body: np.ndarray = np.repeat(np.arange(len(cnt)), cnt)
+        local: np.ndarray = np.arange(cnt.sum()) - offset[body]
+        self._line_idx = np.stack(
+            [local, (local + 1) % np.maximum(cnt[body], 1)], axis=1)
+        self._line_idx = (self._line_idx + offset[body][:, None]).astype(
+            np.int32)
+
+        # the fan of a n-gon has n - 2 triangles
+        tri_cnt: np.ndarray = np.maximum(cnt - 2, 0)
+        body = np.repeat(np.arange(len(cnt)), tri_cnt)
+        local = np.arange(tri_cnt.sum()) - (np.cumsum(tri_cnt) -
+                                            tri_cnt)[body]
+        self._tri_idx = np.stack([np.zeros_like(local), local + 1, local + 2],
+                                 axis=1)
+        self._tri_idx = (self._tri_idx + offset[body][:, None]).astype(
+            np.int32)
+
     def init_data(self):
+        self.drop_removed()
+        bd_len: int = len(self._body_list)
+        if bd_len > self._max_body:
+            raise ValueError(f'{bd_len} bodies, the world can hold '
+                             f'{self._max_body} bodies')
+
+        self._removed_list.clear()
+        self._body_cnt[None] = bd_len
+        self._store.load(
+            self._body_list,
+            [self._body_id_alloc.index(v.id) for v in self._body_list])
+        self.upload()
+        self.init_coll()
+
+    def mark_dirty(self, body: Body) -> None:
+        '''reload the body object changed by the host, it is uploaded
+        with the other dirty bodies before the next step'''
+        row: int = self._store.row(self._body_id_alloc.index(body.id))
+        assert row >= 0
+        self._store.load_body(row, body)
+
+    def upload(self) -> None:
+        '''upload the dirty rows of the store in one kernel'''
+        idx: np.ndarray = self._store.dirty_idx()
+        if len(idx) > 0:
+            self.upload_body(len(idx), idx, self._store.vec_data(idx),
+                             self._store.scalar_data(idx),
+                             self._store.int_data(idx))
+        self._store.clear_dirty()
+
+    @ti.kernel
+    def upload_body(self, n: int, idx: ti.types.ndarray(),
+                    vec: ti.types.ndarray(), scalar: ti.types.ndarray(),
+                    int_data: ti.types.ndarray()):
+        for k in range(n):
+            i = idx[k]
+            self._pos[i] = ti.Vector([vec[k, 0, 0], vec[k, 0, 1]])
+            self._vel[i] = ti.Vector([vec[k, 1, 0], vec[k, 1, 1]])
+            self._force[i] = ti.Vector([vec[k, 2, 0], vec[k, 2, 1]])
+            self._rot[i] = scalar[k, 0]
+            self._ang_vel[i] = scalar[k, 1]
+            self._torque[i] = scalar[k, 2]
+            self._mass[i] = scalar[k, 3]
+            self._inv_mass[i] = scalar[k, 4]
+            self._inertia[i] = scalar[k, 5]
+            self._inv_inertia[i] = scalar[k, 6]
+            self._fric[i] = scalar[k, 7]
+            self._restit[i] = scalar[k, 8]
+            self._bitmask[i] = int_data[k, 0]
+            self._phy_type[i] = int_data[k, 1]
+
+    def download(self) -> None:
+        '''read the moving state of all bodies into the store'''
+        self.compact()
         bd_len: int = len(self._body_list)
-        for i in range(bd_len):
-            self._mass[i] = self._body_list[i].mass
-            self._inertia[i] = self._body_list[i].inertia
-            self._phy_type[i] = self._body_list[i].type + 1
-            self._vel[i] = ti.Vector(
-                [self._body_list[i].vel.x, self._body_list[i].vel.y])
-            self._rot[i] = self._body_list[i].rot
-            self._ang_vel[i] = self._body_list[i].ang_vel
-            self._force[i] = ti.Vector(
-                [self._body_list[i].forces.x, self._body_list[i].forces.y])
-            self._torque[i] = self._body_list[i].torques
-
-            pos = ti.Vector(
-                [self._body_list[i].pos.x, self._body_list[i].pos.y])
-            if self._body_list[i].shape.type == Shape.Type.Circle:
-                cir: Circle = cast(Circle, self._body_list[i].shape)
-                self._shape_type[i] = 1
-                self._cirpos[i] = pos
-                self._cir_rad[i] = cir.radius
-
-            elif self._body_list[i].shape.type == Shape.Type.Edge:
-                edg: Edge = cast(Edge, self._body_list[i].shape)
-                self._shape_type[i] = 2
-                self._edg_st[i] = ti.Vector([edg.start.x, edg.start.y])
-                self._edg_ed[i] = ti.Vector([edg.end.x, edg.end.y])
-
-            elif self._body_list[i].shape.type == Shape.Type.Polygon:
-                poly: Polygon = cast(Polygon, self._body_list[i].shape)
-                vert_len: int = len(poly.vertices)
-                assert vert_len >= 4
-
-                if vert_len == 4:
-                    self._shape_type[i] = 3
-                    self._poly_tripos[i] = pos
-                    for j in range(3):
-                        self._poly_trist[i, j] = ti.Vector(
-                            [poly.vertices[j].x, poly.vertices[j].y])
-                        self._poly_tried[i, j] = ti.Vector(
-                            [poly.vertices[j + 1].x, poly.vertices[j + 1].y])
-
-                elif vert_len == 5:
-                    self._shape_type[i] = 4
-                    self._poly_recpos[i] = pos
-                    for j in range(4):
-                        self._poly_recst[i, j] = ti.Vector(
-                            [poly.vertices[j].x, poly.vertices[j].y])
-                        self._poly_reced[i, j] = ti.Vector(
-                            [poly.vertices[j + 1].x, poly.vertices[j + 1].y])
-
-                elif vert_len == 6:
-                    self._shape_type[i] = 5
-                    self._poly_penpos[i] = pos
-                    for j in range(5):
-                        self._poly_penst[i, j] = ti.Vector(
-                            [poly.vertices[j].x, poly.vertices[j].y])
-                        self._poly_pened[i, j] = ti.Vector(
-                            [poly.vertices[j + 1].x, poly.vertices[j + 1].y])
-
-                elif vert_len == 7:
-                    self._shape_type[i] = 6
-
-            elif self._body_list[i].shape.type == Shape.Type.Capsule:
-                self._shape_type[i] = 7
-                self._cap_pos[i] = pos
-                cap: Capsule = cast(Capsule, self._body_list[i].shape)
-                self._cap_width[i] = cap.width
-                self._cap_height[i] = cap.height
+        vec: np.ndarray = np.zeros((bd_len, 3, 2))
+        scalar: np.ndarray = np.zeros((bd_len, 3))
+        self.download_state(bd_len, vec, scalar)
+        self._store.set_state(vec, scalar)
+
+    @ti.kernel
+    def download_state(self, n: int, vec: ti.types.ndarray(),
+                       scalar: ti.types.ndarray()):
+        for i in range(n):
+            for j in ti.static(range(2)):
+                vec[i, 0, j] = self._pos[i][j]
+                vec[i, 1, j] = self._vel[i][j]
+                vec[i, 2, j] = self._force[i][j]
+            scalar[i, 0] = self._rot[i]
+            scalar[i, 1] = self._ang_vel[i]
+            scalar[i, 2] = self._torque[i]
+
+    def compact(self) -> None:
+        '''drop the removed bodies and their vertices in one pass'''
+        if len(self._removed_list) == 0:
+            return
+
+        # NOTE: upload the dirty rows before they are moved
+        self.upload()
+        keep: np.ndarray = np.ones(self._body_cnt[None], dtype=bool)
+        keep[self._removed_list] = False
+        self._store.keep(keep)
+        self._host_coll_type = self._host_coll_type[keep]
+        self._host_coll_rad = self._host_coll_rad[keep]
+        self._host_vert_cnt = self._host_vert_cnt[keep]
+        self._removed_list.clear()
+        self.drop_removed()
+
+        self.compact_field()
+        self.calc_hash_mask()
+        self.build_render_index()
+
+    def drop_removed(self) -> None:
+        # NOTE: the removed bodies are kept in the list until the
+        # compaction, their ids are freed
+        self._body_list = [
+            v for v in self._body_list if self._body_id_alloc.is_valid(v.id)
+        ]
 
     @ti.kernel
-    def step_velocity(self, dt: float):
-        lvd = 1.0 / (1.0 + dt * self._linear_vel_damping)
-        avd = 1.0 / (1.0 + dt * self._ang_vel_damping)
-        g = self._grav
+    def compact_field(self):
+        # NOTE: the dst is never after the src, so it is safe to move
+        # the data in place by one serial pass
+        dst = 0
+        vert_dst = 0
+        ti.loop_config(serialize=True)
+        for i in range(self._body_cnt[None]):
+            if self._removed[i] == 0:
+                offset = self._vert_offset[i]
+                for j in range(self._vert_cnt[i]):
+                    self._vert[vert_dst + j] = self._vert[offset + j]
+                    self._norm[vert_dst + j] = self._norm[offset + j]
+
+                for f in ti.static(self._body_field_list):
+                    f[dst] = f[i]
+                self._vert_offset[dst] = vert_dst
+                vert_dst += self._vert_cnt[i]
+                dst += 1
+            self._removed[i] = 0
+
+        self._body_cnt[None] = dst
+        self._vert_total[None] = vert_dst
+
+    def write_back(self) -> None:
+        '''copy the kernel state back to the body objects'''
+        self.download()
+        pos: np.ndarray = self._store.pos
+        vel: np.ndarray = self._store.vel
+        rot: np.ndarray = self._store.rot
+        ang_vel: np.ndarray = self._store.ang_vel
+        for i, body in enumerate(self._body_list):
+            body.pos.x = float(pos[i, 0])
+            body.pos.y = float(pos[i, 1])
+            body.vel.x = float(vel[i, 0])
+            body.vel.y = float(vel[i, 1])
+            body.rot = float(rot[i])
+            body.ang_vel = float(ang_vel[i])
+
+    def step(self, dt: float) -> None:
+        self.compact()
+        self.upload()
+        self.step_velocity(dt)
+        self.broad_phase()
+        self.check_pair()
+        self.narrow_phase()
+        self.prepare_contact(dt)
+        for i in range(self._vel_iter):
+            self.solve_contact()
+        self.step_position(dt)
 
-        for i in range(self._body_len):
-            if self._phy_type[i] == -1:
+    def check_pair(self) -> None:
+        '''the pairs over the capacity are dropped by the broad phase,
+        raise instead of losing their contacts silently
+        '''
+        pair_cnt: int = self._pair_cnt[None]
+        if pair_cnt > self._max_pair:
+            raise ValueError(f'{pair_cnt} pairs, the world can hold '
+                             f'{self._max_pair} pairs, enlarge the max_body')
+
+    def step_velocity(self, dt: float) -> None:
+        g: List[float] = [0.0, 0.0]
+        if self._grav_ena:
+            g = [self._grav[0], self._grav[1]]
+
+        lvd: float = 1.0
+        avd: float = 1.0
+        if self._damping_ena:
+            lvd = 1.0 / (1.0 + dt * self._linear_vel_damping)
+            avd = 1.0 / (1.0 + dt * self._ang_vel_damping)
+
+        self.integrate_velocity(dt, g[0], g[1], lvd, avd)
+
+    @ti.kernel
+    def integrate_velocity(self, dt: float, gx: float, gy: float, lvd: float,
+                           avd: float):
+        g = ti.Vector([gx, gy])
+        for i in range(self._body_cnt[None]):
+            if self._phy_type[i] == self.Static:
                 self._vel[i] = ti.Vector([0.0, 0.0])
                 self._ang_vel[i] = 0.0
 
-            elif self._phy_type[i] == 0:
-                self._force[i] = self._force[i] + self._mass[i] * g
-                self._vel[
-                    i] = self._vel[i] + self._force[i] / self._mass[i] * dt
-                self._ang_vel[i] = self._ang_vel[
-                    i] + self._torque[i] / self._inertia[i] * dt
+            elif self._phy_type[i] == self.Dynamic:
+                self._force[i] += self._mass[i] * g
+                self._vel[i] += self._force[i] * self._inv_mass[i] * dt
+                self._ang_vel[i] += self._torque[i] * self._inv_inertia[i] * dt
 
-                self._vel[i] = self._vel[i] * lvd
-                self._ang_vel[i] = self._ang_vel[i] * avd
+                self._vel[i] *= lvd
+                self._ang_vel[i] *= avd
 
-            elif self._phy_type[i] == 1:
-                self._vel[
-                    i] = self._vel[i] + self._force[i] / self._mass[i] * dt
-                self._ang_vel[i] = self._ang_vel[
-                    i] + self._torque[i] / self._inertia[i] * dt
+            elif self._phy_type[i] == self.Kinematic:
+                self._vel[i] += self._force[i] * self._inv_mass[i] * dt
+                self._ang_vel[i] += self._torque[i] * self._inv_inertia[i] * dt
 
-                self._vel[i] = self._vel[i] * lvd
-                self._ang_vel[i] = self._ang_vel[i] * avd
+                self._vel[i] *= lvd
+                self._ang_vel[i] *= avd
 
     @ti.kernel
     def step_position(self, dt: float):
-        for i in range(self._body_len):
-            if self._phy_type[i] == 0:
-                pass
-
-            elif self._phy_type[i] == 1 or self._phy_type[i] == 3:
-                # self._pos[i] = self._pos[i] + self._vel[i] * dt
-                self._rot[i] = self._rot[i] + self._ang_vel[i] * dt
+        for i in range(self._body_cnt[None]):
+            if self._phy_type[i] == self.Dynamic or self._phy_type[
+                    i] == self.Kinematic:
+                self._pos[i] += self._vel[i] * dt
+                self._rot[i] += self._ang_vel[i] * dt
                 self._force[i] = ti.Vector([0.0, 0.0])
                 self._torque[i] = 0.0
 
+    @ti.func
+    def rot_mat(self, radian):
+        cos_val = ti.cos(radian)
+        sin_val = ti.sin(radian)
+        return ti.Matrix([[cos_val, -sin_val], [sin_val, cos_val]])
+
+    @ti.func
+    def cross(self, a, b):
+        return a.x * b.y - a.y * b.x
+
+    @ti.func
+    def cross_sv(self, w, r):
+        # w x r, w is the scalar angle velocity
+        return ti.Vector([-w * r.y, w * r.x])
+
+    @ti.func
+    def cell_hash(self, cell):
+        return ((cell.x * 73856093) ^
+                (cell.y * 19349663)) & self._hash_mask[None]
+
+    @ti.func
+    def world_vert(self, i, j, rot):
+        return self._pos[i] + rot @ self._vert[self._vert_offset[i] + j]
+
+    @ti.func
+    def world_norm(self, i, j, rot):
+        return rot @ self._norm[self._vert_offset[i] + j]
+
+    @ti.func
+    def calc_aabb(self, i):
+        lo = self._pos[i] - self._coll_rad[i]
+        hi = self._pos[i] + self._coll_rad[i]
+        if self._coll_type[i] == self.CollPolygon:
+            rot = self.rot_mat(self._rot[i])
+            lo = ti.Vector([1e30, 1e30])
+            hi = ti.Vector([-1e30, -1e30])
+            for j in range(self._vert_cnt[i]):
+                v = self.world_vert(i, j, rot)
+                lo = ti.min(lo, v)
+                hi = ti.max(hi, v)
+        return lo, hi
+
+    @ti.func
+    def add_pair(self, a, b):
+        both_fixed = self._inv_mass[a] == 0.0 and self._inv_mass[b] == 0.0
+        if not both_fixed and (self._bitmask[a] & self._bitmask[b]) != 0:
+            if self._coll_type[a] != self.CollNone and self._coll_type[
+                    b] != self.CollNone:
+                lo_a, hi_a = self.calc_aabb(a)
+                lo_b, hi_b = self.calc_aabb(b)
+                if (lo_a <= hi_b).all() and (lo_b <= hi_a).all():
+                    # NOTE: keep counting over the capacity, the host
+                    # checks the count after the kernel
+                    idx = ti.atomic_add(self._pair_cnt[None], 1)
+                    if idx < self._max_pair:
+                        self._pair[idx] = ti.Vector([ti.min(a, b),
+                                                     ti.max(a, b)])
+
+    @ti.kernel
+    def broad_phase(self):
+        n = self._body_cnt[None]
+        cs = self._cell_size[None]
+        self._pair_cnt[None] = 0
+        for h in range(self._hash_mask[None] + 1):
+            self._cell_cnt[h] = 0
+
+        for i in range(n):
+            if self._large[i] == 0:
+                cell = ti.floor(self._pos[i] / cs, int)
+                self._cell[i] = cell
+                ti.atomic_add(self._cell_cnt[self.cell_hash(cell)], 1)
+
+        start = 0
+        ti.loop_config(serialize=True)
+        for h in range(self._hash_mask[None] + 1):
+            self._cell_start[h] = start
+            self._cell_fill[h] = start
+            start += self._cell_cnt[h]
+
+        for i in range(n):
+            if self._large[i] == 0:
+                slot = ti.atomic_add(
+                    self._cell_fill[self.cell_hash(self._cell[i])], 1)
+                self._cell_body[slot] = i
+
+        for i in range(n):
+            if self._large[i] == 0:
+                # the cell is no smaller than the bounding circle, so
+                # the overlapped bodies are in the 3x3 neighbour cells
+                for dx, dy in ti.static(ti.ndrange((-1, 2), (-1, 2))):
+                    cell = self._cell[i] + ti.Vector([dx, dy])
+                    h = self.cell_hash(cell)
+                    for k in range(self._cell_start[h],
+                                   self._cell_start[h] + self._cell_cnt[h]):
+                        j = self._cell_body[k]
+                        # NOTE: skip the hash collisions
+                        if j > i and (self._cell[j] == cell).all():
+                            self.add_pair(i, j)
+            else:
+                for j in range(n):
+                    if j != i and (self._large[j] == 0 or j > i):
+                        self.add_pair(i, j)
+
+    @ti.func
+    def max_separation(self, a, b):
+        # the max separation of the edges of a from the vertices of b
+        rot_a = self.rot_mat(self._rot[a])
+        rot_b = self.rot_mat(self._rot[b])
+        best_sep = -1e30
+        best_edge = 0
+        for i in range(self._vert_cnt[a]):
+            n = self.world_norm(a, i, rot_a)
+            v = self.world_vert(a, i, rot_a)
+            sep = 1e30
+            for j in range(self._vert_cnt[b]):
+                sep = ti.min(sep, n.dot(self.world_vert(b, j, rot_b) - v))
+
+            if sep > best_sep:
+                best_sep = sep
+                best_edge = i
+        return best_sep, best_edge
+
+    @ti.func
+    def clip_segment(self, p1, p2, d, offset):
+        # keep the part with d.dot(x) <= offset
+        d1 = d.dot(p1) - offset
+        d2 = d.dot(p2) - offset
+        q1 = p1
+        q2 = p2
+        valid = 1
+        if d1 > 0.0 and d2 > 0.0:
+            valid = 0
+        elif d1 > 0.0:
+            q1 = p1 + (p2 - p1) * (d1 / (d1 - d2))
+        elif d2 > 0.0:
+            q2 = p1 + (p2 - p1) * (d1 / (d1 - d2))
+        return q1, q2, valid
+
+    @ti.func
+    def collide_polygons(self, p, a, b):
+        sep_a, edge_a = self.max_separation(a, b)
+        sep_b, edge_b = self.max_separation(b, a)
+        cnt = 0
+        if sep_a <= 0.0 and sep_b <= 0.0:
+            ref = a
+            inc = b
+            edge = edge_a
+            flip = 0
+            # NOTE: prefer a to keep the manifold stable
+            if sep_b > sep_a + 0.0005:
+                ref = b
+                inc = a
+                edge = edge_b
+                flip = 1
+
+            rot_ref = self.rot_mat(self._rot[ref])
+            rot_inc = self.rot_mat(self._rot[inc])
+            n = self.world_norm(ref, edge, rot_ref)
+            v1 = self.world_vert(ref, edge, rot_ref)
+            v2 = self.world_vert(ref, (edge + 1) % self._vert_cnt[ref],
+                                 rot_ref)
+
+            # the incident edge is the most anti-parallel one
+            inc_edge = 0
+            min_dot = 1e30
+            for i in range(self._vert_cnt[inc]):
+                val = n.dot(self.world_norm(inc, i, rot_inc))
+                if val < min_dot:
+                    min_dot = val
+                    inc_edge = i
+
+            w1 = self.world_vert(inc, inc_edge, rot_inc)
+            w2 = self.world_vert(inc, (inc_edge + 1) % self._vert_cnt[inc],
+                                 rot_inc)
+
+            t = (v2 - v1).normalized()
+            q1, q2, valid1 = self.clip_segment(w1, w2, -t, -t.dot(v1))
+            q1, q2, valid2 = self.clip_segment(q1, q2, t, t.dot(v2))
+            if valid1 == 1 and valid2 == 1:
+                for q in ti.static([q1, q2]):
+                    sep = n.dot(q - v1)
+                    if sep <= 0.0:
+                        # the middle of the two surfaces
+                        self._ct_point[p * 2 + cnt] = q - n * sep * 0.5
+                        self._ct_pen[p * 2 + cnt] = -sep
+                        cnt += 1
+
+            if flip == 1:
+                n = -n
+            self._ct_normal[p] = n
+        return cnt
+
+    @ti.func
+    def collide_polygon_circle(self, p, a, b, sign):
+        # a is polygon, b is circle, the normal is multiplied by sign
+        rot = self.rot_mat(self._rot[a])
+        center = rot.transpose() @ (self._pos[b] - self._pos[a])
+        rad = self._coll_rad[b]
+        offset = self._vert_offset[a]
+        vert_cnt = self._vert_cnt[a]
+        sep = -1e30
+        edge = 0
+        for i in range(vert_cnt):
+            val = self._norm[offset + i].dot(center - self._vert[offset + i])
+            if val > sep:
+                sep = val
+                edge = i
+
+        cnt = 0
+        if sep <= rad:
+            v1 = self._vert[offset + edge]
+            v2 = self._vert[offset + (edge + 1) % vert_cnt]
+            n = self._norm[offset + edge]
+            dist = sep
+            if sep > 1e-6:
+                # the vertex regions
+                if (center - v1).dot(v2 - v1) <= 0.0 and (center -
+                                                          v1).norm() > 1e-6:
+                    dist = (center - v1).norm()
+                    n = (center - v1) / dist
+                elif (center - v2).dot(v1 - v2) <= 0.0 and (
+                        center - v2).norm() > 1e-6:
+                    dist = (center - v2).norm()
+                    n = (center - v2) / dist
+
+            if dist <= rad:
+                nw = rot @ n
+                self._ct_point[p * 2] = self._pos[b] - nw * (dist + rad) * 0.5
+                self._ct_pen[p * 2] = rad - dist
+                self._ct_normal[p] = nw * sign
+                cnt = 1
+        return cnt
+
+    @ti.func
+    def collide_circles(self, p, a, b):
+        d = self._pos[b] - self._pos[a]
+        dist = d.norm()
+        rad = self._coll_rad[a] + self._coll_rad[b]
+        cnt = 0
+        if dist <= rad:
+            n = ti.Vector([0.0, 1.0])
+            if dist > 1e-6:
+                n = d / dist
+            self._ct_normal[p] = n
+            self._ct_point[p * 2] = self._pos[a] + n * (self._coll_rad[a] -
+                                                        (rad - dist) * 0.5)
+            self._ct_pen[p * 2] = rad - dist
+            cnt = 1
+        return cnt
+
+    @ti.kernel
+    def narrow_phase(self):
+        for p in range(ti.min(self._pair_cnt[None], self._max_pair)):
+            a = self._pair[p].x
+            b = self._pair[p].y
+            cnt = 0
+            if self._coll_type[a] == self.CollCircle and self._coll_type[
+                    b] == self.CollCircle:
+                cnt = self.collide_circles(p, a, b)
+            elif self._coll_type[a] == self.CollCircle:
+                cnt = self.collide_polygon_circle(p, b, a, -1.0)
+            elif self._coll_type[b] == self.CollCircle:
+                cnt = self.collide_polygon_circle(p, a, b, 1.0)
+            else:
+                cnt = self.collide_polygons(p, a, b)
+            self._ct_cnt[p] = cnt
+
+    @ti.kernel
+    def prepare_contact(self, dt: float):
+        pair_cnt = ti.min(self._pair_cnt[None], self._max_pair)
+        for i in range(self._body_cnt[None]):
+            self._body_ct_cnt[i] = 0
+
+        for p in range(pair_cnt):
+            ti.atomic_add(self._body_ct_cnt[self._pair[p].x], self._ct_cnt[p])
+            ti.atomic_add(self._body_ct_cnt[self._pair[p].y], self._ct_cnt[p])
+
+        for p in range(pair_cnt):
+            a = self._pair[p].x
+            b = self._pair[p].y
+            n = self._ct_normal[p]
+            t = ti.Vector([n.y, -n.x])
+            # NOTE: split the body mass into every contact, then the
+            # jacobi iteration converges like the averaged sub bodies
+            sa = ti.cast(self._body_ct_cnt[a], float)
+            sb = ti.cast(self._body_ct_cnt[b], float)
+            restit = ti.min(self._restit[a], self._restit[b])
+            self._ct_fric[p] = ti.sqrt(self._fric[a] * self._fric[b])
+
+            for k in range(self._ct_cnt[p]):
+                c = p * 2 + k
+                ra = self._ct_point[c] - self._pos[a]
+                rb = self._ct_point[c] - self._pos[b]
+                rna = self.cross(ra, n)
+                rnb = self.cross(rb, n)
+                rta = self.cross(ra, t)
+                rtb = self.cross(rb, t)
+                kn = sa * (self._inv_mass[a] + self._inv_inertia[a] * rna *
+                           rna) + sb * (self._inv_mass[b] +
+                                        self._inv_inertia[b] * rnb * rnb)
+                kt = sa * (self._inv_mass[a] + self._inv_inertia[a] * rta *
+                           rta) + sb * (self._inv_mass[b] +
+                                        self._inv_inertia[b] * rtb * rtb)
+                self._ct_mass_n[c] = 0.0 if kn <= 0.0 else 1.0 / kn
+                self._ct_mass_t[c] = 0.0 if kt <= 0.0 else 1.0 / kt
+
+                dv = self._vel[b] + self.cross_sv(
+                    self._ang_vel[b], rb) - self._vel[a] - self.cross_sv(
+                        self._ang_vel[a], ra)
+                vn = dv.dot(n)
+                bias = self._bias_factor / dt * ti.max(
+                    self._ct_pen[c] - self._penetration_max, 0.0)
+                if vn < -self._restit_thresh:
+                    bias = ti.max(bias, -restit * vn)
+
+                self._ct_bias[c] = bias
+                self._ct_jn[c] = 0.0
+                self._ct_jt[c] = 0.0
+
+    @ti.kernel
+    def solve_contact(self):
+        pair_cnt = ti.min(self._pair_cnt[None], self._max_pair)
+        for i in range(self._body_cnt[None]):
+            self._dvel[i] = ti.Vector([0.0, 0.0])
+            self._dang_vel[i] = 0.0
+
+        # every contact reads the velocity of the last iteration
+        for p in range(pair_cnt):
+            a = self._pair[p].x
+            b = self._pair[p].y
+            n = self._ct_normal[p]
+            t = ti.Vector([n.y, -n.x])
+            for k in range(self._ct_cnt[p]):
+                c = p * 2 + k
+                ra = self._ct_point[c] - self._pos[a]
+                rb = self._ct_point[c] - self._pos[b]
+                dv = self._vel[b] + self.cross_sv(
+                    self._ang_vel[b], rb) - self._vel[a] - self.cross_sv(
+                        self._ang_vel[a], ra)
+
+                old_jn = self._ct_jn[c]
+                jn = ti.max(
+                    old_jn + self._ct_mass_n[c] *
+                    (-dv.dot(n) + self._ct_bias[c]), 0.0)
+                self._ct_jn[c] = jn
+
+                max_jt = self._ct_fric[p] * jn
+                old_jt = self._ct_jt[c]
+                jt = ti.min(
+                    ti.max(old_jt - self._ct_mass_t[c] * dv.dot(t), -max_jt),
+                    max_jt)
+                self._ct_jt[c] = jt
+
+                impulse = n * (jn - old_jn) + t * (jt - old_jt)
+                ti.atomic_sub(self._dvel[a], impulse * self._inv_mass[a])
+                ti.atomic_sub(self._dang_vel[a],
+                              self._inv_inertia[a] * self.cross(ra, impulse))
+                ti.atomic_add(self._dvel[b], impulse * self._inv_mass[b])
+                ti.atomic_add(self._dang_vel[b],
+                              self._inv_inertia[b] * self.cross(rb, impulse))
+
+        for i in range(self._body_cnt[None]):
+            self._vel[i] += self._dvel[i]
+            self._ang_vel[i] += self._dang_vel[i]
+
+    @ti.kernel
+    def contact_cnt(self) -> int:
+        res = 0
+        for p in range(ti.min(self._pair_cnt[None], self._max_pair)):
+            res += self._ct_cnt[p]
+        return res
+
     def clear_all_bodies(self) -> None:
         self._body_list.clear()
+        self._body_id_alloc.clear()
+        self._removed_list.clear()
+        self._store.load([], [])
+        self._body_cnt[None] = 0
+        self._vert_total[None] = 0
 
     def clear_all_joints(self) -> None:
         self._joint_list.clear()
+
+    @property
+    def grav(self) -> ti.Vector:
+        return self._grav
+
+    @grav.setter
+    def grav(self, grav: ti.Vector) -> None:
+        self._grav = grav
+
+    @property
+    def grav_ena(self) -> bool:
+        return self._grav_ena
+
+    @grav_ena.setter
+    def grav_ena(self, grav_ena: bool) -> None:
+        self._grav_ena = grav_ena
+
+    @property
+    def damping_ena(self) -> bool:
+        return self._damping_ena
+
+    @damping_ena.setter
+    def damping_ena(self, damping_ena: bool) -> None:
+        self._damping_ena = damping_ena
+
+    @property
+    def vel_iter(self) -> int:
+        return self._vel_iter
+
+    @vel_iter.setter
+    def vel_iter(self, vel_iter: int) -> None:
+        self._vel_iter = vel_iter
+
+    @property
+    def store(self) -> BodyStore:
+        return self._store
+
+    @property
+    def max_body(self) -> int:
+        return self._max_body
+
+    @property
+    def body_cnt(self) -> int:
+        return self._body_cnt[None]
+
+    @property
+    def vert_total(self) -> int:
+        return self._vert_total[None]
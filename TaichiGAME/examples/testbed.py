@@ -169,7 +169,8 @@ class FrameRaycast(ng.Frame):
             ng.Render.rd_shape(scene._gui, prim, scene._cam.world_to_screen,
                                scene._cam.meter_to_pixel,
                                ng.Config.QueryRaycasFillColor,
-                               ng.Config.QueryRaycasOutLineColor)
+                               ng.Config.QueryRaycasOutLineColor,
+                               scene._cam.world_to_screen_arr)
 
 
 class FrameBitmask(ng.Frame):
@@ -10,7 +10,9 @@ import TaichiGAME as ng
 
 from TaichiGAME.ti_scene import Scene
 
-ti.init(arch=ti.gpu, excepthook=True)
+# NOTE: the sparse fields of the world need cuda or cpu, the metal and
+# vulkan backends picked by ti.gpu do not support the pointer SNodes
+ti.init(arch=[ti.cuda, ti.cpu], excepthook=True)
 
 scene = Scene('GPU Testbed')
 
@@ -1,7 +1,21 @@
+from __future__ import annotations
 from abc import ABC, abstractmethod
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .simulation import Simulation
 
 
 class Frame(ABC):
+    # NOTE: set when the frame is registered, so the frame can
+    # load bodies into a headless sim without a global scene
+    _sim: Optional[Simulation] = None
+
+    @property
+    def sim(self) -> Simulation:
+        assert self._sim is not None
+        return self._sim
+
     @abstractmethod
     def load(self) -> None:
         raise NotImplementedError
@@ -0,0 +1,2 @@
+from .distance import *
+from .occupancy import *
@@ -0,0 +1,78 @@
+import numpy as np
+
+
+class DistanceTransform():
+    '''the exact Euclidean distance transform of the binary grids
+
+    it is the lower envelope of parabolas by Felzenszwalb and
+    Huttenlocher, which is linear in the cell count. The 2D transform is
+    the 1D one on the columns and then on the rows, and every 1D pass
+    runs all the lines at once.
+    '''
+    # the sample value of the non-feature cells
+    Inf: float = 1e20
+
+    @staticmethod
+    def squared_1d(f: np.ndarray) -> np.ndarray:
+        '''the squared distance transform of every row of the sampled
+        function f(R, N), f is 0 at the features and Inf elsewhere
+        '''
+        rows, size = f.shape
+        line: np.ndarray = np.arange(rows)
+        # the parabola apexes of the envelope and their range borders
+        v: np.ndarray = np.zeros((rows, size), dtype=np.int64)
+        z: np.ndarray = np.zeros((rows, size + 1))
+        k: np.ndarray = np.zeros(rows, dtype=np.int64)
+        z[:, 0] = -np.inf
+        z[:, 1] = np.inf
+
+        for q in range(1, size):
+            fq: np.ndarray = f[:, q] + q * q
+            while True:
+                vk: np.ndarray = v[line, k]
+                s: np.ndarray = (fq - (f[line, vk] + vk * vk)) / (2 * q -
+                                                                  2 * vk)
+                # NOTE: the new parabola hides the last one of the line
+                hide: np.ndarray = s <= z[line, k]
+                if not np.any(hide):
+                    break
+                k[hide] -= 1
+
+            k += 1
+            v[line, k] = q
+            z[line, k] = s
+            z[line, k + 1] = np.inf
+
+        res: np.ndarray = np.empty_like(f)
+        k[:] = 0
+        for q in range(size):
+            while True:
+                ahead: np.ndarray = z[line, k + 1] < q
+                if not np.any(ahead):
+                    break
+                k[ahead] += 1
+
+            vk = v[line, k]
+            res[:, q] = (q - vk) * (q - vk) + f[line, vk]
+
+        return res
+
+    @staticmethod
+    def distance(mask: np.ndarray) -> np.ndarray:
+        '''get the distance(in cells) of every cell to the nearest True
+        cell, inf if there is no True cell
+        '''
+        f: np.ndarray = np.where(mask, 0.0, DistanceTransform.Inf)
+        f = DistanceTransform.squared_1d(f.T).T
+        f = DistanceTransform.squared_1d(f)
+        res: np.ndarray = np.sqrt(f)
+        res[f >= DistanceTransform.Inf / 2.0] = np.inf
+        return res
+
+    @staticmethod
+    def signed_distance(mask: np.ndarray) -> np.ndarray:
+        '''get the signed distance(in cells) between the cell centers,
+        positive outside the True cells and negative inside them
+        '''
+        return DistanceTransform.distance(mask) - DistanceTransform.distance(
+            ~mask)
@@ -0,0 +1,336 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple, cast
+
+import numpy as np
+
+from ..math.matrix import Matrix
+from ..geometry.shape import Capsule, Circle, Edge, Ellipse, Point
+from ..geometry.shape import Polygon, Sector, Shape
+from ..dynamics.body import Body
+from ..dynamics.phy_world import PhysicsWorld
+from ..collision.broad_phase.aabb import AABB
+from ..collision.algorithm.raycast import Raycast
+from .distance import DistanceTransform
+
+
+class OccupancyGrid():
+    '''the occupancy grid of the bodies in a world region
+
+    a cell is occupied if its box overlaps a body shape, so the thin
+    walls and the small bodies are kept. Every cell counts the bodies
+    covering it, so the 'update' only redraws the bodies whose pose
+    changed since the last update and leaves the others. The cell
+    (row, col) covers [lower.x + col * res, lower.x + (col + 1) * res)
+    on the x axis and the same with the row on the y axis.
+
+    Parameters
+    ----------
+    resolution : float
+        the cell side length
+    lower : Matrix
+        the lower left corner of the region
+    upper : Matrix
+        the upper right corner of the region
+    '''
+    # the separating axes of the curved shapes
+    AxisCnt: int = 16
+
+    def __init__(self, resolution: float, lower: Matrix, upper: Matrix):
+        assert resolution > 0.0
+        assert upper.x > lower.x and upper.y > lower.y
+        self._res: float = resolution
+        self._lower: np.ndarray = lower._val.ravel().copy()
+        col: int = int(np.ceil((upper.x - lower.x) / resolution))
+        row: int = int(np.ceil((upper.y - lower.y) / resolution))
+        self._count: np.ndarray = np.zeros((row, col), dtype=np.int32)
+        # the pose and the cells of every drawn body
+        self._body_table: Dict[Body, Tuple[Tuple[float, float, float],
+                                           np.ndarray]] = {}
+        self._sdf: Optional[np.ndarray] = None
+
+    @staticmethod
+    def from_world(world: PhysicsWorld,
+                   resolution: float,
+                   margin: float = 1.0) -> OccupancyGrid:
+        '''make the grid covering all the bodies of the world, and
+        draw them
+        '''
+        if len(world._body_list) == 0:
+            raise ValueError('the world has no body to bound the grid')
+
+        box: np.ndarray = np.array(
+            [OccupancyGrid.body_box(v) for v in world._body_list])
+        res: OccupancyGrid = OccupancyGrid(
+            resolution, Matrix(list(box[:, :2].min(axis=0) - margin), 'vec'),
+            Matrix(list(box[:, 2:].max(axis=0) + margin), 'vec'))
+        res.update(world)
+        return res
+
+    @property
+    def resolution(self) -> float:
+        return self._res
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        '''(row, col) count'''
+        return self._count.shape
+
+    @property
+    def lower(self) -> Matrix:
+        return Matrix(list(self._lower), 'vec')
+
+    @property
+    def grid(self) -> np.ndarray:
+        '''the bool (row, col) occupancy'''
+        return self._count > 0
+
+    @property
+    def count(self) -> np.ndarray:
+        '''the body count covering every cell'''
+        return self._count
+
+    def update(self, world: PhysicsWorld) -> int:
+        '''redraw the moved and new bodies, erase the removed ones
+
+        Returns
+        -------
+        int
+            the bodies drawn
+        '''
+        res: int = 0
+        alive: Dict[Body, bool] = {}
+        for body in world._body_list:
+            alive[body] = True
+            pose: Tuple[float, float, float] = (body.pos.x, body.pos.y,
+                                                body.rot)
+            old: Optional[Tuple[Tuple[float, float, float],
+                                np.ndarray]] = self._body_table.get(body)
+            if old is not None and old[0] == pose:
+                continue
+
+            # NOTE: the cells of a body are unique, so the fancy index
+            # updates do not drop the repeated cells
+            if old is not None:
+                self._count.ravel()[old[1]] -= 1
+            cell: np.ndarray = self.rasterize(body)
+            self._count.ravel()[cell] += 1
+            self._body_table[body] = (pose, cell)
+            res += 1
+
+        for body in [v for v in self._body_table if v not in alive]:
+            self.remove(body)
+
+        if res > 0:
+            self._sdf = None
+        return res
+
+    def remove(self, body: Body) -> None:
+        '''erase the body, it is drawn again by the next update if it is
+        still in the world(such as after its shape is changed)
+        '''
+        old: Optional[Tuple[Tuple[float, float, float],
+                            np.ndarray]] = self._body_table.pop(body, None)
+        if old is not None:
+            self._count.ravel()[old[1]] -= 1
+            self._sdf = None
+
+    def clear(self) -> None:
+        self._count[:] = 0
+        self._body_table = {}
+        self._sdf = None
+
+    def rasterize(self, body: Body) -> np.ndarray:
+        '''get the flat indexes of the cells covered by the body
+
+        a cell is covered if its box overlaps the shape, so the shapes
+        thinner than a cell are not dropped. The overlap is the separating
+        axis test on the shape axes, the cell holding the body position is
+        always covered.
+        '''
+        assert body.shape is not None
+        pos: np.ndarray = self.flat_index(body.pos._val.reshape(1, 2))
+        axis: Optional[np.ndarray] = OccupancyGrid.axes(body.shape)
+        if body.shape.type == Shape.Type.Point:
+            point: Matrix = Matrix.rotate_mat(body.rot) * cast(
+                Point, body.shape).pos + body.pos
+            return np.union1d(pos, self.flat_index(point._val.reshape(1, 2)))
+
+        # NOTE: the curve is only marked at the body position
+        if axis is None:
+            return pos
+
+        # test the cells in the body box
+        box: np.ndarray = OccupancyGrid.body_box(body)
+        col0, row0 = self.cell_index(box[:2])
+        col1, row1 = self.cell_index(box[2:])
+        col0, col1 = max(col0, 0), min(col1, self.shape[1] - 1)
+        row0, row1 = max(row0, 0), min(row1, self.shape[0] - 1)
+        if col0 > col1 or row0 > row1:
+            return pos
+
+        row, col = np.meshgrid(np.arange(row0, row1 + 1),
+                               np.arange(col0, col1 + 1),
+                               indexing='ij')
+        row, col = row.ravel(), col.ravel()
+        rel: np.ndarray = np.stack([
+            self._lower[0] + (col + 0.5) * self._res - body.pos.x,
+            self._lower[1] + (row + 0.5) * self._res - body.pos.y
+        ], axis=1)
+        cos: float = np.cos(body.rot)
+        sin: float = np.sin(body.rot)
+        loc: np.ndarray = np.stack([
+            cos * rel[:, 0] + sin * rel[:, 1],
+            -sin * rel[:, 0] + cos * rel[:, 1]
+        ], axis=1)
+
+        # the half cell box projected on the axes in the world space
+        half: np.ndarray = 0.5 * self._res * (
+            np.abs(cos * axis[:, 0] - sin * axis[:, 1]) +
+            np.abs(sin * axis[:, 0] + cos * axis[:, 1]))
+        # NOTE: the cells only touching the shape are not covered
+        limit: np.ndarray = OccupancyGrid.support(
+            body.shape, axis) + half - 1e-9 * self._res
+        mask: np.ndarray = np.all(loc @ axis.T < limit, axis=1)
+        return np.union1d(pos, (row * self.shape[1] + col)[mask]).astype(
+            np.int64)
+
+    @staticmethod
+    def body_box(body: Body) -> np.ndarray:
+        '''the [x_min, y_min, x_max, y_max] of the body AABB'''
+        aabb: AABB = AABB.from_body(body)
+        return np.array([
+            aabb.bot_left.x, aabb.bot_left.y, aabb.top_right.x,
+            aabb.top_right.y
+        ])
+
+    @staticmethod
+    def axes(shape: Shape) -> Optional[np.ndarray]:
+        '''get the (K, 2) unit separating axes in the shape space, the
+        edge normals of the polygon and the edge, or the evenly spread
+        ones of the curved shapes. None if the shape is not drawn
+        '''
+        if shape.type == Shape.Type.Polygon:
+            normal: np.ndarray = Raycast.polygon_plane(
+                cast(Polygon, shape).vertices)[1]
+            return np.concatenate([normal, -normal])
+
+        elif shape.type == Shape.Type.Edge:
+            edg: Edge = cast(Edge, shape)
+            dirn: np.ndarray = (edg.end - edg.start)._val.ravel()
+            normal = np.array([[dirn[1], -dirn[0]]]) / max(
+                np.linalg.norm(dirn), 1e-12)
+            return np.concatenate([normal, -normal])
+
+        elif shape.type in (Shape.Type.Circle, Shape.Type.Ellipse,
+                            Shape.Type.Capsule, Shape.Type.Sector):
+            theta: np.ndarray = np.linspace(0.0, 2.0 * np.pi,
+                                            OccupancyGrid.AxisCnt,
+                                            endpoint=False)
+            return np.stack([np.cos(theta), np.sin(theta)], axis=1)
+
+        return None
+
+    @staticmethod
+    def support(shape: Shape, axis: np.ndarray) -> np.ndarray:
+        '''get the max projection of the shape on the (K, 2) unit axes in
+        the shape space
+        '''
+        x: np.ndarray = axis[:, 0]
+        y: np.ndarray = axis[:, 1]
+        if shape.type == Shape.Type.Polygon:
+            vert: np.ndarray = Raycast.polygon_plane(
+                cast(Polygon, shape).vertices)[0]
+            return np.max(vert @ axis.T, axis=0)
+
+        elif shape.type == Shape.Type.Edge:
+            edg: Edge = cast(Edge, shape)
+            return np.maximum(axis @ edg.start._val.ravel(),
+                              axis @ edg.end._val.ravel())
+
+        elif shape.type == Shape.Type.Circle:
+            return np.full(len(axis), cast(Circle, shape).radius)
+
+        elif shape.type == Shape.Type.Ellipse:
+            elli: Ellipse = cast(Ellipse, shape)
+            return np.sqrt((elli.A() * x)**2 + (elli.B() * y)**2)
+
+        elif shape.type == Shape.Type.Capsule:
+            cap: Capsule = cast(Capsule, shape)
+            radius: float = min(cap.width, cap.height) / 2.0
+            half: np.ndarray = np.array([cap.width / 2.0 - radius, 0.0])
+            if cap.width < cap.height:
+                half = np.array([0.0, cap.height / 2.0 - radius])
+            return np.abs(axis @ half) + radius
+
+        assert shape.type == Shape.Type.Sector
+        sec: Sector = cast(Sector, shape)
+        # the arc ends and the center, or the arc point on the axis
+        phi: np.ndarray = np.arctan2(y, x)
+        res: np.ndarray = np.maximum(
+            0.0, sec.radius *
+            np.maximum(np.cos(phi - sec.start),
+                       np.cos(phi - sec.start - sec.span)))
+        in_arc: np.ndarray = (phi - sec.start) % (2.0 * np.pi) <= sec.span
+        res[in_arc] = sec.radius
+        return res
+
+    def cell_index(self, point: np.ndarray) -> Tuple[int, int]:
+        '''get the (col, row) of the point, may be out of the grid'''
+        idx: np.ndarray = np.floor((point - self._lower) / self._res)
+        return int(idx[0]), int(idx[1])
+
+    def flat_index(self, points: np.ndarray) -> np.ndarray:
+        '''get the flat indexes of the cells holding the (N, 2) points,
+        the points out of the grid are dropped
+        '''
+        row, col, inside = self.lookup(points)
+        return (row * self.shape[1] + col)[inside].astype(np.int64)
+
+    def lookup(
+            self,
+            points: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''get the (row, col) of the (N, 2) points clamped to the grid,
+        and if they are in the grid
+        '''
+        pts: np.ndarray = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        idx: np.ndarray = np.floor((pts - self._lower) / self._res).astype(
+            np.int64)
+        inside: np.ndarray = (idx[:, 0] >= 0) & (
+            idx[:, 0] < self.shape[1]) & (idx[:, 1] >= 0) & (idx[:, 1] <
+                                                              self.shape[0])
+        return (np.clip(idx[:, 1], 0, self.shape[0] - 1),
+                np.clip(idx[:, 0], 0, self.shape[1] - 1), inside)
+
+    def is_occupied(self, points: np.ndarray) -> np.ndarray:
+        '''check the (N, 2) points, the outside of the grid is occupied'''
+        row, col, inside = self.lookup(points)
+        return (self._count[row, col] > 0) | ~inside
+
+    def signed_distance(self) -> np.ndarray:
+        '''the (row, col) signed distance field between the cell centers
+        in the world length, positive in the free cells and negative in
+        the occupied ones. It is cached until the grid is changed.
+        '''
+        if self._sdf is None:
+            self._sdf = DistanceTransform.signed_distance(
+                self.grid) * self._res
+
+        return self._sdf
+
+    def distance(self, points: np.ndarray) -> np.ndarray:
+        '''look up the signed distance of the cells holding the (N, 2)
+        points, the points out of the grid use the nearest border cell
+        '''
+        row, col, _ = self.lookup(points)
+        return self.signed_distance()[row, col]
+
+    def cell_center(self, row: np.ndarray, col: np.ndarray) -> np.ndarray:
+        '''the (N, 2) world centers of the cells'''
+        return np.stack([
+            self._lower[0] + (np.asarray(col) + 0.5) * self._res,
+            self._lower[1] + (np.asarray(row) + 0.5) * self._res
+        ], axis=1)
+
+    def body_list(self) -> List[Body]:
+        '''the bodies drawn now'''
+        return list(self._body_table)
@@ -1,44 +1,392 @@
-from typing import Callable, List, Optional, Tuple, cast
+import weakref
+from typing import Callable, Dict, List, Optional, Tuple, Union, cast
 
 import numpy as np
 import taichi as ti
 
 from ..common.config import Config
 from ..math.matrix import Matrix
-from ..geometry.shape import Capsule, Circle, Edge
-from ..geometry.shape import Polygon, Shape, ShapePrimitive
+from ..geometry.shape import Capsule, Circle, Curve, Edge, Ellipse
+from ..geometry.shape import Polygon, Sector, Shape, ShapePrimitive
 from ..dynamics.joint.joint import Joint, JointType
 from ..dynamics.joint.distance import DistanceJoint
 from ..dynamics.joint.point import PointJoint
+from ..dynamics.joint.pulley import PulleyJoint, PulleyJointPrimitive
 from ..dynamics.joint.revolute import RevoluteJoint
 from ..dynamics.joint.revolute import RevoluteJointPrimitive
 
 
+class RenderBatch():
+    '''collect the primitives of a frame in local space and draw them
+    with one gui call per primitive kind and color
+
+    every vertex belongs to an owner pose(the body), all vertices are
+    moved to the screen by one numpy transform in the flush
+    '''
+    # draw order of the primitives
+    Fill: int = 0
+    Outline: int = 1
+    Decoration: int = 2
+
+    def __init__(self):
+        self._vert_list: List[np.ndarray] = []
+        self._owner_list: List[int] = []
+        self._cnt_list: List[int] = []
+        self._vert_cnt: int = 0
+        # (layer, kind, color, radius) -> list of index arrays
+        self._call_table: Dict[Tuple[int, str, int, float],
+                               List[np.ndarray]] = {}
+        # the circle radius(pixel) of the circle calls
+        self._radius_table: Dict[Tuple[int, str, int, float],
+                                 List[np.ndarray]] = {}
+
+    @property
+    def vert_cnt(self) -> int:
+        return self._vert_cnt
+
+    def add_vert(self, vert: np.ndarray, owner: int) -> int:
+        '''add the local vertices of the owner pose
+
+        Parameters
+        ----------
+        vert : np.ndarray
+            (N, 2) local vertices
+        owner : int
+            the index of the owner pose
+
+        Returns
+        -------
+        int
+            the index of the first added vertex
+        '''
+        offset: int = self._vert_cnt
+        self._vert_list.append(vert)
+        self._owner_list.append(owner)
+        self._cnt_list.append(len(vert))
+        self._vert_cnt += len(vert)
+        return offset
+
+    def add_triangles(self,
+                      idx: np.ndarray,
+                      color: int = Config.FillColor,
+                      layer: int = Fill) -> None:
+        self._call_table.setdefault((layer, 'tri', color, 0.0),
+                                    []).append(idx)
+
+    def add_lines(self,
+                  idx: np.ndarray,
+                  color: int = Config.OuterLineColor,
+                  radius: float = 1.0,
+                  layer: int = Outline) -> None:
+        self._call_table.setdefault((layer, 'line', color, radius),
+                                    []).append(idx)
+
+    def add_circles(self,
+                    idx: np.ndarray,
+                    radius: Union[float, np.ndarray],
+                    color: int = Config.FillColor,
+                    layer: int = Fill) -> None:
+        key: Tuple[int, str, int, float] = (layer, 'circle', color, 0.0)
+        self._call_table.setdefault(key, []).append(idx)
+        self._radius_table.setdefault(key, []).append(
+            np.broadcast_to(np.asarray(radius, dtype=np.float64),
+                            (len(idx), )))
+
+    def flush(self, gui: ti.GUI, pos: np.ndarray, rot: np.ndarray,
+              to_screen: Callable[[np.ndarray], np.ndarray]) -> None:
+        '''transform all vertices by their owner poses and draw the calls
+
+        Parameters
+        ----------
+        gui : ti.GUI
+            the render target
+        pos : np.ndarray
+            (M, 2) world position of the owner poses
+        rot : np.ndarray
+            (M, ) rotation of the owner poses
+        to_screen : Callable[[np.ndarray], np.ndarray]
+            map the (N, 2) world points to the screen
+        '''
+        if self._vert_cnt == 0:
+            return
+
+        vert: np.ndarray = np.concatenate(self._vert_list)
+        owner: np.ndarray = np.repeat(np.array(self._owner_list),
+                                      self._cnt_list)
+        cos: np.ndarray = np.cos(rot)[owner]
+        sin: np.ndarray = np.sin(rot)[owner]
+        world: np.ndarray = np.empty_like(vert)
+        world[:, 0] = cos * vert[:, 0] - sin * vert[:, 1]
+        world[:, 1] = sin * vert[:, 0] + cos * vert[:, 1]
+        world += pos[owner]
+        scrn: np.ndarray = to_screen(world)
+
+        # NOTE: sort by the layer only, the calls of one layer
+        # keep the insert order
+        for key in sorted(self._call_table, key=lambda v: v[0]):
+            layer, kind, color, radius = key
+            idx: np.ndarray = np.concatenate(self._call_table[key])
+            if kind == 'tri':
+                gui.triangles(scrn[idx[:, 0]], scrn[idx[:, 1]],
+                              scrn[idx[:, 2]], color)
+            elif kind == 'line':
+                gui.lines(scrn[idx[:, 0]], scrn[idx[:, 1]], radius, color)
+            else:
+                gui.circles(scrn[idx],
+                            np.concatenate(self._radius_table[key]),
+                            color)
+
+        self.clear()
+
+    def clear(self) -> None:
+        self._vert_list.clear()
+        self._owner_list.clear()
+        self._cnt_list.clear()
+        self._vert_cnt = 0
+        self._call_table.clear()
+        self._radius_table.clear()
+
+
+class Tessellation():
+    '''the local space vertices of a shape, filled by the triangle
+    index and outlined by the line index
+    '''
+    def __init__(self, vert: np.ndarray, tri: np.ndarray, line: np.ndarray,
+                 sig: Tuple):
+        self._vert: np.ndarray = vert
+        self._tri: np.ndarray = tri
+        self._line: np.ndarray = line
+        # the shape params, regenerate when the shape is changed
+        self._sig: Tuple = sig
+
+
+# a point is a Matrix or a (2, ) array, the points are a Matrix
+# list or a (N, 2) array
+PointLike = Union[Matrix, np.ndarray]
+PointsLike = Union[List[Matrix], np.ndarray]
+# the world to screen transform of the (N, 2) points
+ArrXform = Callable[[np.ndarray], np.ndarray]
+
+
 class Render():
+    # vert len -> (fan triangle index, outline index)
+    _fan_table: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+    # shape -> lod -> tessellation
+    _tess_table: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+    # the segment count range of the curved outline and
+    # the outline length(pixel) of one segment
+    LodMin: int = 8
+    LodMax: int = 64
+    LodPixel: float = 8.0
+
+    @staticmethod
+    def lod(length: float) -> int:
+        '''get the segment count of a curved outline
+
+        Parameters
+        ----------
+        length : float
+            the outline length on the screen(pixel)
+
+        Returns
+        -------
+        int
+            the power of two segment count in [LodMin, LodMax]
+        '''
+        seg: float = max(length / Render.LodPixel, 1.0)
+        res: int = 1 << int(np.ceil(np.log2(seg)))
+        return min(max(res, Render.LodMin), Render.LodMax)
+
+    @staticmethod
+    def shape_sig(shape: Shape) -> Optional[Tuple]:
+        if shape.type == Shape.Type.Polygon:
+            poly: Polygon = cast(Polygon, shape)
+            # NOTE: key on the values, the list may be edited in place
+            return tuple(v for p in poly.vertices for v in (p.x, p.y))
+
+        elif shape.type == Shape.Type.Capsule:
+            cap: Capsule = cast(Capsule, shape)
+            return (cap.width, cap.height)
+
+        elif shape.type == Shape.Type.Ellipse:
+            elp: Ellipse = cast(Ellipse, shape)
+            return (elp.width, elp.height)
+
+        elif shape.type == Shape.Type.Sector:
+            sec: Sector = cast(Sector, shape)
+            return (sec.start, sec.span, sec.radius)
+
+        elif shape.type == Shape.Type.Curve:
+            cur: Curve = cast(Curve, shape)
+            return tuple(v for p in (cur.start, cur.ctrl1, cur.ctrl2, cur.end)
+                         for v in (p.x, p.y))
+
+        return None
+
+    @staticmethod
+    def outline_len(shape: Shape) -> float:
+        # the outline length(meter) of the curved parts
+        if shape.type == Shape.Type.Capsule:
+            cap: Capsule = cast(Capsule, shape)
+            return np.pi * min(cap.width, cap.height)
+
+        elif shape.type == Shape.Type.Ellipse:
+            elp: Ellipse = cast(Ellipse, shape)
+            return 2.0 * np.pi * max(elp.A(), elp.B())
+
+        elif shape.type == Shape.Type.Sector:
+            sec: Sector = cast(Sector, shape)
+            return abs(sec.span) * sec.radius
+
+        elif shape.type == Shape.Type.Curve:
+            cur: Curve = cast(Curve, shape)
+            return (cur.ctrl1 - cur.start).len() + (
+                cur.ctrl2 - cur.ctrl1).len() + (cur.end - cur.ctrl2).len()
+
+        return 0.0
+
+    @staticmethod
+    def tessellate(shape: Shape,
+                   meter_to_pixel: float) -> Optional[Tessellation]:
+        '''get the cached local space tessellation of the shape, the
+        level of detail is chosen by the outline length on the screen
+
+        Returns
+        -------
+        Optional[Tessellation]
+            None if the shape can not be tessellated
+        '''
+        sig: Optional[Tuple] = Render.shape_sig(shape)
+        if sig is None:
+            return None
+
+        lod: int = 0 if shape.type == Shape.Type.Polygon else Render.lod(
+            Render.outline_len(shape) * meter_to_pixel)
+        lod_table: Dict[int, Tessellation] = Render._tess_table.setdefault(
+            shape, {})
+        res: Optional[Tessellation] = lod_table.get(lod)
+        if res is None or res._sig != sig:
+            if res is not None:
+                # the shape is changed, drop all levels
+                lod_table.clear()
+            res = Render.gen_tess(shape, lod, sig)
+            lod_table[lod] = res
+
+        return res
+
+    @staticmethod
+    def gen_tess(shape: Shape, seg: int, sig: Tuple) -> Tessellation:
+        vert: np.ndarray
+        if shape.type == Shape.Type.Polygon:
+            poly: Polygon = cast(Polygon, shape)
+            # NOTE: the vertices is closed, the last is the first one
+            vert = np.array([[v.x, v.y] for v in poly.vertices[:-1]])
+
+        elif shape.type == Shape.Type.Capsule:
+            cap: Capsule = cast(Capsule, shape)
+            rad: float = min(cap.width, cap.height) / 2.0
+            half: float = max(cap.width, cap.height) / 2.0 - rad
+            base: float = 0.0 if cap.width >= cap.height else np.pi / 2.0
+            # two half circles in CCW
+            theta: np.ndarray = base + np.linspace(-0.5, 0.5,
+                                                   seg // 2 + 1) * np.pi
+            axis: np.ndarray = np.array([np.cos(base), np.sin(base)])
+            arc: np.ndarray = np.stack((np.cos(theta), np.sin(theta)),
+                                       axis=1) * rad
+            vert = np.concatenate((arc + axis * half, -arc - axis * half))
+
+        elif shape.type == Shape.Type.Ellipse:
+            elp: Ellipse = cast(Ellipse, shape)
+            theta = np.arange(seg) * 2.0 * np.pi / seg
+            vert = np.stack(
+                (elp.A() * np.cos(theta), elp.B() * np.sin(theta)), axis=1)
+
+        elif shape.type == Shape.Type.Sector:
+            # fan from the center, vertex 0
+            sec: Sector = cast(Sector, shape)
+            arc_seg: int = max(
+                2, int(np.ceil(seg * abs(sec.span) / (2.0 * np.pi))))
+            theta = sec.start + np.linspace(0.0, 1.0, arc_seg + 1) * sec.span
+            vert = np.concatenate(
+                (np.zeros((1, 2)),
+                 np.stack((np.cos(theta), np.sin(theta)), axis=1) *
+                 sec.radius))
+
+        else:
+            # the open cubic bezier curve, only the outline
+            ctrl: np.ndarray = np.array(sig).reshape(4, 2)
+            t: np.ndarray = np.linspace(0.0, 1.0, seg + 1)[:, None]
+            vert = ((1 - t)**3) * ctrl[0] + 3 * ((1 - t)**2) * t * ctrl[
+                1] + 3 * (1 - t) * (t**2) * ctrl[2] + (t**3) * ctrl[3]
+            seq: np.ndarray = np.arange(seg)
+            return Tessellation(vert, np.zeros((0, 3), dtype=np.int64),
+                                np.stack((seq, seq + 1), axis=1), sig)
+
+        tri, line = Render.fan_index(len(vert))
+        return Tessellation(vert, tri, line, sig)
+
+    @staticmethod
+    def to_arr(points: Union[PointLike, PointsLike]) -> np.ndarray:
+        '''convert the point(s) to a (2, ) or (N, 2) array'''
+        if isinstance(points, np.ndarray):
+            return points
+        if isinstance(points, Matrix):
+            return np.array([points.x, points.y])
+
+        return np.array([[p.x, p.y] for p in points]).reshape(-1, 2)
+
+    @staticmethod
+    def fan_index(vert_len: int) -> Tuple[np.ndarray, np.ndarray]:
+        '''get the triangle fan and the outline index of a convex polygon
+
+        Parameters
+        ----------
+        vert_len : int
+            the vertex count of the open polygon
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            (vert_len - 2, 3) triangle index and (vert_len, 2) line index
+        '''
+        res = Render._fan_table.get(vert_len)
+        if res is None:
+            seq: np.ndarray = np.arange(vert_len)
+            tri: np.ndarray = np.stack(
+                (np.zeros(vert_len - 2, dtype=np.int64), seq[1:-1], seq[2:]),
+                axis=1)
+            line: np.ndarray = np.stack((seq, np.roll(seq, -1)), axis=1)
+            res = (tri, line)
+            Render._fan_table[vert_len] = res
+
+        return res
+
     @staticmethod
     def rd_point(gui: ti.GUI,
-                 point: Matrix,
+                 point: PointLike,
                  color: int = ti.rgb_to_hex([1.0, 1.0, 1.0]),
                  radius: float = 2.0) -> None:
         assert gui is not None
         # assert 0 <= point.x <= 1.0
         # assert 0 <= point.y <= 1.0
-        gui.circle([point.x, point.y], color, radius)
+        pos: np.ndarray = Render.to_arr(point)
+        gui.circle([pos[0], pos[1]], color, radius)
 
     @staticmethod
     def rd_points(gui: ti.GUI,
-                  points: List[Matrix],
+                  points: PointsLike,
                   color: int = ti.rgb_to_hex([1.0, 1.0, 1.0]),
-                  radius: float = 2.0) -> None:
+                  radius: Union[float, np.ndarray] = 2.0) -> None:
         assert gui is not None
+        if len(points) == 0:
+            return
 
-        for p in points:
-            Render.rd_point(gui, p, color, radius)
+        gui.circles(Render.to_arr(points), radius, color)
 
     @staticmethod
     def rd_line(gui: ti.GUI,
-                p1: Matrix,
-                p2: Matrix,
+                p1: PointLike,
+                p2: PointLike,
                 color: int = ti.rgb_to_hex([1.0, 1.0, 1.0]),
                 radius: float = 1.0) -> None:
         assert gui is not None
@@ -46,18 +394,29 @@ class Render():
         # assert 0 <= p1.y <= 1.0
         # assert 0 <= p2.x <= 1.0
         # assert 0 <= p2.y <= 1.0
-
-        gui.line([p1.x, p1.y], [p2.x, p2.y], radius, color)
+        begin: np.ndarray = Render.to_arr(p1)
+        end: np.ndarray = Render.to_arr(p2)
+        gui.line([begin[0], begin[1]], [end[0], end[1]], radius, color)
 
     @staticmethod
     def rd_lines(gui: ti.GUI,
-                 lines: List[Tuple[Matrix, Matrix]],
+                 lines: Union[List[Tuple[Matrix, Matrix]], np.ndarray],
                  color: int = ti.rgb_to_hex([1.0, 1.0, 1.0]),
                  radius: float = 1.0) -> None:
+        '''render the lines, which are the (begin, end) Matrix pairs
+        or a (N, 2, 2) array
+        '''
         assert gui is not None
+        if len(lines) == 0:
+            return
+
+        if isinstance(lines, np.ndarray):
+            gui.lines(lines[:, 0], lines[:, 1], radius, color)
+            return
 
-        for lin in lines:
-            Render.rd_line(gui, lin[0], lin[1], color, radius)
+        begin: np.ndarray = Render.to_arr([lin[0] for lin in lines])
+        end: np.ndarray = Render.to_arr([lin[1] for lin in lines])
+        gui.lines(begin, end, radius, color)
 
     @staticmethod
     def rd_shape(gui: ti.GUI,
@@ -65,99 +424,185 @@ class Render():
                  world_to_screen: Callable[[Matrix], Matrix],
                  meter_to_pixel: float,
                  fill_color: int = Config.FillColor,
-                 outline_color: int = Config.OuterLineColor) -> None:
+                 outline_color: int = Config.OuterLineColor,
+                 world_to_screen_arr: Optional[ArrXform] = None) -> None:
         assert gui is not None
         assert prim._shape is not None
 
         if prim._shape.type == Shape.Type.Polygon:
             Render.rd_polygon(gui, prim, world_to_screen, fill_color,
-                              outline_color)
+                              outline_color, world_to_screen_arr)
 
         elif prim._shape.type == Shape.Type.Ellipse:
-            Render.rd_ellipse()
+            Render.rd_ellipse(gui, prim, world_to_screen, meter_to_pixel,
+                              fill_color, outline_color, world_to_screen_arr)
 
         elif prim._shape.type == Shape.Type.Circle:
             Render.rd_circle(gui, prim, world_to_screen, meter_to_pixel,
                              fill_color)
 
         elif prim._shape.type == Shape.Type.Curve:
-            Render.rd_curve()
+            Render.rd_curve(gui, prim, world_to_screen, meter_to_pixel,
+                            outline_color, world_to_screen_arr)
 
         elif prim._shape.type == Shape.Type.Edge:
             Render.rd_edge(gui, prim, world_to_screen)
 
         elif prim._shape.type == Shape.Type.Capsule:
             Render.rd_capsule(gui, prim, world_to_screen, meter_to_pixel,
-                              fill_color)
+                              fill_color, outline_color, world_to_screen_arr)
 
         elif prim._shape.type == Shape.Type.Sector:
-            raise NotImplementedError
+            Render.rd_sector(gui, prim, world_to_screen, meter_to_pixel,
+                             fill_color, outline_color, world_to_screen_arr)
+
+    @staticmethod
+    def batch_shape(batch: RenderBatch,
+                    shape: Shape,
+                    owner: int,
+                    meter_to_pixel: float,
+                    fill_color: int = Config.FillColor,
+                    outline_color: int = Config.OuterLineColor) -> bool:
+        '''add the local geometry of the shape to the batch
+
+        Returns
+        -------
+        bool
+            False if the shape can not be batched
+        '''
+        if shape.type == Shape.Type.Circle:
+            Render.batch_circle(batch, cast(Circle, shape), owner,
+                                meter_to_pixel, fill_color)
+
+        elif shape.type == Shape.Type.Edge:
+            Render.batch_edge(batch, cast(Edge, shape), owner)
+
+        else:
+            tess: Optional[Tessellation] = Render.tessellate(
+                shape, meter_to_pixel)
+            if tess is None:
+                return False
+
+            Render.batch_tess(batch, tess, owner, fill_color, outline_color)
+
+        return True
+
+    @staticmethod
+    def batch_tess(batch: RenderBatch,
+                   tess: Tessellation,
+                   owner: int,
+                   fill_color: int = Config.FillColor,
+                   outline_color: int = Config.OuterLineColor) -> None:
+        offset: int = batch.add_vert(tess._vert, owner)
+        if len(tess._tri) > 0:
+            batch.add_triangles(tess._tri + offset, fill_color)
+        batch.add_lines(tess._line + offset, outline_color, 1.5)
+
+    @staticmethod
+    def batch_circle(batch: RenderBatch,
+                     cir: Circle,
+                     owner: int,
+                     meter_to_pixel: float,
+                     color: int = Config.FillColor) -> None:
+        # NOTE: the gui draws the circle natively, no tessellation
+        offset: int = batch.add_vert(np.zeros((1, 2)), owner)
+        batch.add_circles(np.array([offset]), cir.radius * meter_to_pixel,
+                          color)
+
+    @staticmethod
+    def batch_edge(batch: RenderBatch, edg: Edge, owner: int) -> None:
+        center: Matrix = edg.center()
+        tip: Matrix = center + edg.normal * 0.1
+        vert: np.ndarray = np.array([[edg.start.x, edg.start.y],
+                                     [edg.end.x, edg.end.y],
+                                     [center.x, center.y], [tip.x, tip.y]])
+        offset: int = batch.add_vert(vert, owner)
+        batch.add_lines(np.array([[0, 1], [2, 3]]) + offset,
+                        Config.AxisLineColor)
+        batch.add_circles(np.array([0, 1]) + offset, 2.0,
+                          Config.AxisPointColor, RenderBatch.Outline)
+
+    @staticmethod
+    def batch_body_axis(batch: RenderBatch, shape: Shape, owner: int,
+                        center_visible: bool, rot_line_visible: bool) -> None:
+        '''add the body center point and the rotation lines'''
+        mc: Matrix = shape.center()
+        vert: np.ndarray = np.array([[0.0, 0.0], [mc.x, mc.y],
+                                     [mc.x + 0.15, mc.y],
+                                     [mc.x, mc.y + 0.15]])
+        offset: int = batch.add_vert(vert, owner)
+        if center_visible:
+            batch.add_circles(np.array([offset]), 4.0, Config.BodyCenterColor,
+                              RenderBatch.Decoration)
+
+        if rot_line_visible:
+            batch.add_lines(np.array([[1, 2]]) + offset,
+                            Config.AngleLineXColor,
+                            layer=RenderBatch.Decoration)
+            batch.add_lines(np.array([[1, 3]]) + offset,
+                            Config.AngleLineYColor,
+                            layer=RenderBatch.Decoration)
 
     @staticmethod
     def rd_polygon(gui: ti.GUI,
                    prim: ShapePrimitive,
                    world_to_screen: Callable[[Matrix], Matrix],
                    fill_color: int = Config.FillColor,
-                   outline_color: int = Config.OuterLineColor) -> None:
+                   outline_color: int = Config.OuterLineColor,
+                   world_to_screen_arr: Optional[ArrXform] = None) -> None:
 
         # [trick] draw polygon by draw multi triangle
         poly: Polygon = cast(Polygon, prim._shape)
         assert len(poly.vertices) >= 3
 
-        outer_line_st: Optional[np.ndarray] = None
-        outer_line_ed: Optional[np.ndarray] = None
-        fill_tri_pa: Optional[np.ndarray] = None
-        fill_tri_pb: Optional[np.ndarray] = None
-        fill_tri_pc: Optional[np.ndarray] = None
-
-        is_first: bool = True
-
-        # NOTE: the vertices can form a close shape,
-        # so the first vertex and last vertex are same
-        # print('render poly')
-        vert_len: int = len(poly.vertices)
-        for i in range(vert_len - 1):
-            wordpa: Matrix = Matrix.rotate_mat(
-                prim._rot) * poly.vertices[i] + prim._xform
-            scrnpa: Matrix = world_to_screen(wordpa)
-
-            wordpb: Matrix = Matrix.rotate_mat(
-                prim._rot) * poly.vertices[i + 1] + prim._xform
-            scrnpb: Matrix = world_to_screen(wordpb)
-
-            if is_first:
-                is_first = False
-                outer_line_st = np.array([[scrnpa.x, scrnpa.y]])
-                outer_line_ed = np.array([[scrnpb.x, scrnpb.y]])
-            else:
-                tmpa = np.array([[scrnpa.x, scrnpa.y]])
-                tmpb = np.array([[scrnpb.x, scrnpb.y]])
-                outer_line_st = np.concatenate((outer_line_st, tmpa))
-                outer_line_ed = np.concatenate((outer_line_ed, tmpb))
-
-        assert outer_line_st is not None
-        assert outer_line_ed is not None
-
-        fill_tri_pa = np.repeat(np.array([outer_line_st[0]]),
-                                vert_len - 3,
-                                axis=0)
-        fill_tri_pb = outer_line_st[1:-1]
-        fill_tri_pc = outer_line_st[2:]
+        tess: Optional[Tessellation] = Render.tessellate(poly, 1.0)
+        assert tess is not None
+        Render.rd_tess(gui, prim, tess, world_to_screen, fill_color,
+                       outline_color, world_to_screen_arr)
 
-        # print('poly ver:')
-        # for v in poly.vertices:
-        # print(v)
-        # print('end')
-        # print(f'line_len: {len(outer_line_st)}')
-        # for v in outer_line_st:
-        # print(v)
+    @staticmethod
+    def rd_tess(gui: ti.GUI,
+                prim: ShapePrimitive,
+                tess: Tessellation,
+                world_to_screen: Callable[[Matrix], Matrix],
+                fill_color: int = Config.FillColor,
+                outline_color: int = Config.OuterLineColor,
+                world_to_screen_arr: Optional[ArrXform] = None) -> None:
+        '''transform the cached tessellation by the prim pose and draw it,
+        the vertices are transformed to the screen in one call by the
+        world_to_screen_arr if it is given
+        '''
+        cos: float = np.cos(prim._rot)
+        sin: float = np.sin(prim._rot)
+        world: np.ndarray = tess._vert @ np.array([[cos, sin], [-sin, cos]
+                                                   ]) + prim._xform._val[:, 0]
+        scrn: np.ndarray
+        if world_to_screen_arr is not None:
+            scrn = world_to_screen_arr(world)
+        else:
+            scrn = Render.to_arr(
+                [world_to_screen(Matrix(v.tolist(), 'vec')) for v in world])
 
-        gui.lines(outer_line_st, outer_line_ed, 1.5, outline_color)
-        gui.triangles(fill_tri_pa, fill_tri_pb, fill_tri_pc, fill_color)
+        gui.lines(scrn[tess._line[:, 0]], scrn[tess._line[:, 1]], 1.5,
+                  outline_color)
+        if len(tess._tri) > 0:
+            gui.triangles(scrn[tess._tri[:, 0]], scrn[tess._tri[:, 1]],
+                          scrn[tess._tri[:, 2]], fill_color)
 
     @staticmethod
-    def rd_ellipse() -> None:
-        raise NotImplementedError
+    def rd_ellipse(gui: ti.GUI,
+                   prim: ShapePrimitive,
+                   world_to_screen: Callable[[Matrix], Matrix],
+                   meter_to_pixel: float,
+                   fill_color: int = Config.FillColor,
+                   outline_color: int = Config.OuterLineColor,
+                   world_to_screen_arr: Optional[ArrXform] = None) -> None:
+        assert prim._shape is not None
+        tess: Optional[Tessellation] = Render.tessellate(
+            prim._shape, meter_to_pixel)
+        assert tess is not None
+        Render.rd_tess(gui, prim, tess, world_to_screen, fill_color,
+                       outline_color, world_to_screen_arr)
 
     @staticmethod
     def rd_circle(gui: ti.GUI,
@@ -172,8 +617,22 @@ class Render():
                    radius=cir.radius * meter_to_pixel)
 
     @staticmethod
-    def rd_curve() -> None:
-        raise NotImplementedError
+    def rd_curve(gui: ti.GUI,
+                 prim: ShapePrimitive,
+                 world_to_screen: Callable[[Matrix], Matrix],
+                 meter_to_pixel: float,
+                 color: int = Config.OuterLineColor,
+                 world_to_screen_arr: Optional[ArrXform] = None) -> None:
+        assert prim._shape is not None
+        tess: Optional[Tessellation] = Render.tessellate(
+            prim._shape, meter_to_pixel)
+        assert tess is not None
+        Render.rd_tess(gui,
+                       prim,
+                       tess,
+                       world_to_screen,
+                       outline_color=color,
+                       world_to_screen_arr=world_to_screen_arr)
 
     @staticmethod
     def rd_edge(gui: ti.GUI, prim: ShapePrimitive,
@@ -196,71 +655,35 @@ class Render():
                    prim: ShapePrimitive,
                    world_to_screen: Callable[[Matrix], Matrix],
                    meter_to_pixel: float,
-                   color: int = Config.FillColor) -> None:
-        cap: Capsule = cast(Capsule, prim._shape)
-
-        # render two tangent circle
-        offset: float = np.fmin(cap.width, cap.height) / 2.0
-        tmp1: Matrix = Matrix([0.0, 0.0], 'vec')
-        tmp2: Matrix = Matrix([0.0, 0.0], 'vec')
-        if cap.width > cap.height:
-            tmp1.x = -(cap.width / 2.0 - offset)
-            tmp2.x = cap.width / 2.0 - offset
-        else:
-            tmp1.y = -(cap.height / 2.0 - offset)
-            tmp2.y = cap.height / 2.0 - offset
-
-        tmp1 = Matrix.rotate_mat(prim._rot) * tmp1 + prim._xform
-        tmp2 = Matrix.rotate_mat(prim._rot) * tmp2 + prim._xform
-        tmp1 = world_to_screen(tmp1)
-        tmp2 = world_to_screen(tmp2)
-
-        gui.circle([tmp1.x, tmp1.y], color, radius=offset * meter_to_pixel)
-        gui.circle([tmp2.x, tmp2.y], color, radius=offset * meter_to_pixel)
-
-        # render inner rectangle
-        capw: float = cap.width
-        caph: float = cap.height
-        rectp1: Matrix = Matrix([-capw / 2.0, -caph / 2.0], 'vec')
-        rectp2: Matrix = Matrix([capw / 2.0, -caph / 2.0], 'vec')
-        rectp3: Matrix = Matrix([capw / 2.0, caph / 2.0], 'vec')
-        rectp4: Matrix = Matrix([-capw / 2.0, caph / 2.0], 'vec')
-
-        if capw > caph:
-            rectp1.x += offset
-            rectp2.x -= offset
-            rectp3.x -= offset
-            rectp4.x += offset
-        else:
-            rectp1.y += offset
-            rectp2.y += offset
-            rectp3.y -= offset
-            rectp4.y -= offset
-
-        rectp1 = Matrix.rotate_mat(prim._rot) * rectp1 + prim._xform
-        rectp2 = Matrix.rotate_mat(prim._rot) * rectp2 + prim._xform
-        rectp3 = Matrix.rotate_mat(prim._rot) * rectp3 + prim._xform
-        rectp4 = Matrix.rotate_mat(prim._rot) * rectp4 + prim._xform
-
-        rectp1 = world_to_screen(rectp1)
-        rectp2 = world_to_screen(rectp2)
-        rectp3 = world_to_screen(rectp3)
-        rectp4 = world_to_screen(rectp4)
-
-        # render the center rectangle
-        fill_tri_pa: np.ndarray = np.array([[rectp1.x, rectp1.y],
-                                            [rectp1.x, rectp1.y]])
-        fill_tri_pb: np.ndarray = np.array([[rectp2.x, rectp2.y],
-                                            [rectp3.x, rectp3.y]])
-        fill_tri_pc: np.ndarray = np.array([[rectp3.x, rectp3.y],
-                                            [rectp4.x, rectp4.y]])
+                   fill_color: int = Config.FillColor,
+                   outline_color: int = Config.OuterLineColor,
+                   world_to_screen_arr: Optional[ArrXform] = None) -> None:
+        assert prim._shape is not None
+        tess: Optional[Tessellation] = Render.tessellate(
+            prim._shape, meter_to_pixel)
+        assert tess is not None
+        Render.rd_tess(gui, prim, tess, world_to_screen, fill_color,
+                       outline_color, world_to_screen_arr)
 
-        gui.triangles(fill_tri_pa, fill_tri_pb, fill_tri_pc, color)
+    @staticmethod
+    def rd_sector(gui: ti.GUI,
+                  prim: ShapePrimitive,
+                  world_to_screen: Callable[[Matrix], Matrix],
+                  meter_to_pixel: float,
+                  fill_color: int = Config.FillColor,
+                  outline_color: int = Config.OuterLineColor,
+                  world_to_screen_arr: Optional[ArrXform] = None) -> None:
+        assert prim._shape is not None
+        tess: Optional[Tessellation] = Render.tessellate(
+            prim._shape, meter_to_pixel)
+        assert tess is not None
+        Render.rd_tess(gui, prim, tess, world_to_screen, fill_color,
+                       outline_color, world_to_screen_arr)
 
     @staticmethod
     def rd_rect(gui: ti.GUI,
-                top_left: Matrix,
-                bot_right: Matrix,
+                top_left: PointLike,
+                bot_right: PointLike,
                 color: int = ti.rgb_to_hex([1.0, 1.0, 1.0]),
                 radius: float = 1.0) -> None:
         assert gui is not None
@@ -268,9 +691,30 @@ class Render():
         # assert 0 <= top_left.y <= 1.0
         # assert 0 <= bot_right.x <= 1.0
         # assert 0 <= bot_right.y <= 1.0
+        tl: np.ndarray = Render.to_arr(top_left)
+        br: np.ndarray = Render.to_arr(bot_right)
+        gui.rect([tl[0], tl[1]], [br[0], br[1]], radius, color)
 
-        gui.rect([top_left.x, top_left.y], [bot_right.x, bot_right.y], radius,
-                 color)
+    @staticmethod
+    def rd_rects(gui: ti.GUI,
+                 top_left: np.ndarray,
+                 bot_right: np.ndarray,
+                 color: int = ti.rgb_to_hex([1.0, 1.0, 1.0]),
+                 radius: float = 1.0) -> None:
+        '''render the (N, 2) rects by their four edges in one call'''
+        assert gui is not None
+        if len(top_left) == 0:
+            return
+
+        top_right: np.ndarray = np.stack((bot_right[:, 0], top_left[:, 1]),
+                                         axis=1)
+        bot_left: np.ndarray = np.stack((top_left[:, 0], bot_right[:, 1]),
+                                        axis=1)
+        begin: np.ndarray = np.concatenate(
+            (top_left, top_right, bot_right, bot_left))
+        end: np.ndarray = np.concatenate(
+            (top_right, bot_right, bot_left, top_left))
+        gui.lines(begin, end, radius, color)
 
     @staticmethod
     def rd_joint(gui: ti.GUI, joint: Joint,
@@ -289,7 +733,7 @@ class Render():
             Render.rd_orient_joint(gui, joint, world_to_screen)
 
         elif jt_type == JointType.Pulley:
-            Render.rd_pulley_joint()
+            Render.rd_pulley_joint(gui, joint, world_to_screen)
 
         elif jt_type == JointType.Prismatic:
             Render.rd_prismatic_joint()
@@ -356,8 +800,26 @@ class Render():
                        Config.JointLineColor)
 
     @staticmethod
-    def rd_pulley_joint() -> None:
-        pass
+    def rd_pulley_joint(gui: ti.GUI, joint: Joint,
+                        world_to_screen: Callable[[Matrix], Matrix]) -> None:
+        assert joint is not None
+        tmp: PulleyJointPrimitive = cast(PulleyJoint, joint).prim()
+
+        assert tmp._bodya is not None
+        assert tmp._bodyb is not None
+        pa: Matrix = tmp._bodya.to_world_point(tmp._local_pointa)
+        pb: Matrix = tmp._bodyb.to_world_point(tmp._local_pointb)
+
+        Render.rd_point(gui, world_to_screen(pa), Config.JointPointColor)
+        Render.rd_point(gui, world_to_screen(pb), Config.JointPointColor)
+        Render.rd_line(gui, world_to_screen(pa),
+                       world_to_screen(tmp._ground_pointa),
+                       Config.JointLineColor)
+        Render.rd_line(gui, world_to_screen(tmp._ground_pointa),
+                       world_to_screen(tmp._ground_pointb),
+                       Config.JointLineColor)
+        Render.rd_line(gui, world_to_screen(tmp._ground_pointb),
+                       world_to_screen(pb), Config.JointLineColor)
 
     @staticmethod
     def rd_prismatic_joint() -> None:
@@ -0,0 +1,288 @@
+import struct
+import zlib
+from typing import BinaryIO, List, Optional, Tuple
+
+from .math.matrix import Matrix
+from .common.trajectory import TrajectoryRecorder
+from .simulation import Simulation
+
+
+class ReplayRecorder():
+    '''record a run into a replay file to re-simulate it exactly
+
+    the file holds the snapshot of the start state and the external
+    inputs(mouse joint grab/drag/release, frame switches, param changes)
+    tagged by the sim step they are applied after. A frame switch is
+    stored as a full snapshot, so the player does not need the frame
+    code. Every 'check_interval' steps a checksum of the body states is
+    stored to detect the divergence in the playback.
+
+    Parameters
+    ----------
+    path : str
+        the replay file path
+    check_interval : int
+        the steps between two checksums
+    '''
+    Magic: bytes = b'TGRP'
+    Version: int = 1
+    Header: struct.Struct = struct.Struct('<4sII')
+    # step, kind, payload len
+    Event: struct.Struct = struct.Struct('<qBI')
+
+    # event kind
+    Grab: int = 0
+    Drag: int = 1
+    Release: int = 2
+    State: int = 3
+    Param: int = 4
+    Checksum: int = 5
+    # the last step of the run, written by the close
+    End: int = 6
+    InputKind: Tuple[str, ...] = ('grab', 'drag', 'release', 'frame', 'param')
+
+    # param value type
+    ParamFloat: int = 0
+    ParamInt: int = 1
+    ParamBool: int = 2
+    ParamVec: int = 3
+
+    def __init__(self, path: str, check_interval: int = 60):
+        assert check_interval >= 1
+        self._path: str = path
+        self._check_interval: int = check_interval
+        self._file: Optional[BinaryIO] = None
+        self._sim: Optional[Simulation] = None
+        self._event_cnt: int = 0
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def running(self) -> bool:
+        return self._file is not None
+
+    @property
+    def event_cnt(self) -> int:
+        return self._event_cnt
+
+    @staticmethod
+    def checksum(sim: Simulation) -> int:
+        body, contact = TrajectoryRecorder.gather(sim)
+        return zlib.crc32(body.tobytes())
+
+    @staticmethod
+    def pack_param(name: str, val) -> bytes:
+        tag: int = ReplayRecorder.ParamFloat
+        val_list: List[float] = []
+        if isinstance(val, Matrix):
+            tag = ReplayRecorder.ParamVec
+            val_list = val._val.ravel().tolist()
+        elif isinstance(val, bool):
+            tag = ReplayRecorder.ParamBool
+            val_list = [float(val)]
+        elif isinstance(val, int):
+            tag = ReplayRecorder.ParamInt
+            val_list = [float(val)]
+        else:
+            val_list = [float(val)]
+
+        name_buf: bytes = name.encode('utf-8')
+        return struct.pack(f'<BH{len(name_buf)}s{len(val_list)}d', tag,
+                           len(name_buf), name_buf, *val_list)
+
+    @staticmethod
+    def unpack_param(buf: bytes) -> Tuple[str, object]:
+        tag, name_len = struct.unpack_from('<BH', buf)
+        name: str = buf[3:3 + name_len].decode('utf-8')
+        val_list: List[float] = list(
+            struct.unpack_from(f'<{(len(buf) - 3 - name_len) // 8}d', buf,
+                               3 + name_len))
+        if tag == ReplayRecorder.ParamVec:
+            return name, Matrix(val_list, 'vec')
+        elif tag == ReplayRecorder.ParamBool:
+            return name, val_list[0] != 0.0
+        elif tag == ReplayRecorder.ParamInt:
+            return name, int(val_list[0])
+
+        return name, val_list[0]
+
+    def attach(self, sim: Simulation) -> None:
+        '''save the start state and record the sim until closed'''
+        assert not self.running
+        self._file = open(self._path, 'wb')
+        self._file.write(
+            ReplayRecorder.Header.pack(ReplayRecorder.Magic,
+                                       ReplayRecorder.Version,
+                                       self._check_interval))
+        self._event_cnt = 0
+        self._sim = sim
+        self.write(sim.step_cnt, ReplayRecorder.State, sim.snapshot())
+        sim.attach_input(self.on_input)
+        sim.attach(self.on_check, self._check_interval)
+
+    def write(self, step: int, kind: int, payload: bytes = b'') -> None:
+        assert self._file is not None
+        self._file.write(ReplayRecorder.Event.pack(step, kind, len(payload)))
+        self._file.write(payload)
+        self._event_cnt += 1
+
+    def on_input(self, sim: Simulation, kind: str, args: Tuple) -> None:
+        if kind in ('grab', 'drag'):
+            self.write(sim.step_cnt, ReplayRecorder.InputKind.index(kind),
+                       struct.pack('<dd', *args))
+        elif kind == 'release':
+            self.write(sim.step_cnt, ReplayRecorder.Release)
+        elif kind == 'frame':
+            self.write(sim.step_cnt, ReplayRecorder.State, sim.snapshot())
+        elif kind == 'param':
+            self.write(sim.step_cnt, ReplayRecorder.Param,
+                       ReplayRecorder.pack_param(*args))
+
+    def on_check(self, sim: Simulation) -> None:
+        self.write(sim.step_cnt, ReplayRecorder.Checksum,
+                   struct.pack('<I', ReplayRecorder.checksum(sim)))
+
+    def close(self) -> str:
+        if self._file is None:
+            return self._path
+
+        if self._sim is not None:
+            self.write(self._sim.step_cnt, ReplayRecorder.End)
+            self._sim.detach_input(self.on_input)
+            self._sim.detach(self.on_check)
+            self._sim = None
+
+        self._file.close()
+        self._file = None
+        return self._path
+
+
+class ReplayPlayer():
+    '''re-simulate a replay file headlessly
+
+    'seek' restores the start state and runs the fixed steps as fast as
+    possible to the target step, applying the recorded inputs on the
+    way and comparing the checksums. To watch the rest, attach the
+    player and a scene to the sim after the seek:
+
+        player.seek(scene.sim, 50000)
+        player.attach(scene.sim)
+        scene.show()
+    '''
+    def __init__(self, path: str):
+        # (step, kind, payload)
+        self._event_list: List[Tuple[int, int, bytes]] = []
+        with open(path, 'rb') as fp:
+            buf: bytes = fp.read()
+
+        magic, ver, self._check_interval = ReplayRecorder.Header.unpack_from(
+            buf)
+        if magic != ReplayRecorder.Magic or ver != ReplayRecorder.Version:
+            raise ValueError('not a compatible replay file')
+
+        pos: int = ReplayRecorder.Header.size
+        evt_size: int = ReplayRecorder.Event.size
+        # NOTE: a cut tail of a crashed run is dropped
+        while pos + evt_size <= len(buf):
+            step, kind, size = ReplayRecorder.Event.unpack_from(buf, pos)
+            if pos + evt_size + size > len(buf):
+                break
+            self._event_list.append(
+                (step, kind, buf[pos + evt_size:pos + evt_size + size]))
+            pos += evt_size + size
+
+        if len(self._event_list) == 0 or self._event_list[0][
+                1] != ReplayRecorder.State:
+            raise ValueError('the replay has no start state')
+
+        self._sim: Optional[Simulation] = None
+        self._idx: int = 0
+        self._diverged_step: int = -1
+
+    def __len__(self) -> int:
+        return len(self._event_list)
+
+    @property
+    def check_interval(self) -> int:
+        return self._check_interval
+
+    @property
+    def start_step(self) -> int:
+        return self._event_list[0][0]
+
+    @property
+    def end_step(self) -> int:
+        '''the last recorded step'''
+        return self._event_list[-1][0]
+
+    @property
+    def diverged_step(self) -> int:
+        '''the first step whose checksum differs, -1 if none'''
+        return self._diverged_step
+
+    def reset(self, sim: Simulation) -> None:
+        self._sim = sim
+        self._diverged_step = -1
+        # NOTE: jump to the start state at once instead of running the
+        # empty steps before it
+        step, _, payload = self._event_list[0]
+        sim.restore(payload)
+        assert sim.step_cnt == step
+        self._idx = 1
+        self.apply(sim)
+
+    def apply(self, sim: Simulation) -> None:
+        '''apply the events recorded at the current step of the sim'''
+        while self._idx < len(self._event_list):
+            step, kind, payload = self._event_list[self._idx]
+            if step > sim.step_cnt:
+                break
+
+            self._idx += 1
+            if kind == ReplayRecorder.State:
+                sim.restore(payload)
+            elif kind == ReplayRecorder.Grab:
+                sim.grab(Matrix(list(struct.unpack('<dd', payload)), 'vec'))
+            elif kind == ReplayRecorder.Drag:
+                sim.drag(Matrix(list(struct.unpack('<dd', payload)), 'vec'))
+            elif kind == ReplayRecorder.Release:
+                sim.release()
+            elif kind == ReplayRecorder.Param:
+                sim.set_param(*ReplayRecorder.unpack_param(payload))
+            elif kind == ReplayRecorder.Checksum:
+                if self._diverged_step == -1 and struct.unpack(
+                        '<I', payload)[0] != ReplayRecorder.checksum(sim):
+                    self._diverged_step = step
+
+    def seek(self, sim: Simulation, step: int) -> int:
+        '''run the sim to the step(clamped to the recorded range)
+
+        Returns
+        -------
+        int
+            the first diverged step, -1 if all checksums match
+        '''
+        step = min(max(step, self.start_step), self.end_step)
+        if self._sim is not sim or sim.step_cnt > step or self._idx == 0:
+            self.reset(sim)
+
+        while sim.step_cnt < step:
+            sim.step(1)
+            self.apply(sim)
+
+        return self._diverged_step
+
+    def verify(self, sim: Simulation) -> int:
+        '''replay the whole file, return the first diverged step'''
+        self.reset(sim)
+        return self.seek(sim, self.end_step)
+
+    def attach(self, sim: Simulation) -> None:
+        '''keep applying the recorded inputs while the sim runs'''
+        assert self._sim is sim
+        sim.attach(self.apply, 1)
+
+    def detach(self, sim: Simulation) -> None:
+        sim.detach(self.apply)
@@ -0,0 +1,202 @@
+import random
+import uuid
+import multiprocessing as mp
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import numpy as np
+
+from .frame import Frame
+from .simulation import Simulation
+
+
+def _run_task(
+        task: Tuple[int, str, Type[Frame], Dict[str, Any], int, int,
+                    int]) -> Tuple[int, int]:
+    idx, name, frame_cls, param, step, interval, seed = task
+
+    sim: Simulation = RolloutPool.create_sim(frame_cls, param, seed)
+    body_cnt: int = len(sim.world._body_list)
+    shape: Tuple[int, ...] = (step // interval, body_cnt, 6)
+    # NOTE: the block is unlinked by the caller after packing it
+    shm: shared_memory.SharedMemory = shared_memory.SharedMemory(
+        name=name, create=True, size=max(1, int(np.prod(shape)) * 8))
+    res: np.ndarray = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    for i in range(step // interval):
+        sim.step(interval)
+        res[i] = RolloutPool.observe(sim)
+
+    del res
+    shm.close()
+    return idx, body_cnt
+
+
+class RolloutPool():
+    '''Run independent headless simulations of one frame in worker
+    processes, such as the param sweep of the friction or bias.
+
+    Every run gets its own seed spawned from the pool seed and its
+    own world ids, so the results do not depend on the worker count
+    or the schedule order.
+    Every run writes its body states into its own shared memory block
+    named by the call and the run index, so the caller can unlink all
+    of them even if a run fails, and the blocks are packed into one
+    array, the shape is
+    (run, step // interval, body, 6) and the last dim is
+    [x, y, rot, vel_x, vel_y, ang_vel].
+    '''
+    def __init__(self,
+                 frame_cls: Type[Frame],
+                 step: int,
+                 worker: Optional[int] = None,
+                 interval: int = 1,
+                 seed: int = 0):
+        assert step >= 1
+        assert 1 <= interval <= step
+
+        self._frame_cls: Type[Frame] = frame_cls
+        self._step: int = step
+        self._worker: int = mp.cpu_count() if worker is None else worker
+        self._interval: int = interval
+        self._seed: int = seed
+
+    @property
+    def step(self) -> int:
+        return self._step
+
+    @property
+    def worker(self) -> int:
+        return self._worker
+
+    @property
+    def interval(self) -> int:
+        return self._interval
+
+    @property
+    def seed(self) -> int:
+        return self._seed
+
+    @staticmethod
+    def create_sim(frame_cls: Type[Frame], param: Dict[str, Any],
+                   seed: int) -> Simulation:
+        '''create a headless sim and load the frame with the param
+
+        the key of the param is set to the physics world if it has
+        the attribute, then to the sim, otherwise to the frame before
+        loading, so the frame can read it in 'load'. The global random
+        states are seeded for the loading and restored after it, so the
+        caller's random sequence is not changed.
+        '''
+        py_state: Tuple = random.getstate()
+        np_state: Dict[str, Any] = np.random.get_state(legacy=False)
+        random.seed(seed)
+        np.random.seed(seed)
+
+        try:
+            sim: Simulation = Simulation()
+            frame: Frame = frame_cls()
+            for k, v in param.items():
+                if hasattr(sim.world, k):
+                    setattr(sim.world, k, v)
+                elif hasattr(sim, k):
+                    setattr(sim, k, v)
+                else:
+                    setattr(frame, k, v)
+
+            sim.register_frame(frame)
+            sim.init_frame()
+        finally:
+            random.setstate(py_state)
+            np.random.set_state(np_state)
+
+        return sim
+
+    @staticmethod
+    def observe(sim: Simulation) -> np.ndarray:
+        return np.array([[bd.pos.x, bd.pos.y, bd.rot, bd.vel.x, bd.vel.y,
+                          bd.ang_vel] for bd in sim.world._body_list],
+                        dtype=np.float64).reshape(-1, 6)
+
+    @staticmethod
+    def block_name(prefix: str, idx: int) -> str:
+        return f'{prefix}_{idx}'
+
+    def seed_list(self, run_cnt: int) -> List[int]:
+        seq_list: List[np.random.SeedSequence] = np.random.SeedSequence(
+            self._seed).spawn(run_cnt)
+        return [int(v.generate_state(1)[0]) for v in seq_list]
+
+    def run(self, param_list: List[Dict[str, Any]]) -> np.ndarray:
+        '''run one simulation for every param dict
+
+        Parameters
+        ----------
+        param_list : List[Dict[str, Any]]
+            the params of every run
+
+        Returns
+        -------
+        np.ndarray
+            (run, step // interval, body, 6) body states
+        '''
+        if len(param_list) == 0:
+            return np.zeros((0, self._step // self._interval, 0, 6))
+
+        seed_list: List[int] = self.seed_list(len(param_list))
+        # NOTE: short for the name limit of some systems
+        prefix: str = f'tg_{uuid.uuid4().hex[:12]}'
+        task_list: List[Tuple[int, str, Type[Frame], Dict[str, Any], int,
+                              int, int]] = [
+                                  (i, RolloutPool.block_name(prefix, i),
+                                   self._frame_cls, v, self._step,
+                                   self._interval, seed_list[i])
+                                  for i, v in enumerate(param_list)
+                              ]
+
+        # run idx -> body count
+        block: Dict[int, int] = {}
+        try:
+            if self._worker <= 1:
+                # run in the caller process, easy to debug
+                for task in task_list:
+                    idx, body_cnt = _run_task(task)
+                    block[idx] = body_cnt
+            else:
+                # NOTE: the workers must share the tracker of the caller,
+                # or their own trackers unlink the blocks when they exit
+                resource_tracker.ensure_running()
+                with mp.get_context().Pool(
+                        processes=min(self._worker, len(task_list))) as pool:
+                    for idx, body_cnt in pool.imap_unordered(
+                            _run_task, task_list):
+                        block[idx] = body_cnt
+
+            # all runs must share the body count to be packed in one array
+            body_cnt = block[0]
+            for idx in range(len(task_list)):
+                if block[idx] != body_cnt:
+                    raise ValueError(f'run {idx} creates {block[idx]} '
+                                     f'bodies, expect {body_cnt}')
+
+            res: np.ndarray = np.empty(
+                (len(task_list), self._step // self._interval, body_cnt, 6))
+            for idx in block:
+                shm: shared_memory.SharedMemory = shared_memory.SharedMemory(
+                    name=RolloutPool.block_name(prefix, idx))
+                res[idx] = np.ndarray(res.shape[1:],
+                                      dtype=np.float64,
+                                      buffer=shm.buf)
+                shm.close()
+        finally:
+            # NOTE: the runs finished but not reported before a failure
+            # also leave their blocks
+            for idx in range(len(task_list)):
+                try:
+                    shm = shared_memory.SharedMemory(
+                        name=RolloutPool.block_name(prefix, idx))
+                except FileNotFoundError:
+                    continue
+                shm.close()
+                shm.unlink()
+
+        return res
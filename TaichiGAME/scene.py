@@ -1,5 +1,6 @@
 from __future__ import annotations
-from typing import Dict, Tuple, Union, List, cast, Optional
+import time
+from typing import Dict, Union, Optional
 
 import taichi as ti
 
@@ -8,13 +9,10 @@ from .common.config import Config
 from .common.export_manager import ExportManager
 from .frame import Frame
 from .collision.broad_phase.dbvt import DBVT
-from .collision.broad_phase.aabb import AABB
 from .math.matrix import Matrix
-from .collision.detector import Collsion, Detector
-from .dynamics.body import Body
 from .dynamics.phy_world import PhysicsWorld
 from .dynamics.constraint.contact import ContactMaintainer
-from .dynamics.joint.point import PointJoint, PointJointPrimitive
+from .simulation import Simulation
 
 
 class Scene():
@@ -22,30 +20,30 @@ class Scene():
                  name: str,
                  width: int = 1280,
                  height: int = 720,
-                 option: Dict[str, bool] = {}):
+                 option: Dict[str, bool] = {},
+                 sim: Optional[Simulation] = None):
         self._gui: ti.GUI = ti.GUI(name,
                                    res=(width, height),
                                    background_color=Config.BackgroundColor)
-        self._option: Dict[str, bool] = {'video': False, 'gif': False}
+        self._option: Dict[str, bool] = {
+            'video': False,
+            'gif': False,
+            'realtime': True
+        }
         for v in option:
             self._option[v] = option[v]
         self._ex_mgn: ExportManager = ExportManager()
-        # the physics world, all sim is run in physics world
-        self._world: PhysicsWorld = PhysicsWorld()
-        self._dbvt: DBVT = DBVT()
-        self._maintainer: ContactMaintainer = ContactMaintainer()
+        if self._option['gif']:
+            self._ex_mgn.fmt = 'gif'
+        # all sim is run in the headless simulation, the scene
+        # only handle the gui event and render
+        self._sim: Simulation = Simulation() if sim is None else sim
+        self._world: PhysicsWorld = self._sim.world
+        self._dbvt: DBVT = self._sim.dbvt
+        self._maintainer: ContactMaintainer = self._sim.maintainer
         # the view camera, all viewport scale is in camera
         self._cam: Camera = Camera()
 
-        # physics init settings
-        self._world.grav = Matrix([0.0, -9.8], 'vec')
-        self._world.damping_ena = True
-        self._world._linear_vel_damping = 0.1
-        self._world.ang_vel_damping = 0.1
-        self._world.air_fric_coeff = 0.8
-        self._world.pos_iter = 8
-        self._world.vel_iter = 6
-
         # camera init settings
         self._cam.viewport = Camera.Viewport(Matrix([0.0, height], 'vec'),
                                              Matrix([width, 0.0], 'vec'))
@@ -57,99 +55,81 @@ class Scene():
         # self._cam.dbvt_visible = True
         self._cam._world = self._world
         self._cam._dbvt = self._dbvt
+        self._cam._interp_table = self._sim._prev_state
+        self._cam._profiler = self._sim.profiler
 
-        # extern frame table
-        self._ext_frame_list: List[Frame] = []
-        self._ext_frame_idx: int = 0
-
-        # calcuate step
-        self._fps = 120
-        self._dt = 1 / self._fps
         self._paused = False
+        self._last_time: Optional[float] = None
         # NOTE: some algorithm need to cacluate the pos's len
         # in init state
         self._mouse_pos: Matrix = Matrix([1.0, 1.0], 'vec')
         # the right-mouse btn drag move flag(change viewport)
         self._mouse_viewport_move: bool = False
 
-        # mouse joint oper
-        self._mouse_joint_prim: PointJointPrimitive = PointJointPrimitive()
-        self._mouse_joint_prim._bodya = Body()
-        self._mouse_joint: PointJoint = cast(
-            PointJoint, self._world.create_joint(self._mouse_joint_prim))
-        self._mouse_joint.active = False
-        self._mouse_select_body: Optional[Body] = None
+    @property
+    def sim(self) -> Simulation:
+        return self._sim
 
     def register_frame(self, frame: Frame) -> None:
-        self._ext_frame_list.append(frame)
+        self._sim.register_frame(frame)
 
     def remove_frame(self, frame: Frame) -> None:
-        # NOTE: need to check if exist first
-        self._ext_frame_list.remove(frame)
+        self._sim.remove_frame(frame)
 
     def clear_all(self) -> None:
-        self._world.clear_all_bodies()
-        self._world.clear_all_joints()
-        self._maintainer.clear_all()
-        self._dbvt.clear_all()
-        self._mouse_joint_prim._bodya = Body()
-        self._mouse_joint = cast(
-            PointJoint, self._world.create_joint(self._mouse_joint_prim))
-        self._mouse_joint.active = False
+        self._sim.clear_all()
 
     def calc_nxt_frame(self, delta: int) -> None:
-        ext_len: int = len(self._ext_frame_list)
-        assert -ext_len <= delta <= ext_len
-
-        self._ext_frame_idx = Config.clamp(self._ext_frame_idx, 0, ext_len - 1)
-        # NOTE: the sign of mod in python depend on dividend
-        self._ext_frame_idx = (self._ext_frame_idx + delta) % ext_len
+        self._sim.calc_nxt_frame(delta)
 
     def init_frame(self) -> None:
-        self.change_frame(0)
+        self._sim.init_frame()
 
     def change_frame(self, delta: int) -> None:
-        self.clear_all()
-        self.calc_nxt_frame(delta)
-        self._ext_frame_list[self._ext_frame_idx].load()
-
-    def physics_sim(self) -> None:
-        for elem in self._world._body_list:
-            self._dbvt.update(elem)
-
-        self._world.step_velocity(self._dt)
-
-        pot_list: List[Tuple[Body, Body]] = self._dbvt.generate()
-        # print('sim')
-        for pot in pot_list:
-            # print('pot')
-            # print(f'bodya: ({pot[0].pos.x}, {pot[0].pos.y}), {pot[0].rot}')
-            # print(f'bodyb: ({pot[1].pos.x}, {pot[1].pos.y}), {pot[1].rot}')
-
-            res: Collsion = Detector.detect(pot[0], pot[1])
-            if res._is_colliding:
-                # print('collid')
-                # print(f'contact list len: {len(res._contact_list)}')
-                self._maintainer.add(res)
+        self._sim.change_frame(delta)
 
-        self._maintainer.clear_inactive_points()
-        self._world.prepare_velocity_constraint(self._dt)
+    def advance(self, frame_time: float) -> int:
+        step_cnt: int = self._sim.advance(frame_time)
+        self._cam._interp_alpha = self._sim.interp_alpha
+        return step_cnt
 
-        for i in range(self._world.vel_iter):
-            self._world.solve_velocity_constraint(self._dt)
-            self._maintainer.solve_velocity(self._dt)
-
-        self._world.step_position(self._dt)
-
-        for i in range(self._world.pos_iter):
-            self._maintainer.solve_position(self._dt)
-            self._world.solve_position_constraint(self._dt)
+    def physics_sim(self) -> None:
+        self._sim.physics_sim()
+
+    def frame_time(self) -> float:
+        # NOTE: realtime mode follows the wall clock, otherwise every
+        # rendered frame advances the same sim time(export, batch run)
+        realtime: bool = self._option['realtime'] and not (
+            self._option['video'] or self._option['gif'])
+
+        cur_time: float = time.perf_counter()
+        elapsed: float = self._sim.dt
+        if realtime and self._last_time is not None:
+            elapsed = cur_time - self._last_time
+
+        self._last_time = cur_time
+        return elapsed
+
+    def on_step(self, sim: Simulation) -> None:
+        '''observer entry, attach it to a headless simulation
+        to watch the batch run
+
+        Parameters
+        ----------
+        sim : Simulation
+            the notifying simulation
+        '''
+        if not self._gui.running:
+            return
 
-        self._maintainer.deactivate_all_points()
+        self._cam._interp_alpha = 1.0
+        self._gui.get_events()
+        self.render()
+        self._gui.show()
 
     def render(self) -> None:
         self._cam.render(self._gui)
-        self._ext_frame_list[self._ext_frame_idx].render()
+        self._sim.cur_frame().render()
 
     def handle_left_mouse_event(self, state: Union[ti.GUI.PRESS,
                                                    ti.GUI.RELEASE], x: float,
@@ -157,30 +137,9 @@ class Scene():
 
         self._mouse_pos = self._cam.screen_to_world(Matrix([x, y], 'vec'))
         if state == ti.GUI.PRESS:
-            if self._mouse_joint is None:
-                return
-
-            mouse_box: AABB = AABB(0.01, 0.01)
-            mouse_box.pos = self._mouse_pos
-            bd_list: List[Body] = self._dbvt.query(mouse_box)
-            for bd in bd_list:
-                # print(bd.id)
-                point: Matrix = self._mouse_pos - bd.pos
-                point = Matrix.rotate_mat(-bd.rot) * point
-
-                if bd.shape.contains(
-                        point) and self._mouse_select_body is None:
-                    self._mouse_select_body = bd
-                    prim: PointJointPrimitive = self._mouse_joint.prim()
-                    prim._local_pointa = bd.to_local_point(self._mouse_pos)
-                    prim._bodya = bd
-                    prim._target_point = self._mouse_pos
-                    self._mouse_joint.active = True
-                    self._mouse_joint.set_value(prim)
-                    break
+            self._sim.grab(self._mouse_pos)
         else:
-            self._mouse_joint.active = False
-            self._mouse_select_body = None
+            self._sim.release()
 
     def handle_right_mouse_event(
             self, state: Union[ti.GUI.PRESS, ti.GUI.RELEASE]) -> None:
@@ -203,13 +162,7 @@ class Scene():
                                                       self._cam.meter_to_pixel)
 
         self._mouse_pos = cur_pos
-        # print(f'({self._mouse_pos.x}, {self._mouse_pos.y}')
-        if self._mouse_joint is None:
-            return
-
-        prim: PointJointPrimitive = self._mouse_joint.prim()
-        prim._target_point = self._mouse_pos
-        self._mouse_joint.set_value(prim)
+        self._sim.drag(self._mouse_pos)
 
     def handle_wheel_event(self, y: float) -> None:
         # NOTE: need to set the sef._cam  the value scale
@@ -233,6 +186,7 @@ class Scene():
 
                 elif e.key == ti.GUI.SPACE and e.type == ti.GUI.RELEASE:
                     self._paused = not self._paused
+                    self._last_time = None
 
                 elif e.key == ti.GUI.LMB:
                     self.handle_left_mouse_event(e.type, e.pos[0], e.pos[1])
@@ -291,12 +245,16 @@ class Scene():
                 elif e.key == 'z' and e.type == ti.GUI.PRESS:
                     self._cam.contact_visible = not self._cam.contact_visible
 
+                elif e.key == 'p' and e.type == ti.GUI.PRESS:
+                    # only profile when the overlay is shown
+                    self._cam.profile_visible = not self._cam.profile_visible
+                    self._sim.profiler.ena = self._cam.profile_visible
+
             if not self._paused:
-                self.physics_sim()
+                self.advance(self.frame_time())
 
             self.render()
 
             if self._option['video'] or self._option['gif']:
-                self._gui.show(self._gui.show(self._ex_mgn.frame_name))
-            else:
-                self._gui.show()
+                self._ex_mgn.grab(self._gui)
+            self._gui.show()
@@ -0,0 +1,208 @@
+from typing import List, Optional
+
+import numpy as np
+
+from .math.matrix import Matrix
+from .dynamics.body import Body
+from .simulation import Simulation
+
+
+class Lidar():
+    '''a planar range sensor mounted on a body, such as a lidar or a
+    sonar ring
+
+    every scan casts all the beams by one batched query on the broad
+    phase of the sim and the exact shape tests, the beams start at the
+    mount point and the body holding the sensor is not hit. The clean
+    ranges are kept until the sensor or a body in its range moves, then
+    the noise is applied to every read.
+
+        lidar = Lidar(robot, 360, 2.0 * np.pi, 8.0, noise_std=0.01)
+        lidar.attach(sim)
+        sim.step(10)
+        lidar.ranges
+
+    Parameters
+    ----------
+    body : Body
+        the body holding the sensor
+    beam_cnt : int
+        the beam count
+    fov : float
+        the field of view, the beams spread evenly and the center one
+        points to the body x axis. A full circle has no duplicated beam
+    max_range : float
+        the max range, the missed beams read it
+    offset : Optional[Matrix]
+        the mount point in the body space
+    noise_std : float
+        the std of the gaussian noise added to the hit ranges
+    dropout : float
+        the probability of a beam reading the max range
+    seed : Optional[int]
+        the seed of the noise
+    '''
+    def __init__(self,
+                 body: Body,
+                 beam_cnt: int = 360,
+                 fov: float = 2.0 * np.pi,
+                 max_range: float = 10.0,
+                 offset: Optional[Matrix] = None,
+                 noise_std: float = 0.0,
+                 dropout: float = 0.0,
+                 seed: Optional[int] = None):
+        assert beam_cnt >= 1 and max_range > 0.0
+        assert noise_std >= 0.0 and 0.0 <= dropout <= 1.0
+        self._body: Body = body
+        self._beam_cnt: int = beam_cnt
+        self._fov: float = fov
+        self._max_range: float = max_range
+        self._offset: Matrix = Matrix([0.0, 0.0],
+                                      'vec') if offset is None else offset
+        self._noise_std: float = noise_std
+        self._dropout: float = dropout
+        self._rng: np.random.Generator = np.random.default_rng(seed)
+
+        self._angle: np.ndarray = np.zeros(0)
+        self.update_angle()
+        self._sim: Optional[Simulation] = None
+        # the clean scan and the state it is valid for
+        self._clean: np.ndarray = np.full(beam_cnt, max_range)
+        self._normal: np.ndarray = np.zeros((beam_cnt, 2))
+        self._hit_id: np.ndarray = np.zeros(beam_cnt, dtype=np.int64)
+        self._state: Optional[np.ndarray] = None
+        self._ranges: np.ndarray = self._clean.copy()
+        self._scan_cnt: int = 0
+
+    @property
+    def body(self) -> Body:
+        return self._body
+
+    @property
+    def beam_cnt(self) -> int:
+        return self._beam_cnt
+
+    @property
+    def fov(self) -> float:
+        return self._fov
+
+    @property
+    def max_range(self) -> float:
+        return self._max_range
+
+    @property
+    def angles(self) -> np.ndarray:
+        '''the beam angles in the body space'''
+        return self._angle
+
+    @property
+    def ranges(self) -> np.ndarray:
+        '''the ranges of the last update with the noise'''
+        return self._ranges
+
+    @property
+    def normals(self) -> np.ndarray:
+        '''the world surface normals of the hits, zero if missed'''
+        return self._normal
+
+    @property
+    def hit_ids(self) -> np.ndarray:
+        '''the body ids hit by the beams, 0 if missed'''
+        return self._hit_id
+
+    @property
+    def scan_cnt(self) -> int:
+        '''the scans really cast, the cached updates are not counted'''
+        return self._scan_cnt
+
+    def update_angle(self) -> None:
+        if self._fov >= 2.0 * np.pi:
+            self._angle = np.linspace(-np.pi, np.pi, self._beam_cnt,
+                                      endpoint=False)
+        elif self._beam_cnt == 1:
+            self._angle = np.zeros(1)
+        else:
+            self._angle = np.linspace(-self._fov / 2.0, self._fov / 2.0,
+                                      self._beam_cnt)
+
+    def origin(self) -> Matrix:
+        '''the mount point in the world space'''
+        return Matrix.rotate_mat(
+            self._body.rot) * self._offset + self._body.pos
+
+    def directions(self) -> np.ndarray:
+        '''the (beam_cnt, 2) world unit directions of the beams'''
+        theta: np.ndarray = self._angle + self._body.rot
+        return np.stack([np.cos(theta), np.sin(theta)], axis=1)
+
+    def points(self) -> np.ndarray:
+        '''the (beam_cnt, 2) world end points of the current ranges'''
+        return self.origin()._val.reshape(1, 2) + self.directions(
+        ) * self._ranges[:, None]
+
+    def attach(self, sim: Simulation, interval: int = 1) -> None:
+        '''scan the sim every 'interval' steps'''
+        self._sim = sim
+        sim.attach(self.update, interval)
+
+    def detach(self) -> None:
+        if self._sim is not None:
+            self._sim.detach(self.update)
+            self._sim = None
+
+    def invalidate(self) -> None:
+        '''drop the cached scan, such as after changing a body shape'''
+        self._state = None
+
+    def update(self, sim: Simulation) -> np.ndarray:
+        '''scan the sim(or reuse the last scan) and read it'''
+        self.scan(sim)
+        self._ranges = self._clean.copy()
+        if self._noise_std > 0.0:
+            hit: np.ndarray = self._hit_id != 0
+            self._ranges[hit] += self._rng.normal(0.0, self._noise_std,
+                                                  int(np.sum(hit)))
+            np.clip(self._ranges, 0.0, self._max_range, out=self._ranges)
+
+        if self._dropout > 0.0:
+            self._ranges[self._rng.random(self._beam_cnt) < self._dropout] = \
+                self._max_range
+
+        return self._ranges
+
+    def scan(self, sim: Simulation) -> np.ndarray:
+        '''get the clean ranges, cast the beams only if the state in the
+        range is changed
+        '''
+        origin: np.ndarray = self.origin()._val.ravel()
+        state: np.ndarray = self.state(sim, origin)
+        if self._state is not None and np.array_equal(state, self._state):
+            return self._clean
+
+        dirn: np.ndarray = self.directions()
+        node_idx, dist, normal = sim.dbvt.raycast_closest_many(
+            np.tile(origin, (self._beam_cnt, 1)), dirn, self._max_range,
+            self._body)
+
+        self._clean = dist
+        self._normal = normal
+        hit: np.ndarray = node_idx >= 0
+        self._hit_id = np.zeros(self._beam_cnt, dtype=np.int64)
+        self._hit_id[hit] = [v.id for v in sim.dbvt.bodies(node_idx[hit])]
+        self._state = state
+        self._scan_cnt += 1
+        return self._clean
+
+    def state(self, sim: Simulation, origin: np.ndarray) -> np.ndarray:
+        '''the sensor pose and the poses of the bodies whose fat box is
+        in the range, sorted by the body id
+        '''
+        box: np.ndarray = np.concatenate(
+            [origin - self._max_range, origin + self._max_range])
+        offset, node_idx = sim.dbvt.query_many(box[None, :])
+        body_list: List[Body] = sim.dbvt.bodies(node_idx)
+        res: np.ndarray = np.array(
+            [(self._body.id, origin[0], origin[1], self._body.rot)] +
+            sorted((v.id, v.pos.x, v.pos.y, v.rot) for v in body_list
+                   if v is not self._body))
+        return res
@@ -0,0 +1,421 @@
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional, Tuple, cast
+
+from .common.config import Config
+from .common.profiler import Profiler
+from .frame import Frame
+from .collision.broad_phase.dbvt import DBVT
+from .collision.broad_phase.aabb import AABB
+from .math.matrix import Matrix
+from .collision.detector import Collsion, Detector
+from .collision.algorithm.gjk import GJK
+from .dynamics.body import Body
+from .dynamics.phy_world import PhysicsWorld
+from .dynamics.constraint.contact import ContactMaintainer
+from .dynamics.joint.point import PointJoint, PointJointPrimitive
+from .snapshot import Snapshot
+
+
+class Simulation():
+    '''Headless physics pipeline, it owns the physics world,
+    broad phase tree and contact maintainer but no gui. The
+    render is attached as an observer if needed.
+    '''
+    def __init__(self):
+        # the physics world, all sim is run in physics world
+        self._world: PhysicsWorld = PhysicsWorld()
+        self._dbvt: DBVT = DBVT()
+        self._maintainer: ContactMaintainer = ContactMaintainer()
+
+        # physics init settings
+        self._world.grav = Matrix([0.0, -9.8], 'vec')
+        self._world.damping_ena = True
+        self._world._linear_vel_damping = 0.1
+        self._world.ang_vel_damping = 0.1
+        self._world.air_fric_coeff = 0.8
+        self._world.pos_iter = 8
+        self._world.vel_iter = 6
+
+        # extern frame table
+        self._ext_frame_list: List[Frame] = []
+        self._ext_frame_idx: int = 0
+
+        # calcuate step
+        self._fps = 120
+        self._dt = 1 / self._fps
+        self._step_cnt: int = 0
+        # fixed timestep accumulator, the sim always advances in
+        # '_dt' steps no matter how long a rendered frame takes
+        self._accumulator: float = 0.0
+        self._max_step: int = 8
+        self._substep: int = 1
+        self._time_scale: float = 1.0
+        self._interp_ena: bool = True
+        self._interp_alpha: float = 1.0
+        # body -> (x, y, rot) of the previous step
+        self._prev_state: Dict[Body, Tuple[float, float, float]] = {}
+
+        # per-phase timing of the recent steps, disabled by default
+        self._profiler: Profiler = Profiler()
+
+        # observer -> notify interval(in steps)
+        self._observer_list: List[Tuple[Callable[[Simulation], None],
+                                        int]] = []
+        # called with (sim, kind, args) after an external input
+        # is applied, such as the replay recorder
+        self._input_list: List[Callable[[Simulation, str, Tuple],
+                                        None]] = []
+
+        # mouse joint oper
+        self._mouse_joint_prim: PointJointPrimitive = PointJointPrimitive()
+        self._mouse_joint_prim._bodya = Body()
+        self._mouse_joint: PointJoint = cast(
+            PointJoint, self._world.create_joint(self._mouse_joint_prim))
+        self._mouse_joint.active = False
+        self._mouse_select_body: Optional[Body] = None
+
+    @property
+    def world(self) -> PhysicsWorld:
+        return self._world
+
+    @property
+    def dbvt(self) -> DBVT:
+        return self._dbvt
+
+    @property
+    def maintainer(self) -> ContactMaintainer:
+        return self._maintainer
+
+    @property
+    def profiler(self) -> Profiler:
+        return self._profiler
+
+    @property
+    def dt(self) -> float:
+        return self._dt
+
+    @dt.setter
+    def dt(self, dt: float) -> None:
+        assert dt > 0.0
+        self._dt = dt
+
+    @property
+    def step_cnt(self) -> int:
+        return self._step_cnt
+
+    @property
+    def max_step(self) -> int:
+        return self._max_step
+
+    @max_step.setter
+    def max_step(self, max_step: int) -> None:
+        assert max_step >= 1
+        self._max_step = max_step
+
+    @property
+    def substep(self) -> int:
+        return self._substep
+
+    @substep.setter
+    def substep(self, substep: int) -> None:
+        assert substep >= 1
+        self._substep = substep
+
+    @property
+    def time_scale(self) -> float:
+        return self._time_scale
+
+    @time_scale.setter
+    def time_scale(self, time_scale: float) -> None:
+        assert time_scale > 0.0
+        self._time_scale = time_scale
+
+    @property
+    def interp_ena(self) -> bool:
+        return self._interp_ena
+
+    @interp_ena.setter
+    def interp_ena(self, interp_ena: bool) -> None:
+        self._interp_ena = interp_ena
+
+    @property
+    def interp_alpha(self) -> float:
+        return self._interp_alpha
+
+    def attach(self,
+               observer: Callable[[Simulation], None],
+               interval: int = 1) -> None:
+        '''attach an observer called after every 'interval' steps
+
+        Parameters
+        ----------
+        observer : Callable[[Simulation], None]
+            the callback, such as the render of the scene
+        interval : int
+            the notify interval in fixed steps
+        '''
+        assert interval >= 1
+        self._observer_list.append((observer, interval))
+
+    def detach(self, observer: Callable[[Simulation], None]) -> None:
+        self._observer_list = [
+            v for v in self._observer_list if v[0] != observer
+        ]
+
+    def attach_input(self, listener: Callable[[Simulation, str, Tuple],
+                                              None]) -> None:
+        '''attach a listener of the external inputs, the kind is one of
+        'grab', 'drag', 'release', 'frame' and 'param'
+        '''
+        self._input_list.append(listener)
+
+    def detach_input(
+            self, listener: Callable[[Simulation, str, Tuple],
+                                     None]) -> None:
+        self._input_list = [v for v in self._input_list if v != listener]
+
+    def notify_input(self, kind: str, *args) -> None:
+        for listener in self._input_list:
+            listener(self, kind, args)
+
+    def set_param(self, name: str, val) -> None:
+        '''set the param to the physics world if it has the attribute,
+        otherwise to the sim, the change is sent to the input listeners
+        '''
+        if hasattr(self._world, name):
+            setattr(self._world, name, val)
+        elif hasattr(self, name):
+            setattr(self, name, val)
+        else:
+            raise AttributeError(f'no param named {name!r}')
+
+        self.notify_input('param', name, val)
+
+    def register_frame(self, frame: Frame) -> None:
+        frame._sim = self
+        self._ext_frame_list.append(frame)
+
+    def remove_frame(self, frame: Frame) -> None:
+        # NOTE: need to check if exist first
+        self._ext_frame_list.remove(frame)
+
+    def clear_all(self) -> None:
+        self._world.clear_all_bodies()
+        self._world.clear_all_joints()
+        self._maintainer.clear_all()
+        self._dbvt.clear_all()
+        self._accumulator = 0.0
+        self._prev_state.clear()
+        self._mouse_joint_prim._bodya = Body()
+        self._mouse_joint = cast(
+            PointJoint, self._world.create_joint(self._mouse_joint_prim))
+        self._mouse_joint.active = False
+        self._mouse_select_body = None
+
+    def snapshot(self) -> bytes:
+        '''save the full state into a binary buffer for the rollback
+        or the branch rollouts, see the Snapshot
+        '''
+        return Snapshot.dump(self)
+
+    def restore(self, buf: bytes) -> None:
+        '''load the state saved by the snapshot, the bodies and joints
+        with the same id are kept and updated in place
+        '''
+        Snapshot.load(self, buf)
+
+    def calc_nxt_frame(self, delta: int) -> None:
+        ext_len: int = len(self._ext_frame_list)
+        assert -ext_len <= delta <= ext_len
+
+        self._ext_frame_idx = Config.clamp(self._ext_frame_idx, 0, ext_len - 1)
+        # NOTE: the sign of mod in python depend on dividend
+        self._ext_frame_idx = (self._ext_frame_idx + delta) % ext_len
+
+    def init_frame(self) -> None:
+        self.change_frame(0)
+
+    def change_frame(self, delta: int) -> None:
+        self.clear_all()
+        self.calc_nxt_frame(delta)
+        self._ext_frame_list[self._ext_frame_idx].load()
+        self.notify_input('frame', delta)
+
+    def cur_frame(self) -> Frame:
+        return self._ext_frame_list[self._ext_frame_idx]
+
+    def step(self, n: int = 1) -> None:
+        '''run n fixed steps as fast as possible
+
+        Parameters
+        ----------
+        n : int
+            the number of steps
+        '''
+        for i in range(n):
+            self.physics_sim()
+
+    def advance(self, frame_time: float) -> int:
+        '''accumulate the frame time and run as many fixed steps
+        as fit into it
+
+        Parameters
+        ----------
+        frame_time : float
+            elapsed time of the rendered frame in seconds
+
+        Returns
+        -------
+        int
+            the number of fixed steps have been run
+        '''
+        self._accumulator += frame_time * self._time_scale
+
+        step_cnt: int = 0
+        while self._accumulator >= self._dt and step_cnt < self._max_step:
+            if self._interp_ena:
+                self.store_prev_state()
+
+            self.physics_sim()
+            self._accumulator -= self._dt
+            step_cnt += 1
+
+        # NOTE: drop the time can not be caught up, otherwise the
+        # accumulator grows forever when the render lags behind
+        if self._accumulator >= self._dt:
+            self._accumulator = self._accumulator % self._dt
+
+        self._interp_alpha = self._accumulator / self._dt
+        if not self._interp_ena:
+            self._interp_alpha = 1.0
+
+        return step_cnt
+
+    def store_prev_state(self) -> None:
+        for bd in self._world._body_list:
+            self._prev_state[bd] = (bd.pos.x, bd.pos.y, bd.rot)
+
+    def physics_sim(self) -> None:
+        sub_dt: float = self._dt / self._substep
+        # NOTE: the substeps already converge the constraints,
+        # so spread the vel iterations over them
+        vel_iter: int = max(1, -(-self._world.vel_iter // self._substep))
+
+        prof: Profiler = self._profiler
+        epa_iter: int = GJK.epa_iter_cnt
+        reinsert: int = self._dbvt.reinsert_cnt
+        prof.begin()
+
+        for i in range(self._substep):
+            self.physics_step(sub_dt, vel_iter)
+
+        if prof.ena:
+            prof.count(Profiler.EpaIter, GJK.epa_iter_cnt - epa_iter)
+            prof.count(Profiler.Reinsert, self._dbvt.reinsert_cnt - reinsert)
+            prof.end_frame()
+
+        self._step_cnt += 1
+        for observer, interval in self._observer_list:
+            if self._step_cnt % interval == 0:
+                observer(self)
+
+    def physics_step(self, dt: float, vel_iter: int) -> None:
+        prof: Profiler = self._profiler
+        for elem in self._world._body_list:
+            self._dbvt.update(elem)
+        prof.tick(Profiler.Tree)
+
+        self._world.step_velocity(dt)
+        prof.tick(Profiler.IntegrateVel)
+
+        pot_list: List[Tuple[Body, Body]] = self._dbvt.generate()
+        prof.tick(Profiler.Generate)
+
+        coll_list: List[Collsion] = []
+        for pot in pot_list:
+            res: Collsion = Detector.detect(pot[0], pot[1])
+            if res._is_colliding:
+                coll_list.append(res)
+        prof.tick(Profiler.Detect)
+
+        for res in coll_list:
+            self._maintainer.add(res)
+
+        self._maintainer.clear_inactive_points()
+        prof.tick(Profiler.Contact)
+        if prof.ena:
+            prof.count(Profiler.Pair, len(pot_list))
+            prof.count(Profiler.Colliding, len(coll_list))
+            prof.count(Profiler.ContactPoint,
+                       sum(len(v._contact_list) for v in coll_list))
+
+        self._world.prepare_velocity_constraint(dt,
+                                                self._maintainer.body_list())
+        prof.tick(Profiler.Prepare)
+
+        for i in range(vel_iter):
+            self._world.solve_velocity_constraint(dt)
+            self._maintainer.solve_velocity(dt)
+        self._world.finish_velocity_constraint()
+        prof.tick(Profiler.SolveVel)
+
+        self._world.step_position(dt)
+        prof.tick(Profiler.IntegratePos)
+
+        for i in range(self._world.pos_iter):
+            self._maintainer.solve_position(dt)
+            self._world.solve_position_constraint(dt)
+        prof.tick(Profiler.SolvePos)
+
+        self._maintainer.deactivate_all_points()
+
+    def grab(self, pos: Matrix) -> Optional[Body]:
+        '''bind the mouse joint to the body under the world point
+
+        Parameters
+        ----------
+        pos : Matrix
+            the grab point in world space
+
+        Returns
+        -------
+        Optional[Body]
+            the grabbed body, None if no body under the point
+        '''
+        if self._mouse_select_body is not None:
+            return self._mouse_select_body
+
+        mouse_box: AABB = AABB(0.01, 0.01)
+        mouse_box.pos = pos
+        bd_list: List[Body] = self._dbvt.query(mouse_box)
+        for bd in bd_list:
+            point: Matrix = pos - bd.pos
+            point = Matrix.rotate_mat(-bd.rot) * point
+
+            if bd.shape.contains(point):
+                self._mouse_select_body = bd
+                prim: PointJointPrimitive = self._mouse_joint.prim()
+                prim._local_pointa = bd.to_local_point(pos)
+                prim._bodya = bd
+                prim._target_point = pos
+                self._mouse_joint.active = True
+                self._mouse_joint.set_value(prim)
+                break
+
+        self.notify_input('grab', pos.x, pos.y)
+        return self._mouse_select_body
+
+    def drag(self, pos: Matrix) -> None:
+        # NOTE: the mouse joint is inactive, nothing to drag or record
+        if self._mouse_select_body is None:
+            return
+
+        prim: PointJointPrimitive = self._mouse_joint.prim()
+        prim._target_point = pos
+        self._mouse_joint.set_value(prim)
+        self.notify_input('drag', pos.x, pos.y)
+
+    def release(self) -> None:
+        self._mouse_joint.active = False
+        self._mouse_select_body = None
+        self.notify_input('release')
@@ -0,0 +1,472 @@
+from __future__ import annotations
+import struct
+from typing import Any, Dict, List, Optional, Tuple, Type
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from .math.matrix import Matrix
+from .geometry.shape import Capsule, Circle, Curve, Edge, Ellipse, Point
+from .geometry.shape import Polygon, Rectangle, Sector, Shape
+from .collision.broad_phase.aabb import AABB
+from .collision.broad_phase.dbvt import DBVT
+from .common.random import IdAllocator
+from .dynamics.body import Body
+from .dynamics.phy_world import PhysicsWorld
+from .dynamics.constraint.contact import ContactConstraintPoint
+from .dynamics.constraint.contact import ContactMaintainer
+from .dynamics.constraint.contact import VelocityConstraintPoint
+from .dynamics.constraint.contact import generate_relation
+from .dynamics.joint.joint import Joint
+from .dynamics.joint.distance import DistanceJoint, DistanceJointPrimitive
+from .dynamics.joint.point import PointJoint, PointJointPrimitive
+from .dynamics.joint.pulley import PulleyJoint, PulleyJointPrimitive
+from .dynamics.joint.revolute import RevoluteJoint, RevoluteJointPrimitive
+from .dynamics.joint.rotation import OrientationJoint
+from .dynamics.joint.rotation import OrientationJointPrimitive
+from .dynamics.joint.rotation import RotationJoint, RotationJointPrimitive
+
+if TYPE_CHECKING:
+    from .simulation import Simulation
+
+
+class FieldCodec():
+    '''flatten the plain fields of one class into floats
+
+    the fields and their kinds are taken from a default instance, the
+    number(bool, int, enum, float), Matrix and Body reference fields
+    are kept, the other fields are left to the caller. The body is
+    stored by its id, 0 for None or a body out of the world.
+    '''
+    Num: int = 0
+    Mat: int = 1
+    BodyRef: int = 2
+    MatList: int = 3
+
+    def __init__(self,
+                 default: Any,
+                 skip: Tuple[str, ...] = (),
+                 mat_list: Tuple[str, ...] = ()):
+        # (name, kind, the caster of the number or the matrix type
+        # or whether the body ref defaults to a placeholder body)
+        self._field_list: List[Tuple[str, int, Any]] = []
+        for k, v in vars(default).items():
+            if k in skip:
+                continue
+
+            if k in mat_list:
+                self._field_list.append((k, FieldCodec.MatList, None))
+            elif isinstance(v, (bool, float, np.floating)):
+                self._field_list.append((k, FieldCodec.Num, type(v) is bool))
+            elif isinstance(v, (int, np.integer)):
+                # NOTE: keep the enum type
+                typ: type = type(v)
+                self._field_list.append(
+                    (k, FieldCodec.Num, lambda val, typ=typ: typ(int(val))))
+            elif isinstance(v, Matrix):
+                self._field_list.append((k, FieldCodec.Mat, v._data_type))
+            elif v is None or isinstance(v, Body):
+                self._field_list.append(
+                    (k, FieldCodec.BodyRef, isinstance(v, Body)))
+
+    def encode(self, obj: Any, out: List[float]) -> None:
+        for k, kind, dft in self._field_list:
+            v: Any = getattr(obj, k)
+            if kind == FieldCodec.Num:
+                out.append(float(v))
+            elif kind == FieldCodec.Mat:
+                out.extend(v._val.ravel().tolist())
+            elif kind == FieldCodec.BodyRef:
+                out.append(0.0 if v is None else float(v.id))
+            else:
+                out.append(float(len(v)))
+                for vert in v:
+                    out.extend(vert._val.ravel().tolist())
+
+    def decode(self, obj: Any, vals: List[float], pos: int,
+               body_table: Dict[int, Body]) -> int:
+        '''set the fields of the obj and return the next position'''
+        for k, kind, dft in self._field_list:
+            if kind == FieldCodec.Num:
+                v: float = vals[pos]
+                if dft is False:
+                    setattr(obj, k, v)
+                elif dft is True:
+                    setattr(obj, k, v != 0.0)
+                else:
+                    setattr(obj, k, dft(v))
+                pos += 1
+            elif kind == FieldCodec.Mat:
+                size: int = 2 if dft == 'vec' else 4
+                setattr(obj, k, Matrix(vals[pos:pos + size], dft))
+                pos += size
+            elif kind == FieldCodec.BodyRef:
+                body_id: int = int(vals[pos])
+                pos += 1
+                if body_id != 0:
+                    setattr(obj, k, body_table[body_id])
+                    continue
+
+                # NOTE: keep the placeholder body out of the world
+                cur: Any = getattr(obj, k, None)
+                if isinstance(cur, Body) and body_table.get(cur.id) is not cur:
+                    continue
+                setattr(obj, k, Body() if dft else None)
+            else:
+                vert_len: int = int(vals[pos])
+                pos += 1
+                setattr(obj, k, [
+                    Matrix(vals[pos + 2 * i:pos + 2 * i + 2], 'vec')
+                    for i in range(vert_len)
+                ])
+                pos += 2 * vert_len
+
+        return pos
+
+    def span(self, vals: List[float], pos: int) -> int:
+        '''get the next position without decoding'''
+        for k, kind, dft in self._field_list:
+            if kind == FieldCodec.Mat:
+                pos += 2 if dft == 'vec' else 4
+            elif kind == FieldCodec.MatList:
+                pos += 1 + 2 * int(vals[pos])
+            else:
+                pos += 1
+
+        return pos
+
+
+class Snapshot():
+    '''binary snapshot of the full sim state
+
+    the buffer holds the sim and world settings, the id allocators,
+    the shapes, bodies, joints, the contact points with the accumulated
+    impulses and the DBVT nodes. It is a short header and a flat
+    float64 stream, so the restore is a linear scan.
+
+    The restore keeps the bodies, joints and unchanged shapes which
+    have the same id in the target sim, so the references held by the
+    user are still valid after a rollback. A snapshot can also be
+    restored into a fresh sim to branch the rollouts.
+    '''
+    Magic: bytes = b'TGSN'
+    Version: int = 1
+    Header: struct.Struct = struct.Struct('<4sIQ')
+
+    ShapeClass: Tuple[Type[Shape], ...] = (Point, Polygon, Rectangle, Circle,
+                                           Ellipse, Edge, Curve, Capsule,
+                                           Sector)
+    JointClass: Tuple[Tuple[Type[Joint], type], ...] = (
+        (RotationJoint, RotationJointPrimitive),
+        (PointJoint, PointJointPrimitive),
+        (DistanceJoint, DistanceJointPrimitive),
+        (PulleyJoint, PulleyJointPrimitive),
+        (RevoluteJoint, RevoluteJointPrimitive),
+        (OrientationJoint, OrientationJointPrimitive),
+    )
+
+    _codec_table: Dict[type, FieldCodec] = {}
+
+    @staticmethod
+    def codec(cls: type, skip: Tuple[str, ...] = ()) -> FieldCodec:
+        '''get the cached codec of the class, the skip is only used by
+        the first call
+        '''
+        res: Optional[FieldCodec] = Snapshot._codec_table.get(cls)
+        if res is not None:
+            return res
+
+        prim_table: Dict[type, type] = dict(Snapshot.JointClass)
+        if cls in prim_table:
+            res = FieldCodec(cls(prim_table[cls]()))
+        elif issubclass(cls, Shape):
+            res = FieldCodec(cls(), mat_list=('_vertices', ))
+        else:
+            res = FieldCodec(cls(), skip)
+
+        Snapshot._codec_table[cls] = res
+        return res
+
+    @staticmethod
+    def sim_codec(sim: Simulation) -> FieldCodec:
+        # NOTE: the frames are owned by the code, not the state
+        return Snapshot.codec(type(sim), ('_ext_frame_idx', ))
+
+    @staticmethod
+    def init_codec() -> None:
+        # the relation is rebuilt from the body ids, it does not fit
+        # in the float64
+        Snapshot.codec(Body, ('_shape', ))
+        Snapshot.codec(ContactConstraintPoint, ('_relation', ))
+
+    @staticmethod
+    def dump(sim: Simulation) -> bytes:
+        Snapshot.init_codec()
+        out: List[float] = []
+        world: PhysicsWorld = sim.world
+
+        Snapshot.codec(PhysicsWorld).encode(world, out)
+        Snapshot.dump_id_alloc(world._body_id_alloc, out)
+        Snapshot.dump_id_alloc(world._joint_id_alloc, out)
+
+        # the shared shapes are stored once
+        shape_idx: Dict[int, int] = {}
+        shape_out: List[float] = []
+        body_out: List[float] = []
+        for bd in world._body_list:
+            shape: Any = bd.shape
+            if shape is None:
+                body_out.append(-1.0)
+            else:
+                if id(shape) not in shape_idx:
+                    shape_idx[id(shape)] = len(shape_idx)
+                    shape_out.append(
+                        float(Snapshot.ShapeClass.index(type(shape))))
+                    Snapshot.codec(type(shape)).encode(shape, shape_out)
+                body_out.append(float(shape_idx[id(shape)]))
+
+            body_out.append(float(bd.id))
+            Snapshot.codec(Body.PhysicsAttribute).encode(bd.phy_attr, body_out)
+            Snapshot.codec(Body).encode(bd, body_out)
+
+        out.append(float(len(shape_idx)))
+        out += shape_out
+        out.append(float(len(world._body_list)))
+        out += body_out
+
+        out.append(float(len(world._joint_list)))
+        for jt in world._joint_list:
+            cls_idx: int = [v[0] for v in Snapshot.JointClass].index(type(jt))
+            out += [float(cls_idx), float(jt.id)]
+            Snapshot.codec(type(jt)).encode(jt, out)
+            Snapshot.codec(type(jt._prim)).encode(jt._prim, out)
+        out.append(float(sim._mouse_joint.id))
+
+        Snapshot.dump_dbvt(sim.dbvt, out)
+        Snapshot.dump_contact(sim.maintainer, out)
+        Snapshot.sim_codec(sim).encode(sim, out)
+
+        payload: bytes = np.asarray(out, dtype=np.float64).tobytes()
+        return Snapshot.Header.pack(Snapshot.Magic, Snapshot.Version,
+                                    len(out)) + payload
+
+    @staticmethod
+    def dump_id_alloc(alloc: IdAllocator, out: List[float]) -> None:
+        out.append(float(len(alloc._generation)))
+        out += [float(v) for v in alloc._generation]
+        out += [float(v) for v in alloc._alive]
+        out.append(float(len(alloc._free_list)))
+        out += [float(v) for v in alloc._free_list]
+
+    @staticmethod
+    def dump_dbvt(dbvt: DBVT, out: List[float]) -> None:
+        out += [
+            dbvt._fat_expansion_factor,
+            float(dbvt._root_idx),
+            float(dbvt._reinsert_cnt),
+            float(len(dbvt._empty_list))
+        ]
+        out += [float(v) for v in dbvt._empty_list]
+
+        out.append(float(len(dbvt._tree)))
+        for node in dbvt._tree:
+            box: AABB = node._aabb
+            out += [
+                0.0 if node._body is None else float(node._body.id),
+                box._pos.x, box._pos.y, box._width, box._height,
+                float(node._parent_idx),
+                float(node._left_idx),
+                float(node._right_idx)
+            ]
+
+    @staticmethod
+    def dump_contact(maintainer: ContactMaintainer, out: List[float]) -> None:
+        Snapshot.codec(ContactMaintainer).encode(maintainer, out)
+        # NOTE: the empty lists are dropped by the next clear anyway
+        val_list: List[List[ContactConstraintPoint]] = [
+            v for v in maintainer._contact_table.values() if len(v) > 0
+        ]
+        out.append(float(len(val_list)))
+        for val in val_list:
+            out.append(float(len(val)))
+            for ccp in val:
+                Snapshot.codec(ContactConstraintPoint).encode(ccp, out)
+                Snapshot.codec(VelocityConstraintPoint).encode(ccp._vcp, out)
+
+    @staticmethod
+    def load(sim: Simulation, buf: bytes) -> None:
+        magic, ver, val_len = Snapshot.Header.unpack_from(buf)
+        if magic != Snapshot.Magic or ver != Snapshot.Version:
+            raise ValueError('not a compatible snapshot buffer')
+        Snapshot.init_codec()
+
+        vals: List[float] = np.frombuffer(buf,
+                                          dtype=np.float64,
+                                          count=val_len,
+                                          offset=Snapshot.Header.size).tolist()
+        world: PhysicsWorld = sim.world
+        pos: int = Snapshot.codec(PhysicsWorld).decode(world, vals, 0, {})
+        pos = Snapshot.load_id_alloc(world._body_id_alloc, vals, pos)
+        pos = Snapshot.load_id_alloc(world._joint_id_alloc, vals, pos)
+
+        # (class, start pos) of every shape, decoded on the first use
+        shape_pos: List[Tuple[Type[Shape], int]] = []
+        size: int = int(vals[pos])
+        pos += 1
+        for i in range(size):
+            cls: Type[Shape] = Snapshot.ShapeClass[int(vals[pos])]
+            shape_pos.append((cls, pos + 1))
+            pos = Snapshot.codec(cls).span(vals, pos + 1)
+
+        old_body: Dict[int, Body] = {bd.id: bd for bd in world._body_list}
+        body_table: Dict[int, Body] = {}
+        shape_list: List[Optional[Shape]] = [None] * len(shape_pos)
+        body_list: List[Body] = []
+        size = int(vals[pos])
+        pos += 1
+        for i in range(size):
+            idx: int = int(vals[pos])
+            body_id: int = int(vals[pos + 1])
+            pos += 2
+
+            body: Optional[Body] = old_body.get(body_id)
+            if body is None:
+                body = Body.__new__(Body)
+                body._phy_attr = Body.PhysicsAttribute.__new__(
+                    Body.PhysicsAttribute)
+                body._shape = None
+
+            if idx >= 0:
+                if shape_list[idx] is None:
+                    shape_list[idx] = Snapshot.load_shape(
+                        body.shape, shape_pos[idx], vals)
+                body._shape = shape_list[idx]
+
+            pos = Snapshot.codec(Body.PhysicsAttribute).decode(
+                body._phy_attr, vals, pos, body_table)
+            pos = Snapshot.codec(Body).decode(body, vals, pos, body_table)
+            body_table[body_id] = body
+            body_list.append(body)
+        world._body_list[:] = body_list
+
+        old_joint: Dict[int, Joint] = {jt.id: jt for jt in world._joint_list}
+        joint_list: List[Joint] = []
+        size = int(vals[pos])
+        pos += 1
+        for i in range(size):
+            jt_cls, prim_cls = Snapshot.JointClass[int(vals[pos])]
+            jt: Optional[Joint] = old_joint.get(int(vals[pos + 1]))
+            if type(jt) is not jt_cls:
+                jt = jt_cls(prim_cls())
+            assert jt is not None
+            pos = Snapshot.codec(jt_cls).decode(jt, vals, pos + 2, body_table)
+            pos = Snapshot.codec(prim_cls).decode(jt._prim, vals, pos,
+                                                  body_table)
+            joint_list.append(jt)
+        world._joint_list[:] = joint_list
+        # NOTE: the mouse joint of the sim is kept in the world
+        mouse_id: int = int(vals[pos])
+        pos += 1
+        for jt in joint_list:
+            if jt.id == mouse_id and isinstance(jt, PointJoint):
+                sim._mouse_joint = jt
+                sim._mouse_joint_prim = jt._prim
+
+        pos = Snapshot.load_dbvt(sim.dbvt, vals, pos, body_table)
+        pos = Snapshot.load_contact(sim.maintainer, vals, pos, body_table)
+        Snapshot.sim_codec(sim).decode(sim, vals, pos, body_table)
+
+        # NOTE: no interpolation across the jump
+        sim._prev_state.clear()
+        sim.store_prev_state()
+
+    @staticmethod
+    def load_shape(cur: Optional[Shape], shape_pos: Tuple[Type[Shape], int],
+                   vals: List[float]) -> Shape:
+        cls, pos = shape_pos
+        codec: FieldCodec = Snapshot.codec(cls)
+        # keep the unchanged shape, the caches are keyed by it
+        if type(cur) is cls:
+            cur_val: List[float] = []
+            codec.encode(cur, cur_val)
+            if cur_val == vals[pos:pos + len(cur_val)]:
+                return cur
+
+        res: Shape = cls.__new__(cls)
+        codec.decode(res, vals, pos, {})
+        return res
+
+    @staticmethod
+    def load_id_alloc(alloc: IdAllocator, vals: List[float], pos: int) -> int:
+        size: int = int(vals[pos])
+        pos += 1
+        alloc._generation = [int(v) for v in vals[pos:pos + size]]
+        alloc._alive = [bool(v) for v in vals[pos + size:pos + 2 * size]]
+        pos += 2 * size
+
+        size = int(vals[pos])
+        alloc._free_list = [int(v) for v in vals[pos + 1:pos + 1 + size]]
+        return pos + 1 + size
+
+    @staticmethod
+    def load_dbvt(dbvt: DBVT, vals: List[float], pos: int,
+                  body_table: Dict[int, Body]) -> int:
+        dbvt._fat_expansion_factor = vals[pos]
+        dbvt._root_idx = int(vals[pos + 1])
+        dbvt._reinsert_cnt = int(vals[pos + 2])
+        size: int = int(vals[pos + 3])
+        pos += 4
+        dbvt._empty_list = [int(v) for v in vals[pos:pos + size]]
+        pos += size
+
+        tree: List[DBVT.Node] = []
+        dbvt._body_table = {}
+        size = int(vals[pos])
+        pos += 1
+        for i in range(size):
+            body_id, x, y, w, h, parent, left, right = vals[pos:pos + 8]
+            pos += 8
+            node: DBVT.Node = DBVT.Node()
+            node._aabb = AABB(w, h)
+            node._aabb._pos = Matrix([x, y], 'vec')
+            node._parent_idx = int(parent)
+            node._left_idx = int(left)
+            node._right_idx = int(right)
+            if body_id != 0.0:
+                node._body = body_table[int(body_id)]
+                dbvt._body_table[node._body] = i
+            tree.append(node)
+
+        dbvt._tree = tree
+        dbvt._flat = None
+        return pos
+
+    @staticmethod
+    def load_contact(maintainer: ContactMaintainer, vals: List[float],
+                     pos: int, body_table: Dict[int, Body]) -> int:
+        pos = Snapshot.codec(ContactMaintainer).decode(maintainer, vals, pos,
+                                                       body_table)
+        ccp_codec: FieldCodec = Snapshot.codec(ContactConstraintPoint)
+        vcp_codec: FieldCodec = Snapshot.codec(VelocityConstraintPoint)
+
+        table: Dict[int, List[ContactConstraintPoint]] = {}
+        rel_len: int = int(vals[pos])
+        pos += 1
+        for i in range(rel_len):
+            val: List[ContactConstraintPoint] = []
+            pt_len: int = int(vals[pos])
+            pos += 1
+            for j in range(pt_len):
+                ccp: ContactConstraintPoint = ContactConstraintPoint.__new__(
+                    ContactConstraintPoint)
+                ccp._vcp = VelocityConstraintPoint.__new__(
+                    VelocityConstraintPoint)
+                pos = ccp_codec.decode(ccp, vals, pos, body_table)
+                pos = vcp_codec.decode(ccp._vcp, vals, pos, body_table)
+                ccp._relation = generate_relation(ccp._bodya, ccp._bodyb)
+                val.append(ccp)
+
+            table[val[0]._relation] = val
+
+        maintainer._contact_table = table
+        return pos
@@ -52,10 +52,11 @@ class Scene():
         # extern frame table
         self._ext_frame_list: List[Frame] = []
         self._ext_frame_idx: int = 0
+        # the screen pos of the bodies in the last render
+        self._spos: np.ndarray = np.zeros((0, 2), dtype=np.float32)
 
     def physics_sim(self) -> None:
-        self._world.step_velocity(self._dt)
-        self._world.step_position(self._dt)
+        self._world.step(self._dt)
 
     def render(self) -> None:
         self.smooth_scale()
@@ -160,250 +161,61 @@ class Scene():
 
     @ti.kernel
     def gen_body_data(self, scale: float, origx: float, origy: float,
-                      xformx: float, xformy: float, vw: float, vh: float):
-        for i in range(len(self._world._body_list)):
-            rot_mat = self.rotate_mat(self._world._rot[i])
+                      xformx: float, xformy: float, vw: float, vh: float,
+                      spos: ti.types.ndarray(), svert: ti.types.ndarray()):
+        for i in range(self._world._body_cnt[None]):
+            pos = self._world._pos[i]
+            res = self.world_to_screen(pos, scale, origx, origy, xformx,
+                                       xformy, vw, vh)
+            spos[i, 0] = res.x
+            spos[i, 1] = res.y
 
-            if self._world._shape_type[i] == 1:
-                self._world._cirspos[i] = self.world_to_screen(
-                    self._world._cirpos[i], scale, origx, origy, xformx,
-                    xformy, vw, vh)
-                self._world._scir_rad[i] = self._world._cir_rad[i] * scale
-
-            elif self._world._shape_type[i] == 2:
-                pass
-            elif self._world._shape_type[i] == 3:
-                self._world._poly_trispos[i] = self.world_to_screen(
-                    self._world._poly_tripos[i], scale, origx, origy, xformx,
-                    xformy, vw, vh)
-                for j in range(3):
-                    self._world._poly_trisst[i, j] = self.world_to_screen(
-                        self._world._poly_tripos[i] +
-                        rot_mat @ self._world._poly_trist[i, j], scale, origx, origy,
-                        xformx, xformy, vw, vh)
-
-                    self._world._poly_trised[i, j] = self.world_to_screen(
-                        self._world._poly_tripos[i] +
-                        rot_mat @ self._world._poly_tried[i, j], scale, origx, origy,
-                        xformx, xformy, vw, vh)
-
-                self._world._poly_tri_a[i, 0] = self._world._poly_trisst[i, 0]
-                self._world._poly_tri_b[i, 0] = self._world._poly_trisst[i, 1]
-                self._world._poly_tri_c[i, 0] = self._world._poly_trisst[i, 2]
-
-            elif self._world._shape_type[i] == 4:
-                self._world._poly_recspos[i] = self.world_to_screen(
-                    self._world._poly_recpos[i], scale, origx, origy, xformx,
-                    xformy, vw, vh)
-                for j in range(4):
-                    self._world._poly_recsst[i, j] = self.world_to_screen(
-                        self._world._poly_recpos[i] +
-                        rot_mat @ self._world._poly_recst[i, j], scale, origx, origy,
-                        xformx, xformy, vw, vh)
-
-                    self._world._poly_recsed[i, j] = self.world_to_screen(
-                        self._world._poly_recpos[i] +
-                        rot_mat @ self._world._poly_reced[i, j], scale, origx, origy,
-                        xformx, xformy, vw, vh)
-
-                    if j >= 2:
-                        self._world._poly_rec_a[
-                            i, j - 2] = self._world._poly_recsst[i, 0]
-                        self._world._poly_rec_b[
-                            i, j - 2] = self._world._poly_recsst[i, j - 1]
-                        self._world._poly_rec_c[
-                            i, j - 2] = self._world._poly_recsst[i, j]
-
-            elif self._world._shape_type[i] == 5:
-                self._world._poly_penspos[i] = self.world_to_screen(
-                    self._world._poly_penpos[i], scale, origx, origy, xformx,
-                    xformy, vw, vh)
-                for j in range(5):
-                    self._world._poly_pensst[i, j] = self.world_to_screen(
-                        self._world._poly_penpos[i] +
-                        rot_mat @ self._world._poly_penst[i, j], scale, origx, origy,
-                        xformx, xformy, vw, vh)
-
-                    self._world._poly_pensed[i, j] = self.world_to_screen(
-                        self._world._poly_penpos[i] +
-                        rot_mat @ self._world._poly_pened[i, j], scale, origx, origy,
-                        xformx, xformy, vw, vh)
-
-                    if j >= 2:
-                        self._world._poly_pen_a[
-                            i, j - 2] = self._world._poly_pensst[i, 0]
-                        self._world._poly_pen_b[
-                            i, j - 2] = self._world._poly_pensst[i, j - 1]
-                        self._world._poly_pen_c[
-                            i, j - 2] = self._world._poly_pensst[i, j]
-
-            elif self._world._shape_type[i] == 6:
-                pass
-
-            elif self._world._shape_type[i] == 7:
-                self._world._cap_spos[i] = self.world_to_screen(
-                    self._world._cap_pos[i], scale, origx, origy, xformx,
-                    xformy, vw, vh)
-
-                tmp1 = ti.Vector([0.0, 0.0])
-                tmp2 = ti.Vector([0.0, 0.0])
-                offset = ti.min(self._world._cap_width[i],
-                                self._world._cap_height[i]) / 2.0
-                if self._world._cap_width[i] > self._world._cap_height[i]:
-                    tmp1.x = -(self._world._cap_width[i] / 2.0 - offset)
-                    tmp2.x = (self._world._cap_width[i] / 2.0 - offset)
-                else:
-                    tmp1.y = -(self._world._cap_height[i] / 2.0 - offset)
-                    tmp2.y = (self._world._cap_height[i] / 2.0 - offset)
-
-                self._world._cap_c1[i] = self.world_to_screen(
-                    self._world._cap_pos[i] + rot_mat @ tmp1, scale, origx, origy,
-                    xformx, xformy, vw, vh)
-
-                self._world._cap_c2[i] = self.world_to_screen(
-                    self._world._cap_pos[i] + rot_mat @ tmp2, scale, origx, origy,
-                    xformx, xformy, vw, vh)
-
-                self._world._cap_p[i, 0] = ti.Vector([
-                    -self._world._cap_width[i] / 2.0,
-                    -self._world._cap_height[i] / 2.0
-                ])
-                self._world._cap_p[i, 1] = ti.Vector([
-                    self._world._cap_width[i] / 2.0,
-                    -self._world._cap_height[i] / 2.0
-                ])
-                self._world._cap_p[i, 2] = ti.Vector([
-                    self._world._cap_width[i] / 2.0,
-                    self._world._cap_height[i] / 2.0
-                ])
-                self._world._cap_p[i, 3] = ti.Vector([
-                    -self._world._cap_width[i] / 2.0,
-                    self._world._cap_height[i] / 2.0
-                ])
-
-                if self._world._cap_width[i] > self._world._cap_height[i]:
-                    self._world._cap_p[i, 0].x += offset
-                    self._world._cap_p[i, 1].x -= offset
-                    self._world._cap_p[i, 2].x -= offset
-                    self._world._cap_p[i, 3].x += offset
-                else:
-                    self._world._cap_p[i, 0].y += offset
-                    self._world._cap_p[i, 1].y += offset
-                    self._world._cap_p[i, 2].y -= offset
-                    self._world._cap_p[i, 3].y -= offset
-
-                for j in range(2):
-                    self._world._cap_rec_a[i, j] = self.world_to_screen(
-                        self._world._cap_pos[i] + rot_mat @ self._world._cap_p[i, 0],
-                        scale, origx, origy, xformx, xformy, vw, vh)
-
-                    self._world._cap_rec_b[i, j] = self.world_to_screen(
-                        self._world._cap_pos[i] + rot_mat @ self._world._cap_p[i, j + 1],
-                        scale, origx, origy, xformx, xformy, vw, vh)
-
-                    self._world._cap_rec_c[i, j] = self.world_to_screen(
-                        self._world._cap_pos[i] + rot_mat @ self._world._cap_p[i, j + 2],
-                        scale, origx, origy, xformx, xformy, vw, vh)
+            rot_mat = self.rotate_mat(self._world._rot[i])
+            offset = self._world._vert_offset[i]
+            for j in range(self._world._vert_cnt[i]):
+                res = self.world_to_screen(
+                    pos + rot_mat @ self._world._vert[offset + j], scale,
+                    origx, origy, xformx, xformy, vw, vh)
+                svert[offset + j, 0] = res.x
+                svert[offset + j, 1] = res.y
 
     def render_body(self) -> None:
-        # self._world.random_set()
+        # the circles, the polygon fans and the outlines of all bodies
+        # are drawn by one call each
+        self._spos = np.zeros((self._world.body_cnt, 2), dtype=np.float32)
+        svert: np.ndarray = np.zeros((self._world.vert_total, 2),
+                                     dtype=np.float32)
         self.gen_body_data(self._meter_to_pixel, self._origin.x,
                            self._origin.y, self._xform.x, self._xform.y,
-                           self._viewport.width, self._viewport.height)
-
-        self._gui.circles(self._world._cirspos.to_numpy(),
-                          radius=self._world._scir_rad[1],
-                          color=Config.FillColor)
-
-        tri_st = self._world._poly_trisst.to_numpy()
-        tri_ed = self._world._poly_trised.to_numpy()
-        tri_st = tri_st.reshape(tri_st.shape[0] * tri_st.shape[1], -1)
-        tri_ed = tri_ed.reshape(tri_ed.shape[0] * tri_ed.shape[1], -1)
-        self._gui.lines(begin=tri_st,
-                        end=tri_ed,
-                        color=Config.OuterLineColor,
-                        radius=2)
-
-        rec_st = self._world._poly_recsst.to_numpy()
-        rec_ed = self._world._poly_recsed.to_numpy()
-        rec_st = rec_st.reshape(rec_st.shape[0] * rec_st.shape[1], -1)
-        rec_ed = rec_ed.reshape(rec_ed.shape[0] * rec_ed.shape[1], -1)
-        self._gui.lines(begin=rec_st,
-                        end=rec_ed,
-                        color=Config.OuterLineColor,
-                        radius=2)
-
-        pen_st = self._world._poly_pensst.to_numpy()
-        pen_ed = self._world._poly_pensed.to_numpy()
-        pen_st = pen_st.reshape(pen_st.shape[0] * pen_st.shape[1], -1)
-        pen_ed = pen_ed.reshape(pen_ed.shape[0] * pen_ed.shape[1], -1)
-        self._gui.lines(begin=pen_st,
-                        end=pen_ed,
-                        color=Config.OuterLineColor,
-                        radius=2)
-
-        tri_a = self._world._poly_tri_a.to_numpy()
-        tri_b = self._world._poly_tri_b.to_numpy()
-        tri_c = self._world._poly_tri_c.to_numpy()
-        tri_a = tri_a.reshape(tri_a.shape[0] * tri_a.shape[1], -1)
-        tri_b = tri_b.reshape(tri_b.shape[0] * tri_b.shape[1], -1)
-        tri_c = tri_c.reshape(tri_c.shape[0] * tri_c.shape[1], -1)
-        self._gui.triangles(a=tri_a, b=tri_b, c=tri_c, color=Config.FillColor)
-
-        rec_a = self._world._poly_rec_a.to_numpy()
-        rec_b = self._world._poly_rec_b.to_numpy()
-        rec_c = self._world._poly_rec_c.to_numpy()
-        rec_a = rec_a.reshape(rec_a.shape[0] * rec_a.shape[1], -1)
-        rec_b = rec_b.reshape(rec_b.shape[0] * rec_b.shape[1], -1)
-        rec_c = rec_c.reshape(rec_c.shape[0] * rec_c.shape[1], -1)
-        self._gui.triangles(a=rec_a, b=rec_b, c=rec_c, color=Config.FillColor)
-
-        pen_a = self._world._poly_pen_a.to_numpy()
-        pen_b = self._world._poly_pen_b.to_numpy()
-        pen_c = self._world._poly_pen_c.to_numpy()
-        pen_a = pen_a.reshape(pen_a.shape[0] * pen_a.shape[1], -1)
-        pen_b = pen_b.reshape(pen_b.shape[0] * pen_b.shape[1], -1)
-        pen_c = pen_c.reshape(pen_c.shape[0] * pen_c.shape[1], -1)
-        self._gui.triangles(a=pen_a, b=pen_b, c=pen_c, color=Config.FillColor)
-
-        offset = np.fmin(self._world._cap_width[0],
-                         self._world._cap_height[0]) / 2.0
-        self._gui.circles(self._world._cap_c1.to_numpy(),
-                          radius=self._meter_to_pixel * offset,
-                          color=Config.FillColor)
-
-        self._gui.circles(self._world._cap_c2.to_numpy(),
-                          radius=self._meter_to_pixel * offset,
-                          color=Config.FillColor)
-
-        rec_a = self._world._cap_rec_a.to_numpy()
-        rec_b = self._world._cap_rec_b.to_numpy()
-        rec_c = self._world._cap_rec_c.to_numpy()
-        rec_a = rec_a.reshape(rec_a.shape[0] * rec_a.shape[1], -1)
-        rec_b = rec_b.reshape(rec_b.shape[0] * rec_b.shape[1], -1)
-        rec_c = rec_c.reshape(rec_c.shape[0] * rec_c.shape[1], -1)
-        self._gui.triangles(a=rec_a, b=rec_b, c=rec_c, color=Config.FillColor)
+                           self._viewport.width, self._viewport.height,
+                           self._spos, svert)
+
+        cir_idx: np.ndarray = self._world._cir_idx
+        if len(cir_idx) > 0:
+            self._gui.circles(self._spos[cir_idx],
+                              radius=self._world._host_coll_rad[cir_idx] *
+                              self._meter_to_pixel,
+                              color=Config.FillColor)
+
+        tri_idx: np.ndarray = self._world._tri_idx
+        if len(tri_idx) > 0:
+            self._gui.triangles(a=svert[tri_idx[:, 0]],
+                                b=svert[tri_idx[:, 1]],
+                                c=svert[tri_idx[:, 2]],
+                                color=Config.FillColor)
+
+        line_idx: np.ndarray = self._world._line_idx
+        if len(line_idx) > 0:
+            self._gui.lines(begin=svert[line_idx[:, 0]],
+                            end=svert[line_idx[:, 1]],
+                            color=Config.OuterLineColor,
+                            radius=2)
 
     def render_center(self) -> None:
-        self._gui.circles(self._world._cirspos.to_numpy(),
-                          color=Config.BodyCenterColor,
-                          radius=4)
-
-        self._gui.circles(self._world._poly_trispos.to_numpy(),
-                          color=Config.BodyCenterColor,
-                          radius=4)
-
-        self._gui.circles(self._world._poly_recspos.to_numpy(),
-                          color=Config.BodyCenterColor,
-                          radius=4)
-
-        self._gui.circles(self._world._poly_penspos.to_numpy(),
-                          color=Config.BodyCenterColor,
-                          radius=4)
-
-        self._gui.circles(self._world._cap_spos.to_numpy(),
-                          color=Config.BodyCenterColor,
-                          radius=4)
+        if len(self._spos) > 0:
+            self._gui.circles(self._spos,
+                              color=Config.BodyCenterColor,
+                              radius=4)
 
     def render_rot_line(self) -> None:
         xpos = ti.Vector([0.12, 0.0])
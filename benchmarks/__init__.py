@@ -0,0 +1,4 @@
+'''reproducible benchmarks of the broad phase, narrow phase and solver
+
+run 'python -m benchmarks --help' from the repo root
+'''
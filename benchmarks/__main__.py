@@ -0,0 +1,62 @@
+'''run the benchmarks
+
+    python -m benchmarks --sizes 10 100 1000 --out cur.json
+    python -m benchmarks --filter dbvt --compare base.json
+'''
+import argparse
+import json
+import sys
+from typing import Dict, List
+
+from .bench import compare, run_suite
+
+
+def log(res: Dict) -> None:
+    print(f"{res['name']:<24}{res['size']:>7}{res['min']:>12.3f}"
+          f"{res['median']:>12.3f}{res['mean']:>12.3f}")
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog='benchmarks')
+    parser.add_argument('--sizes',
+                        type=int,
+                        nargs='+',
+                        default=[10, 100, 1000],
+                        help='the body counts, add 10000 for the large run')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--filter',
+                        default='',
+                        help='only run the cases whose name has it')
+    parser.add_argument('--out', default='', help='the result json path')
+    parser.add_argument('--compare',
+                        default='',
+                        help='the base result json to compare with')
+    parser.add_argument('--threshold',
+                        type=float,
+                        default=0.1,
+                        help='the allowed median slowdown ratio')
+    args = parser.parse_args(argv)
+
+    print(f"{'name':<24}{'size':>7}{'min(ms)':>12}{'median(ms)':>12}"
+          f"{'mean(ms)':>12}")
+    res: Dict = run_suite(args.sizes, args.repeat, args.filter, log)
+
+    if args.out:
+        with open(args.out, 'w') as fp:
+            json.dump(res, fp, indent=2)
+
+    if args.compare:
+        with open(args.compare) as fp:
+            base: Dict = json.load(fp)
+
+        slow_list = compare(base, res, args.threshold)
+        for name, size, ratio in slow_list:
+            print(f'slower: {name} size={size} x{ratio:.2f}')
+        if len(slow_list) > 0:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,465 @@
+'''the benchmark cases and the harness, every case builds its state in
+the setup and only the returned callable is timed
+'''
+import copy
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from TaichiGAME.collision.algorithm.clip import ContactGenerator
+from TaichiGAME.collision.algorithm.gjk import GJK, Simplex
+from TaichiGAME.collision.broad_phase.aabb import AABB
+from TaichiGAME.collision.broad_phase.dbvt import DBVT
+from TaichiGAME.collision.detector import Collsion, Detector
+from TaichiGAME.common.trajectory import TrajectoryRecorder
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.geometry.shape import ShapePrimitive
+from TaichiGAME.math.matrix import Matrix
+from TaichiGAME.planning.occupancy import OccupancyGrid
+from TaichiGAME.sensor import Lidar
+from TaichiGAME.simulation import Simulation
+
+from . import scenes
+
+# the setup gets the body count and returns the timed callable, or the
+# timed callable and the untimed cleanup run after it
+Timed = Callable[[], None]
+Setup = Callable[[int], Union[Timed, Tuple[Timed, Callable[[], None]]]]
+
+
+class Bench():
+    def __init__(self,
+                 name: str,
+                 setup: Setup,
+                 max_size: int = 1 << 30,
+                 sized: bool = True):
+        self._name: str = name
+        self._setup: Setup = setup
+        # skip the sizes which take too long for this case
+        self._max_size: int = max_size
+        # the unsized case runs once with the size 0
+        self._sized: bool = sized
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def sized(self) -> bool:
+        return self._sized
+
+    def run(self, size: int, repeat: int) -> Optional[Dict]:
+        if size > self._max_size:
+            return None
+
+        tm_list: List[float] = []
+        for i in range(repeat):
+            res = self._setup(size)
+            fn, cleanup = res if isinstance(res, tuple) else (res, None)
+            start: float = time.perf_counter()
+            fn()
+            tm_list.append((time.perf_counter() - start) * 1000.0)
+            if cleanup is not None:
+                cleanup()
+
+        return {
+            'name': self._name,
+            'size': size,
+            'repeat': repeat,
+            'min': float(np.min(tm_list)),
+            'median': float(np.median(tm_list)),
+            'mean': float(np.mean(tm_list))
+        }
+
+
+def body_prim(body: Body) -> ShapePrimitive:
+    prim: ShapePrimitive = ShapePrimitive()
+    prim._shape = body.shape
+    prim._rot = body.rot
+    prim._xform = body.pos
+    return prim
+
+
+def soup(size: int, dynamic: bool = False) -> Simulation:
+    sim: Simulation = Simulation()
+    scenes.shape_soup(sim, size, dynamic=dynamic)
+    return sim
+
+
+def coll_pair_list(sim: Simulation,
+                   max_len: int = 200) -> List[Tuple[ShapePrimitive,
+                                                     ShapePrimitive, Simplex]]:
+    res: List[Tuple[ShapePrimitive, ShapePrimitive, Simplex]] = []
+    for bodya, bodyb in sim.dbvt.generate():
+        prima: ShapePrimitive = body_prim(bodya)
+        primb: ShapePrimitive = body_prim(bodyb)
+        is_colliding, simplex = GJK.gjk(prima, primb)
+        if is_colliding:
+            res.append((prima, primb, simplex))
+        if len(res) == max_len:
+            break
+
+    return res
+
+
+def setup_dbvt_insert(size: int) -> Callable[[], None]:
+    body_list: List[Body] = soup(size).world._body_list
+
+    def run() -> None:
+        tree: DBVT = DBVT()
+        for bd in body_list:
+            tree.insert(bd)
+
+    return run
+
+
+def setup_dbvt_update(size: int) -> Callable[[], None]:
+    sim: Simulation = soup(size)
+    # move every body out of its fat box to force the reinserts
+    for bd in sim.world._body_list:
+        bd.pos = bd.pos + Matrix([1.0, 0.0], 'vec')
+
+    def run() -> None:
+        for bd in sim.world._body_list:
+            sim.dbvt.update(bd)
+
+    return run
+
+
+def setup_dbvt_generate(size: int) -> Callable[[], None]:
+    sim: Simulation = soup(size)
+
+    def run() -> None:
+        sim.dbvt.generate()
+
+    return run
+
+
+def query_box_list(size: int, seed: int = 8) -> List[AABB]:
+    rng: np.random.Generator = np.random.default_rng(seed)
+    half: float = np.sqrt(size / 51.0)
+    res: List[AABB] = []
+    for i in range(100):
+        box: AABB = AABB(2.0, 2.0)
+        box.pos = Matrix([(rng.random() - 0.5) * 20.0 * half,
+                          (rng.random() - 0.5) * 12.0 * half], 'vec')
+        res.append(box)
+
+    return res
+
+
+def setup_dbvt_query(size: int) -> Callable[[], None]:
+    sim: Simulation = soup(size)
+    box_list: List[AABB] = query_box_list(size)
+
+    def run() -> None:
+        for box in box_list:
+            sim.dbvt.query(box)
+
+    return run
+
+
+def setup_dbvt_raycast(size: int) -> Callable[[], None]:
+    sim: Simulation = soup(size)
+    rng: np.random.Generator = np.random.default_rng(9)
+    ray_list: List[Tuple[Matrix, Matrix]] = []
+    for theta in rng.random(100) * 2.0 * np.pi:
+        ray_list.append((Matrix([0.0, 0.0], 'vec'),
+                         Matrix([np.cos(theta), np.sin(theta)], 'vec')))
+
+    def run() -> None:
+        for start, dirn in ray_list:
+            sim.dbvt.raycast(start, dirn)
+
+    return run
+
+
+def setup_dbvt_query_many(size: int) -> Callable[[], None]:
+    sim: Simulation = soup(size)
+    box: np.ndarray = np.array([[
+        v.bot_left.x, v.bot_left.y, v.top_right.x, v.top_right.y
+    ] for v in query_box_list(size)])
+
+    def run() -> None:
+        # NOTE: include the packing of the tree, it is redone after a step
+        sim.dbvt._flat = None
+        sim.dbvt.query_many(box)
+
+    return run
+
+
+def setup_dbvt_raycast_many(size: int) -> Callable[[], None]:
+    sim: Simulation = soup(size)
+    theta: np.ndarray = np.random.default_rng(9).random(100) * 2.0 * np.pi
+    dirn: np.ndarray = np.stack([np.cos(theta), np.sin(theta)], axis=1)
+
+    def run() -> None:
+        sim.dbvt._flat = None
+        sim.dbvt.raycast_many(np.zeros((100, 2)), dirn)
+
+    return run
+
+
+def setup_dbvt_raycast_closest(size: int) -> Callable[[], None]:
+    sim: Simulation = soup(size)
+    theta: np.ndarray = np.random.default_rng(9).random(100) * 2.0 * np.pi
+    dirn_list: List[Matrix] = [
+        Matrix([np.cos(v), np.sin(v)], 'vec') for v in theta
+    ]
+
+    def run() -> None:
+        for dirn in dirn_list:
+            sim.dbvt.raycast_closest(Matrix([0.0, 0.0], 'vec'), dirn)
+
+    return run
+
+
+def setup_lidar(size: int) -> Callable[[], None]:
+    sim: Simulation = soup(size)
+    lidar: Lidar = Lidar(sim.world._body_list[0], 360, max_range=8.0)
+
+    def run() -> None:
+        for i in range(10):
+            lidar.invalidate()
+            lidar.update(sim)
+
+    return run
+
+
+def setup_grid_update(size: int) -> Callable[[], None]:
+    sim: Simulation = soup(size, dynamic=True)
+    grid: OccupancyGrid = OccupancyGrid.from_world(sim.world, 0.1)
+    # NOTE: one step moves every dynamic body
+    sim.step(1)
+    return lambda: grid.update(sim.world)
+
+
+def setup_grid_sdf(size: int) -> Callable[[], None]:
+    grid: OccupancyGrid = OccupancyGrid.from_world(soup(size).world, 0.1)
+    return lambda: grid.signed_distance()
+
+
+def setup_gjk(size: int) -> Callable[[], None]:
+    sim: Simulation = soup(size)
+    pair_list: List[Tuple[Body, Body]] = sim.dbvt.generate()[:200]
+    prim_list = [(body_prim(a), body_prim(b)) for a, b in pair_list]
+
+    def run() -> None:
+        for prima, primb in prim_list:
+            GJK.gjk(prima, primb)
+
+    return run
+
+
+def setup_epa(size: int) -> Callable[[], None]:
+    # NOTE: the epa expands the simplex in place, so copy it
+    coll_list = copy.deepcopy(coll_pair_list(soup(size)))
+
+    def run() -> None:
+        for prima, primb, simplex in coll_list:
+            GJK.epa(prima, primb, simplex)
+
+    return run
+
+
+def setup_clip(size: int) -> Callable[[], None]:
+    edge_list = []
+    for prima, primb, simplex in coll_pair_list(soup(size)):
+        simplex = GJK.epa(prima, primb, simplex)
+        normal: Matrix = GJK.dump_info(GJK.dump_source(simplex))._normal
+        edga, edgb = ContactGenerator.recognize(prima, primb, normal)
+        edge_list.append((edga, edgb, normal))
+
+    def run() -> None:
+        for edga, edgb, normal in edge_list:
+            ContactGenerator.clip(edga, edgb, normal)
+
+    return run
+
+
+def setup_solve_velocity(size: int) -> Callable[[], None]:
+    sim: Simulation = Simulation()
+    scenes.box_pyramid(sim, size)
+    # settle the stack, then detect again to activate the contacts
+    sim.step(2)
+    for bodya, bodyb in sim.dbvt.generate():
+        res: Collsion = Detector.detect(bodya, bodyb)
+        if res._is_colliding:
+            sim.maintainer.add(res)
+    sim.world.prepare_velocity_constraint(sim.dt)
+    sim.world.finish_velocity_constraint()
+
+    def run() -> None:
+        for i in range(sim.world.vel_iter):
+            sim.maintainer.solve_velocity(sim.dt)
+
+    return run
+
+
+def setup_sim_step(scene: Callable[[Simulation, int], List[Body]],
+                   step_len: int = 5) -> Setup:
+    def setup(size: int) -> Callable[[], None]:
+        sim: Simulation = Simulation()
+        scene(sim, size)
+        return lambda: sim.step(step_len)
+
+    return setup
+
+
+def setup_snapshot(size: int) -> Callable[[], None]:
+    sim: Simulation = Simulation()
+    scenes.box_pyramid(sim, size)
+    sim.step(2)
+
+    def run() -> None:
+        sim.snapshot()
+
+    return run
+
+
+def setup_restore(size: int) -> Callable[[], None]:
+    sim: Simulation = Simulation()
+    scenes.box_pyramid(sim, size)
+    sim.step(2)
+    buf: bytes = sim.snapshot()
+    sim.step(1)
+    return lambda: sim.restore(buf)
+
+
+def setup_record(
+        size: int) -> Tuple[Callable[[], None], Callable[[], None]]:
+    sim: Simulation = soup(size)
+    root_dir: str = tempfile.mkdtemp()
+    rec: TrajectoryRecorder = TrajectoryRecorder(root_dir)
+    rec.start()
+
+    def run() -> None:
+        # NOTE: the sim side cost, the writer runs on its own thread
+        for i in range(100):
+            rec.record(sim)
+
+    def cleanup() -> None:
+        rec.close()
+        shutil.rmtree(root_dir)
+
+    return run, cleanup
+
+
+def setup_import(stmt: str) -> Setup:
+    # NOTE: a fresh interpreter, the modules are cached after the
+    # first import in this one
+    def setup(size: int) -> Callable[[], None]:
+        return lambda: subprocess.run([sys.executable, '-c', stmt],
+                                      check=True,
+                                      stdout=subprocess.DEVNULL,
+                                      stderr=subprocess.DEVNULL)
+
+    return setup
+
+
+def dynamic_soup(sim: Simulation, size: int) -> List[Body]:
+    res: List[Body] = [scenes.add_ground(sim, 40.0 * np.sqrt(size / 51.0),
+                                         -8.0 * np.sqrt(size / 51.0))]
+    return res + scenes.shape_soup(sim, size, dynamic=True)
+
+
+BenchList: List[Bench] = [
+    Bench('dbvt.insert', setup_dbvt_insert),
+    Bench('dbvt.update', setup_dbvt_update),
+    Bench('dbvt.generate', setup_dbvt_generate),
+    Bench('dbvt.query', setup_dbvt_query),
+    Bench('dbvt.raycast', setup_dbvt_raycast),
+    Bench('dbvt.batch_query', setup_dbvt_query_many),
+    Bench('dbvt.batch_raycast', setup_dbvt_raycast_many),
+    Bench('dbvt.raycast_closest', setup_dbvt_raycast_closest),
+    Bench('sensor.lidar', setup_lidar),
+    Bench('planning.grid_update', setup_grid_update),
+    Bench('planning.sdf', setup_grid_sdf),
+    Bench('gjk.gjk', setup_gjk),
+    Bench('gjk.epa', setup_epa),
+    Bench('clip.clip', setup_clip),
+    Bench('contact.solve_velocity', setup_solve_velocity, 1000),
+    Bench('sim.soup', setup_sim_step(dynamic_soup)),
+    # NOTE: the deep stack is dominated by the contacts, so a few
+    # thousand boxes already takes minutes per step
+    Bench('sim.pyramid', setup_sim_step(scenes.box_pyramid), 1000),
+    Bench('sim.chain', setup_sim_step(scenes.joint_chain)),
+    Bench('sim.bullet_rain', setup_sim_step(scenes.bullet_rain)),
+    Bench('snapshot.dump', setup_snapshot, 1000),
+    Bench('snapshot.restore', setup_restore, 1000),
+    Bench('trajectory.record', setup_record),
+    Bench('import.python', setup_import('pass'), sized=False),
+    Bench('import.package', setup_import('import TaichiGAME'), sized=False),
+    Bench('import.scene',
+          setup_import('import TaichiGAME; TaichiGAME.Scene'),
+          sized=False),
+]
+
+
+def meta() -> Dict[str, str]:
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+
+def run_suite(size_list: List[int],
+              repeat: int = 5,
+              name_filter: str = '',
+              log: Optional[Callable[[Dict], None]] = None) -> Dict:
+    '''run the matched cases at every size
+
+    Returns
+    -------
+    Dict
+        {'meta': ..., 'results': [...]}, the times are in ms
+    '''
+    res_list: List[Dict] = []
+    for bench in BenchList:
+        if name_filter not in bench.name:
+            continue
+
+        for size in size_list if bench.sized else [0]:
+            res: Optional[Dict] = bench.run(size, repeat)
+            if res is None:
+                continue
+            res_list.append(res)
+            if log is not None:
+                log(res)
+
+    return {'meta': meta(), 'results': res_list}
+
+
+def compare(base: Dict, cur: Dict,
+            threshold: float = 0.1) -> List[Tuple[str, int, float]]:
+    '''get the cases whose median is slower than the base by
+    more than the threshold
+
+    Returns
+    -------
+    List[Tuple[str, int, float]]
+        (name, size, cur / base median ratio)
+    '''
+    base_table: Dict[Tuple[str, int], float] = {
+        (v['name'], v['size']): v['median']
+        for v in base['results']
+    }
+    res: List[Tuple[str, int, float]] = []
+    for v in cur['results']:
+        ref: Optional[float] = base_table.get((v['name'], v['size']))
+        if ref is None or ref <= 0.0:
+            continue
+
+        ratio: float = v['median'] / ref
+        if ratio > 1.0 + threshold:
+            res.append((v['name'], v['size'], ratio))
+
+    return res
@@ -0,0 +1,134 @@
+'''deterministic scene generators, the same seed always builds the
+same bodies in the same order
+'''
+from typing import List
+
+import numpy as np
+
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.dynamics.joint.revolute import RevoluteJointPrimitive
+from TaichiGAME.geometry.shape import Capsule, Circle, Polygon, Rectangle
+from TaichiGAME.geometry.shape import Shape
+from TaichiGAME.math.matrix import Matrix
+from TaichiGAME.simulation import Simulation
+
+
+def soup_shape_list() -> List[Shape]:
+    # the shapes of the testbed broad phase frame
+    tri: Polygon = Polygon()
+    tri.vertices = [
+        Matrix([-1.0, 1.0], 'vec'),
+        Matrix([0.0, -2.0], 'vec'),
+        Matrix([1.0, -1.0], 'vec'),
+        Matrix([-1.0, 1.0], 'vec')
+    ]
+    tri.scale(0.5)
+
+    poly: Polygon = Polygon()
+    poly.vertices = [
+        Matrix([4.0 * np.sin(v), 4.0 * np.cos(v)], 'vec')
+        for v in np.linspace(0.0, -2.0 * np.pi, 9)
+    ]
+    poly.scale(0.1)
+
+    return [Rectangle(0.5, 0.5), Circle(0.5), tri, poly, Capsule(1.5, 0.5)]
+
+
+def add_body(sim: Simulation,
+             shape: Shape,
+             x: float,
+             y: float,
+             rot: float = 0.0,
+             dynamic: bool = True) -> Body:
+    body: Body = sim.world.create_body()
+    body.shape = shape
+    body.pos = Matrix([x, y], 'vec')
+    body.rot = rot
+    body.mass = 1.0 if dynamic else 1e37
+    body.type = Body.Type.Dynamic if dynamic else Body.Type.Static
+    sim.dbvt.insert(body)
+    return body
+
+
+def add_ground(sim: Simulation, width: float, y: float = 0.0) -> Body:
+    return add_body(sim, Rectangle(width, 1.0), 0.0, y - 0.5, 0.0, False)
+
+
+def shape_soup(sim: Simulation,
+               body_len: int,
+               seed: int = 6,
+               dynamic: bool = False) -> List[Body]:
+    '''random shapes scattered in a box which grows with the body
+    count, so the density keeps the same
+    '''
+    rng: np.random.Generator = np.random.default_rng(seed)
+    shape_list: List[Shape] = soup_shape_list()
+    half: float = np.sqrt(body_len / 51.0)
+    res: List[Body] = []
+
+    for i in range(body_len):
+        res.append(
+            add_body(sim, shape_list[rng.integers(0, len(shape_list))],
+                     (-10.0 + rng.random() * 20.0) * half,
+                     (-6.0 + rng.random() * 12.0) * half,
+                     -np.pi + rng.random() * np.pi, dynamic))
+
+    return res
+
+
+def box_pyramid(sim: Simulation, body_len: int) -> List[Body]:
+    '''stacked boxes on a ground, the rows are chosen to hold about
+    'body_len' boxes
+    '''
+    row: int = max(1, int((np.sqrt(8 * body_len + 1) - 1) / 2))
+    res: List[Body] = [add_ground(sim, row * 1.2 + 10.0)]
+    shape: Rectangle = Rectangle(1.0, 1.0)
+
+    for i in range(row):
+        for j in range(row - i):
+            res.append(
+                add_body(sim, shape, (j - (row - i - 1) / 2.0) * 1.05,
+                         0.5 + i * 1.0))
+
+    return res
+
+
+def joint_chain(sim: Simulation, body_len: int) -> List[Body]:
+    '''a horizontal chain of links hinged to a static anchor'''
+    link: Rectangle = Rectangle(1.0, 0.2)
+    anchor: Body = add_body(sim, Rectangle(0.2, 0.2), 0.0, 0.0, 0.0, False)
+    anchor.bitmask = 0
+    res: List[Body] = [anchor]
+
+    bodya: Body = anchor
+    for i in range(body_len):
+        bodyb: Body = add_body(sim, link, i + 0.5, 0.0)
+        # NOTE: the neighbour links do not collide
+        bodyb.bitmask = 1 << (i % 2)
+        prim: RevoluteJointPrimitive = RevoluteJointPrimitive()
+        prim._bodya = bodya
+        prim._bodyb = bodyb
+        prim._local_pointa = Matrix([0.0 if i == 0 else 0.5, 0.0], 'vec')
+        prim._local_pointb = Matrix([-0.5, 0.0], 'vec')
+        sim.world.create_joint(prim)
+        res.append(bodyb)
+        bodya = bodyb
+
+    return res
+
+
+def bullet_rain(sim: Simulation, body_len: int, seed: int = 7) -> List[Body]:
+    '''small fast bodies falling on a ground'''
+    rng: np.random.Generator = np.random.default_rng(seed)
+    width: float = max(20.0, np.sqrt(body_len) * 2.0)
+    res: List[Body] = [add_ground(sim, width + 4.0)]
+    shape: Circle = Circle(0.1)
+
+    for i in range(body_len):
+        body: Body = add_body(sim, shape, (rng.random() - 0.5) * width,
+                              2.0 + rng.random() * width)
+        body.type = Body.Type.Bullet
+        body.vel = Matrix([0.0, -20.0 - rng.random() * 20.0], 'vec')
+        res.append(body)
+
+    return res
@@ -38,7 +38,7 @@ setuptools.setup(
     ],
     license='MIT',
     keywords=['phyics engine', 'dynamics simulation', 'robot motion control'],
-    packages=setuptools.find_packages(exclude=['tests']),
+    packages=setuptools.find_packages(exclude=['tests', 'benchmarks']),
     include_package_data=True,
     install_requires=['taichi'],
     python_requires=">=3.7,<3.10",
@@ -1,6 +1,8 @@
 import numpy as np
 
 from TaichiGAME.collision.broad_phase.aabb import AABB
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.geometry.shape import Sector
 from TaichiGAME.math.matrix import Matrix
 
 
@@ -85,7 +87,23 @@ class TestAABB():
         assert 1
 
     def test_from_body(self):
-        assert 1
+        sec: Sector = Sector()
+        sec.set_value(0.0, np.pi / 2.0, 2.0)
+        body: Body = Body()
+        body.shape = sec
+        body.pos = Matrix([1.0, 1.0], 'vec')
+        dut: AABB = AABB.from_body(body)
+        assert dut.pos == Matrix([2.0, 2.0], 'vec')
+        assert np.isclose(dut._width, 2.0) and np.isclose(dut._height, 2.0)
+
+        # the arc passes the +y axis
+        body.rot = 1.0
+        sec.set_value(0.3, 0.5, 2.0)
+        dut = AABB.from_body(body)
+        assert np.isclose(dut.top_left.y, 3.0)
+        assert np.isclose(dut.bot_left.y, 1.0)
+        assert np.isclose(dut.top_right.x, 1.0 + 2.0 * np.cos(1.3))
+        assert np.isclose(dut.top_left.x, 1.0 + 2.0 * np.cos(1.8))
 
     def test_from_box(self):
         assert 1
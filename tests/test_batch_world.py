@@ -0,0 +1,188 @@
+import numpy as np
+import pytest
+
+from TaichiGAME.dynamics.batch_world import BatchWorld
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.dynamics.phy_world import PhysicsWorld
+from TaichiGAME.dynamics.joint.point import PointJointPrimitive
+from TaichiGAME.dynamics.joint.rotation import OrientationJointPrimitive
+from TaichiGAME.geometry.shape import Circle, Edge, Rectangle
+from TaichiGAME.math.matrix import Matrix
+
+
+def create_world() -> PhysicsWorld:
+    world: PhysicsWorld = PhysicsWorld()
+    world.grav = Matrix([0.0, -9.8], 'vec')
+    world.lin_vel_damping = 0.1
+    world.ang_vel_damping = 0.1
+    world.vel_iter = 6
+    world.pos_iter = 8
+
+    ground: Body = world.create_body()
+    ground.shape = Rectangle(20.0, 1.0)
+    ground.pos = Matrix([0.0, -2.0], 'vec')
+    ground.mass = 1e37
+    ground.type = Body.Type.Static
+
+    ball: Body = world.create_body()
+    ball.shape = Circle(0.5)
+    ball.pos = Matrix([0.0, 2.0], 'vec')
+    ball.mass = 1.0
+    ball.type = Body.Type.Dynamic
+
+    return world
+
+
+class TestBatchWorld():
+    def test__init__(self):
+        dut: BatchWorld = BatchWorld(create_world(), 4)
+
+        assert dut.batch == 4
+        assert dut.body_cnt == 2
+        assert dut.vel_iter == 6
+        assert dut.pos_iter == 8
+        assert dut.grav.shape == (4, 2)
+        assert np.allclose(dut.grav, [0.0, -9.8])
+        assert np.allclose(dut.lin_vel_damping, 0.1)
+        assert dut._pair.shape == (1, 2)
+
+    def test_step_velocity(self):
+        world: PhysicsWorld = create_world()
+        dut: BatchWorld = BatchWorld(world, 3)
+        ball: Body = world._body_list[1]
+
+        # same integration as the physics world
+        for i in range(5):
+            world.step_velocity(1 / 60)
+            world.step_position(1 / 60)
+            dut.step_velocity(1 / 60)
+            dut.step_position(1 / 60)
+
+        obs: np.ndarray = dut.get_observations()
+        assert np.allclose(obs[:, 1, 0:2], [ball.pos.x, ball.pos.y])
+        assert np.allclose(obs[:, 1, 3:5], [ball.vel.x, ball.vel.y])
+        # static body not moved
+        assert np.allclose(obs[:, 0, 0:2], [0.0, -2.0])
+
+    def test_grav(self):
+        dut: BatchWorld = BatchWorld(create_world(), 2)
+        dut.grav = np.array([[0.0, -9.8], [0.0, 0.0]])
+
+        for i in range(10):
+            dut.step(1 / 60)
+
+        obs: np.ndarray = dut.get_observations()
+        assert obs[0, 1, 1] < 2.0
+        assert np.isclose(obs[1, 1, 1], 2.0)
+
+    def test_step(self):
+        dut: BatchWorld = BatchWorld(create_world(), 2)
+        dut.set_state(pos=np.array([[0.0, -2.0], [3.0, 0.0]]),
+                      mask=np.array([False, True]))
+
+        for i in range(150):
+            dut.step(1 / 60)
+
+        obs: np.ndarray = dut.get_observations()
+        # the ball rests on the ground top(-1.5)
+        assert np.allclose(obs[:, 1, 1], -1.0, atol=0.2)
+        assert np.isclose(obs[0, 1, 0], 0.0, atol=0.01)
+        assert np.isclose(obs[1, 1, 0], 3.0, atol=0.01)
+
+    def test_circle_contact(self):
+        world: PhysicsWorld = PhysicsWorld()
+        world.grav = Matrix([0.0, 0.0], 'vec')
+        world.damping_ena = False
+        for i in range(2):
+            ball: Body = world.create_body()
+            ball.shape = Circle(0.5)
+            ball.pos = Matrix([i * 2.0, 0.0], 'vec')
+            ball.mass = 1.0
+            ball.type = Body.Type.Dynamic
+
+        world._body_list[0].vel = Matrix([2.0, 0.0], 'vec')
+        dut: BatchWorld = BatchWorld(world, 2)
+
+        for i in range(60):
+            dut.step(1 / 60)
+
+        obs: np.ndarray = dut.get_observations()
+        # inelastic collision, momentum is kept
+        assert np.allclose(obs[:, 0, 3] + obs[:, 1, 3], 2.0)
+        assert np.all(obs[:, 1, 0] - obs[:, 0, 0] >= 0.9)
+
+    def test_edge_contact(self):
+        world: PhysicsWorld = create_world()
+        world._body_list[0].shape = Edge()
+        world._body_list[0].shape.set_value(Matrix([-10.0, 0.0], 'vec'),
+                                            Matrix([10.0, 0.0], 'vec'))
+        dut: BatchWorld = BatchWorld(world, 2)
+
+        for i in range(150):
+            dut.step(1 / 60)
+
+        obs: np.ndarray = dut.get_observations()
+        assert np.allclose(obs[:, 1, 1], -1.5, atol=0.1)
+
+    def test_point_joint(self):
+        world: PhysicsWorld = create_world()
+        prim: PointJointPrimitive = PointJointPrimitive()
+        prim._bodya = world._body_list[1]
+        prim._target_point = Matrix([1.0, 3.0], 'vec')
+        world.create_joint(prim)
+        dut: BatchWorld = BatchWorld(world, 2)
+
+        for i in range(120):
+            dut.step(1 / 60)
+
+        obs: np.ndarray = dut.get_observations()
+        assert np.allclose(obs[:, 1, 0:2], [1.0, 3.0], atol=0.3)
+
+    def test_unsupported_joint(self):
+        world: PhysicsWorld = create_world()
+        prim: OrientationJointPrimitive = OrientationJointPrimitive()
+        prim._bodya = world._body_list[1]
+        world.create_joint(prim)
+
+        with pytest.raises(ValueError):
+            BatchWorld(world, 2)
+
+    def test_reset(self):
+        dut: BatchWorld = BatchWorld(create_world(), 3)
+        for i in range(10):
+            dut.step(1 / 60)
+
+        dut.reset(np.array([True, False, True]))
+        obs: np.ndarray = dut.get_observations()
+        assert np.allclose(obs[[0, 2], 1], [0.0, 2.0, 0.0, 0.0, 0.0, 0.0])
+        assert obs[1, 1, 1] < 2.0
+
+        dut.reset()
+        assert np.allclose(dut.get_observations()[:, 1, 1], 2.0)
+
+    def test_set_state(self):
+        dut: BatchWorld = BatchWorld(create_world(), 2)
+        dut.set_state(vel=np.array([[[0.0, 0.0], [1.0, 0.0]]] * 2),
+                      ang_vel=np.array([[0.0, 0.5]] * 2))
+
+        obs: np.ndarray = dut.get_observations()
+        assert np.allclose(obs[:, 1, 3:], [1.0, 0.0, 0.5])
+
+    def test_get_observations(self):
+        dut: BatchWorld = BatchWorld(create_world(), 5)
+        obs: np.ndarray = dut.get_observations()
+
+        assert obs.shape == (5, 2, 6)
+        assert np.allclose(obs[:, 0], [0.0, -2.0, 0.0, 0.0, 0.0, 0.0])
+
+    def test_apply_force(self):
+        dut: BatchWorld = BatchWorld(create_world(), 2)
+        dut.grav = np.zeros((2, 2))
+        forces: np.ndarray = np.zeros((2, 2, 2))
+        forces[1, 1] = [60.0, 0.0]
+        dut.apply_force(forces)
+        dut.step(1 / 60)
+
+        obs: np.ndarray = dut.get_observations()
+        assert np.isclose(obs[0, 1, 3], 0.0)
+        assert obs[1, 1, 3] > 0.9
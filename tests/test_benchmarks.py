@@ -0,0 +1,37 @@
+import json
+
+import numpy as np
+
+from benchmarks import scenes
+from benchmarks.bench import compare, run_suite
+from TaichiGAME.simulation import Simulation
+
+
+class TestBenchmarks():
+    def test_scene(self):
+        sima: Simulation = Simulation()
+        simb: Simulation = Simulation()
+        body_lista = scenes.shape_soup(sima, 20)
+        body_listb = scenes.shape_soup(simb, 20)
+
+        assert len(body_lista) == 20
+        for bda, bdb in zip(body_lista, body_listb):
+            assert type(bda.shape) is type(bdb.shape)
+            assert np.isclose(bda.pos.x, bdb.pos.x)
+            assert np.isclose(bda.rot, bdb.rot)
+
+        dut: Simulation = Simulation()
+        # the anchor and 5 links with 5 joints besides the mouse joint
+        assert len(scenes.joint_chain(dut, 5)) == 6
+        assert len(dut.world._joint_list) == 6
+
+    def test_run_suite(self):
+        dut = run_suite([10], 1, 'dbvt.query')
+        assert len(dut['results']) == 1
+        assert dut['results'][0]['size'] == 10
+        json.dumps(dut)
+
+        base = json.loads(json.dumps(dut))
+        base['results'][0]['median'] = dut['results'][0]['median'] / 2.0
+        assert compare(base, dut)[0][:2] == ('dbvt.query', 10)
+        assert compare(dut, dut) == []
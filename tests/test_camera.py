@@ -0,0 +1,175 @@
+import numpy as np
+
+from TaichiGAME.collision.broad_phase.dbvt import DBVT
+from TaichiGAME.common.camera import Camera
+from TaichiGAME.common.profiler import Profiler
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.dynamics.joint.point import PointJoint, PointJointPrimitive
+from TaichiGAME.dynamics.phy_world import PhysicsWorld
+from TaichiGAME.geometry.shape import Circle, Rectangle
+from TaichiGAME.math.matrix import Matrix
+from tests.test_render import FakeGUI
+
+
+def create_world(body_len: int) -> PhysicsWorld:
+    world: PhysicsWorld = PhysicsWorld()
+    for i in range(body_len):
+        body: Body = world.create_body()
+        body.shape = Rectangle(1.0, 1.0) if i % 2 else Circle(0.5)
+        body.pos = Matrix([i * 1.0, 0.0], 'vec')
+
+    return world
+
+
+class TestCamera():
+    def test_world_to_screen_arr(self):
+        dut: Camera = Camera()
+        dut.viewport = Camera.Viewport()
+        pos: np.ndarray = np.array([[1.0, 2.0], [-3.0, 0.5]])
+        res: np.ndarray = dut.world_to_screen_arr(pos)
+
+        for i in range(2):
+            ref: Matrix = dut.world_to_screen(Matrix(pos[i].tolist(), 'vec'))
+            assert np.allclose(res[i], [ref.x, ref.y])
+
+    def test_render_body(self):
+        dut: Camera = Camera()
+        dut.viewport = Camera.Viewport()
+        dut.world = create_world(100)
+        dut.center_visible = True
+        dut.rot_line_visible = True
+        gui: FakeGUI = FakeGUI()
+        dut.render_body(gui)
+
+        # fill, outline, center and two rotation line calls
+        assert len(gui.call_list) == 6
+        assert gui.call_list[0][0] == 'circles'
+        assert gui.call_list[0][1].shape == (50, 2)
+        assert gui.call_list[1][1].shape == (100, 2)
+        # the first fan vertex(-0.5, 0.5) of the last rect
+        ref: Matrix = dut.world_to_screen(Matrix([98.5, 0.5], 'vec'))
+        assert np.allclose(gui.call_list[1][1][-1], [ref.x, ref.y])
+
+    def test_view_aabb(self):
+        dut: Camera = Camera()
+        dut.viewport = Camera.Viewport()
+        view = dut.view_aabb()
+
+        assert np.isclose(view.top_left.x, -640.0 / 33.0)
+        assert np.isclose(view.bot_right.y, -360.0 / 33.0)
+
+    def test_cull(self):
+        dut: Camera = Camera()
+        dut.viewport = Camera.Viewport()
+        dut.world = create_world(100)
+        dut.dbvt = DBVT()
+        for bd in dut.world._body_list:
+            dut.dbvt.insert(bd)
+
+        body_list = dut.visible_bodies()
+        assert 0 < len(body_list) < 30
+        assert dut.world._body_list[99] not in body_list
+
+        gui: FakeGUI = FakeGUI()
+        dut.render_body(gui)
+        assert len(gui.call_list[0][1]) + len(gui.call_list[1][1]) < 60
+
+        # the joint out of the view is skipped
+        prim: PointJointPrimitive = PointJointPrimitive()
+        prim._bodya = dut.world._body_list[99]
+        prim._target_point = Matrix([99.0, 5.0], 'vec')
+        dut.world._joint_list.append(PointJoint(prim))
+        call_len: int = len(gui.call_list)
+        dut.render_joint(gui)
+        assert len(gui.call_list) == call_len
+
+        dut.cull_ena = False
+        assert len(dut.visible_bodies()) == 100
+        dut.render_joint(gui)
+        assert len(gui.call_list) > call_len
+
+    def test_render_query(self):
+        dut: Camera = Camera()
+        dut.viewport = Camera.Viewport()
+        dut.world = create_world(100)
+        dut.dbvt = DBVT()
+        for bd in dut.world._body_list:
+            dut.dbvt.insert(bd)
+        dut.body_visible = True
+        dut.joint_visible = True
+        dut.aabb_visible = True
+
+        # the bodies, joints and boxes share one view query
+        query = dut.dbvt.query
+        cnt = [0]
+
+        def count_query(aabb):
+            cnt[0] += 1
+            return query(aabb)
+
+        dut.dbvt.query = count_query
+        dut.render(FakeGUI())
+        assert cnt[0] == 1
+
+    def test_screen_xform(self):
+        dut: Camera = Camera()
+        dut.viewport = Camera.Viewport()
+        scale, offset = dut.screen_xform()
+        assert dut.screen_xform()[0] is scale
+
+        # recomputed after the camera is moved
+        dut.transform = Matrix([64.0, 0.0], 'vec')
+        scale, offset = dut.screen_xform()
+        assert np.allclose(offset, [0.55, 0.5])
+
+        pos: np.ndarray = np.random.rand(100, 2) * 10.0
+        res: np.ndarray = dut.screen_to_world_arr(dut.world_to_screen_arr(pos))
+        assert np.allclose(res, pos)
+        ref: Matrix = dut.screen_to_world(Matrix([0.25, 0.75], 'vec'))
+        assert np.allclose(dut.screen_to_world_arr(np.array([[0.25, 0.75]])),
+                           [ref.x, ref.y])
+
+    def test_render_axis(self):
+        dut: Camera = Camera()
+        dut.viewport = Camera.Viewport()
+        gui: FakeGUI = FakeGUI()
+        dut.render_axis(gui)
+
+        assert [v[0] for v in gui.call_list] == ['circles', 'lines']
+        assert gui.call_list[0][1].shape == (82, 2)
+        # the y axis and the x axis
+        begin, end = gui.call_list[1][1], gui.call_list[1][2]
+        assert np.isclose(begin[0][0], end[0][0])
+        assert np.isclose(begin[1][1], end[1][1])
+
+    def test_render_dbvt(self):
+        dut: Camera = Camera()
+        dut.viewport = Camera.Viewport()
+        dut.world = create_world(10)
+        dut.dbvt = DBVT()
+        for bd in dut.world._body_list:
+            dut.dbvt.insert(bd)
+
+        gui: FakeGUI = FakeGUI()
+        dut.render_dbvt(gui, dut.dbvt.root_index(), dut.view_aabb())
+        # four edges of each branch box in one call
+        assert len(gui.call_list) == 1
+        assert gui.call_list[0][1].shape == (9 * 4, 2)
+
+    def test_render_profile(self):
+        dut: Camera = Camera()
+        gui: FakeGUI = FakeGUI()
+        dut.profiler = Profiler()
+        dut.render_profile(gui)
+        assert gui.call_list[0][1] == 'profiler: no frame'
+
+        dut.profiler.ena = True
+        dut.profiler.count(Profiler.Pair, 7)
+        dut.profiler.end_frame()
+        gui.call_list.clear()
+        dut.render_profile(gui)
+
+        text_list = [v[1] for v in gui.call_list]
+        assert len(text_list) == len(Profiler.PhaseName) + 1 + len(
+            Profiler.CounterName)
+        assert text_list[-len(Profiler.CounterName)].split() == ['pair', '7']
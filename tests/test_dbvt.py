@@ -2,6 +2,27 @@ import numpy as np
 
 from TaichiGAME.collision.broad_phase.dbvt import DBVT
 from TaichiGAME.collision.broad_phase.aabb import AABB
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.geometry.shape import Circle, Rectangle
+from TaichiGAME.math.matrix import Matrix
+
+
+def grid_tree() -> DBVT:
+    '''a 4x4 grid of unit boxes and circles at the odd coordinates'''
+    res: DBVT = DBVT()
+    for i in range(16):
+        body: Body = Body()
+        body.shape = Rectangle(1.0, 1.0) if i % 2 == 0 else Circle(0.5)
+        body.pos = Matrix([(i % 4) * 2.0 + 1.0, (i // 4) * 2.0 + 1.0], 'vec')
+        res.insert(body)
+
+    return res
+
+
+def leaf_box(dut: DBVT, body: Body) -> np.ndarray:
+    aabb: AABB = dut._tree[dut._body_table[body]]._aabb
+    return np.array([aabb.bot_left.x, aabb.bot_left.y, aabb.top_right.x,
+                     aabb.top_right.y])
 
 
 class TestDVBT():
@@ -90,6 +111,137 @@ class TestDVBT():
     def test_raycast(self):
         assert 1
 
+    def test_query_many(self):
+        dut: DBVT = grid_tree()
+        qry: np.ndarray = np.array([[0.0, 0.0, 2.0, 2.0],
+                                    [-5.0, -5.0, -4.0, -4.0],
+                                    [0.0, 0.0, 8.0, 8.0], [2.8, 0.0, 3.2, 8.0]])
+        offset, node_idx = dut.query_many(qry)
+
+        assert offset.tolist()[0] == 0 and len(offset) == 5
+        assert offset[-1] == len(node_idx)
+        for i, box in enumerate(qry):
+            ref = set()
+            for body in dut._body_table:
+                v: np.ndarray = leaf_box(dut, body)
+                if np.all(v[:2] <= box[2:]) and np.all(box[:2] <= v[2:]):
+                    ref.add(body)
+            assert set(dut.bodies(node_idx[offset[i]:offset[i + 1]])) == ref
+
+        assert offset[2] - offset[1] == 0
+        assert offset[3] - offset[2] == 16
+        assert offset[4] - offset[3] == 4
+
+        offset, node_idx = DBVT().query_many(qry)
+        assert offset.tolist() == [0] * 5 and len(node_idx) == 0
+
+    def test_raycast_many(self):
+        dut: DBVT = grid_tree()
+        org: np.ndarray = np.array([[-2.0, 1.0], [-2.0, 1.0], [1.0, -2.0],
+                                    [-1.0, -1.0], [1.0, 1.0], [0.0, 0.0]])
+        dirn: np.ndarray = np.array([[1.0, 0.0], [-1.0, 0.0], [0.0, 2.0],
+                                     [1.0, 1.0], [0.0, 1.0], [0.0, 0.0]])
+        offset, node_idx = dut.raycast_many(org, dirn)
+        cnt: np.ndarray = np.diff(offset)
+        assert cnt.tolist() == [4, 0, 4, 4, 4, 0]
+
+        # front to back
+        bodies = dut.bodies(node_idx[offset[0]:offset[1]])
+        assert [v.pos.x for v in bodies] == [1.0, 3.0, 5.0, 7.0]
+        offset, node_idx = dut.raycast_many(org, dirn, max_dist=4.0)
+        # the fat boxes are 0.25 wider on each side
+        assert np.diff(offset).tolist() == [1, 0, 1, 1, 3, 0]
+
+    def test_raycast_many_closest(self):
+        dut: DBVT = grid_tree()
+        org: np.ndarray = np.array([[-2.0, 1.0], [3.0, 10.0], [1.0, 1.0],
+                                    [-2.0, 1.0], [10.0, 3.0]])
+        dirn: np.ndarray = np.array([[1.0, 0.0], [0.0, -3.0], [1.0, 0.0],
+                                     [-1.0, 0.0], [-1.0, 0.0]])
+        node_idx, dist, normal = dut.raycast_many(org, dirn, 20.0, True)
+
+        assert node_idx[3] == -1 and dist[3] == 20.0
+        assert np.allclose(dist, [2.5, 2.5, 0.0, 20.0, 2.5])
+        assert np.allclose(normal,
+                           [[-1.0, 0.0], [0.0, 1.0], [0.0, 0.0], [0.0, 0.0],
+                            [1.0, 0.0]])
+        bodies = dut.bodies(node_idx[[0, 1, 4]])
+        assert bodies[0].pos == Matrix([1.0, 1.0], 'vec')
+        assert bodies[1].pos == Matrix([3.0, 7.0], 'vec')
+        assert bodies[2].pos == Matrix([7.0, 3.0], 'vec')
+
+    def test_raycast_closest(self):
+        dut: DBVT = grid_tree()
+        res = dut.raycast_closest(Matrix([-2.0, 1.0], 'vec'),
+                                  Matrix([2.0, 0.0], 'vec'))
+        assert res is not None
+        assert res.body is not None and res.body.pos == Matrix([1.0, 1.0],
+                                                                'vec')
+        assert np.isclose(res.dist, 2.5) and np.isclose(res.fraction, 1.25)
+        assert res.point == Matrix([0.5, 1.0], 'vec')
+        assert res.normal == Matrix([-1.0, 0.0], 'vec')
+
+        # the circle at (3, 1) is hit first
+        res = dut.raycast_closest(Matrix([3.0, -5.0], 'vec'),
+                                  Matrix([0.0, 1.0], 'vec'))
+        assert res is not None and np.isclose(res.dist, 5.5)
+        assert res.normal == Matrix([0.0, -1.0], 'vec')
+
+        assert dut.raycast_closest(Matrix([-2.0, 1.0], 'vec'),
+                                   Matrix([1.0, 0.0], 'vec'), 2.0) is None
+        assert dut.raycast_closest(Matrix([-2.0, 1.0], 'vec'),
+                                   Matrix([-1.0, 0.0], 'vec')) is None
+        assert DBVT().raycast_closest(Matrix([0.0, 0.0], 'vec'),
+                                      Matrix([1.0, 0.0], 'vec')) is None
+
+    def test_raycast_all(self):
+        dut: DBVT = grid_tree()
+        res = dut.raycast_all(Matrix([-2.0, 1.0], 'vec'),
+                              Matrix([1.0, 0.0], 'vec'))
+        assert [v.dist for v in res] == [2.5, 4.5, 6.5, 8.5]
+        assert len(dut.raycast_all(Matrix([-2.0, 1.0], 'vec'),
+                                   Matrix([1.0, 0.0], 'vec'), 5.0)) == 2
+
+        # passes between the columns
+        assert dut.raycast_all(Matrix([2.0, -2.0], 'vec'),
+                               Matrix([0.0, 1.0], 'vec')) == []
+
+    def test_raycast_closest_many(self):
+        dut: DBVT = grid_tree()
+        org: np.ndarray = np.array([[-2.0, 1.0], [3.0, -5.0], [-2.0, 1.0],
+                                    [1.0, 1.0]])
+        dirn: np.ndarray = np.array([[2.0, 0.0], [0.0, 1.0], [-1.0, 0.0],
+                                     [1.0, 0.0]])
+        node_idx, dist, normal = dut.raycast_closest_many(org, dirn, 20.0)
+        assert np.allclose(dist, [2.5, 5.5, 20.0, 0.0])
+        assert node_idx[2] == -1
+        assert np.allclose(normal, [[-1.0, 0.0], [0.0, -1.0], [0.0, 0.0],
+                                    [0.0, 0.0]])
+        for i in (0, 1):
+            ref = dut.raycast_closest(Matrix(list(org[i]), 'vec'),
+                                      Matrix(list(dirn[i]), 'vec'))
+            assert ref is not None
+            assert dut.bodies(node_idx[[i]])[0] is ref.body
+
+        # skip the body holding the ray start
+        ignore: Body = dut.bodies(node_idx[[3]])[0]
+        node_idx, dist, normal = dut.raycast_closest_many(
+            org[3:], dirn[3:], 20.0, ignore)
+        assert np.allclose(dist, [1.5])
+
+    def test_flatten(self):
+        dut: DBVT = grid_tree()
+        box, child = dut.flatten()
+        assert dut.flatten()[0] is box
+        assert box.shape == (len(dut._tree), 4)
+        root: DBVT.Node = dut._tree[dut._root_idx]
+        assert child[dut._root_idx].tolist() == [root._left_idx,
+                                                 root._right_idx]
+
+        body: Body = next(iter(dut._body_table))
+        dut.remove(body)
+        assert dut.flatten()[0] is not box
+
     def test_generate(self):
         assert 1
 
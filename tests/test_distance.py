@@ -0,0 +1,44 @@
+import numpy as np
+
+from TaichiGAME.planning.distance import DistanceTransform
+
+
+def brute_distance(mask: np.ndarray) -> np.ndarray:
+    pts: np.ndarray = np.argwhere(mask)
+    row, col = np.indices(mask.shape)
+    return np.sqrt(((row[..., None] - pts[:, 0])**2 +
+                    (col[..., None] - pts[:, 1])**2).min(axis=-1))
+
+
+class TestDistanceTransform():
+    def test_squared_1d(self):
+        inf: float = DistanceTransform.Inf
+        f: np.ndarray = np.array([[inf, 0.0, inf, inf, inf, 0.0],
+                                  [0.0, inf, inf, inf, inf, inf]])
+        dut: np.ndarray = DistanceTransform.squared_1d(f)
+
+        assert dut[0].tolist() == [1.0, 0.0, 1.0, 4.0, 1.0, 0.0]
+        assert dut[1].tolist() == [0.0, 1.0, 4.0, 9.0, 16.0, 25.0]
+
+    def test_distance(self):
+        rng: np.random.Generator = np.random.default_rng(0)
+        for shape, prob in [((7, 9), 0.1), ((20, 13), 0.02), ((1, 5), 0.3),
+                            ((15, 15), 0.5)]:
+            mask: np.ndarray = rng.random(shape) < prob
+            mask[0, 0] = True
+            assert np.allclose(DistanceTransform.distance(mask),
+                               brute_distance(mask))
+
+        assert np.all(np.isinf(DistanceTransform.distance(np.zeros((3, 4),
+                                                                   bool))))
+
+    def test_signed_distance(self):
+        mask: np.ndarray = np.zeros((7, 7), dtype=bool)
+        mask[2:5, 2:5] = True
+        dut: np.ndarray = DistanceTransform.signed_distance(mask)
+
+        assert dut[3, 3] == -2.0
+        assert dut[2, 2] == -1.0
+        assert dut[3, 0] == 2.0
+        assert np.isclose(dut[0, 0], np.sqrt(8.0))
+        assert np.all(dut[mask] < 0.0) and np.all(dut[~mask] > 0.0)
@@ -0,0 +1,67 @@
+import json
+import os
+import stat
+import sys
+
+import numpy as np
+
+from TaichiGAME.common.export_manager import ExportManager
+
+
+def gen_frame(val: float) -> np.ndarray:
+    # the taichi (width, height, 4) float image
+    frame: np.ndarray = np.zeros((4, 2, 4), dtype=np.float32)
+    frame[..., 0] = val
+    # the top left pixel
+    frame[0, 1, 1] = 1.0
+    return frame
+
+
+class TestExportManager():
+    def test_to_rgb(self):
+        dut: np.ndarray = ExportManager.to_rgb(gen_frame(0.5))
+        assert dut.shape == (2, 4, 3)
+        assert dut.dtype == np.uint8
+        assert dut[0, 0, 1] == 255
+        assert dut[1, 0, 1] == 0
+        assert dut[1, 3, 0] == 128
+
+    def test_raw(self, tmp_path):
+        dut: ExportManager = ExportManager(str(tmp_path), queue_size=2,
+                                           encoder='')
+        frame_len: int = ExportManager.RawChunk + 6
+        for i in range(frame_len):
+            dut.push(gen_frame(i / frame_len))
+
+        assert dut.running
+        res: str = dut.finish()
+        assert not dut.running
+        assert res.endswith('frames.raw')
+        assert dut.frame_cnt == frame_len
+
+        with open(os.path.join(str(tmp_path), 'frames.json')) as fp:
+            meta = json.load(fp)
+        assert meta['frame_cnt'] == frame_len
+        raw: np.ndarray = np.fromfile(res, dtype=np.uint8).reshape(
+            frame_len, meta['height'], meta['width'], 3)
+        assert raw[-1, 1, 0, 0] == round((frame_len - 1) / frame_len * 255)
+        assert raw[3, 0, 0, 1] == 255
+
+    def test_encoder(self, tmp_path):
+        # the fake encoder copies the stdin to the output file
+        encoder: str = os.path.join(str(tmp_path), 'encoder')
+        with open(encoder, 'w') as fp:
+            fp.write(f'#!{sys.executable}\n'
+                     'import sys\n'
+                     'open(sys.argv[-1], "wb").write(sys.stdin.buffer.read())\n')
+        os.chmod(encoder, os.stat(encoder).st_mode | stat.S_IEXEC)
+
+        dut: ExportManager = ExportManager(str(tmp_path), encoder=encoder)
+        dut.fmt = 'gif'
+        for i in range(10):
+            dut.push(gen_frame(0.0))
+        res: str = dut.finish()
+
+        assert res.endswith('video.gif')
+        assert os.path.getsize(res) == 10 * 2 * 4 * 3
+        assert '-pix_fmt' in dut.encoder_cmd(4, 2)
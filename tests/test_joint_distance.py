@@ -5,6 +5,8 @@ from TaichiGAME.dynamics.joint.distance import DistanceConstraint
 from TaichiGAME.dynamics.joint.distance import DistanceJointPrimitive
 from TaichiGAME.dynamics.joint.distance import DistanceConstraintPrimitive
 from TaichiGAME.dynamics.joint.joint import JointType
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.geometry.shape import Rectangle
 from TaichiGAME.math.matrix import Matrix
 
 
@@ -68,7 +70,19 @@ class TestDistanceJoint():
         assert 1
 
     def test_solve_position(self):
-        assert 1
+        tmp: DistanceJointPrimitive = DistanceJointPrimitive()
+        tmp._bodya = Body()
+        tmp._bodya.shape = Rectangle(1.0, 1.0)
+        tmp._bodya.mass = 1.0
+        tmp._bodya.type = Body.Type.Dynamic
+        tmp._bodya.pos = Matrix([3.0, 0.0], 'vec')
+        tmp._dist_max = 2.0
+        dut: DistanceJoint = DistanceJoint(tmp)
+
+        for i in range(30):
+            dut.solve_position(1 / 60)
+
+        assert np.isclose(tmp._bodya.pos.len(), 2.0, atol=0.01)
 
     def test_prim(self):
         assert 1
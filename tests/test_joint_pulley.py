@@ -1,5 +1,26 @@
+import numpy as np
+
+from TaichiGAME.dynamics.body import Body
 from TaichiGAME.dynamics.joint.joint import JointType
 from TaichiGAME.dynamics.joint.pulley import PulleyJoint, PulleyJointPrimitive
+from TaichiGAME.geometry.shape import Circle, Rectangle
+from TaichiGAME.simulation import Simulation
+from TaichiGAME.math.matrix import Matrix
+
+
+def create_pulley() -> PulleyJoint:
+    prim: PulleyJointPrimitive = PulleyJointPrimitive()
+    prim._bodya = Body()
+    prim._bodyb = Body()
+    for bd, x in ((prim._bodya, -1.0), (prim._bodyb, 1.0)):
+        bd.shape = Circle(0.2)
+        bd.mass = 1.0
+        bd.type = Body.Type.Dynamic
+        bd.pos = Matrix([x, 0.0], 'vec')
+
+    prim._ground_pointa = Matrix([-1.0, 2.0], 'vec')
+    prim._ground_pointb = Matrix([1.0, 2.0], 'vec')
+    return PulleyJoint(prim)
 
 
 class TestPulleyJointPrimitive():
@@ -20,11 +41,75 @@ class TestPulleyJoint():
         dut.set_value(PulleyJointPrimitive())
         assert isinstance(dut._prim, PulleyJointPrimitive)
 
+    def test_calc_length(self):
+        dut: PulleyJoint = create_pulley()
+        assert np.isclose(dut.calc_length(), 4.0)
+
+    def test_init_length(self):
+        # the rest length is taken from the poses when created
+        dut: PulleyJoint = create_pulley()
+        assert np.isclose(dut.prim()._length, 4.0)
+
+        prim: PulleyJointPrimitive = dut.prim()
+        prim._length = 6.0
+        dut.set_value(prim)
+        assert np.isclose(dut.prim()._length, 6.0)
+
+    def test_rest(self):
+        sim: Simulation = Simulation()
+        sim.world.grav = Matrix([0.0, 0.0], 'vec')
+        prim: PulleyJointPrimitive = PulleyJointPrimitive()
+        for x in (-2.0, 2.0):
+            bd: Body = sim.world.create_body()
+            bd.shape = Rectangle(1.0, 1.0)
+            bd.mass = 1.0
+            bd.type = Body.Type.Dynamic
+            bd.pos = Matrix([x, 0.0], 'vec')
+            sim.dbvt.insert(bd)
+
+        prim._bodya = sim.world._body_list[0]
+        prim._bodyb = sim.world._body_list[1]
+        prim._ground_pointa = Matrix([-2.0, 5.0], 'vec')
+        prim._ground_pointb = Matrix([2.0, 5.0], 'vec')
+        sim.world.create_joint(prim)
+
+        # a pulley at rest stays put
+        sim.step(60)
+        assert np.isclose(prim._bodya.pos.y, 0.0, atol=1e-6)
+        assert np.isclose(prim._bodyb.pos.y, 0.0, atol=1e-6)
+
     def test_prepare(self):
-        assert 1
+        dut: PulleyJoint = create_pulley()
+        dut.prim()._impulse = 1.0
+        dut.prepare(1 / 60)
+
+        assert dut.prim()._ua == Matrix([0.0, -1.0], 'vec')
+        assert np.isclose(dut.prim()._eff_mass, 0.5)
+        # warm start pulls both bodies up
+        assert dut.prim()._bodya.vel.y > 0.0
+        assert dut.prim()._bodyb.vel.y > 0.0
 
     def test_solve_velocity(self):
-        assert 1
+        dut: PulleyJoint = create_pulley()
+        dut.prim()._bodya.vel = Matrix([0.0, -1.0], 'vec')
+        dut.prepare(1 / 60)
+        dut.solve_velocity(1 / 60)
+
+        # one side goes down, the other goes up
+        assert np.isclose(dut.prim()._bodya.vel.y, -0.5)
+        assert np.isclose(dut.prim()._bodyb.vel.y, 0.5)
 
     def test_solve_position(self):
-        assert 1
+        dut: PulleyJoint = create_pulley()
+        dut.prim()._bodya.pos = Matrix([-1.0, -1.0], 'vec')
+        for i in range(40):
+            dut.solve_position(1 / 60)
+
+        prim: PulleyJointPrimitive = dut.prim()
+        val_len: float = (prim._bodya.pos - prim._ground_pointa).len() + (
+            prim._bodyb.pos - prim._ground_pointb).len()
+        assert np.isclose(val_len, 4.0, atol=0.01)
+
+    def test_prim(self):
+        dut: PulleyJoint = PulleyJoint()
+        assert isinstance(dut.prim(), PulleyJointPrimitive)
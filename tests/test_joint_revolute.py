@@ -3,6 +3,8 @@ from TaichiGAME.dynamics.joint.joint import JointType
 
 from TaichiGAME.dynamics.joint.revolute import RevoluteJoint
 from TaichiGAME.dynamics.joint.revolute import RevoluteJointPrimitive
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.geometry.shape import Rectangle
 from TaichiGAME.math.matrix import Matrix
 
 
@@ -47,7 +49,22 @@ class TestRevoluteJoint():
         assert 1
 
     def test_solve_position(self):
-        assert 1
+        tmp: RevoluteJointPrimitive = RevoluteJointPrimitive()
+        tmp._bodya = Body()
+        tmp._bodya.shape = Rectangle(1.0, 1.0)
+        tmp._bodya.mass = 1.0
+        tmp._bodya.type = Body.Type.Dynamic
+        tmp._bodyb = Body()
+        tmp._bodyb.pos = Matrix([1.0, 0.0], 'vec')
+        dut: RevoluteJoint = RevoluteJoint(tmp)
+
+        err: float = (tmp._bodyb.pos - tmp._bodya.pos).len()
+        for i in range(10):
+            dut.solve_position(1 / 60)
+
+        # the dynamic body is moved to the static anchor
+        assert (tmp._bodyb.pos - tmp._bodya.pos).len() < err * 0.2
+        assert tmp._bodyb.pos == Matrix([1.0, 0.0], 'vec')
 
     def test_prim(self):
         dut: RevoluteJoint = RevoluteJoint()
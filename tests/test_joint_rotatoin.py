@@ -2,8 +2,10 @@ import numpy as np
 
 from TaichiGAME.dynamics.body import Body
 from TaichiGAME.dynamics.joint.joint import JointType
+from TaichiGAME.dynamics.joint.rotation import OrientationJoint
 from TaichiGAME.dynamics.joint.rotation import OrientationJointPrimitive, RotationJoint
 from TaichiGAME.dynamics.joint.rotation import RotationJointPrimitive
+from TaichiGAME.geometry.shape import Rectangle
 from TaichiGAME.math.matrix import Matrix
 
 
@@ -58,3 +60,25 @@ class TestRotationJoint():
         dut: RotationJoint = RotationJoint()
 
         assert isinstance(dut.prim(), RotationJointPrimitive)
+
+
+class TestOrientationJoint():
+    def test_solve_position(self):
+        tmp: OrientationJointPrimitive = OrientationJointPrimitive()
+        tmp._bodya = Body()
+        tmp._bodya.shape = Rectangle(1.0, 1.0)
+        tmp._bodya.mass = 1.0
+        tmp._bodya.type = Body.Type.Dynamic
+        tmp._bodya.rot = -3.0
+        tmp._target_point = Matrix([-1.0, 1.0], 'vec')
+        dut: OrientationJoint = OrientationJoint(tmp)
+
+        for i in range(30):
+            dut.solve_position(1 / 60)
+
+        # turned the short way(across -pi) to the target angle
+        assert tmp._bodya.rot < -3.0
+        assert np.isclose(np.cos(tmp._bodya.rot), np.cos(0.75 * np.pi),
+                          atol=0.02)
+        assert np.isclose(np.sin(tmp._bodya.rot), np.sin(0.75 * np.pi),
+                          atol=0.02)
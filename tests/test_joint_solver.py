@@ -0,0 +1,180 @@
+from typing import List
+
+import numpy as np
+
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.dynamics.joint.joint import Joint, JointType
+from TaichiGAME.dynamics.joint.joint_solver import JointSolver, inv2x2
+from TaichiGAME.dynamics.joint.point import PointJoint, PointJointPrimitive
+from TaichiGAME.dynamics.joint.revolute import RevoluteJoint
+from TaichiGAME.dynamics.joint.revolute import RevoluteJointPrimitive
+from TaichiGAME.dynamics.joint.rotation import OrientationJoint
+from TaichiGAME.geometry.shape import Rectangle
+from TaichiGAME.math.matrix import Matrix
+
+
+def create_body(x: float, y: float, dynamic: bool = True) -> Body:
+    body: Body = Body()
+    body.shape = Rectangle(1.0, 0.2)
+    body.pos = Matrix([x, y], 'vec')
+    body.vel = Matrix([0.3, -1.0], 'vec')
+    body.ang_vel = 0.5
+    body.mass = 1.0 if dynamic else 1e37
+    body.type = Body.Type.Dynamic if dynamic else Body.Type.Static
+    return body
+
+
+def create_chain(link_len: int) -> List[Joint]:
+    res: List[Joint] = []
+    bodya: Body = create_body(0.0, 0.0, False)
+    for i in range(link_len):
+        bodyb: Body = create_body(i + 1.0, 0.0)
+        prim: RevoluteJointPrimitive = RevoluteJointPrimitive()
+        prim._bodya = bodya
+        prim._bodyb = bodyb
+        prim._local_pointa = Matrix([0.5, 0.0], 'vec')
+        prim._local_pointb = Matrix([-0.5, 0.0], 'vec')
+        res.append(RevoluteJoint(prim))
+        bodya = bodyb
+
+    return res
+
+
+class TestJointSolver():
+    def test_inv2x2(self):
+        k11: np.ndarray = np.array([2.0, 1.0])
+        k12: np.ndarray = np.array([0.5, 1.0])
+        k22: np.ndarray = np.array([3.0, 1.0])
+        dut: np.ndarray = inv2x2(k11, k12, k22)
+
+        assert np.allclose(dut[0], np.linalg.inv([[2.0, 0.5], [0.5, 3.0]]))
+        # singular
+        assert np.allclose(dut[1], 0.0)
+
+    def test_build(self):
+        joint_list: List[Joint] = create_chain(5)
+        joint_list.append(OrientationJoint())
+        joint_list[0].active = False
+        dut: JointSolver = JointSolver()
+        dut.build(joint_list)
+
+        assert len(dut.group_list) == 1
+        assert dut.group_list[0]._type == JointType.Revolute
+        assert len(dut.group_list[0]._joint_list) == 4
+        assert len(dut.fallback_list) == 1
+        # the chain links share bodies with the neighbours
+        assert len(dut.group_list[0]._color_list) == 2
+
+    def test_build_cache(self):
+        joint_list: List[Joint] = create_chain(5)
+        dut: JointSolver = JointSolver()
+
+        dut.prepare(joint_list, 1 / 60)
+        group_list = dut.group_list
+        dut.prepare(joint_list, 1 / 60)
+        assert dut.group_list is group_list
+
+        # rebuild after the joints are changed
+        joint_list[0].active = False
+        dut.prepare(joint_list, 1 / 60)
+        assert dut.group_list is not group_list
+        assert len(dut.group_list[0]._joint_list) == 4
+
+        group_list = dut.group_list
+        joint_list.pop()
+        dut.prepare(joint_list, 1 / 60)
+        assert len(dut.group_list[0]._joint_list) == 3
+
+        # the static body does not make conflict
+        joint_list[1].prim()._bodya.mass = 1e37
+        joint_list[1].prim()._bodya.type = Body.Type.Static
+        group_list = dut.group_list
+        dut.prepare(joint_list, 1 / 60)
+        assert dut.group_list is not group_list
+
+    def test_shared(self):
+        # only the shared bodies are synced between the iterations,
+        # the result is the same after the finish
+        dut_list: List[Joint] = create_chain(6)
+        ref_list: List[Joint] = create_chain(6)
+        dut: JointSolver = JointSolver()
+        ref: JointSolver = JointSolver()
+        shared: Body = dut_list[2].prim()._bodyb
+
+        dut.prepare(dut_list, 1 / 60, [shared])
+        ref.prepare(ref_list, 1 / 60)
+        assert len(dut._shared) == 1
+        for i in range(4):
+            dut.solve_velocity(1 / 60)
+            ref.solve_velocity(1 / 60)
+
+        idx: int = dut._body_list.index(shared)
+        assert np.isclose(shared.ang_vel, dut._ang_vel[idx])
+        # not written back until the finish
+        assert dut_list[4].prim()._bodyb.ang_vel == 0.5
+
+        dut.finish()
+        ref.finish()
+        for dut_jt, ref_jt in zip(dut_list, ref_list):
+            assert np.allclose(dut_jt.prim()._bodyb.vel._val,
+                               ref_jt.prim()._bodyb.vel._val)
+            assert np.isclose(dut_jt.prim()._bodyb.ang_vel,
+                              ref_jt.prim()._bodyb.ang_vel)
+
+    def test_revolute(self):
+        # same result as the joint itself for a single joint
+        dut_list: List[Joint] = create_chain(1)
+        ref_list: List[Joint] = create_chain(1)
+        dut: JointSolver = JointSolver()
+
+        dut.prepare(dut_list, 1 / 60)
+        ref_list[0].prepare(1 / 60)
+        for i in range(4):
+            dut.solve_velocity(1 / 60)
+            ref_list[0].solve_velocity(1 / 60)
+        dut.store_impulse()
+
+        dut_prim = dut_list[0].prim()
+        ref_prim = ref_list[0].prim()
+        assert np.allclose(dut_prim._bodyb.vel._val, ref_prim._bodyb.vel._val)
+        assert np.isclose(dut_prim._bodyb.ang_vel, ref_prim._bodyb.ang_vel)
+        assert np.allclose(dut_prim._impulse._val, ref_prim._impulse._val)
+        # the static body is not moved
+        assert np.allclose(dut_prim._bodya.vel._val, [[0.3], [-1.0]])
+
+    def test_point(self):
+        body: Body = create_body(0.0, 0.0)
+        prim: PointJointPrimitive = PointJointPrimitive()
+        prim._bodya = body
+        prim._target_point = Matrix([1.0, 0.0], 'vec')
+        dut: JointSolver = JointSolver()
+
+        dut.prepare([PointJoint(prim)], 1 / 60)
+        for i in range(6):
+            dut.solve_velocity(1 / 60)
+
+        # pulled to the target
+        assert body.vel.x > 0.3
+
+    def test_chain(self):
+        joint_list: List[Joint] = create_chain(50)
+        dut: JointSolver = JointSolver()
+        dt: float = 1 / 60
+
+        for step in range(30):
+            dut.prepare(joint_list, dt)
+            for i in range(6):
+                dut.solve_velocity(dt)
+            dut.finish()
+
+            for jt in joint_list:
+                bd: Body = jt.prim()._bodyb
+                bd.pos += bd.vel * dt
+                bd.rot += bd.ang_vel * dt
+
+        # the links keep connected
+        for jt in joint_list:
+            prim = jt.prim()
+            pa: Matrix = prim._bodya.to_world_point(prim._local_pointa)
+            pb: Matrix = prim._bodyb.to_world_point(prim._local_pointb)
+            assert (pa - pb).len() < 0.05
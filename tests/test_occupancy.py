@@ -0,0 +1,163 @@
+import numpy as np
+import pytest
+
+from TaichiGAME.planning.occupancy import OccupancyGrid
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.dynamics.phy_world import PhysicsWorld
+from TaichiGAME.geometry.shape import Capsule, Circle, Edge, Ellipse
+from TaichiGAME.geometry.shape import Polygon, Rectangle, Sector, Shape
+from TaichiGAME.math.matrix import Matrix
+
+
+def add_body(world: PhysicsWorld, shape: Shape, x: float, y: float,
+             rot: float = 0.0) -> Body:
+    res: Body = world.create_body()
+    res.shape = shape
+    res.pos = Matrix([x, y], 'vec')
+    res.rot = rot
+    return res
+
+
+def make_grid() -> OccupancyGrid:
+    return OccupancyGrid(0.5, Matrix([-5.0, -5.0], 'vec'),
+                         Matrix([5.0, 5.0], 'vec'))
+
+
+class TestOccupancyGrid():
+    def test__init__(self):
+        dut: OccupancyGrid = make_grid()
+
+        assert dut.shape == (20, 20)
+        assert dut.resolution == 0.5
+        assert not np.any(dut.grid)
+        assert dut.lower == Matrix([-5.0, -5.0], 'vec')
+
+    def test_from_world(self):
+        world: PhysicsWorld = PhysicsWorld()
+        with pytest.raises(ValueError):
+            OccupancyGrid.from_world(world, 0.5)
+
+        add_body(world, Rectangle(2.0, 2.0), 1.0, 1.0)
+        dut: OccupancyGrid = OccupancyGrid.from_world(world, 0.5, 1.0)
+        assert dut.shape == (8, 8)
+        assert dut.lower == Matrix([-1.0, -1.0], 'vec')
+        assert np.sum(dut.grid) == 16
+
+    def test_rasterize(self):
+        world: PhysicsWorld = PhysicsWorld()
+        dut: OccupancyGrid = make_grid()
+        edg: Edge = Edge()
+        edg.set_value(Matrix([-1.0, 0.1], 'vec'), Matrix([1.0, 0.1], 'vec'))
+        sec: Sector = Sector()
+        sec.set_value(0.0, np.pi / 2.0, 2.0)
+        tri: Polygon = Polygon()
+        tri.vertices = [
+            Matrix([0.0, 0.0], 'vec'),
+            Matrix([2.0, 0.0], 'vec'),
+            Matrix([0.0, 2.0], 'vec'),
+            Matrix([0.0, 0.0], 'vec')
+        ]
+
+        # the covered cells hold the shape and are in the shape dilated
+        # by the cell diagonal
+        diag: float = 0.5 * np.sqrt(2.0)
+        for shape, area, perim in [(Rectangle(2.0, 1.0), 2.0, 6.0),
+                                   (Circle(1.5), np.pi * 2.25, np.pi * 3.0),
+                                   (Ellipse(4.0, 2.0), np.pi * 2.0, 9.69),
+                                   (Capsule(3.0, 1.0), 2.0 + np.pi * 0.25,
+                                    4.0 + np.pi), (sec, np.pi, 4.0 + np.pi),
+                                   (tri, 2.0, 4.0 + 2.0 * np.sqrt(2.0))]:
+            cell: np.ndarray = dut.rasterize(add_body(world, shape, 0.0, 0.0))
+            assert len(np.unique(cell)) == len(cell)
+            assert area <= len(cell) * 0.25 <= (area + perim * diag +
+                                                np.pi * diag * diag)
+
+        # the end point is on the border of the 5th cell
+        cell = dut.rasterize(add_body(world, edg, 0.0, 0.0))
+        assert len(cell) == 5
+        assert np.all(cell // dut.shape[1] == 10)
+
+        # the rotation and the clip by the grid
+        cell = dut.rasterize(
+            add_body(world, Rectangle(4.0, 1.0), 0.0, 0.0, np.pi / 2.0))
+        assert np.all(cell % dut.shape[1] >= 9)
+        assert np.all(cell % dut.shape[1] <= 10)
+        assert len(cell) == 16
+        cell = dut.rasterize(add_body(world, Rectangle(4.0, 4.0), 5.0, 5.0))
+        assert len(cell) == 16
+
+    def test_rasterize_thin(self):
+        world: PhysicsWorld = PhysicsWorld()
+        dut: OccupancyGrid = OccupancyGrid(0.1, Matrix([-2.0, -2.0], 'vec'),
+                                           Matrix([2.0, 2.0], 'vec'))
+        # the shapes thinner than a cell hold no cell center
+        add_body(world, Rectangle(0.04, 3.0), 0.55, 0.0)
+        add_body(world, Circle(0.03), -1.05, 1.05)
+        add_body(world, Rectangle(0.04, 1.0), -1.0, -1.0, np.pi / 4.0)
+        dut.update(world)
+
+        assert dut.is_occupied(np.array([[0.55, 0.0], [0.55, 1.45],
+                                         [-1.05, 1.05], [-1.0, -1.0],
+                                         [-1.3, -0.7]])).all()
+        # the wall blocks every row it spans
+        assert np.all(dut.grid[6:34, 25])
+        assert not np.any(dut.grid[:, 24]) and not np.any(dut.grid[:, 26])
+        assert np.sum(dut.grid[20:, :15]) == 1
+
+    def test_update(self):
+        world: PhysicsWorld = PhysicsWorld()
+        dut: OccupancyGrid = make_grid()
+        boxa: Body = add_body(world, Rectangle(1.0, 1.0), -2.0, -2.0)
+        boxb: Body = add_body(world, Rectangle(2.0, 2.0), -2.0, -2.0)
+        add_body(world, Circle(1.0), 2.0, 2.0)
+
+        assert dut.update(world) == 3
+        assert dut.update(world) == 0
+        assert dut.count.max() == 2
+        ref: np.ndarray = dut.count.copy()
+
+        boxb.pos = Matrix([2.0, -2.0], 'vec')
+        assert dut.update(world) == 1
+        assert dut.count.max() == 1
+        assert np.sum(dut.grid) == np.sum(ref > 0) + 4
+
+        fresh: OccupancyGrid = make_grid()
+        fresh.update(world)
+        assert np.array_equal(dut.count, fresh.count)
+
+        world.remove_body(boxa)
+        assert dut.update(world) == 0
+        assert len(dut.body_list()) == 2
+        assert np.sum(dut.grid) == np.sum(ref > 0)
+
+        dut.clear()
+        assert not np.any(dut.grid) and dut.update(world) == 2
+
+    def test_is_occupied(self):
+        world: PhysicsWorld = PhysicsWorld()
+        dut: OccupancyGrid = make_grid()
+        add_body(world, Rectangle(2.0, 2.0), 0.0, 0.0)
+        dut.update(world)
+
+        assert dut.is_occupied(np.array([[0.1, 0.1], [3.0, 3.0],
+                                         [20.0, 0.0]])).tolist() == [
+                                             True, False, True
+                                         ]
+
+    def test_signed_distance(self):
+        world: PhysicsWorld = PhysicsWorld()
+        dut: OccupancyGrid = make_grid()
+        add_body(world, Rectangle(2.0, 2.0), 0.0, 0.0)
+        dut.update(world)
+        sdf: np.ndarray = dut.signed_distance()
+
+        assert dut.signed_distance() is sdf
+        assert np.all(sdf[dut.grid] < 0.0) and np.all(sdf[~dut.grid] > 0.0)
+        assert np.allclose(
+            dut.distance(np.array([[0.1, 0.1], [2.1, 0.1], [-0.9, 0.1]])),
+            [-1.0, 1.5, -0.5])
+
+        world._body_list[0].pos = Matrix([1.0, 0.0], 'vec')
+        dut.update(world)
+        assert dut.signed_distance() is not sdf
+        assert np.isclose(dut.distance(np.array([[2.1, 0.1]]))[0], 0.5)
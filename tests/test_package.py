@@ -0,0 +1,29 @@
+import subprocess
+import sys
+
+
+def run(stmt: str) -> None:
+    # NOTE: a fresh interpreter, the test session already imported taichi
+    subprocess.run([sys.executable, '-c', stmt], check=True)
+
+
+class TestPackage():
+    def test_lazy_import(self):
+        run('import sys; import TaichiGAME as ng; ng.Matrix; ng.DBVT; '
+            'ng.Simulation; ng.Profiler; '
+            "assert 'taichi' not in sys.modules; "
+            "assert 'colorama' not in sys.modules")
+
+    def test_lazy_attr(self):
+        run('import sys; import TaichiGAME as ng; '
+            'from TaichiGAME.scene import Scene; '
+            'from TaichiGAME.render.render import Render; '
+            'from TaichiGAME.common.camera import Camera; '
+            'assert ng.Scene is Scene and ng.Render is Render; '
+            'assert ng.Camera is Camera and ng.common.Camera is Camera; '
+            "assert 'Scene' in dir(ng)")
+
+    def test_missing_attr(self):
+        import TaichiGAME
+        assert not hasattr(TaichiGAME, 'NoSuchName')
+        assert not hasattr(TaichiGAME.common, 'NoSuchName')
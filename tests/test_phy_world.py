@@ -1,6 +1,9 @@
 import numpy as np
 
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.dynamics.joint.point import PointJointPrimitive
 from TaichiGAME.dynamics.phy_world import PhysicsWorld
+from TaichiGAME.geometry.shape import Rectangle
 from TaichiGAME.math.matrix import Matrix
 
 
@@ -36,6 +39,28 @@ class TestPhysicsWorld():
     def test_step_position(self):
         assert 1
 
+    def test_finish_velocity_constraint(self):
+        dut: PhysicsWorld = PhysicsWorld()
+        body: Body = dut.create_body()
+        body.shape = Rectangle(1.0, 1.0)
+        body.mass = 1.0
+        body.type = Body.Type.Dynamic
+        prim: PointJointPrimitive = PointJointPrimitive()
+        prim._bodya = body
+        prim._local_pointa = Matrix([0.0, 0.0], 'vec')
+        prim._target_point = Matrix([1.0, 0.0], 'vec')
+        dut.create_joint(prim)
+
+        # no body is shared, the velocities stay in the solver
+        dut.prepare_velocity_constraint(1 / 60, [])
+        for i in range(4):
+            dut.solve_velocity_constraint(1 / 60)
+        assert body.vel.x == 0.0
+
+        dut.finish_velocity_constraint()
+        assert body.vel.x > 0.0
+        assert prim._impulse.x > 0.0
+
     def test_solve_position_constrain(self):
         # NOTE: just call joint.solve_position
         assert 1
@@ -98,13 +123,27 @@ class TestPhysicsWorld():
         assert not dut.damping_ena
 
     def test_create_body(self):
-        assert 1
+        dut1: PhysicsWorld = PhysicsWorld()
+        dut2: PhysicsWorld = PhysicsWorld()
+
+        # every world owns its id space
+        assert dut1.create_body().id == dut2.create_body().id
+        assert dut1.create_body().id != dut1._body_list[0].id
 
     def test_create_joint(self):
         assert 1
 
     def test_remove_body(self):
-        assert 1
+        dut: PhysicsWorld = PhysicsWorld()
+        body1: Body = dut.create_body()
+        body1_id: int = body1.id
+        dut.remove_body(body1)
+        body2: Body = dut.create_body()
+
+        # the index is reused, the id is not
+        assert body2.id != body1_id
+        assert dut._body_id_alloc.index(body2.id) == 0
+        assert len(dut._body_list) == 1
 
     def test_remove_joint(self):
         assert 1
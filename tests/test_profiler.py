@@ -0,0 +1,40 @@
+import numpy as np
+
+from TaichiGAME.common.profiler import Profiler
+
+
+class TestProfiler():
+    def test_disabled(self):
+        dut: Profiler = Profiler(4)
+        dut.begin()
+        dut.tick(Profiler.Tree)
+        dut.count(Profiler.Pair, 10)
+        dut.end_frame()
+
+        assert dut.size == 0
+        assert dut.stats() == {}
+
+    def test_ring(self):
+        dut: Profiler = Profiler(4)
+        dut.ena = True
+        for i in range(6):
+            dut.begin()
+            dut.tick(Profiler.Tree)
+            dut.tick(Profiler.Detect)
+            dut.count(Profiler.Pair, i)
+            dut.end_frame()
+
+        assert dut.size == 4
+        tm, cnt = dut.frames()
+        # oldest to newest
+        assert cnt[:, Profiler.Pair].tolist() == [2, 3, 4, 5]
+        assert np.all(tm[:, Profiler.Tree] >= 0.0)
+        assert np.all(tm[:, Profiler.Prepare] == 0.0)
+
+        res = dut.stats()
+        assert res['pair']['last'] == 5
+        assert res['pair']['mean'] == 3.5
+        assert res['frame']['max'] >= res['tree']['max']
+
+        dut.reset()
+        assert dut.size == 0
@@ -1,4 +1,4 @@
-from TaichiGAME.common.random import RandomGenerator
+from TaichiGAME.common.random import IdAllocator, RandomGenerator
 
 
 class TestRandom():
@@ -19,3 +19,56 @@ class TestRandom():
         assert dut2 == 4
         assert dut3 == 4
         assert dut4 == 5
+
+
+class TestIdAllocator():
+    def test__init__(self):
+        dut: IdAllocator = IdAllocator()
+
+        assert dut.capacity == 0
+        assert len(dut) == 0
+
+    def test_alloc(self):
+        dut: IdAllocator = IdAllocator(8)
+        dut1: int = dut.alloc()
+        dut2: int = dut.alloc()
+
+        assert dut1 != 0
+        assert dut.index(dut1) == 0
+        assert dut.index(dut2) == 1
+        assert dut.generation(dut1) == 1
+        assert dut.capacity == 2
+        assert len(dut) == 2
+
+    def test_free(self):
+        dut: IdAllocator = IdAllocator(8)
+        dut1: int = dut.alloc()
+        dut2: int = dut.alloc()
+        dut.free(dut1)
+        dut3: int = dut.alloc()
+
+        # the index is reused with a new generation
+        assert dut.index(dut3) == dut.index(dut1)
+        assert dut3 != dut1
+        assert not dut.is_valid(dut1)
+        assert dut.is_valid(dut2)
+        assert dut.is_valid(dut3)
+        assert dut.capacity == 2
+
+    def test_generation_wrap(self):
+        dut: IdAllocator = IdAllocator(30)
+        val: int = dut.alloc()
+        for i in range(4):
+            dut.free(val)
+            val = dut.alloc()
+
+        assert val != 0
+        assert dut.generation(val) >= 1
+
+    def test_clear(self):
+        dut: IdAllocator = IdAllocator()
+        dut1: int = dut.alloc()
+        dut.clear()
+
+        assert not dut.is_valid(dut1)
+        assert dut.alloc() == dut1
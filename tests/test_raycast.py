@@ -0,0 +1,133 @@
+import numpy as np
+
+from TaichiGAME.collision.algorithm.raycast import Raycast, RaycastResult
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.geometry.shape import Capsule, Circle, Edge, Ellipse
+from TaichiGAME.geometry.shape import Polygon, Rectangle, Sector, Shape
+from TaichiGAME.math.matrix import Matrix
+
+
+def make_body(shape: Shape, x: float = 0.0, y: float = 0.0,
+              rot: float = 0.0) -> Body:
+    res: Body = Body()
+    res.shape = shape
+    res.pos = Matrix([x, y], 'vec')
+    res.rot = rot
+    return res
+
+
+def cast(shape: Shape, start: list, dirn: list) -> RaycastResult:
+    res = Raycast.body(make_body(shape), Matrix(start, 'vec'),
+                       Matrix(dirn, 'vec'))
+    assert res is not None
+    return res
+
+
+class TestRaycast():
+    def test_body(self):
+        dut: Body = make_body(Rectangle(2.0, 2.0), 5.0, 0.0, np.pi / 4.0)
+        res = Raycast.body(dut, Matrix([0.0, 0.0], 'vec'),
+                           Matrix([2.0, 0.0], 'vec'))
+
+        assert res is not None and res.body is dut
+        assert np.isclose(res.dist, 5.0 - np.sqrt(2.0))
+        assert np.isclose(res.fraction, res.dist / 2.0)
+        assert res.point == Matrix([5.0 - np.sqrt(2.0), 0.0], 'vec')
+        assert np.isclose(res.normal.len(), 1.0)
+        assert res.normal.x < 0.0
+
+        assert Raycast.body(dut, Matrix([0.0, 0.0], 'vec'),
+                            Matrix([1.0, 0.0], 'vec'), 3.0) is None
+        assert Raycast.body(dut, Matrix([0.0, 0.0], 'vec'),
+                            Matrix([-1.0, 0.0], 'vec')) is None
+        assert Raycast.body(dut, Matrix([0.0, 0.0], 'vec'),
+                            Matrix([0.0, 0.0], 'vec')) is None
+
+    def test_inside(self):
+        res = cast(Circle(1.0), [0.2, 0.1], [1.0, 0.0])
+        assert res.dist == 0.0
+        assert res.normal == Matrix([0.0, 0.0], 'vec')
+
+    def test_polygon(self):
+        tri: Polygon = Polygon()
+        tri.vertices = [
+            Matrix([-1.0, 1.0], 'vec'),
+            Matrix([0.0, -2.0], 'vec'),
+            Matrix([1.0, -1.0], 'vec'),
+            Matrix([-1.0, 1.0], 'vec')
+        ]
+        # NOTE: the vertices are moved to the mass center(0, -2 / 3)
+        res = cast(tri, [0.0, 5.0], [0.0, -1.0])
+        assert np.isclose(res.dist, 5.0 - 2.0 / 3.0)
+        assert np.allclose(res.normal._val.ravel(),
+                           np.array([1.0, 1.0]) / np.sqrt(2.0))
+
+        # the clockwise vertices
+        tri.vertices = tri.vertices[::-1]
+        assert np.isclose(
+            cast(tri, [0.0, 5.0], [0.0, -1.0]).dist, 5.0 - 2.0 / 3.0)
+
+    def test_circle(self):
+        res = cast(Circle(1.0), [-10.0, 0.5], [1.0, 0.0])
+        assert np.isclose(res.dist, 10.0 - np.sqrt(0.75))
+        assert np.allclose(res.normal._val.ravel(), [-np.sqrt(0.75), 0.5])
+
+    def test_ellipse(self):
+        res = cast(Ellipse(4.0, 2.0), [10.0, 0.5], [-1.0, 0.0])
+        assert np.isclose(res.dist, 10.0 - 2.0 * np.sqrt(0.75))
+        assert np.isclose(res.normal.len(), 1.0)
+        assert res.normal.x > 0.0 and res.normal.y > 0.0
+
+        res = cast(Ellipse(4.0, 2.0), [0.0, 10.0], [0.0, -1.0])
+        assert np.isclose(res.dist, 9.0)
+        assert res.normal == Matrix([0.0, 1.0], 'vec')
+
+    def test_edge(self):
+        edg: Edge = Edge()
+        edg.set_value(Matrix([-1.0, -1.0], 'vec'), Matrix([1.0, 1.0], 'vec'))
+        res = cast(edg, [10.0, 0.5], [-1.0, 0.0])
+        assert np.isclose(res.dist, 9.5)
+        # the normal faces the ray
+        assert np.allclose(res.normal._val.ravel(),
+                           np.array([1.0, -1.0]) / np.sqrt(2.0))
+
+        assert Raycast.body(make_body(edg), Matrix([3.0, 0.0], 'vec'),
+                            Matrix([1.0, 1.0], 'vec')) is None
+
+    def test_capsule(self):
+        res = cast(Capsule(4.0, 2.0), [0.5, 10.0], [0.0, -1.0])
+        assert np.isclose(res.dist, 9.0)
+        assert res.normal == Matrix([0.0, 1.0], 'vec')
+
+        res = cast(Capsule(4.0, 2.0), [10.0, 0.0], [-1.0, 0.0])
+        assert np.isclose(res.dist, 8.0)
+        assert res.normal == Matrix([1.0, 0.0], 'vec')
+
+        res = cast(Capsule(2.0, 4.0), [0.0, 10.0], [0.0, -1.0])
+        assert np.isclose(res.dist, 8.0)
+
+    def test_sector(self):
+        sec: Sector = Sector()
+        sec.set_value(0.0, np.pi / 2.0, 2.0)
+        res = cast(sec, [-10.0, 0.5], [1.0, 0.0])
+        assert np.isclose(res.dist, 10.0)
+        assert res.normal == Matrix([-1.0, 0.0], 'vec')
+
+        res = cast(sec, [10.0, 0.5], [-1.0, 0.0])
+        assert np.isclose(res.dist, 10.0 - np.sqrt(3.75))
+
+        # wider than the half circle
+        sec.set_value(0.0, 1.5 * np.pi, 1.0)
+        assert np.isclose(cast(sec, [-10.0, 0.0], [1.0, 0.0]).dist, 9.0)
+        assert np.isclose(cast(sec, [0.5, -10.0], [0.0, 1.0]).dist, 10.0)
+        assert Raycast.body(make_body(sec), Matrix([0.5, -10.0], 'vec'),
+                            Matrix([0.0, 1.0], 'vec'), 9.5) is None
+
+    def test_prim(self):
+        dut: Body = make_body(Rectangle(2.0, 2.0), 0.0, 0.0, np.pi / 2.0)
+        org: np.ndarray = np.array([[-5.0, 0.0], [5.0, 0.0], [0.0, 5.0]])
+        unit: np.ndarray = np.array([[1.0, 0.0], [1.0, 0.0], [0.0, -1.0]])
+        dist, normal = Raycast.prim(Raycast.body_prim(dut), org, unit)
+
+        assert np.allclose(dist[[0, 2]], 4.0) and dist[1] == np.inf
+        assert np.allclose(normal, [[-1.0, 0.0], [0.0, 0.0], [0.0, 1.0]])
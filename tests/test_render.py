@@ -0,0 +1,204 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from TaichiGAME.common.config import Config
+from TaichiGAME.geometry.shape import Capsule, Circle, Curve, Ellipse
+from TaichiGAME.geometry.shape import Polygon, Rectangle, Sector
+from TaichiGAME.geometry.shape import ShapePrimitive
+from TaichiGAME.math.matrix import Matrix
+from TaichiGAME.render.render import Render, RenderBatch
+
+
+class FakeGUI():
+    '''record the draw calls instead of rendering'''
+    def __init__(self):
+        self.call_list: List[Tuple] = []
+
+    def circle(self, pos, color=0xFFFFFF, radius=1):
+        self.call_list.append(('circle', pos, color, radius))
+
+    def circles(self, pos, radius=1, color=0xFFFFFF):
+        self.call_list.append(('circles', pos, color, radius))
+
+    def line(self, begin, end, radius=1, color=0xFFFFFF):
+        self.call_list.append(('line', begin, end, color))
+
+    def lines(self, begin, end, radius=1, color=0xFFFFFF):
+        self.call_list.append(('lines', begin, end, color))
+
+    def triangles(self, a, b, c, color=0xFFFFFF):
+        self.call_list.append(('triangles', a, b, c, color))
+
+    def rect(self, topleft, bottomright, radius=1, color=0xFFFFFF):
+        self.call_list.append(('rect', topleft, bottomright, color))
+
+    def text(self, content, pos, font_size=15, color=0xFFFFFF):
+        self.call_list.append(('text', content, pos, color))
+
+
+def identity(pos: np.ndarray) -> np.ndarray:
+    return pos
+
+
+class TestRender():
+    def test_fan_index(self):
+        tri, line = Render.fan_index(5)
+        assert tri.tolist() == [[0, 1, 2], [0, 2, 3], [0, 3, 4]]
+        assert line[-1].tolist() == [4, 0]
+        assert Render.fan_index(5)[0] is tri
+
+    def test_rd_points(self):
+        dut: FakeGUI = FakeGUI()
+        Render.rd_points(dut, [Matrix([0.1, 0.2], 'vec')] * 10)
+        Render.rd_lines(dut, [(Matrix([0.0, 0.0], 'vec'),
+                               Matrix([1.0, 1.0], 'vec'))] * 10)
+        Render.rd_points(dut, [])
+
+        assert [v[0] for v in dut.call_list] == ['circles', 'lines']
+        assert dut.call_list[0][1].shape == (10, 2)
+
+        # the array input
+        Render.rd_points(dut, np.zeros((5, 2)))
+        Render.rd_lines(dut, np.zeros((5, 2, 2)))
+        Render.rd_point(dut, np.array([0.5, 0.5]))
+        Render.rd_rects(dut, np.zeros((3, 2)), np.ones((3, 2)))
+        assert [v[0] for v in dut.call_list[2:]] == [
+            'circles', 'lines', 'circle', 'lines'
+        ]
+        assert dut.call_list[-1][1].shape == (12, 2)
+
+    def test_rd_polygon(self):
+        dut: FakeGUI = FakeGUI()
+        prim: ShapePrimitive = ShapePrimitive()
+        prim._shape = Rectangle(2.0, 1.0)
+        prim._xform = Matrix([1.0, 0.0], 'vec')
+        Render.rd_polygon(dut, prim, lambda v: v)
+
+        kind, begin, end, color = dut.call_list[0]
+        assert kind == 'lines' and begin.shape == (4, 2)
+        assert np.allclose(begin[0], [0.0, 0.5])
+        assert dut.call_list[1][1].shape == (2, 2)
+
+    def test_batch(self):
+        dut: FakeGUI = FakeGUI()
+        batch: RenderBatch = RenderBatch()
+        for i in range(10):
+            assert Render.batch_shape(batch, Rectangle(1.0, 1.0), i, 10.0)
+            assert Render.batch_shape(batch, Circle(0.5), i, 10.0)
+        Render.batch_body_axis(batch, Circle(0.5), 0, True, True)
+
+        pos: np.ndarray = np.arange(20.0).reshape(10, 2)
+        rot: np.ndarray = np.full(10, np.pi / 2)
+        batch.flush(dut, pos, rot, identity)
+
+        # one call per kind and color, the decoration is drawn last
+        kind_list: List[str] = [v[0] for v in dut.call_list]
+        assert kind_list == [
+            'triangles', 'circles', 'lines', 'circles', 'lines', 'lines'
+        ]
+        tri: Tuple = dut.call_list[0]
+        assert tri[1].shape == (20, 2)
+        # the rotated rect corner (-0.5, 0.5) of the body 1
+        assert np.allclose(tri[1][2], [2.0 - 0.5, 3.0 - 0.5])
+        cir: Tuple = dut.call_list[1]
+        assert np.allclose(cir[1], pos)
+        assert np.allclose(cir[3], 5.0)
+        assert dut.call_list[3][2] == Config.BodyCenterColor
+        assert batch.vert_cnt == 0
+
+    def test_batch_capsule(self):
+        dut: FakeGUI = FakeGUI()
+        batch: RenderBatch = RenderBatch()
+        Render.batch_shape(batch, Capsule(2.0, 1.0), 0, 1.0)
+        batch.flush(dut, np.zeros((1, 2)), np.zeros(1), identity)
+
+        assert [v[0] for v in dut.call_list] == ['triangles', 'lines']
+        vert: np.ndarray = dut.call_list[1][1]
+        assert np.isclose(vert[:, 0].max(), 1.0)
+        assert np.isclose(vert[:, 1].max(), 0.5)
+
+    def test_lod(self):
+        assert Render.lod(0.0) == Render.LodMin
+        assert Render.lod(1e6) == Render.LodMax
+        assert Render.lod(Render.LodPixel * 20) == 32
+
+    def test_tessellate(self):
+        cap: Capsule = Capsule(1.0, 2.0)
+        dut = Render.tessellate(cap, 10.0)
+        # cached by the shape and the lod
+        assert Render.tessellate(cap, 10.0) is dut
+        assert len(Render.tessellate(cap, 1000.0)._vert) > len(dut._vert)
+
+        # the CCW outline of the vertical capsule
+        vert: np.ndarray = dut._vert
+        area: float = np.sum(vert[:, 0] * np.roll(vert[:, 1], -1) -
+                             np.roll(vert[:, 0], -1) * vert[:, 1])
+        assert area > 0.0
+        assert np.isclose(vert[:, 1].max(), 1.0)
+        assert len(dut._tri) == len(vert) - 2
+
+        # regenerated after the shape is changed
+        cap.set_value(1.0, 4.0)
+        assert np.isclose(Render.tessellate(cap, 10.0)._vert[:, 1].max(), 2.0)
+
+        elp = Render.tessellate(Ellipse(4.0, 2.0), 100.0)
+        assert np.isclose(elp._vert[:, 0].max(), 2.0)
+        assert np.isclose(elp._vert[:, 1].max(), 1.0)
+
+        sec: Sector = Sector()
+        sec.set_value(0.0, np.pi / 2, 1.0)
+        dut = Render.tessellate(sec, 100.0)
+        assert np.allclose(dut._vert[0], [0.0, 0.0])
+        assert np.allclose(dut._vert[-1], [0.0, 1.0])
+
+        cur: Curve = Curve()
+        cur.set_value(Matrix([0.0, 0.0], 'vec'), Matrix([1.0, 1.0], 'vec'),
+                      Matrix([2.0, 1.0], 'vec'), Matrix([3.0, 0.0], 'vec'))
+        dut = Render.tessellate(cur, 100.0)
+        assert len(dut._tri) == 0
+        assert np.allclose(dut._vert[[0, -1]], [[0.0, 0.0], [3.0, 0.0]])
+        assert len(dut._line) == len(dut._vert) - 1
+
+        assert Render.tessellate(Circle(1.0), 10.0) is None
+
+    def test_tessellate_polygon(self):
+        poly: Polygon = Polygon()
+        poly.vertices = [
+            Matrix(v, 'vec') for v in ([-1.0, -1.0], [1.0, -1.0],
+                                       [1.0, 1.0], [-1.0, 1.0], [-1.0, -1.0])
+        ]
+        dut = Render.tessellate(poly, 1.0)
+        assert Render.tessellate(poly, 1.0) is dut
+
+        # the vertex list edited in place
+        poly.vertices[1] = Matrix([3.0, -1.0], 'vec')
+        assert np.isclose(Render.tessellate(poly, 1.0)._vert[:, 0].max(), 3.0)
+
+        # the vertex list replaced by the scale
+        poly.scale(2.0)
+        assert np.isclose(Render.tessellate(poly, 1.0)._vert[:, 0].max(), 6.0)
+
+    def test_rd_shape(self):
+        dut: FakeGUI = FakeGUI()
+        sec: Sector = Sector()
+        sec.set_value(0.0, np.pi, 1.0)
+        for shape in (sec, Ellipse(2.0, 1.0), Capsule(2.0, 1.0)):
+            prim: ShapePrimitive = ShapePrimitive()
+            prim._shape = shape
+            prim._xform = Matrix([1.0, 0.0], 'vec')
+            Render.rd_shape(dut, prim, lambda v: v, 10.0)
+
+        assert [v[0] for v in dut.call_list] == ['lines', 'triangles'] * 3
+        # the sector center is at the prim position
+        assert np.allclose(dut.call_list[0][1][0], [1.0, 0.0])
+
+        # same result by the array transform
+        arr: FakeGUI = FakeGUI()
+        Render.rd_shape(arr,
+                        prim,
+                        lambda v: v,
+                        10.0,
+                        world_to_screen_arr=identity)
+        for ref, res in zip(dut.call_list[-2:], arr.call_list):
+            assert all(np.allclose(u, v) for u, v in zip(ref[1:], res[1:]))
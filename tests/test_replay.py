@@ -0,0 +1,159 @@
+from typing import List
+
+import numpy as np
+import pytest
+
+from TaichiGAME.frame import Frame
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.geometry.shape import Circle, Rectangle
+from TaichiGAME.math.matrix import Matrix
+from TaichiGAME.replay import ReplayPlayer, ReplayRecorder
+from TaichiGAME.simulation import Simulation
+
+
+class FrameStack(Frame):
+    def __init__(self, box_len: int = 3):
+        super().__init__()
+        self._box_len: int = box_len
+
+    def load(self) -> None:
+        ground: Body = self.sim.world.create_body()
+        ground.shape = Rectangle(20.0, 1.0)
+        ground.pos = Matrix([0.0, -0.5], 'vec')
+        ground.mass = 1e37
+        ground.type = Body.Type.Static
+        self.sim.dbvt.insert(ground)
+
+        for i in range(self._box_len):
+            body: Body = self.sim.world.create_body()
+            body.shape = Rectangle(1.0, 1.0) if i % 2 == 0 else Circle(0.5)
+            body.pos = Matrix([0.1 * i, 0.5 + i * 1.05], 'vec')
+            body.mass = 1.0
+            body.type = Body.Type.Dynamic
+            self.sim.dbvt.insert(body)
+
+    def render(self) -> None:
+        pass
+
+
+def record(path: str) -> np.ndarray:
+    sim: Simulation = Simulation()
+    sim.register_frame(FrameStack(3))
+    sim.register_frame(FrameStack(4))
+    sim.init_frame()
+    sim.step(10)
+
+    dut: ReplayRecorder = ReplayRecorder(path, 8)
+    dut.attach(sim)
+    sim.step(20)
+    sim.grab(Matrix([0.0, 0.5], 'vec'))
+    for i in range(10):
+        sim.drag(Matrix([0.1 * i, 1.0], 'vec'))
+        sim.step(2)
+    sim.release()
+    sim.set_param('grav', Matrix([0.0, -5.0], 'vec'))
+    sim.step(20)
+    sim.change_frame(1)
+    sim.set_param('vel_iter', 4)
+    sim.step(30)
+    dut.close()
+    return np.array([[bd.pos.x, bd.pos.y, bd.rot]
+                     for bd in sim.world._body_list])
+
+
+class TestReplay():
+    def test_param(self):
+        name, val = ReplayRecorder.unpack_param(
+            ReplayRecorder.pack_param('grav', Matrix([1.0, -2.0], 'vec')))
+        assert name == 'grav' and val == Matrix([1.0, -2.0], 'vec')
+        assert ReplayRecorder.unpack_param(
+            ReplayRecorder.pack_param('grav_ena', False)) == ('grav_ena',
+                                                              False)
+        name, val = ReplayRecorder.unpack_param(
+            ReplayRecorder.pack_param('vel_iter', 3))
+        assert val == 3 and isinstance(val, int)
+
+    def test_replay(self, tmp_path):
+        path: str = str(tmp_path / 'run.rep')
+        ref: np.ndarray = record(path)
+
+        dut: ReplayPlayer = ReplayPlayer(path)
+        assert dut.start_step == 10
+        assert dut.end_step == 100
+
+        # no frame registered, the frame switch is a snapshot
+        sim: Simulation = Simulation()
+        assert dut.verify(sim) == -1
+        assert sim.step_cnt == 100
+        assert sim.world.vel_iter == 4
+        assert len(sim.world._body_list) == 5
+        assert np.array_equal(
+            np.array([[bd.pos.x, bd.pos.y, bd.rot]
+                      for bd in sim.world._body_list]), ref)
+
+        # seek back restarts from the start state
+        assert dut.seek(sim, 40) == -1
+        assert sim.step_cnt == 40
+        assert sim._mouse_select_body is not None
+        assert dut.seek(sim, 1000) == -1
+        assert sim.step_cnt == 100
+
+    def test_seek_start(self, tmp_path):
+        path: str = str(tmp_path / 'run.rep')
+        record(path)
+
+        # the steps before the start state are not run
+        step_list: List[int] = []
+        sim: Simulation = Simulation()
+        sim.attach(lambda v: step_list.append(v.step_cnt))
+        dut: ReplayPlayer = ReplayPlayer(path)
+        dut.reset(sim)
+        assert sim.step_cnt == 10 and len(step_list) == 0
+        assert dut.seek(sim, 15) == -1
+        assert step_list == [11, 12, 13, 14, 15]
+
+    def test_drag_idle(self, tmp_path):
+        path: str = str(tmp_path / 'run.rep')
+        sim: Simulation = Simulation()
+        sim.register_frame(FrameStack(3))
+        sim.init_frame()
+
+        # the drag without a grabbed body is not recorded
+        dut: ReplayRecorder = ReplayRecorder(path, 8)
+        dut.attach(sim)
+        for i in range(5):
+            sim.drag(Matrix([0.1 * i, 8.0], 'vec'))
+            sim.step(1)
+        sim.grab(Matrix([0.0, 0.5], 'vec'))
+        sim.drag(Matrix([0.1, 0.6], 'vec'))
+        sim.step(1)
+        dut.close()
+
+        kind_list: List[int] = [v[1] for v in ReplayPlayer(path)._event_list]
+        assert kind_list.count(ReplayRecorder.Drag) == 1
+
+    def test_diverge(self, tmp_path):
+        path: str = str(tmp_path / 'run.rep')
+        record(path)
+
+        dut: ReplayPlayer = ReplayPlayer(path)
+        sim: Simulation = Simulation()
+        dut.seek(sim, 20)
+        sim.world._body_list[1].vel = Matrix([1.0, 0.0], 'vec')
+        assert dut.seek(sim, 50) == 24
+
+    def test_broken(self, tmp_path):
+        path: str = str(tmp_path / 'run.rep')
+        record(path)
+        with open(path, 'rb') as fp:
+            buf: bytes = fp.read()
+
+        # the cut tail is dropped
+        with open(path, 'wb') as fp:
+            fp.write(buf[:-3])
+        assert ReplayPlayer(path).end_step <= 100
+
+        with open(path, 'wb') as fp:
+            fp.write(b'XXXX' + buf[4:])
+        with pytest.raises(ValueError):
+            ReplayPlayer(path)
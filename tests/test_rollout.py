@@ -0,0 +1,144 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+from TaichiGAME.frame import Frame
+from TaichiGAME.rollout import RolloutPool
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.geometry.shape import Circle, Rectangle
+from TaichiGAME.math.matrix import Matrix
+from TaichiGAME.simulation import Simulation
+
+
+class FrameGrow(Frame):
+    cnt: int = 1
+    # fail the run at the step, after its block is created
+    fail_step: int = 0
+
+    def load(self) -> None:
+        if self.fail_step > 0:
+            self.sim.attach(FrameGrow.fail, self.fail_step)
+
+        for i in range(self.cnt):
+            ball: Body = self.sim.world.create_body()
+            ball.shape = Circle(0.5)
+            ball.pos = Matrix([i * 2.0, 0.0], 'vec')
+            ball.mass = 1.0
+            ball.type = Body.Type.Dynamic
+            self.sim.dbvt.insert(ball)
+
+    @staticmethod
+    def fail(sim: Simulation) -> None:
+        raise ValueError(f'fail at step {sim.step_cnt}')
+
+    def render(self) -> None:
+        pass
+
+
+class FrameSlide(Frame):
+    fric: float = 0.2
+    jitter: bool = False
+
+    def load(self) -> None:
+        ground: Body = self.sim.world.create_body()
+        ground.shape = Rectangle(40.0, 1.0)
+        ground.pos = Matrix([0.0, -1.0], 'vec')
+        ground.mass = 1e37
+        ground.fric = self.fric
+        ground.type = Body.Type.Static
+        self.sim.dbvt.insert(ground)
+
+        ball: Body = self.sim.world.create_body()
+        ball.shape = Circle(0.5)
+        ball.pos = Matrix([0.0, 0.0], 'vec')
+        if self.jitter:
+            ball.pos.x = random.random()
+        ball.vel = Matrix([4.0, 0.0], 'vec')
+        ball.mass = 1.0
+        ball.fric = self.fric
+        ball.type = Body.Type.Dynamic
+        self.sim.dbvt.insert(ball)
+
+    def render(self) -> None:
+        pass
+
+
+class TestRolloutPool():
+    def test__init__(self):
+        dut: RolloutPool = RolloutPool(FrameSlide, 20, worker=2, interval=5)
+
+        assert dut.step == 20
+        assert dut.worker == 2
+        assert dut.interval == 5
+        assert dut.seed == 0
+
+    def test_create_sim(self):
+        sim = RolloutPool.create_sim(FrameSlide, {
+            'fric': 0.5,
+            'vel_iter': 3,
+            'substep': 2
+        }, 0)
+
+        assert len(sim.world._body_list) == 2
+        assert sim.world._body_list[0].fric == 0.5
+        assert sim.world.vel_iter == 3
+        assert sim.substep == 2
+
+    def test_run(self):
+        param_list = [{'fric': 0.0}, {'fric': 0.8}, {'grav_ena': False}]
+        dut: RolloutPool = RolloutPool(FrameSlide, 30, worker=2, interval=10)
+        res: np.ndarray = dut.run(param_list)
+
+        assert res.shape == (3, 3, 2, 6)
+        # the ground is not moved
+        assert np.allclose(res[:, :, 0, 0:2], [0.0, -1.0])
+        # more friction, shorter slide
+        assert res[0, -1, 1, 0] > res[1, -1, 1, 0]
+
+        # same result in the caller process
+        dut = RolloutPool(FrameSlide, 30, worker=1, interval=10)
+        assert np.allclose(dut.run(param_list), res)
+
+    def test_seed(self):
+        param_list = [{'jitter': True}, {'jitter': True}]
+        res1: np.ndarray = RolloutPool(FrameSlide, 2, worker=2,
+                                       seed=7).run(param_list)
+        res2: np.ndarray = RolloutPool(FrameSlide, 2, worker=1,
+                                       seed=7).run(param_list)
+        res3: np.ndarray = RolloutPool(FrameSlide, 2, worker=1,
+                                       seed=8).run(param_list)
+
+        assert np.allclose(res1, res2)
+        assert not np.isclose(res1[0, 0, 1, 0], res1[1, 0, 1, 0])
+        assert not np.allclose(res1, res3)
+
+    def test_global_random(self):
+        random.seed(3)
+        np.random.seed(3)
+        expect = (random.random(), np.random.random())
+
+        random.seed(3)
+        np.random.seed(3)
+        RolloutPool(FrameSlide, 2, worker=1).run([{'jitter': True}])
+        RolloutPool.create_sim(FrameSlide, {'jitter': True}, 5)
+        assert (random.random(), np.random.random()) == expect
+
+    def test_body_cnt(self):
+        dut: RolloutPool = RolloutPool(FrameGrow, 2, worker=1)
+        assert dut.run([{'cnt': 3}, {'cnt': 3}]).shape == (2, 2, 3, 6)
+
+        with pytest.raises(ValueError):
+            dut.run([{'cnt': 2}, {'cnt': 3}])
+
+    @pytest.mark.skipif(not os.path.isdir('/dev/shm'),
+                        reason='no /dev/shm to list the blocks')
+    def test_fail_block(self):
+        # the blocks of the finished runs are unlinked after a failure
+        ref = set(os.listdir('/dev/shm'))
+        param_list = [{'cnt': 1}] * 5 + [{'fail_step': 5}]
+        for worker in (1, 2):
+            with pytest.raises(ValueError):
+                RolloutPool(FrameGrow, 20, worker=worker).run(param_list)
+            assert set(os.listdir('/dev/shm')) == ref
@@ -0,0 +1,114 @@
+import numpy as np
+
+from TaichiGAME.sensor import Lidar
+from TaichiGAME.simulation import Simulation
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.geometry.shape import Circle, Rectangle
+from TaichiGAME.math.matrix import Matrix
+
+
+def add_body(sim: Simulation, shape, x: float, y: float) -> Body:
+    res: Body = sim.world.create_body()
+    res.shape = shape
+    res.pos = Matrix([x, y], 'vec')
+    res.mass = 1e37
+    res.type = Body.Type.Static
+    sim.dbvt.insert(res)
+    return res
+
+
+def make_sim():
+    '''a robot at the origin, a wall on the right and a ball on the top'''
+    sim: Simulation = Simulation()
+    sim.world.grav_ena = False
+    robot: Body = add_body(sim, Circle(0.5), 0.0, 0.0)
+    wall: Body = add_body(sim, Rectangle(1.0, 10.0), 5.5, 0.0)
+    ball: Body = add_body(sim, Circle(1.0), 0.0, 4.0)
+    return sim, robot, wall, ball
+
+
+class TestLidar():
+    def test__init__(self):
+        sim, robot, wall, ball = make_sim()
+        dut: Lidar = Lidar(robot, 4)
+
+        assert dut.body is robot
+        assert np.allclose(dut.angles, [-np.pi, -np.pi / 2.0, 0.0,
+                                        np.pi / 2.0])
+        assert np.all(dut.ranges == dut.max_range)
+
+        dut = Lidar(robot, 3, np.pi / 2.0)
+        assert np.allclose(dut.angles, [-np.pi / 4.0, 0.0, np.pi / 4.0])
+
+    def test_update(self):
+        sim, robot, wall, ball = make_sim()
+        dut: Lidar = Lidar(robot, 4, max_range=8.0)
+        res: np.ndarray = dut.update(sim)
+
+        # the robot itself is not hit
+        assert np.allclose(res, [8.0, 8.0, 5.0, 3.0])
+        assert dut.hit_ids.tolist() == [0, 0, wall.id, ball.id]
+        assert np.allclose(dut.normals, [[0.0, 0.0], [0.0, 0.0], [-1.0, 0.0],
+                                         [0.0, -1.0]])
+        assert np.allclose(dut.points()[2], [5.0, 0.0])
+
+        robot.rot = np.pi / 2.0
+        # the beams point to -y, +x, +y and -x now
+        assert np.allclose(dut.update(sim), [8.0, 5.0, 3.0, 8.0])
+
+        dut = Lidar(robot, 1, 0.0, offset=Matrix([1.0, 0.0], 'vec'))
+        robot.rot = 0.0
+        assert np.allclose(dut.update(sim), [4.0])
+
+    def test_cache(self):
+        sim, robot, wall, ball = make_sim()
+        far: Body = add_body(sim, Circle(1.0), 30.0, 0.0)
+        dut: Lidar = Lidar(robot, 8, max_range=8.0)
+        dut.update(sim)
+        dut.update(sim)
+        assert dut.scan_cnt == 1
+
+        # out of the range
+        far.pos = Matrix([30.0, 1.0], 'vec')
+        dut.update(sim)
+        assert dut.scan_cnt == 1
+
+        ball.pos = Matrix([0.0, 3.0], 'vec')
+        sim.dbvt.update(ball)
+        assert np.isclose(dut.update(sim)[6], 2.0)
+        assert dut.scan_cnt == 2
+
+        robot.rot = 0.1
+        dut.update(sim)
+        assert dut.scan_cnt == 3
+
+        dut.invalidate()
+        dut.update(sim)
+        assert dut.scan_cnt == 4
+
+    def test_noise(self):
+        sim, robot, wall, ball = make_sim()
+        dut: Lidar = Lidar(robot, 4, max_range=8.0, noise_std=0.1, seed=1)
+        ref: Lidar = Lidar(robot, 4, max_range=8.0, noise_std=0.1, seed=1)
+        res: np.ndarray = dut.update(sim).copy()
+
+        assert np.allclose(res, ref.update(sim))
+        assert np.all(res[:2] == 8.0)
+        assert not np.allclose(res[2:], [5.0, 3.0])
+        # the noise is drawn on every read of the cached scan
+        assert not np.allclose(dut.update(sim), res)
+        assert dut.scan_cnt == 1
+
+        dut = Lidar(robot, 4, max_range=8.0, dropout=1.0)
+        assert np.all(dut.update(sim) == 8.0)
+
+    def test_attach(self):
+        sim, robot, wall, ball = make_sim()
+        dut: Lidar = Lidar(robot, 4, max_range=8.0)
+        dut.attach(sim, 2)
+        sim.step(4)
+        assert np.allclose(dut.ranges, [8.0, 8.0, 5.0, 3.0])
+
+        dut.detach()
+        sim.step(2)
+        assert dut.scan_cnt == 1
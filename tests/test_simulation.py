@@ -0,0 +1,196 @@
+import numpy as np
+
+from TaichiGAME.frame import Frame
+from TaichiGAME.simulation import Simulation
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.geometry.shape import Circle, Rectangle
+from TaichiGAME.math.matrix import Matrix
+
+
+class FrameDrop(Frame):
+    def load(self) -> None:
+        ground: Body = self.sim.world.create_body()
+        ground.shape = Rectangle(20.0, 1.0)
+        ground.pos = Matrix([0.0, -2.0], 'vec')
+        ground.mass = 1e37
+        ground.type = Body.Type.Static
+        self.sim.dbvt.insert(ground)
+
+        ball: Body = self.sim.world.create_body()
+        ball.shape = Circle(0.5)
+        ball.pos = Matrix([0.0, 2.0], 'vec')
+        ball.mass = 1.0
+        ball.type = Body.Type.Dynamic
+        self.sim.dbvt.insert(ball)
+
+    def render(self) -> None:
+        pass
+
+
+class TestSimulation():
+    def test__init__(self):
+        dut: Simulation = Simulation()
+
+        assert dut.world.grav == Matrix([0.0, -9.8], 'vec')
+        assert dut.world.vel_iter == 6
+        assert dut.world.pos_iter == 8
+        assert np.isclose(dut.dt, 1 / 120)
+        assert dut.step_cnt == 0
+        assert dut.max_step == 8
+        assert dut.substep == 1
+        # the mouse joint
+        assert len(dut.world._joint_list) == 1
+        assert not dut._mouse_joint.active
+
+    def test_register_frame(self):
+        dut: Simulation = Simulation()
+        frame: FrameDrop = FrameDrop()
+        dut.register_frame(frame)
+
+        assert frame.sim is dut
+        dut.init_frame()
+        assert len(dut.world._body_list) == 2
+
+    def test_step(self):
+        dut: Simulation = Simulation()
+        dut.register_frame(FrameDrop())
+        dut.init_frame()
+        ball: Body = dut.world._body_list[1]
+
+        dut.step(10)
+        assert dut.step_cnt == 10
+        assert ball.pos.y < 2.0
+
+        # rest on the ground after a while
+        dut.step(200)
+        assert -1.2 < ball.pos.y < -0.8
+
+    def test_advance(self):
+        dut: Simulation = Simulation()
+        dut.register_frame(FrameDrop())
+        dut.init_frame()
+
+        assert dut.advance(dut.dt * 2.5) == 2
+        assert np.isclose(dut.interp_alpha, 0.5)
+        # clamp the steps when the render lags
+        assert dut.advance(1.0) == dut.max_step
+        assert dut._accumulator < dut.dt
+
+        dut.time_scale = 4.0
+        assert dut.advance(dut.dt) == 4
+
+    def test_advance_clamp(self):
+        dut: Simulation = Simulation()
+        dut.register_frame(FrameDrop())
+        dut.init_frame()
+        dut.max_step = 3
+
+        # a long stall must not run all the missed steps
+        assert dut.advance(dut.dt * 100.5) == 3
+        assert dut.step_cnt == 3
+        assert 0.0 <= dut._accumulator < dut.dt
+        # the dropped time is not caught up by the next frame
+        assert dut.advance(0.0) == 0
+        assert dut.step_cnt == 3
+
+    def test_advance_carry(self):
+        dut: Simulation = Simulation()
+        dut.register_frame(FrameDrop())
+        dut.init_frame()
+
+        # the leftover time of a frame runs in the later frames
+        assert dut.advance(dut.dt * 0.6) == 0
+        assert np.isclose(dut._accumulator, dut.dt * 0.6)
+        assert dut.advance(dut.dt * 0.6) == 1
+        assert np.isclose(dut._accumulator, dut.dt * 0.2)
+        assert dut.advance(dut.dt * 0.9) == 1
+        assert np.isclose(dut._accumulator, dut.dt * 0.1)
+        assert dut.step_cnt == 2
+
+    def test_interp_alpha(self):
+        dut: Simulation = Simulation()
+        dut.register_frame(FrameDrop())
+        dut.init_frame()
+
+        rng = np.random.default_rng(0)
+        for frame_time in rng.uniform(0.0, dut.dt * 12.0, 50):
+            dut.advance(frame_time)
+            assert 0.0 <= dut.interp_alpha <= 1.0
+            assert np.isclose(dut.interp_alpha, dut._accumulator / dut.dt)
+
+        dut.interp_ena = False
+        dut.advance(dut.dt * 0.5)
+        assert dut.interp_alpha == 1.0
+
+    def test_substep(self):
+        dut: Simulation = Simulation()
+        dut.register_frame(FrameDrop())
+        dut.init_frame()
+        dut.substep = 4
+        dut.step(1)
+
+        assert dut.step_cnt == 1
+
+    def test_attach(self):
+        dut: Simulation = Simulation()
+        dut.register_frame(FrameDrop())
+        dut.init_frame()
+
+        cnt = [0]
+
+        def observer(sim: Simulation) -> None:
+            assert sim is dut
+            cnt[0] += 1
+
+        dut.attach(observer, 2)
+        dut.step(6)
+        assert cnt[0] == 3
+
+        dut.detach(observer)
+        dut.step(6)
+        assert cnt[0] == 3
+
+    def test_grab(self):
+        dut: Simulation = Simulation()
+        dut.register_frame(FrameDrop())
+        dut.init_frame()
+        ball: Body = dut.world._body_list[1]
+
+        assert dut.grab(Matrix([5.0, 5.0], 'vec')) is None
+        assert dut.grab(Matrix([0.1, 2.0], 'vec')) is ball
+        assert dut._mouse_joint.active
+
+        dut.drag(Matrix([3.0, 2.0], 'vec'))
+        dut.step(60)
+        assert ball.pos.x > 0.5
+
+        dut.release()
+        assert not dut._mouse_joint.active
+
+    def test_clear_all(self):
+        dut: Simulation = Simulation()
+        dut.register_frame(FrameDrop())
+        dut.init_frame()
+        dut.step(2)
+        dut.clear_all()
+
+        assert len(dut.world._body_list) == 0
+        assert len(dut.world._joint_list) == 1
+        assert dut.dbvt.root_index() == -1
+
+    def test_profiler(self):
+        dut: Simulation = Simulation()
+        dut.register_frame(FrameDrop())
+        dut.init_frame()
+        dut.step(10)
+        assert dut.profiler.size == 0
+
+        dut.profiler.ena = True
+        dut.step(200)
+        res = dut.profiler.stats()
+        assert dut.profiler.size == 120
+        assert res['frame']['mean'] > 0.0
+        # the ball rests on the ground
+        assert res['pair']['last'] == 1
+        assert res['colliding']['last'] == 1
+        assert res['contact_point']['last'] >= 1
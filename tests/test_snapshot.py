@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+from TaichiGAME.simulation import Simulation
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.dynamics.joint.revolute import RevoluteJointPrimitive
+from TaichiGAME.geometry.shape import Capsule, Circle, Polygon, Rectangle
+from TaichiGAME.math.matrix import Matrix
+from TaichiGAME.snapshot import Snapshot
+
+
+def add_body(sim: Simulation, shape, x: float, y: float,
+             dynamic: bool = True) -> Body:
+    body: Body = sim.world.create_body()
+    body.shape = shape
+    body.pos = Matrix([x, y], 'vec')
+    body.mass = 1.0 if dynamic else 1e37
+    body.type = Body.Type.Dynamic if dynamic else Body.Type.Static
+    sim.dbvt.insert(body)
+    return body
+
+
+def create_sim() -> Simulation:
+    sim: Simulation = Simulation()
+    add_body(sim, Rectangle(20.0, 1.0), 0.0, -0.5, False)
+    box: Rectangle = Rectangle(1.0, 1.0)
+    for i in range(3):
+        add_body(sim, box, i * 1.1 - 1.1, 0.5)
+    add_body(sim, Circle(0.5), 0.0, 1.6)
+    add_body(sim, Capsule(1.0, 0.5), 3.0, 2.0)
+
+    tri: Polygon = Polygon()
+    tri.vertices = [
+        Matrix([-1.0, 0.0], 'vec'),
+        Matrix([1.0, 0.0], 'vec'),
+        Matrix([0.0, 1.0], 'vec'),
+        Matrix([-1.0, 0.0], 'vec')
+    ]
+    add_body(sim, tri, -4.0, 1.0)
+
+    anchor: Body = add_body(sim, Rectangle(0.2, 0.2), 6.0, 4.0, False)
+    link: Body = add_body(sim, Rectangle(1.0, 0.2), 6.5, 4.0)
+    anchor.bitmask = 0
+    prim: RevoluteJointPrimitive = RevoluteJointPrimitive()
+    prim._bodya = anchor
+    prim._bodyb = link
+    prim._local_pointb = Matrix([-0.5, 0.0], 'vec')
+    sim.world.create_joint(prim)
+    return sim
+
+
+def observe(sim: Simulation) -> np.ndarray:
+    return np.array([[bd.pos.x, bd.pos.y, bd.rot, bd.vel.x, bd.vel.y,
+                      bd.ang_vel] for bd in sim.world._body_list])
+
+
+class TestSnapshot():
+    def test_rollback(self):
+        dut: Simulation = create_sim()
+        dut.step(30)
+        buf: bytes = dut.snapshot()
+        assert buf[:4] == Snapshot.Magic
+        assert len(dut.maintainer._contact_table) > 0
+
+        body_list = list(dut.world._body_list)
+        shape = body_list[1].shape
+        dut.step(30)
+        ref: np.ndarray = observe(dut)
+
+        dut.restore(buf)
+        assert dut.step_cnt == 30
+        # the bodies and unchanged shapes are updated in place
+        assert all(a is b for a, b in zip(body_list, dut.world._body_list))
+        assert dut.world._body_list[1].shape is shape
+        assert dut.world._body_list[2].shape is shape
+
+        dut.step(30)
+        assert np.array_equal(observe(dut), ref)
+
+    def test_branch(self):
+        src: Simulation = create_sim()
+        src.step(30)
+        buf: bytes = src.snapshot()
+        src.step(30)
+
+        dut: Simulation = Simulation()
+        dut.restore(buf)
+        assert dut.snapshot() == buf
+        assert len(dut.world._joint_list) == 2
+        assert dut.world._joint_list[0] is dut._mouse_joint
+        assert dut.world._body_list[2].shape is dut.world._body_list[3].shape
+
+        dut.step(30)
+        assert np.array_equal(observe(dut), observe(src))
+
+    def test_structure(self):
+        dut: Simulation = create_sim()
+        dut.step(5)
+        buf: bytes = dut.snapshot()
+        body_cnt: int = len(dut.world._body_list)
+        ball: Body = dut.world._body_list[4]
+        ball.shape.radius = 2.0
+
+        # remove and add the bodies after the snapshot
+        dut.dbvt.remove(dut.world._body_list[1])
+        dut.world.remove_body(dut.world._body_list[1])
+        add_body(dut, Circle(0.2), 8.0, 8.0)
+        dut.world.clear_all_joints()
+
+        dut.restore(buf)
+        assert len(dut.world._body_list) == body_cnt
+        assert len(dut.world._joint_list) == 2
+        assert len(dut.dbvt._body_table) == body_cnt
+        # the changed shape is rebuilt
+        assert dut.world._body_list[4] is ball
+        assert ball.shape.radius == 0.5
+        assert len(dut.world._body_id_alloc) == body_cnt
+        assert all(
+            dut.world._body_id_alloc.is_valid(bd.id)
+            for bd in dut.world._body_list)
+
+        with pytest.raises(ValueError):
+            dut.restore(b'XXXX' + buf[4:])
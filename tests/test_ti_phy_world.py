@@ -0,0 +1,291 @@
+import numpy as np
+import pytest
+import taichi as ti
+
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.dynamics.ti_phy_world import PhysicsWorld
+from TaichiGAME.geometry.shape import Capsule, Circle, Edge, Polygon
+from TaichiGAME.geometry.shape import Rectangle
+from TaichiGAME.math.matrix import Matrix
+
+ti.init(arch=ti.cpu)
+# NOTE: share one world, every new world compiles the kernels again
+world: PhysicsWorld = PhysicsWorld(4096)
+
+
+def reset_world() -> PhysicsWorld:
+    world.clear_all_bodies()
+    world.grav_ena = True
+    world.damping_ena = True
+    return world
+
+
+def create_body(dut: PhysicsWorld, shape, x: float, y: float,
+                dynamic: bool) -> Body:
+    body: Body = dut.create_body()
+    body.shape = shape
+    body.pos = Matrix([x, y], 'vec')
+    body.mass = 1.0 if dynamic else 1e37
+    body.type = Body.Type.Dynamic if dynamic else Body.Type.Static
+    return body
+
+
+class TestPhysicsWorld():
+    def test_coll_geom(self):
+        coll_type, rad, vert = PhysicsWorld.coll_geom(Circle(0.5), 8)
+        assert coll_type == PhysicsWorld.CollCircle
+        assert rad == 0.5
+
+        coll_type, rad, vert = PhysicsWorld.coll_geom(Rectangle(2.0, 1.0), 8)
+        assert coll_type == PhysicsWorld.CollPolygon
+        assert len(vert) == 4
+        assert np.allclose(vert[0], [-1.0, 0.5])
+
+        edg: Edge = Edge()
+        edg.set_value(Matrix([-1.0, 0.0], 'vec'), Matrix([1.0, 0.0], 'vec'))
+        coll_type, rad, vert = PhysicsWorld.coll_geom(edg, 8)
+        assert len(vert) == 2
+
+        # the curved shape is a CCW convex polygon
+        coll_type, rad, vert = PhysicsWorld.coll_geom(Capsule(2.0, 1.0), 8)
+        assert len(vert) == 8
+        assert 0.9 < np.max(np.array(vert)[:, 0]) <= 1.0
+        area: float = 0.0
+        for i in range(len(vert)):
+            p1, p2 = vert[i], vert[(i + 1) % len(vert)]
+            area += p1[0] * p2[1] - p2[0] * p1[1]
+        assert area > 0.0
+
+    def test_init_data(self):
+        dut: PhysicsWorld = reset_world()
+        create_body(dut, Rectangle(40.0, 1.0), 0.0, -1.0, False)
+        create_body(dut, Circle(0.5), 1.0, 2.0, True)
+        dut.init_data()
+
+        assert dut._body_cnt[None] == 2
+        assert dut._phy_type[0] == int(Body.Type.Static)
+        assert dut._phy_type[1] == int(Body.Type.Dynamic)
+        assert np.allclose(dut._pos[1].to_numpy(), [1.0, 2.0])
+        # the ground is out of the grid
+        assert dut._large[0] == 1
+        assert dut._large[1] == 0
+
+    def test_step(self):
+        dut: PhysicsWorld = reset_world()
+        body: Body = create_body(dut, Circle(0.5), 0.0, 0.0, True)
+        body.vel = Matrix([1.0, 0.0], 'vec')
+        dut.damping_ena = False
+        dut.init_data()
+
+        dut.step(0.1)
+        dut.write_back()
+        assert np.isclose(body.vel.y, -0.1)
+        assert np.isclose(body.pos.x, 0.1)
+        assert np.isclose(body.pos.y, -0.01)
+
+    def test_broad_phase(self):
+        dut: PhysicsWorld = reset_world()
+        create_body(dut, Rectangle(40.0, 1.0), 0.0, -1.0, False)
+        create_body(dut, Circle(0.5), 0.0, -0.1, True)
+        create_body(dut, Circle(0.5), 0.8, -0.1, True)
+        create_body(dut, Circle(0.5), 5.0, 5.0, True)
+        dut.init_data()
+        dut.broad_phase()
+
+        pair_list = sorted(
+            tuple(dut._pair[i].to_numpy())
+            for i in range(dut._pair_cnt[None]))
+        assert pair_list == [(0, 1), (0, 2), (1, 2)]
+
+    def test_rest(self):
+        dut: PhysicsWorld = reset_world()
+        create_body(dut, Rectangle(40.0, 1.0), 0.0, -1.0, False)
+        ball: Body = create_body(dut, Circle(0.5), 0.0, 1.0, True)
+        box: Body = create_body(dut, Rectangle(1.0, 1.0), 3.0, 1.0, True)
+        dut.init_data()
+
+        for i in range(300):
+            dut.step(1 / 60)
+        dut.write_back()
+
+        assert np.isclose(ball.pos.y, 0.0, atol=0.05)
+        assert np.isclose(box.pos.y, 0.0, atol=0.05)
+        assert np.isclose(box.rot, 0.0, atol=0.01)
+        assert np.isclose(ball.vel.y, 0.0, atol=0.05)
+
+    def test_circle_collision(self):
+        dut: PhysicsWorld = reset_world()
+        bodya: Body = create_body(dut, Circle(0.5), -1.0, 0.0, True)
+        bodyb: Body = create_body(dut, Circle(0.5), 1.0, 0.0, True)
+        bodya.vel = Matrix([2.0, 0.0], 'vec')
+        bodyb.vel = Matrix([-2.0, 0.0], 'vec')
+        dut.grav_ena = False
+        dut.damping_ena = False
+        dut.init_data()
+
+        for i in range(60):
+            dut.step(1 / 60)
+        dut.write_back()
+
+        # the momentum is kept and the circles do not pass through
+        assert np.isclose(bodya.vel.x + bodyb.vel.x, 0.0, atol=1e-4)
+        assert bodya.pos.x < bodyb.pos.x
+        assert bodyb.pos.x - bodya.pos.x > 0.95
+
+    def test_restit(self):
+        # the pair bounces by the lower restitution, as the host world
+        dut: PhysicsWorld = reset_world()
+        ground: Body = create_body(dut, Rectangle(40.0, 1.0), 0.0, -1.0, False)
+        ground.restit = 0.0
+        ball: Body = create_body(dut, Circle(0.5), 0.0, 0.1, True)
+        ball.restit = 1.0
+        ball.vel = Matrix([0.0, -5.0], 'vec')
+        dut.grav_ena = False
+        dut.damping_ena = False
+        dut.init_data()
+
+        for i in range(10):
+            dut.step(1 / 60)
+        dut.write_back()
+
+        # only the penetration bias is left, no elastic bounce
+        assert abs(ball.vel.y) < 1.0
+
+    def test_vert_buffer(self):
+        dut: PhysicsWorld = reset_world()
+        hept: Polygon = Polygon()
+        hept.vertices = [
+            Matrix([np.cos(v), np.sin(v)], 'vec')
+            for v in np.arange(8) * 2.0 * np.pi / 7
+        ]
+
+        create_body(dut, Rectangle(1.0, 1.0), 0.0, 0.0, True)
+        create_body(dut, Circle(0.5), 2.0, 0.0, True)
+        create_body(dut, hept, 4.0, 0.0, True)
+        dut.init_data()
+
+        assert dut.vert_total == 11
+        assert dut._vert_offset[2] == 4
+        assert dut._vert_cnt[2] == 7
+        assert list(dut._cir_idx) == [1]
+        # 2 + 5 fan triangles and 4 + 7 outlines
+        assert dut._tri_idx.shape == (7, 3)
+        assert dut._line_idx.shape == (11, 2)
+        assert list(dut._tri_idx[2]) == [4, 5, 6]
+        assert list(dut._line_idx[10]) == [10, 4]
+
+    def test_remove_body(self):
+        dut: PhysicsWorld = reset_world()
+        body_list = [
+            create_body(dut, Rectangle(1.0, 1.0), i * 2.0, 0.0, True)
+            for i in range(4)
+        ]
+        dut.init_data()
+
+        dut.remove_body(body_list[1])
+        dut.remove_body(body_list[2])
+        # compacted once by the write back
+        dut.write_back()
+        assert dut.body_cnt == 2
+        assert dut.vert_total == 8
+        assert np.allclose(dut._pos[1].to_numpy(), [6.0, 0.0])
+        assert dut._vert_offset[1] == 4
+        assert dut._tri_idx.shape == (4, 3)
+
+    def test_capacity(self):
+        # more bodies than one block
+        dut: PhysicsWorld = reset_world()
+        for i in range(PhysicsWorld.BlockLen + 10):
+            create_body(dut, Circle(0.2), (i % 100) * 0.5, (i // 100) * 0.5,
+                        True)
+        dut.grav_ena = False
+        dut.init_data()
+        dut.step(1 / 60)
+
+        assert dut.body_cnt == PhysicsWorld.BlockLen + 10
+        assert dut._pair_cnt[None] == 0
+        assert np.allclose(dut._pos[PhysicsWorld.BlockLen + 9].to_numpy(),
+                           [16.5, 5.0])
+
+    def test_pair_overflow(self):
+        # every two bodies of the pile overlap
+        dut: PhysicsWorld = reset_world()
+        for i in range(300):
+            create_body(dut, Circle(0.5), 0.0, i * 1e-3, True)
+        dut.init_data()
+
+        with pytest.raises(ValueError):
+            dut.step(1 / 60)
+        assert dut._pair_cnt[None] == 300 * 299 // 2
+
+    def test_store(self):
+        dut: PhysicsWorld = reset_world()
+        bodya: Body = create_body(dut, Circle(0.5), 0.0, 0.0, True)
+        bodyb: Body = create_body(dut, Circle(0.5), 3.0, 0.0, True)
+        dut.init_data()
+
+        assert len(dut.store) == 2
+        assert not dut.store.dirty.any()
+        assert np.allclose(dut.store.pos, [[0.0, 0.0], [3.0, 0.0]])
+
+        # only the dirty row is uploaded
+        bodyb.pos = Matrix([5.0, 1.0], 'vec')
+        dut.mark_dirty(bodyb)
+        assert list(dut.store.dirty_idx()) == [1]
+        dut._pos[0] = ti.Vector([7.0, 7.0])
+        dut.upload()
+        assert np.allclose(dut._pos[0].to_numpy(), [7.0, 7.0])
+        assert np.allclose(dut._pos[1].to_numpy(), [5.0, 1.0])
+
+        # edit the arrays for a control loop
+        dut.download()
+        assert np.allclose(dut.store.pos[0], [7.0, 7.0])
+        dut.store.vel[0] = [1.0, 0.0]
+        dut.store.mark(0)
+        dut.upload()
+        assert np.allclose(dut._vel[0].to_numpy(), [1.0, 0.0])
+
+        dut.write_back()
+        assert np.isclose(bodya.pos.x, 7.0)
+        assert np.isclose(bodya.vel.x, 1.0)
+
+    def test_store_row(self):
+        dut: PhysicsWorld = reset_world()
+        body_list = [
+            create_body(dut, Circle(0.5), i * 2.0, 0.0, True)
+            for i in range(4)
+        ]
+        dut.init_data()
+        slot = [dut._body_id_alloc.index(v.id) for v in body_list]
+        assert [dut.store.row(v) for v in slot] == [0, 1, 2, 3]
+
+        # the rows follow the fields, the compaction moves them
+        dut.remove_body(body_list[1])
+        assert dut.store.row(slot[1]) == -1
+        assert dut.store.row(slot[3]) == 3
+
+        # marking a body does not compact the fields
+        body_list[3].pos = Matrix([8.0, 1.0], 'vec')
+        dut.mark_dirty(body_list[3])
+        assert list(dut.store.dirty_idx()) == [3]
+        assert dut.body_cnt == 4
+
+        dut.write_back()
+        assert [dut.store.row(v) for v in slot] == [0, -1, 1, 2]
+        assert dut._body_list == [body_list[0], body_list[2], body_list[3]]
+        assert np.allclose(dut._pos[2].to_numpy(), [8.0, 1.0])
+
+        # the reused index has no row until it is loaded
+        body: Body = create_body(dut, Circle(0.5), 9.0, 0.0, True)
+        assert dut._body_id_alloc.index(body.id) == slot[1]
+        assert dut.store.row(slot[1]) == -1
+        dut.init_data()
+        assert dut.store.row(slot[1]) == 3
+
+    def test_init_empty(self):
+        dut: PhysicsWorld = reset_world()
+        dut.init_data()
+        dut.step(1 / 60)
+
+        assert dut.body_cnt == 0
+        assert len(dut.store) == 0
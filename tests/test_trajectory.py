@@ -0,0 +1,97 @@
+import json
+import os
+
+import numpy as np
+
+from TaichiGAME.common.trajectory import BodyDtype, TrajectoryReader
+from TaichiGAME.common.trajectory import TrajectoryRecorder
+from TaichiGAME.dynamics.body import Body
+from TaichiGAME.geometry.shape import Circle, Rectangle
+from TaichiGAME.math.matrix import Matrix
+from TaichiGAME.simulation import Simulation
+
+
+def create_sim() -> Simulation:
+    sim: Simulation = Simulation()
+    for shape, x, y, dynamic in ((Rectangle(20.0, 1.0), 0.0, -0.5, False),
+                                 (Circle(0.5), 0.0, 0.6, True),
+                                 (Rectangle(1.0, 1.0), 2.0, 0.6, True)):
+        body: Body = sim.world.create_body()
+        body.shape = shape
+        body.pos = Matrix([x, y], 'vec')
+        body.mass = 1.0 if dynamic else 1e37
+        body.type = Body.Type.Dynamic if dynamic else Body.Type.Static
+        sim.dbvt.insert(body)
+
+    return sim
+
+
+class TestTrajectory():
+    def test_gather_contact(self):
+        sim: Simulation = create_sim()
+        sim.step(60)
+        body, cont = TrajectoryRecorder.gather(sim, contact=True)
+        assert len(cont) > 0
+        # the bodies rest on the ground top
+        assert np.allclose(cont['y'], 0.0, atol=0.05)
+
+        # the point follows the body turned after the contact prepare
+        for bd in sim.world._body_list:
+            bd.rot += 0.5
+        body, cont = TrajectoryRecorder.gather(sim, contact=True)
+        ccp_list = [
+            v for val in sim.maintainer._contact_table.values() for v in val
+        ]
+        for row, ccp in zip(cont, ccp_list):
+            ref: Matrix = ccp._bodya.to_world_point(ccp._locala)
+            assert np.allclose([row['x'], row['y']], [ref.x, ref.y])
+
+    def test_record(self, tmp_path):
+        sim: Simulation = create_sim()
+        dut: TrajectoryRecorder = TrajectoryRecorder(str(tmp_path),
+                                                     contact=True,
+                                                     chunk=2,
+                                                     flush_interval=4)
+        dut.attach(sim, 2)
+
+        ref_list = []
+        for i in range(10):
+            sim.step(2)
+            ref_list.append(TrajectoryRecorder.gather(sim)[0])
+
+        # visible to the reader after the flush
+        dut.flush()
+        assert len(TrajectoryReader(str(tmp_path))) == 10
+
+        # the body removed in the middle of the run
+        sim.world.remove_body(sim.world._body_list[1])
+        sim.step(2)
+        assert dut.close() == str(tmp_path)
+        sim.step(2)
+
+        reader: TrajectoryReader = TrajectoryReader(str(tmp_path))
+        assert len(reader) == 11
+        assert reader.interval == 2
+        assert list(reader.steps[:3]) == [2, 4, 6]
+        assert reader.find(8) == 3
+        assert reader.find(9) == -1
+        for i in (0, 5, 9):
+            assert reader.frame(i).dtype == BodyDtype
+            assert np.array_equal(reader.frame(i), ref_list[i])
+        assert len(reader.frame(10)) == 2
+
+        # the bodies rest on the ground
+        cont = reader.contacts(9)
+        assert len(cont) > 0
+        assert np.all(cont['normal_impulse'] >= 0.0)
+
+        steps, rows = reader.track(int(ref_list[0]['id'][1]))
+        assert list(steps) == list(range(2, 21, 2))
+        assert np.array_equal(rows['y'], [v['y'][1] for v in ref_list])
+
+        # the files are cut to the used rows
+        with open(os.path.join(str(tmp_path), 'meta.json')) as fp:
+            meta = json.load(fp)
+        assert os.path.getsize(os.path.join(
+            str(tmp_path), 'body.raw')) == meta['body_cnt'] * BodyDtype.itemsize
+        assert meta['body_cnt'] == 10 * 3 + 2